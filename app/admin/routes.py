@@ -345,6 +345,9 @@ def tier_create():
                     max_res_label = None
             max_fps = request.form.get("max_fps")
             max_clips = request.form.get("max_clips_per_project")
+            render_engine = (request.form.get("render_engine") or "").strip().lower()
+            if render_engine not in {"multipass", "single_pass"}:
+                render_engine = None
             # Accept MB input from the form, fallback to legacy bytes key if provided
             storage_mb = request.form.get("storage_limit_mb")
             storage_bytes_legacy = request.form.get("storage_limit_bytes")
@@ -398,6 +401,7 @@ def tier_create():
                 max_output_resolution=max_res_label,
                 max_fps=_to_int_or_none(max_fps),
                 max_clips_per_project=_to_int_or_none(max_clips),
+                render_engine=render_engine,
                 storage_limit_bytes=(
                     _mb_to_bytes(storage_mb)
                     if (storage_mb is not None and str(storage_mb).strip() != "")
@@ -481,6 +485,11 @@ def tier_edit(tier_id: int):
             tier.max_clips_per_project = _to_int_or_none(
                 request.form.get("max_clips_per_project")
             )
+            # Render engine override (blank => system default)
+            render_engine = (request.form.get("render_engine") or "").strip().lower()
+            tier.render_engine = (
+                render_engine if render_engine in {"multipass", "single_pass"} else None
+            )
 
             # Handle pricing (dollars to cents)
             monthly_price = request.form.get("monthly_price")
@@ -1020,12 +1029,16 @@ def system_info():
     for status in ["pending", "started", "success", "failure", "retry", "revoked"]:
         job_stats[status] = ProcessingJob.query.filter_by(status=status).count()
 
+    # Integration lookup caches (counters of this web process)
+    from app.integrations.lookup_cache import lookup_cache_stats
+
     return render_template(
         "admin/system_info.html",
         title="System Information",
         db_stats=db_stats,
         storage_stats=storage_stats,
         job_stats=job_stats,
+        lookup_cache_stats=lookup_cache_stats(),
         version=get_version(),
         changelog=get_changelog(),
     )
@@ -2076,6 +2089,7 @@ def workers():
         "registered": {},
         "scheduled": {},
         "active_queues": {},
+        "binaries": {},
         "errors": [],
     }
     try:
@@ -2085,6 +2099,14 @@ def workers():
         info["registered"] = insp.registered() or {}
         info["scheduled"] = insp.scheduled() or {}
         info["active_queues"] = insp.active_queues() or {}
+        # Binary paths/capabilities from each worker's registry (older
+        # workers don't know the command and simply don't reply)
+        replies = celery_app.control.broadcast(
+            "binary_capabilities", reply=True, timeout=2
+        )
+        for reply in replies or []:
+            if isinstance(reply, dict):
+                info["binaries"].update(reply)
     except Exception as e:
         info["errors"].append(str(e))
 
@@ -2120,6 +2142,8 @@ def workers():
                 "registered": (info["registered"] or {}).get(name) or [],
                 "scheduled": (info["scheduled"] or {}).get(name) or [],
                 "queues": (info["active_queues"] or {}).get(name) or [],
+                "binaries": ((info["binaries"] or {}).get(name) or {}).get("binaries")
+                or {},
             }
         )
 
@@ -141,8 +141,8 @@ def job_details_api(job_id: int):
     """Return details for a single ProcessingJob (compat wrapper).
 
     The client expects a URL template to fetch job details; this
-    endpoint returns a small JSON summary including a link to the
-    underlying Celery task status endpoint.
+    endpoint returns a small JSON summary including the job's log
+    entries and a link to the underlying Celery task status endpoint.
     """
     try:
         from flask_login import current_user
@@ -167,6 +167,7 @@ def job_details_api(job_id: int):
             "started_at": job.started_at.isoformat() if job.started_at else None,
             "completed_at": job.completed_at.isoformat() if job.completed_at else None,
             "task_status_url": task_status_url,
+            "logs": job.all_logs(),
         }
         return jsonify(payload)
     except Exception:
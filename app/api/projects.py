@@ -290,7 +290,9 @@ def create_and_download_clips_api(project_id: int):
     )
     effective_limit = max(1, min(effective_limit, max_batch))
 
+    from app.clip_urls import normalize_source_url, source_clip_key, twitch_clip_slug
     from app.tasks.download_clip_v2 import download_clip_task_v2 as download_clip_task
+    from app.tasks.download_clip_v2 import download_clips_batch_task_v2
 
     download_queue: str | None = None
     try:
@@ -321,45 +323,108 @@ def create_and_download_clips_api(project_id: int):
             503,
         )
 
+    # Clips per batch download task; 0 or 1 queues one task per clip
+    batch_size = int(current_app.config.get("DOWNLOAD_BATCH_SIZE", 25) or 0)
+    batched: list[tuple[int, str]] = []
+    batch_task_ids: dict[int, str | None] = {}
+
+    def queue_download(clip_id: int, url_s: str) -> str | None:
+        """Queue one clip's download, or hold it for a batch task.
+
+        Returns:
+            The task ID, None if batched (see batch_task_ids) or failed
+        """
+        if batch_size > 1:
+            batched.append((clip_id, url_s))
+            # The clip is already committed: queue each batch once it's full
+            # so a later failure can't leave it without a download task
+            if len(batched) >= batch_size:
+                queue_batches()
+            return None
+        try:
+            task = download_clip_task.apply_async(
+                args=(clip_id, url_s), queue=download_queue
+            )
+        except Exception as task_err:
+            logger.error(
+                "download_queue_failed",
+                clip_id=clip_id,
+                error=str(task_err),
+                error_type=type(task_err).__name__,
+            )
+            return None
+        logger.info(
+            "download_queued",
+            task_id=task.id,
+            clip_id=clip_id,
+            url=url_s,
+            queue=download_queue,
+            project_id=project.id,
+        )
+        return task.id
+
+    def queue_batches() -> None:
+        """Queue held clips as batch tasks and record each clip's task ID."""
+        while batched:
+            chunk = batched[:batch_size]
+            del batched[:batch_size]
+            try:
+                task = download_clips_batch_task_v2.apply_async(
+                    args=([list(c) for c in chunk],), queue=download_queue
+                )
+                task_id = task.id
+                logger.info(
+                    "download_batch_queued",
+                    task_id=task_id,
+                    clips=len(chunk),
+                    queue=download_queue,
+                    project_id=project.id,
+                )
+            except Exception as task_err:
+                task_id = None
+                logger.error(
+                    "download_queue_failed",
+                    clip_ids=[clip_id for clip_id, _ in chunk],
+                    error=str(task_err),
+                    error_type=type(task_err).__name__,
+                )
+            batch_task_ids.update((clip_id, task_id) for clip_id, _ in chunk)
+
     items = []
     skipped_count = 0
     try:
         order_base = project.clips.count() or 0
         idx = 0
 
-        def normalize_url(u: str) -> str:
+        normalize_url = normalize_source_url
+        extract_key = source_clip_key
+
+        # Twitch metadata for every clip that needs it, fetched up front in
+        # bulk (100 clips per Helix request) instead of one request per clip
+        slugs = [
+            twitch_clip_slug((obj.get("url") or "").strip())
+            for obj in provided_clips[:effective_limit]
+            if "twitch" in (obj.get("url") or "").lower()
+            and not (
+                obj.get("creator_name")
+                and obj.get("game_name")
+                and obj.get("created_at")
+            )
+        ] + [
+            twitch_clip_slug((url or "").strip())
+            for url in urls[:effective_limit]
+            if "twitch" in (url or "").lower()
+        ]
+        twitch_meta = {}
+        if slugs:
             try:
-                u = (u or "").strip()
-                if not u:
-                    return ""
-                base = u.split("?")[0].split("#")[0]
-                if base.endswith("/"):
-                    base = base[:-1]
-                return base
-            except Exception:
-                return (u or "").strip()
+                from app.integrations.twitch import get_clips_by_ids
 
-        def extract_key(u: str) -> str:
-            try:
-                s = normalize_url(u)
-                if not s:
-                    return ""
-                low = s.lower()
-                if ("twitch.tv" in low and "/clip/" in low) or (
-                    "clips.twitch.tv" in low
-                ):
-                    try:
-                        if "clips.twitch.tv" in low:
-                            slug = low.split("clips.twitch.tv", 1)[1].lstrip("/")
-                        else:
-                            slug = low.split("/clip/", 1)[1]
-                        slug = slug.split("/")[0]
-                        return slug
-                    except Exception:
-                        pass
-                return s
-            except Exception:
-                return normalize_url(u)
+                twitch_meta = get_clips_by_ids(slugs)
+            except Exception as enrich_err:
+                current_app.logger.warning(
+                    f"Failed to fetch Twitch metadata for {len(slugs)} clips: {enrich_err}"
+                )
 
         seen = set()
 
@@ -403,11 +468,9 @@ def create_and_download_clips_api(project_id: int):
                     not creator_name or not game_name or not clip_created_at
                 ):
                     try:
-                        from app.integrations.twitch import get_clip_by_id
-
-                        clip_id = extract_key(url_s)
+                        clip_id = twitch_clip_slug(url_s)
                         if clip_id:
-                            twitch_clip = get_clip_by_id(clip_id)
+                            twitch_clip = twitch_meta.get(clip_id)
                             if twitch_clip:
                                 current_app.logger.info(
                                     f"Enriched clip metadata from Twitch for: {clip_id}"
@@ -474,38 +537,7 @@ def create_and_download_clips_api(project_id: int):
                     }
                 create_clip_analytics(clip, current_user.id, view_count, discord_data)
 
-                try:
-                    task = download_clip_task.apply_async(
-                        args=(clip.id, url_s), queue=download_queue
-                    )
-                    task_id = task.id
-                    try:
-                        logger.info(
-                            "download_queued",
-                            task_id=task_id,
-                            clip_id=clip.id,
-                            url=url_s,
-                            queue=download_queue,
-                            project_id=project.id,
-                        )
-                    except Exception:
-                        # Fallback if structlog not working
-                        current_app.logger.info(
-                            f"Queued download task {task_id} for clip {clip.id}: {url_s} [queue={download_queue}]"
-                        )
-                except Exception as task_err:
-                    logger.error(
-                        "download_queue_failed",
-                        clip_id=clip.id,
-                        error=str(task_err),
-                        error_type=type(task_err).__name__,
-                    )
-                    # Fallback error logging
-                    current_app.logger.error(
-                        f"Failed to queue download for clip {clip.id}: {task_err}"
-                    )
-                    task_id = None
-
+                task_id = queue_download(clip.id, url_s)
                 items.append({"clip_id": clip.id, "task_id": task_id, "url": url_s})
                 idx += 1
             except Exception as outer_err:
@@ -540,11 +572,9 @@ def create_and_download_clips_api(project_id: int):
 
             if platform == "twitch":
                 try:
-                    from app.integrations.twitch import get_clip_by_id
-
-                    clip_id = extract_key(url_s)
+                    clip_id = twitch_clip_slug(url_s)
                     if clip_id:
-                        twitch_clip = get_clip_by_id(clip_id)
+                        twitch_clip = twitch_meta.get(clip_id)
                         if twitch_clip:
                             current_app.logger.info(
                                 f"Enriched clip metadata from Twitch for: {clip_id}"
@@ -594,27 +624,7 @@ def create_and_download_clips_api(project_id: int):
                 except Exception:
                     db.session.rollback()
                     continue
-                try:
-                    task = download_clip_task.apply_async(
-                        args=(clip.id, url_s), queue=download_queue
-                    )
-                    task_id = task.id
-                    logger.info(
-                        "download_queued",
-                        task_id=task_id,
-                        clip_id=clip.id,
-                        url=url_s,
-                        queue=download_queue,
-                        project_id=project.id,
-                    )
-                except Exception as task_err:
-                    task_id = None
-                    logger.error(
-                        "download_queue_failed",
-                        clip_id=clip.id,
-                        error=str(task_err),
-                        error_type=type(task_err).__name__,
-                    )
+                task_id = queue_download(clip.id, url_s)
                 items.append(
                     {
                         "clip_id": clip.id,
@@ -653,21 +663,15 @@ def create_and_download_clips_api(project_id: int):
                 except Exception:
                     db.session.rollback()
                     continue
-                task = download_clip_task.apply_async(
-                    args=(clip.id, url_s), queue=download_queue
-                )
-                logger.info(
-                    "download_queued",
-                    task_id=task.id,
-                    clip_id=clip.id,
-                    url=url_s,
-                    queue=download_queue,
-                    project_id=project.id,
-                )
-                items.append({"clip_id": clip.id, "task_id": task.id, "url": url_s})
+                task_id = queue_download(clip.id, url_s)
+                items.append({"clip_id": clip.id, "task_id": task_id, "url": url_s})
                 idx += 1
 
         db.session.commit()
+        queue_batches()
+        for item in items:
+            if item["clip_id"] in batch_task_ids:
+                item["task_id"] = batch_task_ids[item["clip_id"]]
         return (
             jsonify(
                 {
@@ -687,6 +691,9 @@ def create_and_download_clips_api(project_id: int):
             pass
         current_app.logger.error(f"API download dispatch failed: {e}")
         return jsonify({"error": "Failed to dispatch downloads"}), 500
+    finally:
+        # Clips committed before a failure still get their download queued
+        queue_batches()
 
 
 @api_bp.route("/projects/<int:project_id>/compile", methods=["POST"])
@@ -1268,9 +1275,7 @@ def serve_preview_video(project_id: int):
 @api_bp.route("/projects/<int:project_id>/clips", methods=["GET"])
 @login_required
 def list_project_clips_api(project_id: int):
-    import json
     import os
-    import subprocess
 
     from app.models import Clip, Project
 
@@ -1294,37 +1299,23 @@ def list_project_clips_api(project_id: int):
             try:
                 file_path = os.path.join(current_app.instance_path, media.file_path)
                 if os.path.exists(file_path):
+                    from app import media_probe
                     from app.ffmpeg_config import _resolve_binary
 
-                    ffprobe_bin = _resolve_binary(current_app, "ffprobe")
-
-                    result = subprocess.run(
-                        [
-                            ffprobe_bin,
-                            "-v",
-                            "quiet",
-                            "-print_format",
-                            "json",
-                            "-show_format",
-                            file_path,
-                        ],
-                        capture_output=True,
-                        text=True,
+                    probe_data = media_probe.probe(
+                        file_path,
+                        _resolve_binary(current_app, "ffprobe"),
+                        checksum=media.checksum,
                         timeout=5,
+                        config=current_app.config,
                     )
+                    duration = media_probe.duration_of(probe_data)
+                    if duration is not None:
+                        # Update the media file duration for future use
+                        media.duration = duration
+                        from app.models import db
 
-                    if result.returncode == 0:
-                        probe_data = json.loads(result.stdout)
-                        if (
-                            "format" in probe_data
-                            and "duration" in probe_data["format"]
-                        ):
-                            duration = float(probe_data["format"]["duration"])
-                            # Update the media file duration for future use
-                            media.duration = duration
-                            from app.models import db
-
-                            db.session.commit()
+                        db.session.commit()
             except Exception as e:
                 current_app.logger.warning(
                     f"Failed to probe duration for clip {c.id}: {e}"
@@ -1659,6 +1650,7 @@ def get_project_details_api(project_id: int):
             "fps": project.fps,
             "vertical_zoom": getattr(project, "vertical_zoom", 100),
             "vertical_align": getattr(project, "vertical_align", "center"),
+            "render_engine": getattr(project, "render_engine", None),
             "tags": project.tags,
             "description": getattr(project, "description", None),
         }
@@ -1668,7 +1660,7 @@ def get_project_details_api(project_id: int):
 @api_bp.route("/projects/<int:project_id>", methods=["PATCH"])
 @login_required
 def update_project_details_api(project_id: int):
-    """Update project details (platform preset, format, fps, audio normalization, tags, description)."""
+    """Update project details (platform preset, format, fps, audio normalization, render engine, tags, description)."""
     from app.models import PlatformPreset, Project, db
 
     project = Project.query.filter_by(id=project_id, user_id=current_user.id).first()
@@ -1708,6 +1700,13 @@ def update_project_details_api(project_id: int):
     if "vertical_align" in data:
         project.vertical_align = data["vertical_align"]
 
+    # Update render engine override if provided (None/"" => tier/system default)
+    if "render_engine" in data:
+        engine = (data["render_engine"] or "").strip().lower() or None
+        if engine not in (None, "multipass", "single_pass"):
+            return jsonify({"error": "Invalid render engine"}), 400
+        project.render_engine = engine
+
     # Update audio normalization if provided
     if "audio_norm_profile" in data:
         project.audio_norm_profile = data["audio_norm_profile"]
@@ -1746,6 +1745,7 @@ def update_project_details_api(project_id: int):
                 "fps": project.fps,
                 "audio_norm_profile": project.audio_norm_profile,
                 "audio_norm_db": project.audio_norm_db,
+                "render_engine": project.render_engine,
                 "tags": project.tags,
                 "description": getattr(project, "description", None),
             }
@@ -385,7 +385,7 @@ def enrich_clip_urls_api():
             "count": int
         }
     """
-    from app.integrations.twitch import get_clip_by_id
+    from app.integrations.twitch import get_clips_by_ids
 
     data = request.get_json(silent=True) or {}
     urls = data.get("urls", [])
@@ -413,14 +413,22 @@ def enrich_clip_urls_api():
     enriched_clips = []
     total_duration = 0.0
 
+    clip_ids = {url: extract_clip_id(url) for url in urls}
+    # One Helix request for all clips (up to 100 IDs per call)
+    try:
+        twitch_clips = get_clips_by_ids(cid for cid in clip_ids.values() if cid)
+    except Exception as e:
+        current_app.logger.error(f"Failed to fetch clip metadata: {e}")
+        twitch_clips = {}
+
     for url in urls:
-        clip_id = extract_clip_id(url)
+        clip_id = clip_ids[url]
         if not clip_id:
             current_app.logger.warning(f"Could not extract clip ID from URL: {url}")
             continue
 
         try:
-            clip = get_clip_by_id(clip_id)
+            clip = twitch_clips.get(clip_id)
             if clip:
                 enriched_clips.append(
                     {
@@ -12,15 +12,19 @@ Endpoints:
 - PUT /worker/jobs/<job_id> - Update processing job status/progress
 """
 
+import gzip
 import mimetypes
 import os
+import re
+import zlib
 from datetime import datetime
 from functools import wraps
 
-from flask import current_app, jsonify, request, send_file
+from flask import current_app, jsonify, make_response, request, send_file
 
 from app import storage as storage_lib
 from app.api import api_bp
+from app.clip_urls import normalize_source_url, source_clip_key, twitch_clip_slug
 from app.models import Clip, MediaFile, MediaType, ProcessingJob, Project, db
 
 
@@ -104,8 +108,57 @@ def _download_creator_avatar(clip: Clip) -> bool:
         return False
 
 
+# Workers gzip large JSON bodies; cap the inflated size so a tiny compressed
+# body can't expand into an unbounded buffer
+_MAX_INFLATED_BODY = 32 * 1024 * 1024
+# JSON responses at least this large are gzipped for clients that accept it
+_GZIP_RESPONSE_MIN_BYTES = 1024
+
+
+def _inflate_request_body() -> bool:
+    """Replace a gzip-encoded request body with its decompressed bytes.
+
+    Returns:
+        False if the body is not valid gzip or inflates past the size cap
+    """
+    if request.headers.get("Content-Encoding", "").lower() != "gzip":
+        return True
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(request.get_data(), _MAX_INFLATED_BODY)
+    except zlib.error:
+        return False
+    if inflater.unconsumed_tail:
+        return False
+    # get_json()/get_data() read the cached body, so they see the plain JSON
+    request._cached_data = data
+    return True
+
+
+def _gzip_json_response(rv):
+    """Gzip a large JSON response when the worker accepts gzip."""
+    response = make_response(rv)
+    if (
+        response.direct_passthrough
+        or response.mimetype != "application/json"
+        or "Content-Encoding" in response.headers
+        or "gzip" not in request.headers.get("Accept-Encoding", "").lower()
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < _GZIP_RESPONSE_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
 def require_worker_key(f):
-    """Decorator to require WORKER_API_KEY for worker endpoints."""
+    """Decorator to require WORKER_API_KEY for worker endpoints.
+
+    Also accepts gzip-encoded request bodies and gzips large JSON responses.
+    """
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -127,11 +180,41 @@ def require_worker_key(f):
             )
             return jsonify({"error": "Unauthorized"}), 401
 
-        return f(*args, **kwargs)
+        if not _inflate_request_body():
+            return jsonify({"error": "Invalid gzip request body"}), 400
+
+        return _gzip_json_response(f(*args, **kwargs))
 
     return decorated_function
 
 
+def _clip_metadata(clip: Clip) -> dict:
+    """Clip fields a download task needs (see worker_get_clip)."""
+    return {
+        "id": clip.id,
+        "title": clip.title,
+        "source_url": clip.source_url,
+        "source_platform": clip.source_platform,
+        "source_id": clip.source_id,
+        "project_id": clip.project_id,
+        "user_id": clip.project.user_id,
+        "username": clip.project.owner.username,
+        "project_name": clip.project.name,
+    }
+
+
+def _apply_clip_status(clip: Clip, data: dict) -> None:
+    """Apply is_downloaded/media_file_id/duration from a status update."""
+    if "is_downloaded" in data:
+        clip.is_downloaded = bool(data["is_downloaded"])
+
+    if "media_file_id" in data:
+        clip.media_file_id = int(data["media_file_id"])
+
+    if "duration" in data:
+        clip.duration = float(data["duration"])
+
+
 @api_bp.route("/worker/clips/<int:clip_id>", methods=["GET"])
 @require_worker_key
 def worker_get_clip(clip_id: int):
@@ -154,19 +237,7 @@ def worker_get_clip(clip_id: int):
         if not clip:
             return jsonify({"error": "Clip not found"}), 404
 
-        return jsonify(
-            {
-                "id": clip.id,
-                "title": clip.title,
-                "source_url": clip.source_url,
-                "source_platform": clip.source_platform,
-                "source_id": clip.source_id,
-                "project_id": clip.project_id,
-                "user_id": clip.project.user_id,
-                "username": clip.project.owner.username,
-                "project_name": clip.project.name,
-            }
-        )
+        return jsonify(_clip_metadata(clip))
     except Exception as e:
         current_app.logger.error(f"Error fetching clip {clip_id}: {e}")
         return jsonify({"error": "Internal error"}), 500
@@ -190,26 +261,182 @@ def worker_update_clip_status(clip_id: int):
         if not clip:
             return jsonify({"error": "Clip not found"}), 404
 
-        data = request.get_json() or {}
+        _apply_clip_status(clip, request.get_json() or {})
+        db.session.commit()
 
-        if "is_downloaded" in data:
-            clip.is_downloaded = bool(data["is_downloaded"])
+        return jsonify({"status": "updated", "clip_id": clip_id})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error updating clip {clip_id}: {e}")
+        return jsonify({"error": "Internal error"}), 500
 
-        if "media_file_id" in data:
-            clip.media_file_id = int(data["media_file_id"])
 
-        if "duration" in data:
-            clip.duration = float(data["duration"])
+# Most clips a single download-context or status-batch call may name
+_MAX_CLIP_BATCH = 200
+
+
+def _clip_id_list(values) -> list[int] | None:
+    """Parse a JSON list of clip IDs; None if it is not one."""
+    if not isinstance(values, list) or len(values) > _MAX_CLIP_BATCH:
+        return None
+    try:
+        return [int(v) for v in values]
+    except (TypeError, ValueError):
+        return None
+
+
+@api_bp.route("/worker/clips/download-context", methods=["POST"])
+@require_worker_key
+def worker_get_download_context():
+    """Everything a batch download task needs for many clips, in one call.
+
+    Combines GET /worker/clips/<id>, POST /worker/media/find-reusable and
+    GET /worker/users/<id>/quota for every clip in the request.
+
+    Request body:
+        {"clip_ids": [int, ...]}
+
+    Returns:
+        {
+            "clips": [{...clip metadata..., "reuse": {find-reusable result}}],
+            "missing": [int, ...],
+            "quota": {"<user_id>": {quota result}}
+        }
+    """
+    try:
+        clip_ids = _clip_id_list((request.get_json() or {}).get("clip_ids"))
+        if clip_ids is None:
+            return (
+                jsonify(
+                    {"error": f"clip_ids must be a list of at most {_MAX_CLIP_BATCH}"}
+                ),
+                400,
+            )
+
+        from sqlalchemy.orm import joinedload
+
+        from app.models import User
 
+        clips = (
+            Clip.query.options(joinedload(Clip.project).joinedload(Project.owner))
+            .filter(Clip.id.in_(clip_ids))
+            .all()
+            if clip_ids
+            else []
+        )
+        by_id = {clip.id: clip for clip in clips}
+
+        by_user: dict[int, list[Clip]] = {}
+        for clip in clips:
+            by_user.setdefault(clip.project.user_id, []).append(clip)
+
+        reuse: dict[int, dict] = {}
+        quota: dict[str, dict] = {}
+        for user_id, user_clips in by_user.items():
+            lookups = [
+                (
+                    source_clip_key(clip.source_url),
+                    normalize_source_url(clip.source_url),
+                )
+                for clip in user_clips
+            ]
+            for clip, result in zip(
+                user_clips, _find_reusable_media(user_id, lookups), strict=True
+            ):
+                reuse[clip.id] = result
+            user = db.session.get(User, user_id)
+            if user:
+                quota[str(user_id)] = _user_quota(user)
+
+        return jsonify(
+            {
+                "clips": [
+                    {**_clip_metadata(by_id[cid]), "reuse": reuse[cid]}
+                    for cid in dict.fromkeys(clip_ids)
+                    if cid in by_id
+                ],
+                "missing": [cid for cid in dict.fromkeys(clip_ids) if cid not in by_id],
+                "quota": quota,
+            }
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error building download context: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+
+@api_bp.route("/worker/clips/status-batch", methods=["POST"])
+@require_worker_key
+def worker_update_clip_statuses():
+    """Update the download status of many clips in one transaction.
+
+    Request body:
+        {"updates": [{"clip_id": int, "is_downloaded": bool, ...}, ...]}
+
+    Returns:
+        {"status": "updated", "updated": [int, ...], "missing": [int, ...]}
+    """
+    try:
+        updates = (request.get_json() or {}).get("updates")
+        clip_ids = _clip_id_list(
+            [u.get("clip_id") for u in updates if isinstance(u, dict)]
+            if isinstance(updates, list)
+            else None
+        )
+        if clip_ids is None or len(clip_ids) != len(updates):
+            return jsonify({"error": "updates must be a list of clip updates"}), 400
+
+        clips = {
+            clip.id: clip
+            for clip in (
+                Clip.query.filter(Clip.id.in_(clip_ids)).all() if clip_ids else []
+            )
+        }
+        updated, missing = [], []
+        for clip_id, data in zip(clip_ids, updates, strict=True):
+            clip = clips.get(clip_id)
+            if clip is None:
+                missing.append(clip_id)
+                continue
+            _apply_clip_status(clip, data)
+            updated.append(clip_id)
         db.session.commit()
 
-        return jsonify({"status": "updated", "clip_id": clip_id})
+        return jsonify({"status": "updated", "updated": updated, "missing": missing})
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating clip {clip_id}: {e}")
+        current_app.logger.error(f"Error updating clip statuses: {e}")
         return jsonify({"error": "Internal error"}), 500
 
 
+def _apply_twitch_metadata(clip: Clip, twitch_clip) -> None:
+    """Copy creator, game and creation date (and a title for generic titles)."""
+    if twitch_clip.creator_name:
+        clip.creator_name = twitch_clip.creator_name
+    if twitch_clip.creator_id:
+        clip.creator_id = twitch_clip.creator_id
+    if twitch_clip.game_name:
+        clip.game_name = twitch_clip.game_name
+    if twitch_clip.created_at:
+        try:
+            clip.clip_created_at = datetime.fromisoformat(
+                twitch_clip.created_at.replace("Z", "+00:00")
+            )
+        except Exception as dt_err:
+            current_app.logger.warning(f"Failed to parse created_at: {dt_err}")
+    if twitch_clip.title and (not clip.title or clip.title.startswith("Clip ")):
+        clip.title = twitch_clip.title
+
+
+def _has_twitch_metadata(clip: Clip) -> bool:
+    """True when the clip already carries what enrichment would fetch."""
+    return bool(
+        clip.creator_name
+        and clip.creator_id
+        and clip.game_name
+        and clip.clip_created_at
+    )
+
+
 @api_bp.route("/worker/clips/<int:clip_id>/enrich", methods=["POST"])
 @require_worker_key
 def worker_enrich_clip_metadata(clip_id: int):
@@ -235,18 +462,12 @@ def worker_enrich_clip_metadata(clip_id: int):
             return jsonify({"status": "skipped", "reason": "Not a Twitch URL"})
 
         # Extract clip slug and enrich metadata
-        import re
-
         from app.integrations.twitch import get_clip_by_id
 
-        match = re.search(
-            r"(?:clips?\.twitch\.tv/|twitch\.tv/.+/clip/)([^/?&#]+)",
-            source_url,
-        )
-        if not match:
+        clip_slug = twitch_clip_slug(source_url)
+        if not clip_slug:
             return jsonify({"status": "skipped", "reason": "Could not extract clip ID"})
 
-        clip_slug = match.group(1)
         twitch_clip = get_clip_by_id(clip_slug)
 
         if not twitch_clip:
@@ -254,23 +475,7 @@ def worker_enrich_clip_metadata(clip_id: int):
                 {"status": "skipped", "reason": "No metadata from Twitch API"}
             )
 
-        # Update clip metadata
-        if twitch_clip.creator_name:
-            clip.creator_name = twitch_clip.creator_name
-        if twitch_clip.creator_id:
-            clip.creator_id = twitch_clip.creator_id
-        if twitch_clip.game_name:
-            clip.game_name = twitch_clip.game_name
-        if twitch_clip.created_at:
-            try:
-                clip.clip_created_at = datetime.fromisoformat(
-                    twitch_clip.created_at.replace("Z", "+00:00")
-                )
-            except Exception:
-                pass
-        if twitch_clip.title and (not clip.title or clip.title.startswith("Clip ")):
-            clip.title = twitch_clip.title
-
+        _apply_twitch_metadata(clip, twitch_clip)
         db.session.commit()
 
         # Download avatar (always attempt, helper will reuse if exists)
@@ -284,6 +489,64 @@ def worker_enrich_clip_metadata(clip_id: int):
         return jsonify({"error": "Internal error"}), 500
 
 
+@api_bp.route("/worker/clips/enrich-batch", methods=["POST"])
+@require_worker_key
+def worker_enrich_clips_metadata():
+    """Enrich many clips with Twitch metadata using bulk Helix lookups.
+
+    Clips that already carry creator, game and date are not looked up
+    again; their avatars are still fetched.
+
+    Request body:
+        {"clip_ids": [int, ...]}
+
+    Returns:
+        {"status": "enriched", "enriched": [int, ...], "skipped": [int, ...]}
+    """
+    try:
+        clip_ids = _clip_id_list((request.get_json() or {}).get("clip_ids"))
+        if clip_ids is None:
+            return (
+                jsonify(
+                    {"error": f"clip_ids must be a list of at most {_MAX_CLIP_BATCH}"}
+                ),
+                400,
+            )
+
+        from app.integrations.twitch import get_clips_by_ids
+
+        clips = Clip.query.filter(Clip.id.in_(clip_ids)).all() if clip_ids else []
+        slugs = {
+            clip.id: twitch_clip_slug(clip.source_url)
+            for clip in clips
+            if "twitch" in (clip.source_url or "").lower()
+            and not _has_twitch_metadata(clip)
+        }
+        twitch_clips = get_clips_by_ids(slug for slug in slugs.values() if slug)
+
+        enriched, skipped = [], []
+        for clip in clips:
+            twitch_clip = twitch_clips.get(slugs.get(clip.id) or "")
+            if twitch_clip:
+                _apply_twitch_metadata(clip, twitch_clip)
+            if twitch_clip or _has_twitch_metadata(clip):
+                enriched.append(clip.id)
+            else:
+                skipped.append(clip.id)
+        db.session.commit()
+
+        # Download avatars (the helper reuses files already on disk)
+        for clip in clips:
+            _download_creator_avatar(clip)
+        db.session.commit()
+
+        return jsonify({"status": "enriched", "enriched": enriched, "skipped": skipped})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error enriching clips: {e}", exc_info=True)
+        return jsonify({"error": "Internal error"}), 500
+
+
 @api_bp.route("/worker/media/<int:media_id>", methods=["GET"])
 @require_worker_key
 def worker_get_media(media_id: int):
@@ -321,6 +584,71 @@ def worker_get_media(media_id: int):
         return jsonify({"error": "Internal error"}), 500
 
 
+def _find_reusable_media(user_id: int, lookups: list[tuple[str, str]]) -> list[dict]:
+    """Match (clip_key, normalized_url) pairs against the user's downloaded clips.
+
+    All lookups are answered by one query on the indexed Clip.source_key;
+    the newest matching clip whose media file still exists wins.
+
+    Returns:
+        One find-reusable result per lookup, in order
+    """
+    from app.tasks.video_processing import _resolve_media_input_path
+
+    keys = {k for pair in lookups for k in pair if k}
+    rows = (
+        (
+            db.session.query(Clip, MediaFile)
+            .join(Project, Project.id == Clip.project_id)
+            .join(MediaFile, MediaFile.id == Clip.media_file_id)
+            .filter(Project.user_id == user_id, Clip.source_key.in_(keys))
+            .order_by(Clip.created_at.desc(), Clip.id.desc())
+            .all()
+        )
+        if keys
+        else []
+    )
+
+    by_key: dict[str, list[tuple[int, Clip, MediaFile]]] = {}
+    for pos, (prev, mf) in enumerate(rows):
+        by_key.setdefault(prev.source_key, []).append((pos, prev, mf))
+
+    exists: dict[int, bool] = {}
+
+    def _exists(mf: MediaFile) -> bool:
+        if mf.id not in exists:
+            exists[mf.id] = False
+            if mf.file_path:
+                try:
+                    # Check if file exists (using canonical path resolution)
+                    file_path = _resolve_media_input_path(mf.file_path)
+                    exists[mf.id] = bool(file_path and os.path.exists(file_path))
+                except Exception:
+                    # File path couldn't be resolved, continue searching
+                    pass
+        return exists[mf.id]
+
+    results = []
+    for key, norm in lookups:
+        matches = sorted(
+            by_key.get(key, []) + (by_key.get(norm, []) if norm != key else []),
+            key=lambda m: m[0],
+        )
+        found = {"found": False}
+        for _, prev, mf in matches:
+            if _exists(mf):
+                found = {
+                    "found": True,
+                    "media_file_id": mf.id,
+                    "file_path": mf.file_path,
+                    "duration": mf.duration,
+                    "reused_from_clip_id": prev.id,
+                }
+                break
+        results.append(found)
+    return results
+
+
 @api_bp.route("/worker/media/find-reusable", methods=["POST"])
 @require_worker_key
 def worker_find_reusable_media():
@@ -355,96 +683,53 @@ def worker_find_reusable_media():
         if not user_id or not source_url:
             return jsonify({"error": "user_id and source_url required"}), 400
 
-        # Helper functions (same as in download_clip_task)
-        def _normalize_url(u: str) -> str:
-            try:
-                s = (u or "").strip()
-                if not s:
-                    return ""
-                base = s.split("?")[0].split("#")[0]
-                return base[:-1] if base.endswith("/") else base
-            except Exception:
-                return (u or "").strip()
-
-        def _extract_clip_key(u: str) -> str:
-            try:
-                s = _normalize_url(u)
-                if not s:
-                    return ""
-                low = s.lower()
-                if ("twitch.tv" in low and "/clip/" in low) or (
-                    "clips.twitch.tv" in low
-                ):
-                    try:
-                        if "clips.twitch.tv" in low:
-                            slug = low.split("clips.twitch.tv", 1)[1].lstrip("/")
-                        else:
-                            slug = low.split("/clip/", 1)[1]
-                        slug = slug.split("/")[0]
-                        return slug
-                    except Exception:
-                        return s
-                return s
-            except Exception:
-                return _normalize_url(u)
-
-        # Use provided values or compute them
-        key = clip_key or _extract_clip_key(source_url)
-        norm = normalized_url or _normalize_url(source_url)
-
-        # Look for matching clips with media files
-        from app.models import Clip, Project
-
-        candidates = (
-            db.session.query(Clip)
-            .join(Project, Project.id == Clip.project_id)
-            .filter(
-                Project.user_id == user_id,
-                Clip.media_file_id.isnot(None),
-            )
-            .order_by(Clip.created_at.desc())
-            .limit(500)
-            .all()
-        )
+        key = clip_key or source_clip_key(source_url)
+        norm = normalized_url or normalize_source_url(source_url)
+        return jsonify(_find_reusable_media(user_id, [(key, norm)])[0])
 
-        for prev in candidates:
-            try:
-                # Skip if clip has no source_url
-                if not prev.source_url:
-                    continue
+    except Exception as e:
+        current_app.logger.error(f"Error finding reusable media: {e}")
+        return jsonify({"error": "Internal error"}), 500
 
-                pv_key = _extract_clip_key(prev.source_url)
-                pv_norm = _normalize_url(prev.source_url)
-            except Exception:
-                continue
 
-            if (pv_key and key and pv_key == key) or (pv_norm and pv_norm == norm):
-                if prev.media_file_id:
-                    mf = db.session.get(MediaFile, prev.media_file_id)
-                    if not mf or not mf.file_path:
-                        continue
+@api_bp.route("/worker/media/find-reusable/batch", methods=["POST"])
+@require_worker_key
+def worker_find_reusable_media_batch():
+    """Find reusable media for many source URLs of one user in one query.
 
-                    # Check if file exists (using canonical path resolution)
-                    from app.tasks.video_processing import _resolve_media_input_path
+    Request body:
+        {
+            "user_id": int,
+            "source_urls": [str, ...]
+        }
 
-                    try:
-                        file_path = _resolve_media_input_path(mf.file_path)
-                        if file_path and os.path.exists(file_path):
-                            return jsonify(
-                                {
-                                    "found": True,
-                                    "media_file_id": mf.id,
-                                    "file_path": mf.file_path,
-                                    "duration": mf.duration,
-                                    "reused_from_clip_id": prev.id,
-                                }
-                            )
-                    except Exception:
-                        # File path couldn't be resolved, continue searching
-                        continue
-
-        return jsonify({"found": False})
+    Returns:
+        {"results": [find-reusable result, ...]} in source_urls order
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = data.get("user_id")
+        source_urls = data.get("source_urls")
+        if (
+            not user_id
+            or not isinstance(source_urls, list)
+            or len(source_urls) > _MAX_CLIP_BATCH
+        ):
+            return (
+                jsonify(
+                    {
+                        "error": "user_id and source_urls (at most "
+                        f"{_MAX_CLIP_BATCH}) required"
+                    }
+                ),
+                400,
+            )
 
+        lookups = [
+            (source_clip_key(str(u or "")), normalize_source_url(str(u or "")))
+            for u in source_urls
+        ]
+        return jsonify({"results": _find_reusable_media(user_id, lookups)})
     except Exception as e:
         current_app.logger.error(f"Error finding reusable media: {e}")
         return jsonify({"error": "Internal error"}), 500
@@ -640,6 +925,141 @@ def worker_update_job(job_id: int):
         return jsonify({"error": "Internal error"}), 500
 
 
+# Rendered segments of distributed compilations, one directory per job; names
+# are always compile_distributed.segment_name() ("clip_<id>.mp4")
+_SEGMENT_NAME_RE = re.compile(r"^clip_\d+\.mp4$")
+
+
+def _segment_dir(job_id: int) -> str:
+    return os.path.join(current_app.instance_path, "tmp", "segments", str(job_id))
+
+
+@api_bp.route(
+    "/worker/jobs/<int:job_id>/segments/<name>", methods=["PUT", "GET", "HEAD"]
+)
+@require_worker_key
+def worker_job_segment(job_id: int, name: str):
+    """Store or serve a rendered segment of a distributed compilation.
+
+    Render subtasks PUT each clip they finish (multipart field "segment");
+    the merge task GETs them back, with Range/ETag support so interrupted
+    downloads resume. HEAD tells a retried subtask what is already stored.
+
+    Returns:
+        PUT: {"status": "stored", "name": str, "stored": int}
+        GET/HEAD: the segment, or 404
+    """
+    if not _SEGMENT_NAME_RE.match(name):
+        return jsonify({"error": "Invalid segment name"}), 400
+    try:
+        if not db.session.query(ProcessingJob.id).filter_by(id=job_id).first():
+            return jsonify({"error": "Job not found"}), 404
+
+        seg_dir = _segment_dir(job_id)
+        path = os.path.join(seg_dir, name)
+
+        if request.method != "PUT":
+            if not os.path.isfile(path):
+                return jsonify({"error": "Segment not found"}), 404
+            response = send_file(
+                path, mimetype="video/mp4", conditional=True, etag=True
+            )
+            response.headers["Accept-Ranges"] = "bytes"
+            return response
+
+        upload = request.files.get("segment")
+        if upload is None:
+            return jsonify({"error": "No segment file provided"}), 400
+        os.makedirs(seg_dir, exist_ok=True)
+        tmp_path = f"{path}.part"
+        upload.save(tmp_path)
+        os.replace(tmp_path, path)
+        stored = sum(1 for n in os.listdir(seg_dir) if n.endswith(".mp4"))
+        return jsonify({"status": "stored", "name": name, "stored": stored})
+    except Exception as e:
+        current_app.logger.error(f"Error handling segment {name} of job {job_id}: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+
+@api_bp.route("/worker/jobs/<int:job_id>/segments", methods=["DELETE"])
+@require_worker_key
+def worker_delete_job_segments(job_id: int):
+    """Remove every stored segment of a job once it has been merged.
+
+    Returns:
+        {"status": "deleted", "job_id": int}
+    """
+    import shutil
+
+    shutil.rmtree(_segment_dir(job_id), ignore_errors=True)
+    return jsonify({"status": "deleted", "job_id": job_id})
+
+
+# Upper bounds for one append call; workers flush far smaller batches
+_MAX_LOG_BATCH = 500
+_MAX_LOG_MESSAGE = 4000
+
+
+@api_bp.route("/worker/jobs/<int:job_id>/logs", methods=["POST"])
+@require_worker_key
+def worker_append_job_logs(job_id: int):
+    """Append log entries to a processing job.
+
+    Entries are inserted as processing_job_logs rows, so an append never
+    reads or rewrites the job's result_data.
+
+    Request body:
+        {
+            "entries": [
+                {"ts": str, "level": str, "message": str, "status": str | None}
+            ]
+        }
+
+    Returns:
+        {"status": "appended", "job_id": int, "count": int}
+    """
+    try:
+        from app.models import ProcessingJobLog
+
+        if not db.session.query(ProcessingJob.id).filter_by(id=job_id).first():
+            return jsonify({"error": "Job not found"}), 404
+
+        data = request.get_json() or {}
+        entries = data.get("entries")
+        if not isinstance(entries, list):
+            return jsonify({"error": "entries must be a list"}), 400
+        if len(entries) > _MAX_LOG_BATCH:
+            return jsonify({"error": f"At most {_MAX_LOG_BATCH} entries"}), 400
+
+        rows = []
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get("message"):
+                continue
+            try:
+                ts = datetime.fromisoformat(str(entry.get("ts")))
+            except (TypeError, ValueError):
+                ts = datetime.utcnow()
+            rows.append(
+                ProcessingJobLog(
+                    job_id=job_id,
+                    ts=ts,
+                    level=str(entry.get("level") or "info")[:20],
+                    message=str(entry["message"])[:_MAX_LOG_MESSAGE],
+                    status=(str(entry["status"])[:50] if entry.get("status") else None),
+                )
+            )
+
+        if rows:
+            db.session.add_all(rows)
+            db.session.commit()
+
+        return jsonify({"status": "appended", "job_id": job_id, "count": len(rows)})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error appending logs to job {job_id}: {e}")
+        return jsonify({"error": "Internal error"}), 500
+
+
 @api_bp.route("/worker/projects/<int:project_id>", methods=["GET"])
 @require_worker_key
 def worker_get_project(project_id: int):
@@ -807,6 +1227,29 @@ def worker_create_media():
         return jsonify({"error": str(e)}), 500
 
 
+def _user_quota(user) -> dict:
+    """Storage quota for a user (see worker_get_user_quota)."""
+    from app.quotas import get_effective_tier, storage_used_bytes
+
+    tier = get_effective_tier(user)
+    if not tier:
+        # No tier assigned, return defaults
+        return {
+            "remaining_bytes": 0,
+            "total_bytes": 0,
+            "used_bytes": 0,
+        }
+
+    used_bytes = storage_used_bytes(user.id)
+    total_bytes = tier.storage_limit_bytes if tier else 0
+    remaining_bytes = max(0, total_bytes - used_bytes) if total_bytes else None
+    return {
+        "remaining_bytes": remaining_bytes,
+        "total_bytes": total_bytes,
+        "used_bytes": used_bytes,
+    }
+
+
 @api_bp.route("/worker/users/<int:user_id>/quota", methods=["GET"])
 @require_worker_key
 def worker_get_user_quota(user_id: int):
@@ -821,34 +1264,12 @@ def worker_get_user_quota(user_id: int):
     """
     try:
         from app.models import User
-        from app.quotas import get_effective_tier, storage_used_bytes
 
         user = db.session.get(User, user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        tier = get_effective_tier(user)
-        if not tier:
-            # No tier assigned, return defaults
-            return jsonify(
-                {
-                    "remaining_bytes": 0,
-                    "total_bytes": 0,
-                    "used_bytes": 0,
-                }
-            )
-
-        used_bytes = storage_used_bytes(user.id)
-        total_bytes = tier.storage_limit_bytes if tier else 0
-        remaining_bytes = max(0, total_bytes - used_bytes) if total_bytes else None
-
-        return jsonify(
-            {
-                "remaining_bytes": remaining_bytes,
-                "total_bytes": total_bytes,
-                "used_bytes": used_bytes,
-            }
-        )
+        return jsonify(_user_quota(user))
     except Exception as e:
         current_app.logger.error(f"Error fetching quota for user {user_id}: {e}")
         return jsonify({"error": "Internal error"}), 500
@@ -1073,55 +1494,22 @@ def worker_upload_clip(project_id: int, clip_id: int):
             f"Worker uploaded clip {clip_id} -> MediaFile {media.id} for project {project_id}"
         )
 
-        # Enrich Twitch metadata synchronously (runs server-side with secrets)
-        if clip.source_url and "twitch" in clip.source_url.lower():
+        # Enrich Twitch metadata synchronously (runs server-side with secrets).
+        # Clips imported with full metadata (bulk-enriched by download_clips_api)
+        # skip the Helix request.
+        if (
+            clip.source_url
+            and "twitch" in clip.source_url.lower()
+            and not _has_twitch_metadata(clip)
+        ):
             try:
-                import re
-
                 from app.integrations.twitch import get_clip_by_id
 
-                current_app.logger.info(
-                    f"Attempting to enrich Twitch metadata for clip {clip_id}, URL: {clip.source_url}"
-                )
-
-                # Extract clip slug from URL
-                match = re.search(
-                    r"(?:clips?\.twitch\.tv/|twitch\.tv/.+/clip/)([^/?&#]+)",
-                    clip.source_url,
-                )
-                if match:
-                    clip_slug = match.group(1)
-                    current_app.logger.info(f"Extracted clip slug: {clip_slug}")
-
+                clip_slug = twitch_clip_slug(clip.source_url)
+                if clip_slug:
                     twitch_clip = get_clip_by_id(clip_slug)
                     if twitch_clip:
-                        current_app.logger.info(
-                            f"Got Twitch metadata: creator={twitch_clip.creator_name}, game={twitch_clip.game_name}"
-                        )
-
-                        # Update clip with metadata (always update, not just if empty)
-                        if twitch_clip.creator_name:
-                            clip.creator_name = twitch_clip.creator_name
-                        if twitch_clip.creator_id:
-                            clip.creator_id = twitch_clip.creator_id
-                        if twitch_clip.game_name:
-                            clip.game_name = twitch_clip.game_name
-                        if twitch_clip.created_at:
-                            try:
-                                from datetime import datetime
-
-                                clip.clip_created_at = datetime.fromisoformat(
-                                    twitch_clip.created_at.replace("Z", "+00:00")
-                                )
-                            except Exception as dt_err:
-                                current_app.logger.warning(
-                                    f"Failed to parse created_at: {dt_err}"
-                                )
-                        if twitch_clip.title:
-                            # Only override generic titles
-                            if not clip.title or clip.title.startswith("Clip "):
-                                clip.title = twitch_clip.title
-
+                        _apply_twitch_metadata(clip, twitch_clip)
                         db.session.commit()
                         current_app.logger.info(
                             f"Successfully enriched clip {clip_id} with Twitch metadata"
@@ -1312,6 +1700,106 @@ def _cleanup_old_compilations(
         current_app.logger.warning(f"Compilation cleanup failed: {e}")
 
 
+def _store_compilation(
+    project: Project,
+    metadata: dict,
+    place_video,
+    original_filename: str | None,
+    thumbnail_file=None,
+) -> dict:
+    """Place a finished compilation in the project's storage and record it.
+
+    Args:
+        project: Project the compilation belongs to
+        metadata: {duration, width, height, framerate, file_size, filename}
+        place_video: Callable(dest_path) that writes or moves the video there
+        original_filename: Name the worker uploaded the video under
+        thumbnail_file: Optional uploaded thumbnail (FileStorage)
+
+    Returns:
+        Response dict for the upload endpoints
+    """
+    from app.storage import compilations_dir as get_compilations_dir
+
+    project_id = project.id
+    compilations_dir = get_compilations_dir(project.owner, project.name)
+    os.makedirs(compilations_dir, exist_ok=True)
+
+    # Clean up old compilations (keep most recent 3)
+    _cleanup_old_compilations(compilations_dir, keep_count=3, project_id=project.id)
+
+    # Use filename from metadata or generate one
+    video_filename = metadata.get("filename") or f"compilation_{project_id}.mp4"
+    # Strip path components if any
+    video_filename = os.path.basename(video_filename)
+
+    video_path = os.path.join(compilations_dir, video_filename)
+
+    # Generate thumbnail filename
+    stem = os.path.splitext(video_filename)[0]
+    thumbnail_filename = f"{stem}.jpg"
+    thumbnail_path = (
+        os.path.join(compilations_dir, thumbnail_filename) if thumbnail_file else None
+    )
+
+    # Save video file
+    place_video(video_path)
+    current_app.logger.info(f"Saved compilation video to {video_path}")
+
+    # Save thumbnail if provided
+    if thumbnail_file and thumbnail_path:
+        thumbnail_file.save(thumbnail_path)
+        current_app.logger.info(f"Saved compilation thumbnail to {thumbnail_path}")
+
+    # Create MediaFile record
+    media = MediaFile(
+        filename=video_filename,
+        original_filename=original_filename,
+        file_path=video_path,
+        file_size=metadata.get("file_size", os.path.getsize(video_path)),
+        mime_type="video/mp4",
+        media_type=MediaType.COMPILATION,
+        user_id=project.user_id,
+        project_id=project_id,
+        duration=metadata.get("duration"),
+        width=metadata.get("width"),
+        height=metadata.get("height"),
+        framerate=metadata.get("framerate"),
+        thumbnail_path=thumbnail_path,
+        is_processed=True,
+    )
+    db.session.add(media)
+    db.session.flush()
+
+    # Update project with output file info
+    project.output_filename = video_filename
+    project.output_file_size = os.path.getsize(video_path)
+
+    db.session.commit()
+
+    current_app.logger.info(
+        f"Worker uploaded compilation -> MediaFile {media.id} for project {project_id}"
+    )
+
+    return {
+        "status": "uploaded",
+        "media_id": media.id,
+        "project_id": project_id,
+        "file_path": video_path,
+        "thumbnail_path": thumbnail_path,
+    }
+
+
+def _parse_upload_metadata() -> dict:
+    try:
+        import json
+
+        metadata = json.loads(request.form.get("metadata", "{}"))
+    except Exception:
+        metadata = {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
 @api_bp.route("/worker/projects/<int:project_id>/compilation/upload", methods=["POST"])
 @require_worker_key
 def worker_upload_compilation(project_id: int):
@@ -1342,109 +1830,304 @@ def worker_upload_compilation(project_id: int):
             return jsonify({"error": "No video file provided"}), 400
 
         video_file = request.files["video"]
-        thumbnail_file = request.files.get("thumbnail")
+        return jsonify(
+            _store_compilation(
+                project,
+                _parse_upload_metadata(),
+                video_file.save,
+                video_file.filename,
+                request.files.get("thumbnail"),
+            )
+        )
 
-        # Get metadata
-        metadata_str = request.form.get("metadata", "{}")
-        try:
-            import json
+    except Exception as e:
+        db.session.rollback()
 
-            metadata = json.loads(metadata_str)
-        except Exception:
-            metadata = {}
+        # Provide clearer error message for file size limit
+        error_msg = str(e)
+        if "413" in error_msg or "Request Entity Too Large" in error_msg:
+            max_size_gb = current_app.config.get("MAX_CONTENT_LENGTH", 0) / (
+                1024 * 1024 * 1024
+            )
+            error_msg = f"File size exceeds maximum allowed ({max_size_gb:.1f}GB). Consider increasing MAX_CONTENT_LENGTH."
 
-        # Build storage path using storage.compilations_dir()
-        from app.storage import compilations_dir as get_compilations_dir
+        current_app.logger.error(
+            f"Error uploading compilation for project {project_id}: {error_msg}"
+        )
+        import traceback
 
-        compilations_dir = get_compilations_dir(project.owner, project.name)
-        os.makedirs(compilations_dir, exist_ok=True)
+        traceback.print_exc()
+        return jsonify({"error": error_msg}), 500
 
-        # Clean up old compilations (keep most recent 3)
-        _cleanup_old_compilations(compilations_dir, keep_count=3, project_id=project.id)
 
-        # Use filename from metadata or generate one
-        video_filename = metadata.get("filename") or f"compilation_{project_id}.mp4"
-        # Strip path components if any
-        video_filename = os.path.basename(video_filename)
+# Chunked compilation uploads: <instance>/tmp/compilation_uploads/<project>/<id>.part
+_UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+_UPLOAD_COPY_BYTES = 1024 * 1024
+# Abandoned partial uploads are removed when another upload of the project commits
+_STALE_UPLOAD_SECONDS = 24 * 3600
 
-        video_path = os.path.join(compilations_dir, video_filename)
 
-        # Generate thumbnail filename
-        stem = os.path.splitext(video_filename)[0]
-        thumbnail_filename = f"{stem}.jpg"
-        thumbnail_path = (
-            os.path.join(compilations_dir, thumbnail_filename)
-            if thumbnail_file
-            else None
-        )
+def _compilation_upload_path(project_id: int, upload_id: str) -> str:
+    return os.path.join(
+        current_app.instance_path,
+        "tmp",
+        "compilation_uploads",
+        str(project_id),
+        f"{upload_id}.part",
+    )
 
-        # Save video file
-        video_file.save(video_path)
-        current_app.logger.info(f"Saved compilation video to {video_path}")
 
-        # Save thumbnail if provided
-        if thumbnail_file and thumbnail_path:
-            thumbnail_file.save(thumbnail_path)
-            current_app.logger.info(f"Saved compilation thumbnail to {thumbnail_path}")
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
 
-        # Create MediaFile record
-        media = MediaFile(
-            filename=video_filename,
-            original_filename=video_file.filename,
-            file_path=video_path,
-            file_size=metadata.get("file_size", os.path.getsize(video_path)),
-            mime_type="video/mp4",
-            media_type=MediaType.COMPILATION,
-            user_id=project.user_id,
-            project_id=project_id,
-            duration=metadata.get("duration"),
-            width=metadata.get("width"),
-            height=metadata.get("height"),
-            framerate=metadata.get("framerate"),
-            thumbnail_path=thumbnail_path,
-            is_processed=True,
-        )
-        db.session.add(media)
-        db.session.flush()
 
-        # Update project with output file info
-        project.output_filename = video_filename
-        project.output_file_size = os.path.getsize(video_path)
+@api_bp.route(
+    "/worker/projects/<int:project_id>/compilation/chunks/<upload_id>",
+    methods=["PUT", "GET", "DELETE"],
+)
+@require_worker_key
+def worker_compilation_chunk(project_id: int, upload_id: str):
+    """Append to, inspect or abort a chunked compilation upload.
+
+    PUT appends the raw request body at ``?offset=N``, which must equal the
+    bytes already stored; otherwise 409 returns the stored offset so the
+    worker can resume from there. The body is streamed to disk, so chunks are
+    never held in memory. GET reports the stored offset (0 for an unknown
+    upload); DELETE discards the partial file.
 
-        db.session.commit()
+    Returns:
+        PUT/GET: {"status": "stored" | "pending", "upload_id": str, "offset": int}
+        409: {"error": str, "offset": int}
+        DELETE: {"status": "deleted", "upload_id": str}
+    """
+    if not _UPLOAD_ID_RE.match(upload_id):
+        return jsonify({"error": "Invalid upload id"}), 400
+    try:
+        if not db.session.query(Project.id).filter_by(id=project_id).first():
+            return jsonify({"error": "Project not found"}), 404
 
-        current_app.logger.info(
-            f"Worker uploaded compilation -> MediaFile {media.id} for project {project_id}"
-        )
+        path = _compilation_upload_path(project_id, upload_id)
+        if request.method == "DELETE":
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return jsonify({"status": "deleted", "upload_id": upload_id})
+
+        stored = _file_size(path)
+        if request.method == "GET":
+            return jsonify(
+                {"status": "pending", "upload_id": upload_id, "offset": stored}
+            )
+
+        try:
+            offset = int(request.args.get("offset", ""))
+        except ValueError:
+            return jsonify({"error": "offset is required"}), 400
+        if offset != stored:
+            return (
+                jsonify(
+                    {"error": "Offset does not match stored size", "offset": stored}
+                ),
+                409,
+            )
 
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            while True:
+                block = request.stream.read(_UPLOAD_COPY_BYTES)
+                if not block:
+                    break
+                f.write(block)
         return jsonify(
-            {
-                "status": "uploaded",
-                "media_id": media.id,
-                "project_id": project_id,
-                "file_path": video_path,
-                "thumbnail_path": thumbnail_path,
-            }
+            {"status": "stored", "upload_id": upload_id, "offset": _file_size(path)}
+        )
+    except Exception as e:
+        current_app.logger.error(
+            f"Error handling upload {upload_id} of project {project_id}: {e}"
         )
+        return jsonify({"error": "Internal error"}), 500
+
+
+def _prune_stale_uploads(upload_dir: str) -> None:
+    """Remove files left in an upload or handoff directory for over a day."""
+    import time
+
+    cutoff = time.time() - _STALE_UPLOAD_SECONDS
+    try:
+        for name in os.listdir(upload_dir):
+            path = os.path.join(upload_dir, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError:
+        pass
+
+
+@api_bp.route(
+    "/worker/projects/<int:project_id>/compilation/chunks/<upload_id>/commit",
+    methods=["POST"],
+)
+@require_worker_key
+def worker_commit_compilation(project_id: int, upload_id: str):
+    """Finish a chunked compilation upload.
+
+    The assembled file is checked against the size and SHA-256 the worker
+    computed from its local output, then moved into the project's
+    compilations directory and recorded exactly like a single-request upload.
+    On a mismatch the partial file is discarded and 409 is returned, so the
+    worker uploads again from scratch.
 
+    Multipart form data:
+        - metadata: JSON string with {sha256, file_size, filename, duration,
+          width, height, framerate}
+        - thumbnail: thumbnail image (optional)
+
+    Returns:
+        Same as worker_upload_compilation
+    """
+    import hashlib
+    import shutil
+
+    if not _UPLOAD_ID_RE.match(upload_id):
+        return jsonify({"error": "Invalid upload id"}), 400
+    try:
+        project = db.session.get(Project, project_id)
+        if not project:
+            return jsonify({"error": "Project not found"}), 404
+
+        path = _compilation_upload_path(project_id, upload_id)
+        if not os.path.isfile(path):
+            return jsonify({"error": "Upload not found"}), 404
+
+        metadata = _parse_upload_metadata()
+        expected = str(metadata.get("sha256") or "").lower()
+        if not expected:
+            return jsonify({"error": "sha256 is required"}), 400
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_UPLOAD_COPY_BYTES), b""):
+                digest.update(block)
+        size = os.path.getsize(path)
+        expected_size = metadata.get("file_size")
+        if digest.hexdigest() != expected or (
+            expected_size is not None and int(expected_size) != size
+        ):
+            os.remove(path)
+            current_app.logger.warning(
+                f"Checksum mismatch for upload {upload_id} of project {project_id}"
+            )
+            return jsonify({"error": "Checksum mismatch", "offset": 0}), 409
+
+        result = _store_compilation(
+            project,
+            metadata,
+            lambda dest: shutil.move(path, dest),
+            metadata.get("filename"),
+            request.files.get("thumbnail"),
+        )
+        _prune_stale_uploads(os.path.dirname(path))
+        return jsonify(result)
     except Exception as e:
         db.session.rollback()
+        current_app.logger.error(
+            f"Error committing upload {upload_id} of project {project_id}: {e}"
+        )
+        return jsonify({"error": str(e)}), 500
 
-        # Provide clearer error message for file size limit
-        error_msg = str(e)
-        if "413" in error_msg or "Request Entity Too Large" in error_msg:
-            max_size_gb = current_app.config.get("MAX_CONTENT_LENGTH", 0) / (
-                1024 * 1024 * 1024
-            )
-            error_msg = f"File size exceeds maximum allowed ({max_size_gb:.1f}GB). Consider increasing MAX_CONTENT_LENGTH."
 
+@api_bp.route("/worker/storage/handshake", methods=["GET"])
+@require_worker_key
+def worker_storage_handshake():
+    """Return the data root's handshake token (created on first call).
+
+    A worker that finds the same token in its own data root shares storage
+    with the web app and can hand compilations over without uploading them.
+
+    Returns:
+        {"token": str, "token_file": str, "handoff_dir": str}
+    """
+    token = storage_lib.storage_token(create=True)
+    if not token:
+        return jsonify({"error": "Data root is not writable"}), 500
+    return jsonify(
+        {
+            "token": token,
+            "token_file": storage_lib.STORAGE_TOKEN_FILE,
+            "handoff_dir": storage_lib.HANDOFF_DIR,
+        }
+    )
+
+
+_HANDOFF_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}\.[A-Za-z0-9]{1,8}$")
+
+
+@api_bp.route("/worker/projects/<int:project_id>/compilation/handoff", methods=["POST"])
+@require_worker_key
+def worker_handoff_compilation(project_id: int):
+    """Record a compilation a worker placed in the shared handoff directory.
+
+    Workers on the same host or storage mount as the web app hard-link (or
+    copy) the finished video into ``<data root>/.handoff/`` and send only its
+    name and metadata; the file is renamed into the compilations directory
+    and recorded exactly like an uploaded one.
+
+    Multipart form data:
+        - metadata: JSON string with {handoff, token, file_size, filename,
+          duration, width, height, framerate}
+        - thumbnail: thumbnail image (optional)
+
+    Returns:
+        Same as worker_upload_compilation; 409 when the token does not match
+        this server's data root or the handed-off file is not visible here
+    """
+    import shutil
+
+    try:
+        project = db.session.get(Project, project_id)
+        if not project:
+            return jsonify({"error": "Project not found"}), 404
+
+        metadata = _parse_upload_metadata()
+        name = str(metadata.get("handoff") or "")
+        if not _HANDOFF_NAME_RE.match(name):
+            return jsonify({"error": "Invalid handoff name"}), 400
+        token = storage_lib.storage_token()
+        if not token or metadata.get("token") != token:
+            return jsonify({"error": "Storage token mismatch"}), 409
+
+        handoff_dir = storage_lib.handoff_dir()
+        path = os.path.join(handoff_dir, name)
+        if not os.path.isfile(path):
+            return jsonify({"error": "Handed-off file not found"}), 409
+        expected_size = metadata.get("file_size")
+        if expected_size is not None and int(expected_size) != os.path.getsize(path):
+            return jsonify({"error": "Handed-off file is incomplete"}), 409
+
+        def _place(dest: str) -> None:
+            try:
+                os.replace(path, dest)
+            except OSError:
+                shutil.move(path, dest)
+
+        result = _store_compilation(
+            project,
+            metadata,
+            _place,
+            metadata.get("filename"),
+            request.files.get("thumbnail"),
+        )
+        _prune_stale_uploads(handoff_dir)
+        return jsonify({**result, "handoff": True})
+    except Exception as e:
+        db.session.rollback()
         current_app.logger.error(
-            f"Error uploading compilation for project {project_id}: {error_msg}"
+            f"Error recording handed-off compilation for project {project_id}: {e}"
         )
-        import traceback
-
-        traceback.print_exc()
-        return jsonify({"error": error_msg}), 500
+        return jsonify({"error": str(e)}), 500
 
 
 # ============================================================================
@@ -1490,7 +2173,8 @@ def worker_get_compilation_context(project_id: int):
             "tier_limits": {
                 "max_res_label": str | None,
                 "max_fps": int | None,
-                "max_clips": int | None
+                "max_clips": int | None,
+                "render_engine": str | None
             }
         }
     """
@@ -1522,6 +2206,7 @@ def worker_get_compilation_context(project_id: int):
             "watermark_opacity": 0.3,
             "watermark_position": "bottom-right",
             "watermark_size": 150,
+            "render_engine": None,
         }
         username = None
 
@@ -1567,6 +2252,9 @@ def worker_get_compilation_context(project_id: int):
                         f"Error loading watermark settings: {wm_err}"
                     )
 
+            if getattr(user, "tier", None):
+                tier_limits["render_engine"] = user.tier.render_engine
+
             # Get tier-specific limits
             if hasattr(user, "tier") and user.tier and not user.tier.is_unlimited:
                 tier_limits["max_res_label"] = user.tier.max_output_resolution
@@ -1590,6 +2278,7 @@ def worker_get_compilation_context(project_id: int):
                     "duck_ratio": project.duck_ratio or 20.0,
                     "duck_attack": project.duck_attack or 1.0,
                     "duck_release": project.duck_release or 250.0,
+                    "render_engine": project.render_engine,
                 },
                 "clips": [
                     {
@@ -1603,6 +2292,7 @@ def worker_get_compilation_context(project_id: int):
                             {
                                 "id": clip.media_file.id,
                                 "file_path": clip.media_file.file_path or "",
+                                "checksum": clip.media_file.checksum,
                                 "duration": clip.media_file.duration,
                                 "width": clip.media_file.width,
                                 "height": clip.media_file.height,
@@ -1645,6 +2335,9 @@ def worker_get_media_batch():
                     "file_path": str,
                     "media_type": str,
                     "duration": float,
+                    "checksum": str | None,
+                    "file_size": int,
+                    "uploaded_at": str | None,
                     ...
                 }
             ]
@@ -1700,6 +2393,11 @@ def worker_get_media_batch():
                         "width": mf.width,
                         "height": mf.height,
                         "framerate": mf.framerate,
+                        "checksum": mf.checksum,
+                        "file_size": mf.file_size,
+                        "uploaded_at": (
+                            mf.uploaded_at.isoformat() if mf.uploaded_at else None
+                        ),
                     }
                     for mf in existing_media
                 ]
@@ -1723,8 +2421,13 @@ def worker_download_media(media_id):
 
     Response:
         - 200: File content with proper Content-Type and Content-Disposition headers
+        - 206: Requested byte range (Range header, honoured while If-Range matches)
+        - 304: Not modified (If-None-Match matches the ETag)
         - 404: File not found or doesn't exist on disk
         - 401: Unauthorized (wrong/missing user_id)
+
+    HEAD returns the same headers without the body, including ETag,
+    Content-Length and Accept-Ranges.
     """
     try:
         user_id = request.args.get("user_id", type=int)
@@ -1762,13 +2465,21 @@ def worker_download_media(media_id):
             f"Worker downloading media {media_id} ({filename}) for user {user_id}"
         )
 
-        # Send file with proper headers
-        return send_file(
+        # Send file with proper headers. conditional=True answers HEAD, Range
+        # and If-Range requests (Accept-Ranges: bytes) so workers can check
+        # their cache and resume interrupted downloads; the content checksum
+        # makes a stable ETag when known
+        response = send_file(
             file_path,
             mimetype=mimetype,
             as_attachment=True,
             download_name=filename,
+            conditional=True,
+            etag=media_file.checksum or True,
         )
+        # Werkzeug only sets this on range replies; advertise it up front
+        response.headers["Accept-Ranges"] = "bytes"
+        return response
 
     except Exception as e:
         current_app.logger.error(f"Error downloading media {media_id}: {e}")
@@ -0,0 +1,367 @@
+"""
+Per-process registry of external binaries and their capabilities.
+
+resolve_binary() used to run ``ffmpeg -hide_banner -encoders`` on both the
+project-local and the system ffmpeg on every call in GPU contexts, and it is
+called once per clip, per asset and per probe; NVENC and CUDA filter
+detection listed encoders, filters and hwaccels again. This module resolves
+ffmpeg, ffprobe and yt-dlp once per process and lists each binary's version,
+encoders, filters and hwaccels on first use.
+
+Entries are keyed by the binary's real path and mtime, so replacing a binary
+in place is picked up on the next call; invalidate() drops everything (used
+after binary update checks and by the ``refresh_binaries`` worker control
+command). Workers warm() the registry at startup and after a refresh, and
+the ``binary_capabilities`` command answers from cached_snapshot(), so the
+Workers page never waits on ffmpeg.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_CONFIG_KEYS = {
+    "ffmpeg": "FFMPEG_BINARY",
+    "ffprobe": "FFPROBE_BINARY",
+    "yt-dlp": "YT_DLP_BINARY",
+    "ytdlp": "YT_DLP_BINARY",
+}
+
+# Encoders worth showing on the Workers page (the full list is ~200 entries)
+NOTABLE_ENCODERS = (
+    "h264_nvenc",
+    "hevc_nvenc",
+    "av1_nvenc",
+    "h264_qsv",
+    "h264_vaapi",
+    "libx264",
+    "libx265",
+    "aac",
+)
+
+
+def _truthy(value: Any) -> bool:
+    return str(value or "").lower() in {"1", "true", "yes", "on"}
+
+
+def _debug(message: str) -> None:
+    if os.getenv("FFMPEG_DEBUG"):
+        try:
+            print(message)
+        except Exception:
+            pass
+
+
+def _run(argv: list[str], timeout: float = 5) -> str:
+    try:
+        res = subprocess.run(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+        return res.stdout or ""
+    except Exception:
+        return ""
+
+
+def _parse_listing(output: str) -> set[str]:
+    """Names from ``-encoders``/``-filters`` output (flags column, then name)."""
+    names = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or parts[1] == "=":
+            continue
+        if re.fullmatch(r"[A-Z.|]{3,6}", parts[0]):
+            names.add(parts[1])
+    return names
+
+
+class BinaryInfo:
+    """One binary on disk; capabilities are listed lazily, once."""
+
+    def __init__(self, path: str, real_path: str | None, mtime: float | None):
+        self.path = path
+        self.real_path = real_path
+        self.mtime = mtime
+        self._lock = threading.Lock()
+        self._lists: dict[str, Any] = {}
+
+    @property
+    def exists(self) -> bool:
+        return self.real_path is not None
+
+    def _cached(self, key: str, compute):
+        with self._lock:
+            if key not in self._lists:
+                self._lists[key] = compute() if self.exists else None
+            return self._lists[key]
+
+    @property
+    def version(self) -> str | None:
+        def _version():
+            name = os.path.basename(self.path).lower()
+            flag = "--version" if "yt-dlp" in name or "ytdlp" in name else "-version"
+            out = _run([self.path, flag], timeout=10).strip()
+            match = re.search(r"version\s+(\S+)", out)
+            if match:
+                return match.group(1)
+            return out.splitlines()[0] if out else None
+
+        return self._cached("version", _version)
+
+    @property
+    def encoders(self) -> set[str]:
+        return (
+            self._cached(
+                "encoders",
+                lambda: _parse_listing(_run([self.path, "-hide_banner", "-encoders"])),
+            )
+            or set()
+        )
+
+    @property
+    def filters(self) -> set[str]:
+        return (
+            self._cached(
+                "filters",
+                lambda: _parse_listing(_run([self.path, "-hide_banner", "-filters"])),
+            )
+            or set()
+        )
+
+    @property
+    def hwaccels(self) -> set[str]:
+        def _hwaccels():
+            out = _run([self.path, "-hide_banner", "-hwaccels"])
+            lines = out.splitlines()
+            if lines and lines[0].rstrip().endswith(":"):
+                lines = lines[1:]
+            return {line.strip() for line in lines if line.strip()}
+
+        return self._cached("hwaccels", _hwaccels) or set()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for admin views (lists only what was already probed)."""
+        with self._lock:
+            lists = dict(self._lists)
+        data: dict[str, Any] = {
+            "path": self.path,
+            "real_path": self.real_path,
+            "mtime": self.mtime,
+            "version": lists.get("version"),
+        }
+        if lists.get("encoders") is not None:
+            data["encoders"] = sorted(set(NOTABLE_ENCODERS) & lists["encoders"])
+            data["encoder_count"] = len(lists["encoders"])
+        if lists.get("filters") is not None:
+            data["filter_count"] = len(lists["filters"])
+            data["cuda_filters"] = sorted(
+                f for f in lists["filters"] if f.endswith("_cuda")
+            )
+        if lists.get("hwaccels") is not None:
+            data["hwaccels"] = sorted(lists["hwaccels"])
+        return data
+
+
+class BinaryRegistry:
+    """Resolved binary paths and BinaryInfo entries for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._infos: dict[tuple, BinaryInfo] = {}
+        self._resolved: dict[tuple, str] = {}
+        self.generation = 0
+        self.invalidated_at: float | None = None
+        self._warm: dict[str, Any] | None = None
+
+    def _identity(self, path: str) -> tuple[str, str | None, float | None]:
+        real = shutil.which(path) if not os.path.isabs(path) else path
+        real = os.path.realpath(real) if real and os.path.exists(real) else None
+        mtime = None
+        if real:
+            try:
+                mtime = os.path.getmtime(real)
+            except OSError:
+                real = None
+        return path, real, mtime
+
+    def info(self, path: str) -> BinaryInfo:
+        """Return the BinaryInfo for a binary path or name, cached by mtime."""
+        key = self._identity(str(path or ""))
+        with self._lock:
+            entry = self._infos.get(key)
+            if entry is None:
+                # Drop entries of the same path at an older mtime
+                for old in [k for k in self._infos if k[0] == key[0]]:
+                    del self._infos[old]
+                entry = BinaryInfo(*key)
+                self._infos[key] = entry
+            return entry
+
+    def cache_key(self, path: str) -> str:
+        """Identity string that changes when the binary is replaced."""
+        _, real, mtime = self._identity(str(path or ""))
+        return f"{path}@{mtime}" if real else str(path)
+
+    def has_encoder(self, path: str, encoder: str) -> bool:
+        return encoder in self.info(path).encoders
+
+    def resolve(self, app, name: str) -> str:
+        """Resolve a binary path using app config or local ./bin vs system.
+
+        Order of precedence:
+          1) Explicit app.config override (FFMPEG_BINARY, YT_DLP_BINARY, FFPROBE_BINARY)
+          2) For ffmpeg only: if PREFER_SYSTEM_FFMPEG=1, prefer system 'ffmpeg'
+          3) Project-local ./bin/<name> if present
+             - For ffmpeg: if local ffmpeg lacks NVENC but system ffmpeg has
+               NVENC, prefer system
+          4) Fallback to executable name (resolved via PATH)
+        """
+        lname = name.lower()
+        cfg_key = _CONFIG_KEYS.get(lname)
+        if cfg_key:
+            path = app.config.get(cfg_key)
+            if path:
+                return path
+
+        local_bin = os.path.join(os.path.dirname(app.root_path), "bin", name)
+        if lname != "ffmpeg":
+            # Non-ffmpeg tools: prefer project-local if present, else PATH
+            return local_bin if os.path.exists(local_bin) else name
+
+        # For ffmpeg specifically, allow preferring system binary (useful in GPU containers)
+        if _truthy(
+            os.getenv("PREFER_SYSTEM_FFMPEG", app.config.get("PREFER_SYSTEM_FFMPEG"))
+        ):
+            _debug("[ffmpeg] prefer system ffmpeg via PREFER_SYSTEM_FFMPEG=1")
+            return "ffmpeg"
+        if not os.path.exists(local_bin):
+            _debug("[ffmpeg] no local ffmpeg; using system 'ffmpeg'")
+            return "ffmpeg"
+
+        gpu_context = bool(
+            _truthy(os.getenv("USE_GPU_QUEUE", app.config.get("USE_GPU_QUEUE")))
+            or os.getenv("NVIDIA_VISIBLE_DEVICES")
+            or os.getenv("CUDA_VISIBLE_DEVICES")
+        )
+        if not gpu_context:
+            _debug(f"[ffmpeg] selecting local ffmpeg: {local_bin}")
+            return local_bin
+
+        # GPU context: pick the binary that actually has NVENC. The choice is
+        # remembered until either binary changes on disk.
+        key = (self._identity(local_bin), self._identity("ffmpeg"))
+        with self._lock:
+            cached = self._resolved.get(key)
+        if cached is not None:
+            return cached
+        local_has = self.has_encoder(local_bin, "h264_nvenc")
+        sys_has = self.has_encoder("ffmpeg", "h264_nvenc")
+        _debug(
+            f"[ffmpeg] gpu_context=1 local_bin='{local_bin}' "
+            f"local_nvenc={local_has} system_nvenc={sys_has}"
+        )
+        chosen = "ffmpeg" if sys_has and not local_has else local_bin
+        _debug(f"[ffmpeg] selecting {chosen}")
+        with self._lock:
+            self._resolved[key] = chosen
+        return chosen
+
+    def invalidate(self) -> None:
+        """Forget every resolved path and capability (and NVENC/CUDA checks)."""
+        with self._lock:
+            self._infos.clear()
+            self._resolved.clear()
+            self.generation += 1
+            self.invalidated_at = time.time()
+        try:
+            from app import ffmpeg_config
+
+            ffmpeg_config._NVENC_CACHE.clear()
+            ffmpeg_config._GPU_FILTER_CACHE.clear()
+        except Exception:
+            pass
+        logger.info("binary_registry_invalidated", generation=self.generation)
+
+    def warm(self, app) -> dict[str, Any] | None:
+        """Resolve and list the binaries now, for cached_snapshot() to serve.
+
+        Returns:
+            The snapshot, or None if resolving failed (logged)
+        """
+        try:
+            snap = self.snapshot(app)
+        except Exception as e:
+            logger.warning("binary_registry_warm_failed", error=str(e))
+            return None
+        with self._lock:
+            self._warm = snap
+        return snap
+
+    def cached_snapshot(self) -> dict[str, Any]:
+        """The last warm() snapshot, without running any binary.
+
+        After invalidate() (until the next warm()) only what this process
+        has looked up since is reported.
+        """
+        with self._lock:
+            warm = self._warm
+        if warm is not None and warm["generation"] == self.generation:
+            return warm
+        return self.snapshot()
+
+    def snapshot(self, app=None) -> dict[str, Any]:
+        """Resolved ffmpeg/ffprobe/yt-dlp with version and capabilities.
+
+        With app, the three binaries are resolved (and ffmpeg's encoders,
+        filters and hwaccels listed) first; otherwise only what this process
+        already looked up is reported.
+        """
+        binaries: dict[str, Any] = {}
+        if app is not None:
+            for name in ("ffmpeg", "ffprobe", "yt-dlp"):
+                info = self.info(self.resolve(app, name))
+                # Populate the lazily listed capabilities for the summary
+                _ = info.version
+                if name == "ffmpeg":
+                    _ = (info.encoders, info.filters, info.hwaccels)
+                binaries[name] = info.as_dict()
+        else:
+            with self._lock:
+                infos = list(self._infos.values())
+            for info in infos:
+                binaries[info.path] = info.as_dict()
+
+        nvenc = None
+        try:
+            from app import ffmpeg_config
+
+            nvenc = {k: list(v) for k, v in ffmpeg_config._NVENC_CACHE.items()}
+        except Exception:
+            pass
+        return {
+            "binaries": binaries,
+            "nvenc": nvenc,
+            "generation": self.generation,
+            "invalidated_at": self.invalidated_at,
+        }
+
+
+_REGISTRY = BinaryRegistry()
+
+
+def get_registry() -> BinaryRegistry:
+    """Return the process-wide registry."""
+    return _REGISTRY
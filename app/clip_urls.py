@@ -0,0 +1,45 @@
+"""
+Canonical keys for clip source URLs.
+
+The same clip reaches the app under many URLs (``clips.twitch.tv/<slug>``,
+``twitch.tv/<channel>/clip/<slug>?filter=...``, trailing slashes). Media reuse
+and duplicate detection compare source_clip_key() values instead: the
+lower-cased slug for Twitch clips, the URL without query string, fragment or
+trailing slash otherwise. Clip.source_key stores it so reuse is one indexed
+query. Helix lookups need the slug as written, which twitch_clip_slug()
+returns.
+"""
+
+import re
+
+# clips.twitch.tv/<slug>, clip.twitch.tv/<slug>, [www.|m.]twitch.tv/[<channel>/]clip/<slug>
+_TWITCH_SLUG_RE = re.compile(
+    r"(?:clips?\.twitch\.tv/|twitch\.tv/(?:[^?#]+/)?clip/)([^/?&#]+)", re.IGNORECASE
+)
+
+
+def normalize_source_url(u: str) -> str:
+    """Source URL without query string, fragment or trailing slash."""
+    try:
+        s = (u or "").strip()
+        if not s:
+            return ""
+        base = s.split("?")[0].split("#")[0]
+        return base[:-1] if base.endswith("/") else base
+    except Exception:
+        return (u or "").strip()
+
+
+def twitch_clip_slug(u: str | None) -> str | None:
+    """Clip slug from a Twitch clip URL, case preserved (Helix IDs are
+    case-sensitive), or None for other URLs."""
+    match = _TWITCH_SLUG_RE.search(normalize_source_url(u or ""))
+    return match.group(1) if match else None
+
+
+def source_clip_key(u: str) -> str:
+    """Lower-cased Twitch clip slug for Twitch clip URLs, else the normalized URL."""
+    slug = twitch_clip_slug(u)
+    if slug:
+        return slug.lower()
+    return normalize_source_url(u)
@@ -0,0 +1,322 @@
+"""
+Per-host encoder tuning calibrated by benchmarking the local hardware.
+
+ffmpeg_config.DEFAULTS uses the same NVENC preset, lookahead and libx264
+preset on every worker, whatever its GPU or core count. The calibration run
+(``python scripts/calibrate_encoder.py``) encodes a standard reference clip
+with a matrix of settings per encoder, measures throughput (fps), output
+bitrate and SSIM against the reference, and keeps the fastest combination
+that meets the quality and bitrate targets:
+
+- nvenc: preset (p1..p7) x rc-lookahead
+- x264:  preset (ultrafast..medium) x threads
+
+The winners are written to a JSON profile for this host, which
+ffmpeg_config.nvenc_encoder_args()/cpu_encoder_args() read on every call:
+
+    {"version": 1, "host": "...", "created": ..., "targets": {...},
+     "encoders": {"nvenc": {"settings": {...}, "fps": ..., ...},
+                  "x264": {...}},
+     "results": [...every measured combination...]}
+
+The profile lives at ENCODER_PROFILE_PATH, by default
+``instance/encoder_profiles/<hostname>.json``. Without a profile the
+DEFAULTS are used unchanged.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_PROFILE_VERSION = 1
+
+NVENC_PRESETS = ["p1", "p2", "p3", "p4", "p5", "p6", "p7"]
+NVENC_LOOKAHEADS = [8, 20]
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium"]
+
+DEFAULT_MIN_SSIM = 0.97
+
+_cache_lock = threading.Lock()
+_cache: dict[str, Any] = {"path": None, "mtime": None, "profile": None}
+
+
+def profile_path() -> str:
+    """Return where this host's encoder profile is stored."""
+    env = os.getenv("ENCODER_PROFILE_PATH")
+    if env:
+        return env
+    here = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(
+        os.path.dirname(here),
+        "instance",
+        "encoder_profiles",
+        f"{socket.gethostname()}.json",
+    )
+
+
+def load_profile(path: str | None = None) -> dict | None:
+    """Return the saved profile, re-reading it only when the file changes."""
+    path = path or profile_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _cache_lock:
+        if _cache["path"] == path and _cache["mtime"] == mtime:
+            return _cache["profile"]
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("encoder_profile_unreadable", path=path, error=str(e))
+        profile = None
+    if not isinstance(profile, dict) or profile.get("version") != _PROFILE_VERSION:
+        profile = None
+    with _cache_lock:
+        _cache.update(path=path, mtime=mtime, profile=profile)
+    return profile
+
+
+def save_profile(profile: dict, path: str | None = None) -> str:
+    """Atomically write a profile. Returns the path written."""
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+def tuned_settings(encoder: str) -> dict[str, Any]:
+    """Return the calibrated settings for "nvenc" or "x264", or {}."""
+    profile = load_profile()
+    entry = ((profile or {}).get("encoders") or {}).get(encoder) or {}
+    settings = entry.get("settings")
+    return dict(settings) if isinstance(settings, dict) else {}
+
+
+def parse_bitrate(value: str | int | float) -> float:
+    """Parse an ffmpeg bitrate such as "12M" or "8000k" into bits per second."""
+    text = str(value).strip()
+    match = re.fullmatch(r"([\d.]+)\s*([kKmMgG]?)", text)
+    if not match:
+        raise ValueError(f"invalid bitrate: {value!r}")
+    scale = {"": 1, "k": 1e3, "m": 1e6, "g": 1e9}[match.group(2).lower()]
+    return float(match.group(1)) * scale
+
+
+def select_best(
+    results: list[dict], min_ssim: float, max_bitrate: float | None
+) -> dict | None:
+    """Return the fastest result meeting the quality and bitrate targets."""
+    passing = [
+        r
+        for r in results
+        if r.get("ok")
+        and r.get("ssim", 0.0) >= min_ssim
+        and (not max_bitrate or r.get("bitrate", 0.0) <= max_bitrate)
+    ]
+    if not passing:
+        return None
+    return max(passing, key=lambda r: (r["fps"], -r["bitrate"]))
+
+
+def candidate_matrix(
+    nvenc: bool, cpu_count: int | None = None
+) -> list[tuple[str, dict]]:
+    """Return the (encoder, settings) combinations to benchmark."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    thread_options = sorted({0, max(1, cpu_count // 2)})
+    matrix: list[tuple[str, dict]] = []
+    if nvenc:
+        for preset in NVENC_PRESETS:
+            for lookahead in NVENC_LOOKAHEADS:
+                matrix.append(("nvenc", {"preset": preset, "rc_lookahead": lookahead}))
+    for preset in X264_PRESETS:
+        for threads in thread_options:
+            matrix.append(("x264", {"preset": preset, "threads": threads}))
+    return matrix
+
+
+def make_reference(
+    ffmpeg_bin: str, path: str, resolution: str, fps: int, seconds: float
+) -> None:
+    """Render the standard reference clip (lossless, with film-like grain)."""
+    subprocess.run(
+        [
+            ffmpeg_bin,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={resolution}:rate={fps}:duration={seconds},"
+            "noise=alls=6:allf=t",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-qp",
+            "0",
+            "-pix_fmt",
+            "yuv420p",
+            path,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def _ssim(ffmpeg_bin: str, encoded: str, reference: str) -> float:
+    res = subprocess.run(
+        [
+            ffmpeg_bin,
+            "-hide_banner",
+            "-i",
+            encoded,
+            "-i",
+            reference,
+            "-lavfi",
+            "[0:v][1:v]ssim",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    match = re.search(r"All:([\d.]+)", res.stderr or "")
+    return float(match.group(1)) if match else 0.0
+
+
+def measure(
+    ffmpeg_bin: str,
+    reference: str,
+    encoder: str,
+    settings: dict,
+    work_dir: str,
+    frames: int,
+    seconds: float,
+) -> dict:
+    """Encode the reference with one combination and measure it."""
+    from app.ffmpeg_config import cpu_encoder_args, nvenc_encoder_args
+
+    video_args = (
+        nvenc_encoder_args(settings)
+        if encoder == "nvenc"
+        else cpu_encoder_args(settings)
+    )
+    out = os.path.join(work_dir, f"{encoder}.mp4")
+    result = {"encoder": encoder, "settings": settings, "ok": False}
+    started = time.monotonic()
+    try:
+        subprocess.run(
+            [
+                ffmpeg_bin,
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-i",
+                reference,
+                *video_args,
+                "-an",
+                out,
+            ],
+            check=True,
+            capture_output=True,
+        )
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode("utf-8", errors="replace")
+        result["error"] = stderr.strip().splitlines()[-1] if stderr.strip() else ""
+        return result
+    elapsed = max(time.monotonic() - started, 1e-6)
+    size = os.path.getsize(out)
+    result.update(
+        ok=True,
+        fps=round(frames / elapsed, 1),
+        bytes=size,
+        bitrate=round(size * 8 / seconds),
+        ssim=round(_ssim(ffmpeg_bin, out, reference), 5),
+    )
+    return result
+
+
+def calibrate(
+    ffmpeg_bin: str,
+    nvenc: bool,
+    min_ssim: float = DEFAULT_MIN_SSIM,
+    max_bitrate: float | None = None,
+    resolution: str = "1920x1080",
+    fps: int = 60,
+    seconds: float = 10.0,
+    report=None,
+) -> dict:
+    """Benchmark the candidate matrix on this host and build a profile.
+
+    Args:
+        ffmpeg_bin: ffmpeg executable
+        nvenc: Whether to include NVENC candidates
+        min_ssim: Minimum SSIM against the reference a setting must reach
+        max_bitrate: Maximum average bitrate in bits/s (None: no limit)
+        resolution: Reference clip size
+        fps: Reference clip frame rate
+        seconds: Reference clip duration
+        report: Optional callback(result) after each measurement
+
+    Returns:
+        Profile dict (pass to save_profile()); encoders without a passing
+        combination are left out so they keep the built-in defaults
+    """
+    frames = int(fps * seconds)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="clippy_calibrate_") as work:
+        reference = os.path.join(work, "reference.mkv")
+        make_reference(ffmpeg_bin, reference, resolution, fps, seconds)
+        for encoder, settings in candidate_matrix(nvenc):
+            result = measure(
+                ffmpeg_bin, reference, encoder, settings, work, frames, seconds
+            )
+            results.append(result)
+            if report:
+                report(result)
+
+    encoders = {}
+    for encoder in ("nvenc", "x264"):
+        best = select_best(
+            [r for r in results if r["encoder"] == encoder], min_ssim, max_bitrate
+        )
+        if best:
+            encoders[encoder] = {
+                k: best[k] for k in ("settings", "fps", "bitrate", "ssim")
+            }
+    return {
+        "version": _PROFILE_VERSION,
+        "host": socket.gethostname(),
+        "created": time.time(),
+        "ffmpeg": ffmpeg_bin,
+        "targets": {
+            "min_ssim": min_ssim,
+            "max_bitrate": max_bitrate,
+            "resolution": resolution,
+            "fps": fps,
+            "seconds": seconds,
+        },
+        "encoders": encoders,
+        "results": results,
+    }
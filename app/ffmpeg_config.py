@@ -204,9 +204,16 @@ def _env_nvenc_disabled() -> bool:
     } or str(os.getenv("CLIPPY_DISABLE_NVENC", "")).lower() in {"1", "true", "yes"}
 
 
+def _cache_key(ffmpeg_bin: str) -> str:
+    """Detection cache key; changes when the binary is replaced on disk."""
+    from app.binary_registry import get_registry
+
+    return get_registry().cache_key(str(ffmpeg_bin or "ffmpeg"))
+
+
 def _detect_nvenc(ffmpeg_bin: str) -> bool:
     global _NVENC_CACHE
-    key = str(ffmpeg_bin or "ffmpeg")
+    key = _cache_key(ffmpeg_bin)
     if key in _NVENC_CACHE:
         return _NVENC_CACHE[key][0]
     if _env_nvenc_disabled():
@@ -216,14 +223,9 @@ def _detect_nvenc(ffmpeg_bin: str) -> bool:
         import subprocess
         import tempfile
 
-        res = subprocess.run(
-            [ffmpeg_bin, "-hide_banner", "-encoders"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            timeout=5,
-        )
-        if "h264_nvenc" not in (res.stdout or ""):
+        from app.binary_registry import get_registry
+
+        if not get_registry().has_encoder(ffmpeg_bin, "h264_nvenc"):
             _NVENC_CACHE[key] = (False, "h264_nvenc encoder not listed by ffmpeg")
             return False
 
@@ -274,18 +276,152 @@ def detect_nvenc(ffmpeg_bin: str) -> tuple[bool, str]:
 
     Results are cached per-binary path.
     """
-    key = str(ffmpeg_bin or "ffmpeg")
+    key = _cache_key(ffmpeg_bin)
     available = _detect_nvenc(ffmpeg_bin)
     reason = _NVENC_CACHE.get(key, (available, "ok" if available else "unavailable"))[1]
     return available, reason
 
 
-def _env_nvenc_preset() -> str:
+# Cache CUDA decode/filter availability per ffmpeg binary path, like NVENC
+_GPU_FILTER_CACHE: dict[str, tuple[bool, str]] = {}
+
+
+def _env_gpu_filters_disabled() -> bool:
+    """Return True if the CUDA decode/filter path is disabled via environment."""
+    return str(os.getenv("FFMPEG_DISABLE_GPU_FILTERS", "")).lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+
+
+def detect_gpu_filters(ffmpeg_bin: str) -> tuple[bool, str]:
+    """Return whether ffmpeg can decode and scale on the GPU, and why not.
+
+    Requires working NVENC, the ``cuda`` hwaccel and the ``scale_cuda``
+    filter, verified by uploading and scaling one frame on the device.
+    Results are cached per-binary path.
+    """
+    key = _cache_key(ffmpeg_bin)
+    if key in _GPU_FILTER_CACHE:
+        return _GPU_FILTER_CACHE[key]
+    if _env_gpu_filters_disabled():
+        _GPU_FILTER_CACHE[key] = (False, "Disabled via environment")
+        return _GPU_FILTER_CACHE[key]
+    if not _detect_nvenc(ffmpeg_bin):
+        _GPU_FILTER_CACHE[key] = (False, "NVENC unavailable")
+        return _GPU_FILTER_CACHE[key]
+    try:
+        import subprocess
+        import tempfile
+
+        from app.binary_registry import get_registry
+
+        info = get_registry().info(ffmpeg_bin)
+        if "cuda" not in info.hwaccels:
+            _GPU_FILTER_CACHE[key] = (False, "cuda hwaccel not listed by ffmpeg")
+            return _GPU_FILTER_CACHE[key]
+        if "scale_cuda" not in info.filters:
+            _GPU_FILTER_CACHE[key] = (False, "scale_cuda filter not listed by ffmpeg")
+            return _GPU_FILTER_CACHE[key]
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".mp4")
+        try:
+            os.close(fd)
+            test = subprocess.run(
+                [
+                    ffmpeg_bin,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-init_hw_device",
+                    "cuda=gpu",
+                    "-filter_hw_device",
+                    "gpu",
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    "color=size=320x180:rate=30:color=black",
+                    "-frames:v",
+                    "1",
+                    "-vf",
+                    "format=nv12,hwupload,scale_cuda=256:144:format=yuv420p",
+                    "-c:v",
+                    "h264_nvenc",
+                    tmp_path,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                timeout=10,
+            )
+            ok = test.returncode == 0
+            _GPU_FILTER_CACHE[key] = (ok, "ok" if ok else (test.stdout or "unknown"))
+        finally:
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+    except Exception:
+        _GPU_FILTER_CACHE[key] = (False, "exception during detection")
+    return _GPU_FILTER_CACHE[key]
+
+
+def gpu_filters_enabled(app, ffmpeg_bin: str) -> bool:
+    """Return True when clips should be decoded and scaled on the GPU.
+
+    COMPILE_GPU_FILTERS=auto (default) uses the path whenever
+    detect_gpu_filters() succeeds; false disables it.
+    """
+    setting = str(app.config.get("COMPILE_GPU_FILTERS", "auto")).lower()
+    if setting in {"0", "false", "no", "off"}:
+        return False
+    return detect_gpu_filters(ffmpeg_bin)[0]
+
+
+def hwaccel_input_args() -> list[str]:
+    """Input options that keep decoded frames in CUDA memory."""
+    return ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+
+
+def gpu_scale_filter(width: int, height: int, download: bool = False) -> str:
+    """Return a scale_cuda step to WxH yuv420p.
+
+    With download=True the frames are copied back to system memory afterwards
+    so CPU-only filters (drawtext, drawbox, overlay) can follow.
+    """
+    step = f"scale_cuda={width}:{height}:format=yuv420p"
+    if download:
+        step += ",hwdownload,format=yuv420p"
+    return step
+
+
+def gpu_encoder_args(ffmpeg_bin: str) -> list[str]:
+    """encoder_args() for CUDA frames, which must not be converted by -pix_fmt."""
+    args = encoder_args(ffmpeg_bin)
+    if "-pix_fmt" in args:
+        i = args.index("-pix_fmt")
+        del args[i : i + 2]
+    return args
+
+
+def _env_nvenc_preset(default: str | None = None) -> str:
     """Return NVENC preset honoring environment override if provided."""
     p = os.getenv("FFMPEG_NVENC_PRESET")
     if p:
         return p
-    return str(DEFAULTS.get("nvenc_preset", "slow"))
+    return str(default or DEFAULTS.get("nvenc_preset", "slow"))
+
+
+def _tuning(encoder: str) -> dict[str, Any]:
+    """Settings calibrated for this host (see app.encoder_profile), or {}."""
+    try:
+        from app.encoder_profile import tuned_settings
+
+        return tuned_settings(encoder)
+    except Exception:
+        return {}
 
 
 def overlay_enabled() -> bool:
@@ -298,68 +434,90 @@ def overlay_enabled() -> bool:
     return bool(DEFAULTS.get("enable_overlay", True))
 
 
-def encoder_args(ffmpeg_bin: str) -> list[str]:
-    """Return encoder argument list favoring NVENC when available."""
-    if _detect_nvenc(ffmpeg_bin):
-        return [
-            "-c:v",
-            "h264_nvenc",
-            "-preset",
-            _env_nvenc_preset(),
-            "-rc",
-            "vbr",
-            "-cq",
-            str(DEFAULTS["cq"]),
-            "-b:v",
-            str(DEFAULTS["bitrate"]),
-            "-maxrate",
-            str(DEFAULTS["bitrate"]),
-            "-bufsize",
-            str(DEFAULTS["bitrate"]),
-            "-profile:v",
-            "high",
-            "-level",
-            "4.2",
-            "-g",
-            str(DEFAULTS["gop"]),
-            "-bf",
-            "3",
-            "-rc-lookahead",
-            str(DEFAULTS["rc_lookahead"]),
-            "-spatial_aq",
-            str(DEFAULTS["spatial_aq"]),
-            "-aq-strength",
-            str(DEFAULTS["aq_strength"]),
-            "-temporal-aq",
-            str(DEFAULTS["temporal_aq"]),
-            "-pix_fmt",
-            "yuv420p",
-        ]
-    # libx264 fallback (CRF mode similar quality)
+def nvenc_encoder_args(tuning: dict[str, Any] | None = None) -> list[str]:
+    """Return h264_nvenc args; tuning overrides preset and rc_lookahead.
+
+    Without tuning the host's calibrated profile is used (FFMPEG_NVENC_PRESET
+    still wins over it). Explicit tuning is taken as is, so calibration
+    measures each candidate preset rather than the environment's.
+    """
+    if tuning is None:
+        t = _tuning("nvenc")
+        preset = _env_nvenc_preset(t.get("preset"))
+    else:
+        t = tuning
+        preset = str(t.get("preset") or DEFAULTS.get("nvenc_preset", "slow"))
     return [
         "-c:v",
-        "libx264",
+        "h264_nvenc",
         "-preset",
-        "medium",
-        "-crf",
+        preset,
+        "-rc",
+        "vbr",
+        "-cq",
         str(DEFAULTS["cq"]),
+        "-b:v",
+        str(DEFAULTS["bitrate"]),
+        "-maxrate",
+        str(DEFAULTS["bitrate"]),
+        "-bufsize",
+        str(DEFAULTS["bitrate"]),
+        "-profile:v",
+        "high",
+        "-level",
+        "4.2",
+        "-g",
+        str(DEFAULTS["gop"]),
+        "-bf",
+        "3",
+        "-rc-lookahead",
+        str(t.get("rc_lookahead", DEFAULTS["rc_lookahead"])),
+        "-spatial_aq",
+        str(DEFAULTS["spatial_aq"]),
+        "-aq-strength",
+        str(DEFAULTS["aq_strength"]),
+        "-temporal-aq",
+        str(DEFAULTS["temporal_aq"]),
         "-pix_fmt",
         "yuv420p",
     ]
 
 
-def cpu_encoder_args() -> list[str]:
-    """Explicit CPU encoder args for fallback retries."""
-    return [
+# Repeat the SPS/PPS before every keyframe. Timeline segments are joined with
+# -c copy, and stream-copied clips carry other parameter sets than encoded
+# segments; in-band headers keep a decoder from applying one segment's to the
+# next. (The encoders' extradata is Annex B, as dump_extra needs.)
+INBAND_HEADER_ARGS = ["-bsf:v", "dump_extra"]
+
+
+def encoder_args(ffmpeg_bin: str) -> list[str]:
+    """Return encoder argument list favoring NVENC when available."""
+    if _detect_nvenc(ffmpeg_bin):
+        return [*nvenc_encoder_args(), *INBAND_HEADER_ARGS]
+    # libx264 fallback (CRF mode similar quality)
+    return [*cpu_encoder_args(), *INBAND_HEADER_ARGS]
+
+
+def cpu_encoder_args(tuning: dict[str, Any] | None = None) -> list[str]:
+    """Explicit CPU encoder args for fallback retries.
+
+    tuning overrides preset and threads; without it the host's calibrated
+    profile is used.
+    """
+    t = _tuning("x264") if tuning is None else tuning
+    args = [
         "-c:v",
         "libx264",
         "-preset",
-        "medium",
+        str(t.get("preset", "medium")),
         "-crf",
         str(DEFAULTS["cq"]),
         "-pix_fmt",
         "yuv420p",
     ]
+    if t.get("threads"):
+        args.extend(["-threads", str(t["threads"])])
+    return args
 
 
 def audio_args() -> list[str]:
@@ -378,107 +536,9 @@ def audio_args() -> list[str]:
 def _resolve_binary(app, name: str) -> str:
     """Resolve a binary path using app config or local ./bin vs system smart fallback.
 
-    Order of precedence:
-      1) Explicit app.config override (FFMPEG_BINARY, YT_DLP_BINARY, FFPROBE_BINARY)
-      2) For ffmpeg only: if PREFER_SYSTEM_FFMPEG=1, prefer system 'ffmpeg'
-      3) Project-local ./bin/<name> if present
-         - For ffmpeg: if local ffmpeg lacks NVENC but system ffmpeg has NVENC, prefer system
-      4) Fallback to executable name (resolved via PATH)
+    See BinaryRegistry.resolve(); results and capability listings are cached
+    per process until the binary changes on disk.
     """
-    import subprocess
-
-    cfg_key = None
-    lname = name.lower()
-    if lname == "ffmpeg":
-        cfg_key = "FFMPEG_BINARY"
-    elif lname in ("yt-dlp", "ytdlp"):
-        cfg_key = "YT_DLP_BINARY"
-    elif lname == "ffprobe":
-        cfg_key = "FFPROBE_BINARY"
-
-    if cfg_key:
-        path = app.config.get(cfg_key)
-        if path:
-            return path
-
-    proj_root = os.path.dirname(app.root_path)
-    local_bin = os.path.join(proj_root, "bin", name)
-
-    # For ffmpeg specifically, allow preferring system binary (useful in GPU containers)
-    if lname == "ffmpeg":
-        prefer_system = str(
-            os.getenv(
-                "PREFER_SYSTEM_FFMPEG", app.config.get("PREFER_SYSTEM_FFMPEG", "")
-            )
-        ).lower() in {"1", "true", "yes", "on"}
-        if prefer_system:
-            if os.getenv("FFMPEG_DEBUG"):
-                try:
-                    print("[ffmpeg] prefer system ffmpeg via PREFER_SYSTEM_FFMPEG=1")
-                except Exception:
-                    pass
-            return "ffmpeg"
-
-        # If local exists, but we're in a GPU context, pick the one that supports NVENC
-        def _has_nvenc(bin_path: str) -> bool:
-            try:
-                res = subprocess.run(
-                    [bin_path, "-hide_banner", "-encoders"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    timeout=5,
-                )
-                return "h264_nvenc" in (res.stdout or "")
-            except Exception:
-                return False
-
-        gpu_context = (
-            str(os.getenv("USE_GPU_QUEUE", app.config.get("USE_GPU_QUEUE", ""))).lower()
-            in {
-                "1",
-                "true",
-                "yes",
-                "on",
-            }
-            or os.getenv("NVIDIA_VISIBLE_DEVICES")
-            or os.getenv("CUDA_VISIBLE_DEVICES")
-        )
-
-        if os.path.exists(local_bin):
-            if gpu_context:
-                # Prefer the binary that actually has NVENC
-                local_has = _has_nvenc(local_bin)
-                sys_has = _has_nvenc("ffmpeg")
-                if os.getenv("FFMPEG_DEBUG"):
-                    try:
-                        print(
-                            f"[ffmpeg] gpu_context=1 local_bin='{local_bin}' local_nvenc={local_has} system_nvenc={sys_has}"
-                        )
-                    except Exception:
-                        pass
-                if sys_has and not local_has:
-                    if os.getenv("FFMPEG_DEBUG"):
-                        try:
-                            print("[ffmpeg] selecting system ffmpeg (has NVENC)")
-                        except Exception:
-                            pass
-                    return "ffmpeg"
-            if os.getenv("FFMPEG_DEBUG"):
-                try:
-                    print(f"[ffmpeg] selecting local ffmpeg: {local_bin}")
-                except Exception:
-                    pass
-            return local_bin
-        # No local bin; system
-        if os.getenv("FFMPEG_DEBUG"):
-            try:
-                print("[ffmpeg] no local ffmpeg; using system 'ffmpeg'")
-            except Exception:
-                pass
-        return "ffmpeg"
+    from app.binary_registry import get_registry
 
-    # Non-ffmpeg tools: prefer project-local if present, else PATH
-    if os.path.exists(local_bin):
-        return local_bin
-    return name
+    return get_registry().resolve(app, name)
@@ -12,6 +12,7 @@ from typing import Any
 
 import httpx
 
+from app.integrations.http_client import discord_client
 from config.settings import Config
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
@@ -47,23 +48,22 @@ def get_channel_messages(
     url = f"{DISCORD_API_BASE}/channels/{cid}/messages"
     params = {"limit": lim}
 
-    with httpx.Client(timeout=20.0, headers=_headers()) as client:
-        resp = client.get(url, params=params)
+    resp = discord_client.get(url, headers=_headers(), params=params)
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        # Log the response body for debugging
+        error_detail = ""
         try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            # Log the response body for debugging
-            error_detail = ""
-            try:
-                error_data = resp.json()
-                error_detail = f" - {error_data}"
-            except Exception:
-                error_detail = f" - {resp.text}"
-            raise RuntimeError(
-                f"Discord API error {resp.status_code}: {error_detail}. "
-                f"Check that bot token is valid and bot has access to channel {cid}"
-            ) from e
-        data = resp.json()
+            error_data = resp.json()
+            error_detail = f" - {error_data}"
+        except Exception:
+            error_detail = f" - {resp.text}"
+        raise RuntimeError(
+            f"Discord API error {resp.status_code}: {error_detail}. "
+            f"Check that bot token is valid and bot has access to channel {cid}"
+        ) from e
+    data = resp.json()
 
     # Return selected fields to reduce payload size
     out: list[dict[str, Any]] = []
@@ -0,0 +1,290 @@
+"""
+Shared, rate-limit aware HTTP clients for the Twitch and Discord integrations.
+
+Each call used to go through ``httpx.get`` or a throwaway ``httpx.Client``, so
+every request opened a new TLS connection, and the APIs' rate-limit headers
+were ignored until a 429 reached the user. ApiClient keeps one pooled
+``httpx.Client`` per process (recreated after a fork) and runs every request
+through a token bucket:
+
+- the bucket refills at the API's documented rate and is corrected from the
+  response headers (Twitch ``Ratelimit-Remaining``/``Ratelimit-Reset``,
+  Discord ``X-RateLimit-Remaining``/``X-RateLimit-Reset-After``), so requests
+  wait for the reset instead of failing once the budget is spent;
+- 429 and 502/503/504 responses and connection errors are retried with
+  exponential backoff, honouring ``Retry-After`` and the reset headers.
+
+ApiClient.arequest() is the asyncio variant; it shares the bucket with the
+synchronous client and pools connections for the duration of async_session().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_RETRY_STATUSES = {429, 502, 503, 504}
+# Longest single wait for a rate-limit reset or Retry-After
+_MAX_WAIT = 60.0
+
+
+def _header_float(headers: httpx.Headers, *names: str) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+class RateLimiter:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    update() replaces the estimate with what the server reports, and block()
+    holds all requests until a reset time.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.waits = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token; returns how long to wait before sending (0 if none)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._blocked_until - now)
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            if wait > 0:
+                self.waits += 1
+            return min(wait, _MAX_WAIT)
+
+    def update(self, headers: httpx.Headers) -> None:
+        """Adopt the remaining budget and reset time from response headers."""
+        remaining = _header_float(
+            headers, "Ratelimit-Remaining", "X-RateLimit-Remaining"
+        )
+        if remaining is None:
+            return
+        limit = _header_float(headers, "Ratelimit-Limit", "X-RateLimit-Limit")
+        reset_after = _header_float(headers, "X-RateLimit-Reset-After")
+        if reset_after is None:
+            reset_at = _header_float(headers, "Ratelimit-Reset", "X-RateLimit-Reset")
+            if reset_at is not None:
+                reset_after = max(0.0, reset_at - time.time())
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = limit
+            self._tokens = min(self._tokens, remaining)
+            if remaining < 1 and reset_after is not None:
+                self._blocked_until = max(
+                    self._blocked_until, now + min(reset_after, _MAX_WAIT)
+                )
+
+    def block(self, seconds: float) -> None:
+        """Hold every request for ``seconds`` (e.g. after a 429)."""
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + min(seconds, _MAX_WAIT)
+            )
+
+
+class ApiClient:
+    """Pooled, rate-limited client for one external API.
+
+    Args:
+        name: API name used in logs
+        capacity: Token bucket size (requests that may burst)
+        rate: Sustained requests per second
+        timeout: Default request timeout in seconds
+        max_retries: Retries for 429/5xx responses and connection errors
+        backoff: Base delay in seconds for exponential backoff
+        pool_size: Keep-alive connections kept per process
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: float,
+        rate: float,
+        timeout: float = 15.0,
+        max_retries: int | None = None,
+        backoff: float = 0.5,
+        pool_size: int | None = None,
+    ):
+        self.name = name
+        self.limiter = RateLimiter(capacity, rate)
+        self.timeout = timeout
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else int(os.environ.get("INTEGRATION_HTTP_RETRIES", 3))
+        )
+        self.backoff = backoff
+        self.pool_size = (
+            pool_size
+            if pool_size is not None
+            else int(os.environ.get("INTEGRATION_HTTP_POOL_SIZE", 10))
+        )
+        self._lock = threading.Lock()
+        self._client: httpx.Client | None = None
+        self._pid: int | None = None
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        """The process's pooled client (a forked child builds its own)."""
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = httpx.Client(timeout=self.timeout, limits=self._limits())
+                self._pid = os.getpid()
+            return self._client
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+
+    def _retry_delay(self, resp: httpx.Response | None, attempt: int) -> float:
+        delay = None
+        if resp is not None:
+            delay = _header_float(resp.headers, "Retry-After")
+            if delay is None and resp.status_code == 429:
+                try:
+                    delay = float(resp.json().get("retry_after"))
+                except Exception:
+                    delay = None
+        if delay is None:
+            delay = self.backoff * 2**attempt
+        return min(max(delay, 0.0), _MAX_WAIT)
+
+    def _after_response(self, resp: httpx.Response, attempt: int) -> float | None:
+        """Record a response; returns the delay before retrying, or None."""
+        self.limiter.update(resp.headers)
+        if resp.status_code not in _RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        delay = self._retry_delay(resp, attempt)
+        if resp.status_code == 429:
+            self.stats["rate_limited"] += 1
+            self.limiter.block(delay)
+        self.stats["retries"] += 1
+        logger.info(
+            "integration_http_retry",
+            api=self.name,
+            status=resp.status_code,
+            attempt=attempt + 1,
+            delay=round(delay, 2),
+        )
+        return delay
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, waiting for the rate limiter and retrying 429/5xx.
+
+        Returns the last response (callers call raise_for_status() as before).
+        """
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve()
+            if wait:
+                time.sleep(wait)
+            self.stats["requests"] += 1
+            try:
+                resp = self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                time.sleep(self._retry_delay(None, attempt))
+                attempt += 1
+                continue
+            delay = self._after_response(resp, attempt)
+            if delay is None:
+                return resp
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def async_session(self) -> AsyncIterator[httpx.AsyncClient]:
+        """A pooled AsyncClient for one async operation (bound to its loop)."""
+        async with httpx.AsyncClient(
+            timeout=self.timeout, limits=self._limits()
+        ) as session:
+            yield session
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        session: httpx.AsyncClient | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Async request(); pass ``session`` from async_session() to reuse it."""
+        if session is None:
+            async with self.async_session() as own:
+                return await self.arequest(method, url, session=own, **kwargs)
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+            self.stats["requests"] += 1
+            try:
+                resp = await session.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._retry_delay(None, attempt))
+                attempt += 1
+                continue
+            delay = self._after_response(resp, attempt)
+            if delay is None:
+                return resp
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Twitch app tokens get 800 points per minute; Discord allows 50 requests/s
+# globally (per-route buckets are smaller and come from the headers)
+twitch_client = ApiClient("twitch", capacity=800, rate=800 / 60)
+discord_client = ApiClient("discord", capacity=50, rate=50, timeout=20.0)
@@ -0,0 +1,230 @@
+"""
+Two-tier cache for rarely changing integration lookups.
+
+Broadcaster IDs, profile images and game names were fetched from Helix on
+every wizard "Get Clips" step and every clip upload, although they almost
+never change. LookupCache keeps them:
+
+- in an in-process LRU with per-entry expiry, so repeat lookups in the same
+  web or worker process cost nothing
+- in the app cache (``app.cache``, Redis when REDIS_URL is set) while a Flask
+  app context is active, so every process shares what one of them fetched
+
+Misses are cached too ("negative caching") with a shorter TTL: a login that
+does not exist, or a game ID Twitch does not know, is not asked for again on
+every request. Callers only put() answers they actually got from the API;
+failed requests are never cached.
+
+The shared tier is best effort: without an app context, or when the cache
+backend errors, lookups fall through to the API, and the tier is retried
+after a short back-off.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CACHE_SIZE = 2048
+_KEY_PREFIX = "integrations:"
+# Seconds to skip the shared tier after a cache backend error
+_SHARED_RETRY_SECONDS = 60.0
+
+_MISSING = object()
+
+_registry: list[LookupCache] = []
+_registry_lock = threading.Lock()
+_shared_down_until = 0.0
+
+
+def _shared_cache():
+    """Return app.cache when an app context is active, else None."""
+    if time.monotonic() < _shared_down_until:
+        return None
+    try:
+        from flask import has_app_context
+
+        if not has_app_context():
+            return None
+        from app.cache import cache
+
+        return cache
+    except Exception:
+        return None
+
+
+def _shared_failed(name: str, e: Exception) -> None:
+    global _shared_down_until
+    _shared_down_until = time.monotonic() + _SHARED_RETRY_SECONDS
+    logger.warning("lookup_cache_shared_unavailable", cache=name, error=str(e))
+
+
+class LookupCache:
+    """In-process LRU plus shared app-cache tier for one kind of lookup.
+
+    Args:
+        name: Namespace for keys and stats (e.g. "twitch.user_id")
+        ttl: Seconds a found value is kept
+        negative_ttl: Seconds a "not found" (None) answer is kept
+        max_entries: In-process LRU capacity; defaults to
+            INTEGRATION_CACHE_SIZE (0 disables the in-process tier)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: int,
+        negative_ttl: int,
+        max_entries: int | None = None,
+    ):
+        self.name = name
+        self.ttl = int(ttl)
+        self.negative_ttl = int(negative_ttl)
+        self.max_entries = max(
+            0,
+            int(
+                max_entries
+                if max_entries is not None
+                else os.environ.get("INTEGRATION_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+            ),
+        )
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "shared_hits": 0, "misses": 0}
+        with _registry_lock:
+            _registry.append(self)
+
+    def _shared_key(self, key: str) -> str:
+        return f"{_KEY_PREFIX}{self.name}:{key}"
+
+    def _ttl_for(self, value: Any) -> int:
+        return self.ttl if value is not None else self.negative_ttl
+
+    def _remember(self, key: str, value: Any) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_for(value), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _memory_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return entry[1]
+
+    def get_many(self, keys: Iterable[str]) -> tuple[dict[str, Any], list[str]]:
+        """Look up keys in memory, then in the shared tier.
+
+        Returns:
+            (found, missing): cached values by key (None for cached misses)
+            and the keys to ask the API for, in order
+        """
+        found: dict[str, Any] = {}
+        pending: list[str] = []
+        for key in dict.fromkeys(k for k in keys if k):
+            value = self._memory_get(key)
+            if value is _MISSING:
+                pending.append(key)
+            else:
+                found[key] = value
+        if not pending:
+            return found, []
+
+        shared = _shared_cache()
+        if shared is not None:
+            try:
+                stored = shared.get_many(*(self._shared_key(k) for k in pending))
+            except Exception as e:
+                _shared_failed(self.name, e)
+                stored = [None] * len(pending)
+            missing = []
+            for key, entry in zip(pending, stored, strict=False):
+                # Values are wrapped so a cached None is told apart from a miss
+                if isinstance(entry, dict) and "v" in entry:
+                    found[key] = entry["v"]
+                    self._remember(key, entry["v"])
+                    with self._lock:
+                        self._counters["shared_hits"] += 1
+                else:
+                    missing.append(key)
+            pending = missing
+
+        with self._lock:
+            self._counters["misses"] += len(pending)
+        return found, pending
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return (True, value) when key is cached (value may be None)."""
+        found, _missing = self.get_many([key])
+        if key in found:
+            return True, found[key]
+        return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        """Cache an API answer; None records that the key does not exist."""
+        self.put_many({key: value})
+
+    def put_many(self, values: dict[str, Any]) -> None:
+        """Cache several API answers at once."""
+        for key, value in values.items():
+            self._remember(key, value)
+        shared = _shared_cache()
+        if shared is None:
+            return
+        # One set_many() per TTL: found values, then cached misses
+        by_ttl: dict[int, dict[str, dict]] = {}
+        for key, value in values.items():
+            by_ttl.setdefault(self._ttl_for(value), {})[self._shared_key(key)] = {
+                "v": value
+            }
+        try:
+            for ttl, mapping in by_ttl.items():
+                shared.set_many(mapping, timeout=ttl)
+        except Exception as e:
+            _shared_failed(self.name, e)
+
+    def clear(self) -> None:
+        """Drop in-process entries (shared entries expire on their own)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the in-process entry count."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters["memory_hits"] + counters["shared_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            "name": self.name,
+            **counters,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+def lookup_cache_stats() -> list[dict]:
+    """Stats of every LookupCache in this process, for the admin system page."""
+    with _registry_lock:
+        caches = list(_registry)
+    return [c.stats() for c in caches]
@@ -5,21 +5,41 @@ Uses client-credentials (app access token) from Config to authenticate requests.
 """
 from __future__ import annotations
 
+import logging
 import time
+from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Any
 
-import httpx
-
+from app.integrations.http_client import twitch_client
+from app.integrations.lookup_cache import LookupCache
 from config.settings import Config
 
+logger = logging.getLogger(__name__)
+
 TWITCH_OAUTH_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
 TWITCH_HELIX_BASE = "https://api.twitch.tv/helix"
 
+# Most IDs Helix /clips and /games accept in one request
+HELIX_MAX_IDS = 100
+# Seconds a resolved lookup is reused before asking Twitch again. Broadcaster
+# IDs and game names practically never change; profile images now and then.
+USER_ID_TTL = 24 * 3600
+PROFILE_IMAGE_TTL = 6 * 3600
+GAME_NAME_TTL = 24 * 3600
+# Unknown logins, users and game IDs are asked for again after this long
+NEGATIVE_TTL = 10 * 60
+
 
 _cached_token: str | None = None
 _cached_expiry: float = 0.0
 
+user_id_cache = LookupCache("twitch.user_id", USER_ID_TTL, NEGATIVE_TTL)
+profile_image_cache = LookupCache(
+    "twitch.profile_image", PROFILE_IMAGE_TTL, NEGATIVE_TTL
+)
+game_name_cache = LookupCache("twitch.game_name", GAME_NAME_TTL, NEGATIVE_TTL)
+
 
 def _get_app_token() -> str:
     """Get an app access token using client credentials, with basic caching."""
@@ -39,7 +59,7 @@ def _get_app_token() -> str:
         "client_secret": client_secret,
         "grant_type": "client_credentials",
     }
-    resp = httpx.post(TWITCH_OAUTH_TOKEN_URL, data=data, timeout=15.0)
+    resp = twitch_client.post(TWITCH_OAUTH_TOKEN_URL, data=data, timeout=15.0)
     resp.raise_for_status()
     payload = resp.json()
     _cached_token = payload.get("access_token")
@@ -59,37 +79,52 @@ def _client_headers() -> dict[str, str]:
 
 
 def get_user_id(username: str) -> str | None:
-    """Resolve a Twitch username (login) to a user/broadcaster ID."""
+    """Resolve a Twitch username (login) to a user/broadcaster ID.
+
+    Results, including unknown logins, are cached (see user_id_cache).
+    """
     if not username:
         return None
+    key = username.strip().lower()
+    hit, user_id = user_id_cache.get(key)
+    if hit:
+        return user_id
     url = f"{TWITCH_HELIX_BASE}/users"
     params = {"login": username}
-    resp = httpx.get(url, headers=_client_headers(), params=params, timeout=15.0)
+    resp = twitch_client.get(
+        url, headers=_client_headers(), params=params, timeout=15.0
+    )
     resp.raise_for_status()
     data = resp.json().get("data", [])
-    if not data:
-        return None
-    return data[0].get("id")
+    user_id = data[0].get("id") if data else None
+    user_id_cache.put(key, user_id)
+    return user_id
 
 
 def get_user_profile_image_url(user_id: str) -> str | None:
     """Fetch Twitch user's profile image URL by user_id.
 
-    Uses Helix /users?id= to retrieve profile_image_url.
+    Uses Helix /users?id= to retrieve profile_image_url. Answers are cached
+    (see profile_image_cache); failed requests are not.
     """
     if not user_id:
         return None
+    hit, image_url = profile_image_cache.get(str(user_id))
+    if hit:
+        return image_url
     url = f"{TWITCH_HELIX_BASE}/users"
     params = {"id": user_id}
-    resp = httpx.get(url, headers=_client_headers(), params=params, timeout=15.0)
     try:
+        resp = twitch_client.get(
+            url, headers=_client_headers(), params=params, timeout=15.0
+        )
         resp.raise_for_status()
         data = resp.json().get("data", [])
-        if not data:
-            return None
-        return data[0].get("profile_image_url")
     except Exception:
         return None
+    image_url = data[0].get("profile_image_url") if data else None
+    profile_image_cache.put(str(user_id), image_url)
+    return image_url
 
 
 @dataclass
@@ -107,9 +142,127 @@ class Clip:
     game_name: str | None = None
 
 
+def _clip_from_helix(c: dict[str, Any], game_names: dict[str, str]) -> Clip:
+    game_id = c.get("game_id")
+    return Clip(
+        id=c.get("id"),
+        url=c.get("url"),
+        title=c.get("title"),
+        created_at=c.get("created_at"),
+        duration=float(c.get("duration", 0)),
+        view_count=int(c.get("view_count", 0)),
+        thumbnail_url=c.get("thumbnail_url"),
+        creator_name=c.get("creator_name"),
+        creator_id=c.get("creator_id"),
+        game_id=game_id,
+        game_name=game_names.get(game_id) if game_id else None,
+    )
+
+
+def _chunks(values: list[str], size: int = HELIX_MAX_IDS) -> Iterable[list[str]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _cached_game_names(game_ids: Iterable[str]) -> tuple[dict[str, str], list[str]]:
+    """Split game IDs into cached names and IDs that need a lookup."""
+    cached, missing = game_name_cache.get_many(str(g) for g in game_ids if g)
+    return {gid: name for gid, name in cached.items() if name}, missing
+
+
+def _store_game_names(chunk: list[str], data: list[dict[str, Any]]) -> dict[str, str]:
+    """Cache a /games response for the IDs requested; returns the names found."""
+    found = {g.get("id"): g.get("name") for g in data}
+    game_name_cache.put_many({gid: found.get(gid) or None for gid in chunk})
+    return {gid: name for gid, name in found.items() if name}
+
+
+def get_game_names(game_ids: Iterable[str]) -> dict[str, str]:
+    """Resolve game IDs to names, up to 100 IDs per Helix /games call.
+
+    Names (and IDs Twitch does not know) are cached in game_name_cache.
+    IDs whose lookup failed are left out.
+    """
+    names, missing = _cached_game_names(game_ids)
+    for chunk in _chunks(missing):
+        try:
+            resp = twitch_client.get(
+                f"{TWITCH_HELIX_BASE}/games",
+                headers=_client_headers(),
+                # Twitch API allows repeating id params
+                params=[("id", gid) for gid in chunk],
+                timeout=15.0,
+            )
+            resp.raise_for_status()
+            names.update(_store_game_names(chunk, resp.json().get("data", [])))
+        except Exception:
+            continue
+    return names
+
+
+async def aget_game_names(game_ids: Iterable[str], session=None) -> dict[str, str]:
+    """Async get_game_names(); shares its cache."""
+    names, missing = _cached_game_names(game_ids)
+    for chunk in _chunks(missing):
+        try:
+            resp = await twitch_client.arequest(
+                "GET",
+                f"{TWITCH_HELIX_BASE}/games",
+                session=session,
+                headers=_client_headers(),
+                params=[("id", gid) for gid in chunk],
+                timeout=15.0,
+            )
+            resp.raise_for_status()
+            names.update(_store_game_names(chunk, resp.json().get("data", [])))
+        except Exception:
+            continue
+    return names
+
+
+def get_clips_by_ids(clip_ids: Iterable[str]) -> dict[str, Clip]:
+    """Fetch many clips by ID (slug), up to 100 IDs per Helix /clips call.
+
+    Game names for all clips are resolved with get_game_names(). IDs match
+    case-insensitively (slugs are often lower-cased from URLs).
+
+    Returns:
+        Clip objects keyed by the requested IDs; unknown IDs and IDs whose
+        request failed are left out
+    """
+    wanted: dict[str, list[str]] = {}
+    for cid in clip_ids:
+        if cid:
+            wanted.setdefault(cid.lower(), []).append(cid)
+
+    raw: list[dict[str, Any]] = []
+    for chunk in _chunks(list(wanted)):
+        try:
+            resp = twitch_client.get(
+                f"{TWITCH_HELIX_BASE}/clips",
+                headers=_client_headers(),
+                params=[("id", wanted[key][0]) for key in chunk],
+                timeout=15.0,
+            )
+            resp.raise_for_status()
+            raw.extend(resp.json().get("data", []))
+        except Exception:
+            continue
+
+    game_names = get_game_names(c.get("game_id") for c in raw)
+    clips: dict[str, Clip] = {}
+    for c in raw:
+        clip = _clip_from_helix(c, game_names)
+        for requested in wanted.get((clip.id or "").lower(), []):
+            clips[requested] = clip
+    return clips
+
+
 def get_clip_by_id(clip_id: str) -> Clip | None:
     """Fetch a single clip by its ID from the Twitch Helix API.
 
+    Use get_clips_by_ids() for more than one clip.
+
     Args:
         clip_id: The Twitch clip ID (slug from the URL)
 
@@ -118,67 +271,16 @@ def get_clip_by_id(clip_id: str) -> Clip | None:
     """
     if not clip_id:
         return None
-
-    url = f"{TWITCH_HELIX_BASE}/clips"
-    params = {"id": clip_id}
-
-    try:
-        resp = httpx.get(url, headers=_client_headers(), params=params, timeout=15.0)
-        resp.raise_for_status()
-        j = resp.json()
-        raw = j.get("data", [])
-        if not raw:
-            return None
-
-        c = raw[0]
-
-        # Fetch game name if game_id is present
-        game_name = None
-        game_id = c.get("game_id")
-        if game_id:
-            try:
-                g_resp = httpx.get(
-                    f"{TWITCH_HELIX_BASE}/games",
-                    headers=_client_headers(),
-                    params={"id": game_id},
-                    timeout=15.0,
-                )
-                g_resp.raise_for_status()
-                g_items = g_resp.json().get("data", [])
-                if g_items:
-                    game_name = g_items[0].get("name")
-            except Exception:
-                pass
-
-        return Clip(
-            id=c.get("id"),
-            url=c.get("url"),
-            title=c.get("title"),
-            created_at=c.get("created_at"),
-            duration=float(c.get("duration", 0)),
-            view_count=int(c.get("view_count", 0)),
-            thumbnail_url=c.get("thumbnail_url"),
-            creator_name=c.get("creator_name"),
-            creator_id=c.get("creator_id"),
-            game_id=game_id,
-            game_name=game_name,
-        )
-    except Exception:
-        return None
+    return get_clips_by_ids([clip_id]).get(clip_id)
 
 
-def get_clips(
+def _clips_params(
     broadcaster_id: str,
-    started_at: str | None = None,
-    ended_at: str | None = None,
-    first: int = 20,
-    after: str | None = None,
+    started_at: str | None,
+    ended_at: str | None,
+    first: int,
+    after: str | None,
 ) -> dict[str, Any]:
-    """Fetch clips for a broadcaster.
-
-    Returns dict with keys: items: List[Clip], pagination: {cursor}
-    """
-    url = f"{TWITCH_HELIX_BASE}/clips"
     params: dict[str, Any] = {
         "broadcaster_id": broadcaster_id,
         "first": max(1, min(first, 100)),
@@ -189,140 +291,196 @@ def get_clips(
         params["ended_at"] = ended_at
     if after:
         params["after"] = after
+    return params
 
-    resp = httpx.get(url, headers=_client_headers(), params=params, timeout=20.0)
-    resp.raise_for_status()
-    j = resp.json()
-    raw = j.get("data", [])
-    # Collect game_ids for enrichment
-    game_ids = {c.get("game_id") for c in raw if c.get("game_id")}
-    game_map: dict[str, str] = {}
-    if game_ids:
-        try:
-            gids = list(game_ids)
-            # Twitch API allows repeating game_id params
-            games_params = []
-            for gid in gids:
-                games_params.append(("id", gid))
-            g_resp = httpx.get(
-                f"{TWITCH_HELIX_BASE}/games",
-                headers=_client_headers(),
-                params=games_params,
-                timeout=15.0,
-            )
-            g_resp.raise_for_status()
-            g_items = g_resp.json().get("data", [])
-            for g in g_items:
-                game_map[g.get("id")] = g.get("name")
-        except Exception:
-            game_map = {}
-
-    items: list[Clip] = []
-    for c in raw:
-        items.append(
-            Clip(
-                id=c.get("id"),
-                url=c.get("url"),
-                title=c.get("title"),
-                created_at=c.get("created_at"),
-                duration=float(c.get("duration", 0)),
-                view_count=int(c.get("view_count", 0)),
-                thumbnail_url=c.get("thumbnail_url"),
-                creator_name=c.get("creator_name"),
-                creator_id=c.get("creator_id"),
-                game_id=c.get("game_id"),
-                game_name=game_map.get(c.get("game_id")) if c.get("game_id") else None,
-            )
-        )
 
+def _clips_page(
+    j: dict[str, Any], raw: list[dict[str, Any]], game_names: dict[str, str]
+) -> dict[str, Any]:
     return {
-        "items": [clip.__dict__ for clip in items],
+        "items": [_clip_from_helix(c, game_names).__dict__ for c in raw],
         "pagination": j.get("pagination", {}),
     }
 
 
-def get_clips_for_duration(
+def get_clips(
     broadcaster_id: str,
-    target_duration_seconds: int,
     started_at: str | None = None,
     ended_at: str | None = None,
-    max_clips: int = 100,
+    first: int = 20,
+    after: str | None = None,
 ) -> dict[str, Any]:
-    """Fetch clips iteratively until total duration meets or exceeds target.
-
-    Args:
-        broadcaster_id: Twitch broadcaster/user ID
-        target_duration_seconds: Target total duration in seconds
-        started_at: Optional start date filter (RFC3339)
-        ended_at: Optional end date filter (RFC3339)
-        max_clips: Maximum number of clips to fetch (safety limit)
+    """Fetch clips for a broadcaster.
 
-    Returns:
-        dict with keys: items: List[Clip], pagination: {cursor}, total_duration: float
+    Returns dict with keys: items: List[Clip], pagination: {cursor}
     """
-    all_clips: list[dict[str, Any]] = []
-    total_duration = 0.0
-    cursor = None
-    batch_size = 20  # Fetch clips in batches
+    resp = twitch_client.get(
+        f"{TWITCH_HELIX_BASE}/clips",
+        headers=_client_headers(),
+        params=_clips_params(broadcaster_id, started_at, ended_at, first, after),
+        timeout=20.0,
+    )
+    resp.raise_for_status()
+    j = resp.json()
+    raw = j.get("data", [])
+    return _clips_page(j, raw, get_game_names(c.get("game_id") for c in raw))
 
-    import logging
 
-    logger = logging.getLogger(__name__)
-    logger.info(
-        f"[Twitch] Starting duration-based fetch: target={target_duration_seconds}s, max_clips={max_clips}"
+async def aget_clips(
+    broadcaster_id: str,
+    started_at: str | None = None,
+    ended_at: str | None = None,
+    first: int = 20,
+    after: str | None = None,
+    session=None,
+) -> dict[str, Any]:
+    """Async get_clips(); pass a twitch_client.async_session() to pool requests."""
+    resp = await twitch_client.arequest(
+        "GET",
+        f"{TWITCH_HELIX_BASE}/clips",
+        session=session,
+        headers=_client_headers(),
+        params=_clips_params(broadcaster_id, started_at, ended_at, first, after),
+        timeout=20.0,
     )
+    resp.raise_for_status()
+    j = resp.json()
+    raw = j.get("data", [])
+    game_names = await aget_game_names((c.get("game_id") for c in raw), session=session)
+    return _clips_page(j, raw, game_names)
+
+
+class _DurationCollector:
+    """Collects pages of clips until their total duration reaches a target.
+
+    Shared by get_clips_for_duration() and aget_clips_for_duration(), which
+    only differ in how they fetch each page.
+    """
+
+    batch_size = 20  # Fetch clips in batches
 
-    while total_duration < target_duration_seconds and len(all_clips) < max_clips:
-        # Fetch a batch of clips
-        result = get_clips(
-            broadcaster_id=broadcaster_id,
-            started_at=started_at,
-            ended_at=ended_at,
-            first=min(batch_size, max_clips - len(all_clips)),
-            after=cursor,
+    def __init__(self, target_duration_seconds: int, max_clips: int):
+        self.target = target_duration_seconds
+        self.max_clips = max_clips
+        self.clips: list[dict[str, Any]] = []
+        self.total_duration = 0.0
+        self.cursor: str | None = None
+        self.done = False
+        logger.info(
+            f"[Twitch] Starting duration-based fetch: target={target_duration_seconds}s, max_clips={max_clips}"
         )
 
+    def next_page_size(self) -> int | None:
+        """Clips to request next, or None when finished."""
+        if (
+            self.done
+            or self.total_duration >= self.target
+            or len(self.clips) >= self.max_clips
+        ):
+            return None
+        return min(self.batch_size, self.max_clips - len(self.clips))
+
+    def add_page(self, result: dict[str, Any]) -> None:
         batch_clips = result.get("items", [])
         if not batch_clips:
             # No more clips available
             logger.info(
-                f"[Twitch] No more clips available. Total: {len(all_clips)} clips, {total_duration:.1f}s"
+                f"[Twitch] No more clips available. Total: {len(self.clips)} clips, {self.total_duration:.1f}s"
             )
-            break
+            self.done = True
+            return
 
         logger.info(f"[Twitch] Fetched batch of {len(batch_clips)} clips")
 
         # Add clips and accumulate duration
         for clip in batch_clips:
-            all_clips.append(clip)
-            clip_duration = clip.get("duration", 0.0)
-            total_duration += clip_duration
+            self.clips.append(clip)
+            self.total_duration += clip.get("duration", 0.0)
 
             # Stop if we've reached our target
-            if total_duration >= target_duration_seconds:
+            if self.total_duration >= self.target:
                 logger.info(
-                    f"[Twitch] Target reached: {len(all_clips)} clips, {total_duration:.1f}s >= {target_duration_seconds}s"
+                    f"[Twitch] Target reached: {len(self.clips)} clips, {self.total_duration:.1f}s >= {self.target}s"
                 )
                 break
 
         # Check if we've reached target or safety limit
-        if total_duration >= target_duration_seconds or len(all_clips) >= max_clips:
-            break
+        if self.total_duration >= self.target or len(self.clips) >= self.max_clips:
+            self.done = True
+            return
 
         # Get pagination cursor for next batch
-        pagination = result.get("pagination", {})
-        cursor = pagination.get("cursor")
-        if not cursor:
+        self.cursor = result.get("pagination", {}).get("cursor")
+        if not self.cursor:
             # No more pages available
             logger.info(
-                f"[Twitch] No more pages. Total: {len(all_clips)} clips, {total_duration:.1f}s"
+                f"[Twitch] No more pages. Total: {len(self.clips)} clips, {self.total_duration:.1f}s"
             )
-            break
+            self.done = True
 
-    logger.info(f"[Twitch] Final result: {len(all_clips)} clips, {total_duration:.1f}s")
+    def result(self) -> dict[str, Any]:
+        logger.info(
+            f"[Twitch] Final result: {len(self.clips)} clips, {self.total_duration:.1f}s"
+        )
+        return {
+            "items": self.clips,
+            "pagination": {"cursor": self.cursor} if self.cursor else {},
+            "total_duration": self.total_duration,
+        }
 
-    return {
-        "items": all_clips,
-        "pagination": {"cursor": cursor} if cursor else {},
-        "total_duration": total_duration,
-    }
+
+def get_clips_for_duration(
+    broadcaster_id: str,
+    target_duration_seconds: int,
+    started_at: str | None = None,
+    ended_at: str | None = None,
+    max_clips: int = 100,
+) -> dict[str, Any]:
+    """Fetch clips iteratively until total duration meets or exceeds target.
+
+    Args:
+        broadcaster_id: Twitch broadcaster/user ID
+        target_duration_seconds: Target total duration in seconds
+        started_at: Optional start date filter (RFC3339)
+        ended_at: Optional end date filter (RFC3339)
+        max_clips: Maximum number of clips to fetch (safety limit)
+
+    Returns:
+        dict with keys: items: List[Clip], pagination: {cursor}, total_duration: float
+    """
+    collector = _DurationCollector(target_duration_seconds, max_clips)
+    while (first := collector.next_page_size()) is not None:
+        collector.add_page(
+            get_clips(
+                broadcaster_id=broadcaster_id,
+                started_at=started_at,
+                ended_at=ended_at,
+                first=first,
+                after=collector.cursor,
+            )
+        )
+    return collector.result()
+
+
+async def aget_clips_for_duration(
+    broadcaster_id: str,
+    target_duration_seconds: int,
+    started_at: str | None = None,
+    ended_at: str | None = None,
+    max_clips: int = 100,
+) -> dict[str, Any]:
+    """Async get_clips_for_duration(); all pages share one pooled session."""
+    collector = _DurationCollector(target_duration_seconds, max_clips)
+    async with twitch_client.async_session() as session:
+        while (first := collector.next_page_size()) is not None:
+            collector.add_page(
+                await aget_clips(
+                    broadcaster_id=broadcaster_id,
+                    started_at=started_at,
+                    ended_at=ended_at,
+                    first=first,
+                    after=collector.cursor,
+                    session=session,
+                )
+            )
+    return collector.result()
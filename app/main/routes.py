@@ -929,31 +929,20 @@ def media_library():
                 if not m.file_path or not os.path.exists(m.file_path):
                     continue
                 # Use ffprobe to extract duration and basic video props
-                probe_cmd = [
-                    _resolve_binary(current_app, "ffprobe"),
-                    "-v",
-                    "error",
-                    "-select_streams",
-                    "v:0",
-                    "-show_entries",
-                    "stream=width,height,r_frame_rate",
-                    "-show_entries",
-                    "format=duration",
-                    "-of",
-                    "json",
-                    m.file_path,
-                ]
-                out = subprocess.check_output(probe_cmd, text=True, encoding="utf-8")
-                import json as _json
+                from app import media_probe
 
-                data = _json.loads(out)
-                st = (data.get("streams") or [{}])[0]
-                fr = st.get("r_frame_rate") or "0/1"
-                try:
-                    num, den = fr.split("/")
-                    m.framerate = (float(num) / float(den)) if float(den) != 0 else None
-                except Exception:
-                    m.framerate = None
+                data = media_probe.probe(
+                    m.file_path,
+                    _resolve_binary(current_app, "ffprobe"),
+                    checksum=m.checksum,
+                    config=current_app.config,
+                )
+                if data is None:
+                    continue
+                st = media_probe.first_stream(data, "video") or {}
+                m.framerate = (
+                    media_probe.parse_frame_rate(st.get("r_frame_rate")) or None
+                )
                 try:
                     m.width = (
                         int(st.get("width")) if st.get("width") is not None else m.width
@@ -965,10 +954,7 @@ def media_library():
                     )
                 except Exception:
                     pass
-                try:
-                    m.duration = float((data.get("format") or {}).get("duration") or 0)
-                except Exception:
-                    m.duration = None
+                m.duration = media_probe.duration_of(data) or 0.0
                 dirty = True
             except Exception:
                 continue
@@ -0,0 +1,349 @@
+"""
+Memoized ffprobe metadata shared by compile, download and web routes.
+
+Every caller that needs a file's duration, dimensions, framerate or audio
+layout goes through probe(), which runs ffprobe once with
+``-show_format -show_streams`` and caches the parsed JSON:
+
+- in-process LRU (PROBE_CACHE_SIZE entries), so the several probes a compile
+  makes of the same intro, music track or concat output cost one subprocess
+- optional Redis tier (PROBE_CACHE_REDIS_URL, PROBE_CACHE_TTL) shared by the
+  web app and workers
+
+Entries are keyed by the content checksum when the caller knows it (MediaFile
+rows), otherwise by the file's resolved path, size and mtime, so an edited or
+replaced file is probed again. Failed probes are never cached.
+
+The Redis tier is best effort: when redis is missing or unreachable lookups
+fall through to ffprobe, and the tier is retried after a short back-off.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_TTL = 7 * 24 * 3600
+_REDIS_PREFIX = "clippy:probe:"
+# Seconds to skip the Redis tier after a connection error
+_REDIS_RETRY_SECONDS = 60.0
+
+_CACHE_SINGLETON: ProbeCache | None = None
+_SINGLETON_LOCK = threading.Lock()
+
+
+class ProbeCache:
+    """Two-tier (in-process LRU + optional Redis) cache of ffprobe results.
+
+    Args:
+        max_entries: In-process LRU capacity (0 disables memoization)
+        redis_url: Redis URL for the shared tier, or None to disable it
+        ttl: Expiry of Redis entries in seconds
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        redis_url: str | None = None,
+        ttl: int = DEFAULT_TTL,
+    ):
+        self.max_entries = max(0, int(max_entries))
+        self.redis_url = redis_url or None
+        self.ttl = int(ttl)
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._counters = {
+            "memory_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "failures": 0,
+        }
+
+    @classmethod
+    def from_config(cls, config) -> ProbeCache:
+        """Create a cache from PROBE_CACHE_* settings.
+
+        Args:
+            config: Mapping with those keys (app.config, or os.environ for
+                tasks that run without a Flask app)
+        """
+        max_entries, redis_url, ttl = _settings(config)
+        return cls(max_entries=max_entries, redis_url=redis_url, ttl=ttl)
+
+    # ----- keys -----
+    @staticmethod
+    def make_key(
+        path: str, extra_args: list[str] | None = None, checksum: str | None = None
+    ) -> str | None:
+        """Return the cache key for path, or None if the file can't be stat()ed."""
+        if checksum:
+            ident = f"sha256:{checksum}"
+        else:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            ident = f"file:{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}"
+        if extra_args:
+            ident += "|" + " ".join(extra_args)
+        return ident
+
+    # ----- tiers -----
+    def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+
+                self._redis = redis.Redis.from_url(
+                    self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+                )
+            except Exception as e:  # missing package or malformed URL
+                self._redis_failed(e)
+                return None
+        return self._redis
+
+    def _redis_failed(self, e: Exception) -> None:
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+        logger.warning("probe_cache_redis_unavailable", error=str(e))
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached probe for key from memory, then Redis."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return data
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = client.get(_REDIS_PREFIX + key)
+            except Exception as e:
+                self._redis_failed(e)
+                raw = None
+            if raw:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    data = None
+                if data is not None:
+                    self._remember(key, data)
+                    with self._lock:
+                        self._counters["redis_hits"] += 1
+                    return data
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def _remember(self, key: str, data: dict) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, data: dict) -> None:
+        """Store a successful probe in both tiers."""
+        self._remember(key, data)
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.setex(_REDIS_PREFIX + key, self.ttl, json.dumps(data))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+
+    def clear(self) -> None:
+        """Drop in-process entries (Redis entries expire on their own)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the in-process entry count."""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters["memory_hits"] + counters["redis_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "redis_enabled": bool(self.redis_url),
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+def _settings(config) -> tuple[int, str | None, int]:
+    size = config.get("PROBE_CACHE_SIZE")
+    return (
+        max(0, int(DEFAULT_CACHE_SIZE if size in (None, "") else size)),
+        str(config.get("PROBE_CACHE_REDIS_URL") or "") or None,
+        int(config.get("PROBE_CACHE_TTL") or DEFAULT_TTL),
+    )
+
+
+def get_probe_cache(config=None) -> ProbeCache:
+    """Return the process-wide probe cache.
+
+    Args:
+        config: app.config, or os.environ for tasks without a Flask app;
+            the cache is rebuilt when its settings change
+    """
+    global _CACHE_SINGLETON
+    if config is None:
+        config = os.environ
+    try:
+        wanted = _settings(config)
+    except (TypeError, ValueError) as e:
+        logger.warning("probe_cache_config_invalid", error=str(e))
+        wanted = (DEFAULT_CACHE_SIZE, None, DEFAULT_TTL)
+    with _SINGLETON_LOCK:
+        current = _CACHE_SINGLETON
+        if (
+            current is None
+            or (
+                current.max_entries,
+                current.redis_url,
+                current.ttl,
+            )
+            != wanted
+        ):
+            _CACHE_SINGLETON = current = ProbeCache(*wanted)
+        return current
+
+
+def probe(
+    path: str,
+    ffprobe_bin: str = "ffprobe",
+    extra_args: list[str] | None = None,
+    checksum: str | None = None,
+    timeout: float | None = 30,
+    config=None,
+) -> dict[str, Any] | None:
+    """Return ffprobe's format and stream info for path, memoized.
+
+    Args:
+        path: Media file to probe
+        ffprobe_bin: ffprobe executable
+        extra_args: Additional ffprobe arguments (FFPROBE_ARGS)
+        checksum: Content checksum, when known, used as the cache identity
+        timeout: ffprobe timeout in seconds
+        config: Settings mapping passed to get_probe_cache()
+
+    Returns:
+        Parsed ``{"format": {...}, "streams": [...]}``, or None if the file
+        is missing or ffprobe fails
+    """
+    extra_args = list(extra_args or [])
+    cache = get_probe_cache(config)
+    key = cache.make_key(path, extra_args, checksum)
+    if key is None:
+        return None
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    cmd = [
+        ffprobe_bin,
+        *extra_args,
+        "-v",
+        "quiet",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe exited with {result.returncode}")
+        data = json.loads(result.stdout)
+        if not isinstance(data, dict):
+            raise ValueError("unexpected ffprobe output")
+    except Exception as e:
+        cache.record_failure()
+        logger.debug("probe_failed", path=path, error=str(e))
+        return None
+
+    data.setdefault("format", {})
+    data.setdefault("streams", [])
+    cache.put(key, data)
+    return data
+
+
+def parse_frame_rate(value: Any) -> float:
+    """Parse an ffprobe rate such as "30000/1001" or "30"; 0.0 if unusable."""
+    try:
+        if isinstance(value, str) and "/" in value:
+            num, den = value.split("/", 1)
+            return float(num) / float(den) if float(den or 0) else 0.0
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def first_stream(data: dict | None, codec_type: str) -> dict | None:
+    """Return the first stream of codec_type ("video", "audio") in a probe."""
+    for stream in (data or {}).get("streams") or []:
+        if stream.get("codec_type") == codec_type:
+            return stream
+    return None
+
+
+def duration_of(data: dict | None) -> float | None:
+    """Return the container duration in seconds, or None if unknown."""
+    try:
+        value = ((data or {}).get("format") or {}).get("duration")
+        return float(value) if value not in (None, "", "N/A") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def has_audio(data: dict | None) -> bool:
+    """Return True when the probe lists at least one audio stream."""
+    return first_stream(data, "audio") is not None
+
+
+def video_metadata(data: dict | None) -> dict[str, Any]:
+    """Return duration, width, height and framerate of a probe's video stream.
+
+    Returns:
+        Dict with those keys, or {} when the file has no video stream
+    """
+    video = first_stream(data, "video")
+    if video is None:
+        return {}
+    try:
+        width = int(video.get("width") or 0)
+        height = int(video.get("height") or 0)
+    except (TypeError, ValueError):
+        width = height = 0
+    return {
+        "duration": duration_of(data) or 0.0,
+        "width": width,
+        "height": height,
+        "framerate": parse_frame_rate(video.get("r_frame_rate", "0/1")),
+    }
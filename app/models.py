@@ -11,8 +11,11 @@ from enum import Enum
 
 from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from app.clip_urls import source_clip_key
+
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
 
@@ -615,6 +618,10 @@ class Project(db.Model):
         db.Float, default=250.0
     )  # 10.0 to 1000.0 ms, how fast to recover
 
+    # Final-stage render engine override ('multipass', 'single_pass');
+    # None falls back to the tier setting, then COMPILE_RENDER_ENGINE
+    render_engine = db.Column(db.String(20), nullable=True)
+
     # Output file information
     output_filename = db.Column(db.String(255))
     output_file_size = db.Column(db.BigInteger)
@@ -782,6 +789,9 @@ class Clip(db.Model):
     source_platform = db.Column(db.String(50))  # 'discord', 'twitch', 'upload'
     source_url = db.Column(db.String(500))
     source_id = db.Column(db.String(100))  # Platform-specific ID
+    # clip_urls.source_clip_key(source_url), kept in sync by _sync_source_key;
+    # indexed for media reuse lookups
+    source_key = db.Column(db.String(500), index=True)
 
     # Optional enriched metadata for UI and rendering
     creator_name = db.Column(db.String(120))  # who clipped it / creator
@@ -835,6 +845,11 @@ class Clip(db.Model):
         seconds = int(self.duration % 60)
         return f"{minutes:02d}:{seconds:02d}"
 
+    @validates("source_url")
+    def _sync_source_key(self, key: str, value: str | None) -> str | None:
+        self.source_key = source_clip_key(value) or None
+        return value
+
     def __repr__(self) -> str:
         return f"<Clip {self.title}>"
 
@@ -1020,10 +1035,75 @@ class ProcessingJob(db.Model):
             return (self.completed_at - self.started_at).total_seconds()
         return None
 
+    def all_logs(self) -> list[dict]:
+        """
+        Get the job's log entries in order.
+
+        Combines entries older workers stored in result_data["logs"] with
+        rows appended through the job log channel.
+
+        Returns:
+            list[dict]: Log entries with ts, level, message and status
+        """
+        legacy = []
+        if isinstance(self.result_data, dict):
+            legacy = list(self.result_data.get("logs") or [])
+        return legacy + [entry.to_dict() for entry in self.log_entries]
+
     def __repr__(self) -> str:
         return f"<ProcessingJob {self.job_type} - {self.status}>"
 
 
+class ProcessingJobLog(db.Model):
+    """
+    Append-only log line for a processing job.
+
+    Workers ship log lines in batches; storing each line as its own row keeps
+    appends cheap instead of rewriting the job's result_data JSON per line.
+    """
+
+    __tablename__ = f"{_TABLE_PREFIX}processing_job_logs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(
+        db.Integer,
+        db.ForeignKey(f"{_TABLE_PREFIX}processing_jobs.id"),
+        nullable=False,
+        index=True,
+    )
+    ts = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    level = db.Column(db.String(20), nullable=False, default="info")
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(50))
+
+    job = db.relationship(
+        "ProcessingJob",
+        backref=db.backref(
+            "log_entries",
+            lazy="dynamic",
+            cascade="all, delete-orphan",
+            order_by="ProcessingJobLog.id",
+        ),
+    )
+
+    def to_dict(self) -> dict:
+        """
+        Convert log entry to the dict shape used in result_data["logs"].
+
+        Returns:
+            dict: ts (ISO 8601), level, message, status
+        """
+        return {
+            "ts": self.ts.isoformat() if self.ts else None,
+            "level": self.level,
+            "message": self.message,
+            "status": self.status,
+        }
+
+    def __repr__(self) -> str:
+        return f"<ProcessingJobLog job={self.job_id} {self.level}>"
+
+
 class Tier(db.Model):
     """Subscription tier/plan defining quotas and features.
 
@@ -1088,6 +1168,12 @@ class Tier(db.Model):
         nullable=True,
         doc="Maximum number of members per team (None => unlimited)",
     )
+    # Rendering
+    render_engine = db.Column(
+        db.String(20),
+        nullable=True,
+        doc="Final-stage render engine: multipass|single_pass (None => system default)",
+    )
 
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
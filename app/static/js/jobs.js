@@ -79,7 +79,7 @@
       if (!modalEl) return false;
       modalEl.querySelector('.modal-title').textContent = `${data.job_type} · ${data.project_name || ('Project #' + (data.project_id || ''))}`;
       const pre = modalEl.querySelector('pre');
-      const logs = (data.result_data && data.result_data.logs) || [];
+      const logs = data.logs || (data.result_data && data.result_data.logs) || [];
       pre.textContent = logs.map(l => {
         const ts = l.ts ? new Date(l.ts).toLocaleString() : '';
         const lvl = l.level ? `[${l.level.toUpperCase()}]` : '';
@@ -430,19 +430,37 @@ async function startDownloadPolling(wizard) {
 
   async function poll() {
     let done = 0, failed = 0;
+    // Clips downloaded by one batch task share its task ID; fetch it once per tick
+    const statuses = {};
 
     for (const t of realTasks) {
       if (!t || !t.task_id) continue;
-      if (t.done) { done++; continue; }
+      if (t.done) { done++; if (t.failed) failed++; continue; }
 
       try {
-        const res = await fetch(`/api/tasks/${t.task_id}`);
-        const s = await res.json();
+        if (!(t.task_id in statuses)) {
+          const res = await fetch(`/api/tasks/${t.task_id}`);
+          statuses[t.task_id] = await res.json();
+        }
+        const s = statuses[t.task_id];
         const st = String((s && (s.state || s.status)) || '').toUpperCase();
 
         if (st) t._lastState = st;
 
-        if (st === 'SUCCESS' || (s && s.ready && st !== 'FAILURE')) {
+        // Batch tasks report each clip: info.clips while running, result.clips when done
+        const perClip = s && ((s.result && s.result.clips) || (s.info && s.info.clips));
+        const clipState = perClip ? perClip[String(t.clip_id)] : null;
+        const clipStatus = clipState && typeof clipState === 'object' ? clipState.status : clipState;
+
+        if (clipStatus === 'failed') {
+          t.done = true;
+          t.failed = true;
+          done++;
+          failed++;
+        } else if (clipStatus === 'completed' || clipStatus === 'reused') {
+          t.done = true;
+          done++;
+        } else if (st === 'SUCCESS' || (s && s.ready && st !== 'FAILURE')) {
           t.done = true;
           done++;
         } else if (st === 'FAILURE') {
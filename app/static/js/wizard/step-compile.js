@@ -646,7 +646,16 @@ async function startCompilation(wizard) {
         const parts = [];
         if (stage) parts.push(`[${stage}]`);
         if (msg) parts.push(msg);
-        if (parts.length) log.textContent = parts.join(' ') + ` ${pct}%`;
+        const extras = [];
+        if (meta.fps) extras.push(`${Math.round(meta.fps)} fps`);
+        if (meta.eta_seconds != null && meta.eta_seconds > 0) {
+          const mins = Math.floor(meta.eta_seconds / 60);
+          const secs = String(meta.eta_seconds % 60).padStart(2, '0');
+          extras.push(`ETA ${mins}:${secs}`);
+        }
+        if (parts.length) {
+          log.textContent = parts.join(' ') + ` ${pct}%` + (extras.length ? ` · ${extras.join(' · ')}` : '');
+        }
 
         if (st === 'SUCCESS') {
           clearInterval(compileTimer);
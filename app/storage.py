@@ -83,6 +83,58 @@ def compilations_dir(user, project_name: str | None) -> str:
     return os.path.join(root, "compilations")
 
 
+# Shared-storage handshake: the web app writes a random token at the data
+# root; a worker that reads the same token sees the same storage and can hand
+# finished files over through HANDOFF_DIR instead of uploading them
+STORAGE_TOKEN_FILE = ".storage-token"
+HANDOFF_DIR = ".handoff"
+
+
+def handoff_dir() -> str:
+    return os.path.join(data_root(), HANDOFF_DIR)
+
+
+def storage_token(create: bool = False) -> str | None:
+    """Return the data root's handshake token, creating it if asked.
+
+    Returns None when the token file is missing (and create is False) or
+    unreadable.
+    """
+    path = os.path.join(data_root(), STORAGE_TOKEN_FILE)
+    try:
+        with open(path) as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except OSError:
+        pass
+    if not create:
+        return None
+    import secrets
+    import tempfile
+
+    try:
+        os.makedirs(data_root(), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=data_root(), prefix=STORAGE_TOKEN_FILE)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(16))
+        try:
+            # Never replace a token another process created first
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # No hard links on this filesystem
+            if not os.path.exists(path):
+                os.replace(tmp, path)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
 def ensure_dirs(*paths: str) -> None:
     for p in paths:
         try:
@@ -29,6 +29,17 @@ def _resolve_binary(app, name: str) -> str:
     return resolve_bin(app, name)
 
 
+def _refresh_binary_caches() -> None:
+    """Invalidate the binary registry locally and on all workers."""
+    from app.binary_registry import get_registry
+
+    get_registry().invalidate()
+    try:
+        celery_app.control.broadcast("refresh_binaries")
+    except Exception as e:
+        logger.warning("binary_registry_broadcast_failed", error=str(e))
+
+
 def _get_current_version(binary_path: str, binary_name: str) -> str | None:
     """Get current version of a binary."""
     try:
@@ -105,6 +116,10 @@ def check_binary_updates_task(self) -> dict:
 
     try:
         with app.app_context():
+            # Re-resolve binaries (here and on every worker) so versions and
+            # capabilities reflect anything installed since they were cached
+            _refresh_binary_caches()
+
             # Check yt-dlp
             ytdlp_path = _resolve_binary(app, "yt-dlp")
             current_ytdlp = _get_current_version(ytdlp_path, "yt-dlp")
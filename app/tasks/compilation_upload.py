@@ -0,0 +1,279 @@
+"""
+Chunked, resumable upload of the final compilation.
+
+upload_compilation() sends the finished video as one multipart POST once the
+last encode is done: nothing is transferred while ffmpeg runs, a dropped
+connection restarts the whole file, and the server buffers the form before
+saving it. CompilationUpload instead PUTs the file in fixed-size chunks at
+explicit offsets (``/compilation/chunks/<upload_id>?offset=N``), which the
+server appends to a partial file on disk. After a failed PUT the worker asks
+the server for its stored offset and continues from there. A final commit
+carries the SHA-256 of the local file; the server verifies it before moving
+the file into the project's compilations directory.
+
+When the single-pass engine writes the output, it is muxed as fragmented MP4
+(FRAGMENTED_MP4_ARGS) so the file only ever grows, and start_streaming()
+uploads complete chunks from a background thread while ffmpeg is still
+writing. If the bytes sent differ from the finished file (the commit checksum
+fails), the upload is repeated from the finished file. The delivered file
+stays fragmented, so streaming is opt-in (COMPILE_STREAM_UPLOAD).
+
+Servers without the chunk endpoints answer 404/405 to the first PUT;
+UploadUnsupported tells the caller to use upload_compilation() instead.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+import requests
+import structlog
+
+from app.tasks import worker_api
+from app.tasks.segment_cache import file_sha256
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Keeps the moov box at the start and writes self-contained fragments, so a
+# file that is still being written can be read (and uploaded) front to back
+FRAGMENTED_MP4_ARGS = ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+FRAGMENTED_FORMATS = ("mp4", "mov")
+
+
+class UploadUnsupported(Exception):
+    """The server has no chunked upload endpoints (older app version)."""
+
+
+def _flag(config, key: str, default: bool) -> bool:
+    value = config.get(key, default)
+    if isinstance(value, str):
+        return value.lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+def chunked_upload_enabled(config) -> bool:
+    """Return True when COMPILE_CHUNKED_UPLOAD allows chunked uploads."""
+    return _flag(config, "COMPILE_CHUNKED_UPLOAD", True)
+
+
+def stream_upload_enabled(config) -> bool:
+    """Return True when COMPILE_STREAM_UPLOAD allows uploading during encode.
+
+    Off by default: the delivered file is then a fragmented MP4, which some
+    players and editors seek poorly in or reject.
+    """
+    return _flag(config, "COMPILE_STREAM_UPLOAD", False)
+
+
+def chunk_bytes(config) -> int:
+    """Chunk size from COMPILE_UPLOAD_CHUNK_MB (at least 256 KiB)."""
+    try:
+        mb = float(config.get("COMPILE_UPLOAD_CHUNK_MB", 8))
+    except (TypeError, ValueError):
+        return DEFAULT_CHUNK_BYTES
+    return max(256 * 1024, int(mb * 1024 * 1024))
+
+
+class CompilationUpload:
+    """One chunked upload of a project's compilation.
+
+    Args:
+        project_id: Project the compilation belongs to
+        chunk_size: Bytes per PUT
+        poll_interval: Seconds between checks for new data while streaming
+        max_failures: Consecutive failed PUTs tolerated before giving up
+        retry_backoff: Base delay in seconds before resuming after a failure
+    """
+
+    def __init__(
+        self,
+        project_id: int,
+        chunk_size: int = DEFAULT_CHUNK_BYTES,
+        poll_interval: float = 0.25,
+        max_failures: int = 5,
+        retry_backoff: float = 0.5,
+    ):
+        self.project_id = project_id
+        self.chunk_size = max(1, int(chunk_size))
+        self.poll_interval = poll_interval
+        self.max_failures = max_failures
+        self.retry_backoff = retry_backoff
+        self.upload_id = uuid.uuid4().hex
+        self.offset = 0
+        # Bytes sent while the file was still being written
+        self.streamed_bytes = 0
+        self._failures = 0
+        self._path: str | None = None
+        self._thread: threading.Thread | None = None
+        self._writer_done = threading.Event()
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+
+    # -- streaming -----------------------------------------------------------
+
+    def start_streaming(self, path: str) -> None:
+        """Upload path in the background while another process writes it.
+
+        Only complete chunks are sent until writer_finished() is called, then
+        the remainder. Errors are kept for finish(), which falls back to
+        uploading the finished file.
+        """
+        self._path = path
+        self._thread = threading.Thread(
+            target=self._stream, args=(path,), name="compilation-upload", daemon=True
+        )
+        self._thread.start()
+
+    def writer_finished(self) -> None:
+        """Signal that the file being streamed is complete."""
+        self._writer_done.set()
+
+    def cancel_streaming(self) -> None:
+        """Stop streaming and discard what was sent (e.g. the encode failed)."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._writer_done.set()
+        self._thread.join()
+        self._thread = None
+        self._stop.clear()
+        self._writer_done.clear()
+        self._error = None
+        self._restart()
+
+    def _stream(self, path: str) -> None:
+        try:
+            self._pump(path, live=True)
+        except BaseException as e:  # reported by finish()
+            self._error = e
+
+    # -- upload --------------------------------------------------------------
+
+    def finish(
+        self,
+        path: str,
+        thumbnail_path: str | None = None,
+        metadata: dict | None = None,
+    ) -> dict:
+        """Upload whatever is left of path, then commit it.
+
+        Returns:
+            The server's upload result (see worker_api.upload_compilation)
+
+        Raises:
+            UploadUnsupported: The server has no chunked upload endpoints
+        """
+        if self._thread is not None:
+            self._writer_done.set()
+            self._thread.join()
+            self._thread = None
+            if isinstance(self._error, UploadUnsupported):
+                raise self._error
+            if self._error is not None or self._path != path:
+                if self._error is not None:
+                    logger.warning(
+                        "compilation_stream_upload_failed",
+                        project_id=self.project_id,
+                        error=str(self._error),
+                    )
+                self._restart()
+        self._error = None
+
+        metadata = {**(metadata or {}), "file_size": os.path.getsize(path)}
+        retried = False
+        while True:
+            self._pump(path, live=False)
+            try:
+                return worker_api.commit_compilation_upload(
+                    self.project_id,
+                    self.upload_id,
+                    file_sha256(path),
+                    thumbnail_path=thumbnail_path,
+                    metadata=metadata,
+                )
+            except requests.HTTPError as e:
+                status = getattr(e.response, "status_code", None)
+                if status != 409 or retried:
+                    raise
+                retried = True
+                # The streamed bytes don't match the finished file (the muxer
+                # rewrote part of it): upload the finished file again
+                logger.warning(
+                    "compilation_upload_checksum_mismatch",
+                    project_id=self.project_id,
+                    upload_id=self.upload_id,
+                )
+                self._restart()
+
+    def _restart(self) -> None:
+        try:
+            worker_api.abort_compilation_upload(self.project_id, self.upload_id)
+        except requests.RequestException:
+            pass  # pruned by the server later
+        self.upload_id = uuid.uuid4().hex
+        self.offset = 0
+        self.streamed_bytes = 0
+        self._failures = 0
+
+    def _pump(self, path: str, live: bool) -> None:
+        f = None
+        try:
+            while not self._stop.is_set():
+                finished = not live or self._writer_done.is_set()
+                if f is None:
+                    if not os.path.exists(path):
+                        if finished:
+                            raise FileNotFoundError(path)
+                        self._stop.wait(self.poll_interval)
+                        continue
+                    f = open(path, "rb")
+                f.seek(self.offset)
+                data = f.read(self.chunk_size)
+                if not data and finished:
+                    return
+                if not finished and len(data) < self.chunk_size:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self._send(data)
+                if not finished:
+                    self.streamed_bytes = self.offset
+        finally:
+            if f is not None:
+                f.close()
+
+    def _send(self, data: bytes) -> None:
+        """PUT one chunk at self.offset and move self.offset to the stored size."""
+        try:
+            result = worker_api.put_compilation_chunk(
+                self.project_id, self.upload_id, self.offset, data
+            )
+        except requests.HTTPError as e:
+            status = getattr(e.response, "status_code", None)
+            if status in (404, 405) and self.offset == 0:
+                raise UploadUnsupported(str(e)) from e
+            raise
+        except requests.RequestException as e:
+            self._failures += 1
+            if self._failures >= self.max_failures:
+                raise
+            logger.warning(
+                "compilation_chunk_retry",
+                project_id=self.project_id,
+                offset=self.offset,
+                error=str(e),
+            )
+            time.sleep(min(30.0, self.retry_backoff * 2**self._failures))
+            try:
+                # The chunk may have been stored before the connection broke
+                self.offset = worker_api.get_compilation_upload_offset(
+                    self.project_id, self.upload_id
+                )
+            except requests.RequestException:
+                pass
+            return
+        self._failures = 0
+        # A 409 reports the stored offset; the caller re-reads from there
+        self.offset = int(result.get("offset") or 0)
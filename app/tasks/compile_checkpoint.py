@@ -0,0 +1,277 @@
+"""
+Durable, resumable scratch space for compilations.
+
+A compile used to render into a TemporaryDirectory, so a worker restart or
+redeploy mid-compile threw away every finished segment and the retried task
+started again from clip 1. This module gives each compilation a scratch
+directory under a durable root, keyed by a hash of everything that determines
+its output (project settings, the clip timeline, tier limits and the task
+arguments), plus a manifest of the stage outputs completed so far:
+
+    <root>/<key>/manifest.json   completed stages -> output files
+    <root>/<key>/.lock           flock() held by the task using the checkpoint
+    <root>/<key>/...             clip renders, conformed assets, concat, final
+
+A retried task with the same key reopens the directory and skips every stage
+whose recorded outputs still exist with the recorded size. Each stage also
+records the inputs it was built from, so a stage is only reused when those are
+unchanged (e.g. the timeline is rebuilt if a previously failed clip now
+renders). The directory is removed once the compilation is delivered.
+
+Checkpoints whose manifest hasn't been touched for COMPILE_CHECKPOINT_TTL_HOURS
+and that aren't locked by a running task are garbage-collected whenever a new
+checkpoint is opened.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Bump when the key derivation or manifest layout changes
+_MANIFEST_VERSION = 1
+
+_MANIFEST = "manifest.json"
+_LOCK = ".lock"
+
+
+def checkpoint_key(
+    project_data: dict, clips: list[dict], tier_limits: dict, params: dict
+) -> str:
+    """Return the timeline hash identifying one compilation's output.
+
+    Private keys of project_data (``_progress``, ``_prefetch``, ...) hold
+    per-run objects and are ignored.
+
+    Args:
+        project_data: Project dict from API
+        clips: Clip dicts in timeline order (after tier limits)
+        tier_limits: Tier limits dict from API
+        params: Task arguments (intro/outro/transitions/music settings)
+
+    Returns:
+        Hex SHA256 key
+    """
+    payload = {
+        "v": _MANIFEST_VERSION,
+        "project": {k: v for k, v in project_data.items() if not k.startswith("_")},
+        "clips": clips,
+        "tier_limits": tier_limits,
+        "params": params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CompileCheckpoint:
+    """Scratch directory plus a manifest of completed compile stages."""
+
+    def __init__(self, root: str, key: str):
+        self.key = key
+        self.work_dir = os.path.join(root, key)
+        self._manifest_path = os.path.join(self.work_dir, _MANIFEST)
+        self._lock = threading.Lock()
+        self._lock_fh = None
+        os.makedirs(self.work_dir, exist_ok=True)
+        self._stages = self._read_manifest()
+
+    # ----- locking -----
+    def acquire(self) -> bool:
+        """Take the cross-process lock; False if another task holds it."""
+        try:
+            import fcntl
+        except ImportError:  # pragma: no cover - non-POSIX platforms
+            return True
+
+        fh = open(os.path.join(self.work_dir, _LOCK), "a+")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._lock_fh = fh
+        return True
+
+    def release(self) -> None:
+        """Drop the cross-process lock (closing the file releases the flock)."""
+        if self._lock_fh is not None:
+            with contextlib.suppress(OSError):
+                self._lock_fh.close()
+            self._lock_fh = None
+
+    # ----- manifest -----
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _MANIFEST_VERSION:
+            return {}
+        stages = data.get("stages")
+        return stages if isinstance(stages, dict) else {}
+
+    def _write_manifest_locked(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.work_dir, suffix=".manifest")
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {
+                    "version": _MANIFEST_VERSION,
+                    "updated": time.time(),
+                    "stages": self._stages,
+                },
+                f,
+            )
+        os.replace(tmp, self._manifest_path)
+
+    @property
+    def stages(self) -> list[str]:
+        """Names of the stages recorded in the manifest."""
+        with self._lock:
+            return list(self._stages)
+
+    def get(self, stage: str, inputs=None) -> list[str] | None:
+        """Return the recorded output paths of a stage, or None.
+
+        A stage only counts as complete when it was recorded with the same
+        inputs and every output file still exists with its recorded size.
+        """
+        with self._lock:
+            entry = self._stages.get(stage)
+        if not entry or entry.get("inputs") != inputs:
+            return None
+        paths = []
+        for rel, size in entry.get("outputs", []):
+            path = os.path.join(self.work_dir, rel)
+            try:
+                if os.path.getsize(path) != size:
+                    return None
+            except OSError:
+                return None
+            paths.append(path)
+        return paths
+
+    def get_path(self, stage: str, inputs=None) -> str | None:
+        """Return the single output path of a one-file stage, or None."""
+        paths = self.get(stage, inputs)
+        return paths[0] if paths else None
+
+    def record(self, stage: str, outputs: str | list[str], inputs=None) -> None:
+        """Mark a stage complete with its output file(s).
+
+        Outputs outside the checkpoint directory can't survive a restart and
+        are not recorded. Failures are logged, never raised: a missing
+        checkpoint only costs a re-render.
+        """
+        if isinstance(outputs, str):
+            outputs = [outputs]
+        entries = []
+        for path in outputs:
+            rel = os.path.relpath(os.path.abspath(path), self.work_dir)
+            if rel.startswith(os.pardir):
+                logger.debug("compile_checkpoint_skip_external", stage=stage, path=path)
+                return
+            try:
+                entries.append([rel, os.path.getsize(path)])
+            except OSError:
+                return
+        try:
+            with self._lock:
+                self._stages[stage] = {"outputs": entries, "inputs": inputs}
+                self._write_manifest_locked()
+        except Exception as e:
+            logger.warning("compile_checkpoint_write_failed", stage=stage, error=str(e))
+
+    def discard(self) -> None:
+        """Remove the checkpoint directory after the compilation is delivered."""
+        self.release()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def collect_stale(root: str, max_age_seconds: float) -> int:
+    """Remove checkpoints untouched for max_age_seconds. Returns the count.
+
+    Age is taken from the manifest (rewritten on every completed stage) or,
+    for checkpoints that never completed a stage, the directory itself.
+    Directories locked by a running task are skipped.
+    """
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-POSIX platforms
+        fcntl = None
+
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for name in names:
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        try:
+            manifest = os.path.join(path, _MANIFEST)
+            age_ref = manifest if os.path.exists(manifest) else path
+            if os.path.getmtime(age_ref) > cutoff:
+                continue
+        except OSError:
+            continue
+
+        if fcntl is not None:
+            try:
+                fh = open(os.path.join(path, _LOCK), "a+")
+            except OSError:
+                continue
+            with fh:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+        else:  # pragma: no cover - non-POSIX platforms
+            shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+
+    if removed:
+        logger.info("compile_checkpoints_collected", root=root, count=removed)
+    return removed
+
+
+def open_checkpoint(app, key: str) -> CompileCheckpoint | None:
+    """Open (or resume) the checkpoint for key, or None when unavailable.
+
+    Returns None when checkpoints are disabled, the root isn't writable, or
+    another task is already compiling the same timeline on this host.
+    """
+    if not app.config.get("COMPILE_CHECKPOINT_ENABLED", True):
+        return None
+    root = app.config.get("COMPILE_CHECKPOINT_DIR") or os.path.join(
+        tempfile.gettempdir(), "clippy-compile-checkpoints"
+    )
+    try:
+        ttl_hours = float(app.config.get("COMPILE_CHECKPOINT_TTL_HOURS", 48))
+    except (TypeError, ValueError):
+        ttl_hours = 48.0
+
+    try:
+        os.makedirs(root, exist_ok=True)
+        collect_stale(root, ttl_hours * 3600)
+        checkpoint = CompileCheckpoint(root, key)
+    except OSError as e:
+        logger.warning("compile_checkpoint_unavailable", root=root, error=str(e))
+        return None
+
+    if not checkpoint.acquire():
+        logger.info("compile_checkpoint_busy", key=key)
+        return None
+    return checkpoint
@@ -0,0 +1,467 @@
+"""
+Distributed compilation: fan clip renders out across workers, then merge.
+
+A single compile_video_task_v2 renders every clip on one worker. For long
+timelines (COMPILE_DISTRIBUTED_MIN_CLIPS and up) the task acts as a
+coordinator instead: it splits the clips into chunks of
+COMPILE_DISTRIBUTED_CHUNK_SIZE and replaces itself with a Celery chord:
+
+    chord(render_chunk_task x N on the gpu/cpu queue) -> merge_compilation_task
+
+The merge task inherits the coordinator's task id (Task.replace), so clients
+polling the original task id and the processing job created by the
+coordinator see the whole compilation. Render subtasks publish PROGRESS on
+that id as their segments land.
+
+Rendered segments are exchanged through a SegmentStore: a directory shared
+by all workers when COMPILE_DISTRIBUTED_SHARED_DIR is set, otherwise the
+server's /api/worker/jobs/<id>/segments endpoints. A redelivered or retried
+subtask skips segments that are already stored. Clip failures are isolated
+the same way as in a single-worker compile; a chunk that keeps failing after
+its retries reports all its clips as failed instead of failing the chord,
+so the merge task always runs and records the outcome on the job.
+"""
+
+import contextlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Any
+
+import structlog
+from celery import chord
+
+from app.tasks import worker_api
+from app.tasks.celery_app import celery_app
+from app.tasks.compile_checkpoint import checkpoint_key, open_checkpoint
+from app.tasks.compile_video_v2 import (
+    _clip_render_concurrency,
+    _finish_compilation_v2,
+    _prepare_watermark,
+    _render_clips_v2,
+    _watermark_mode,
+)
+from app.tasks.ffmpeg_progress import CompileProgress
+from app.tasks.job_logs import JobLogBuffer
+from app.tasks.stream_copy import StreamCopyStats
+from app.tasks.video_processing import _get_app, resolve_binary
+
+logger = structlog.get_logger(__name__)
+
+# The only names segment_name() produces
+_SEGMENT_NAME_RE = re.compile(r"^clip_\d+\.mp4$")
+
+
+def plan_chunks(config, clips: list[dict]) -> list[list[dict]]:
+    """Split clips into render chunks, or return [] to compile on one worker.
+
+    Distribution is off unless COMPILE_DISTRIBUTED_MIN_CLIPS is positive and
+    the timeline has at least that many clips, and it only applies when the
+    clips span more than one chunk.
+    """
+    try:
+        min_clips = int(config.get("COMPILE_DISTRIBUTED_MIN_CLIPS", 0) or 0)
+        chunk_size = int(config.get("COMPILE_DISTRIBUTED_CHUNK_SIZE", 4) or 1)
+    except (TypeError, ValueError):
+        return []
+    if min_clips <= 0 or len(clips) < min_clips:
+        return []
+    chunk_size = max(1, chunk_size)
+    chunks = [clips[i : i + chunk_size] for i in range(0, len(clips), chunk_size)]
+    return chunks if len(chunks) > 1 else []
+
+
+def segment_name(clip: dict) -> str:
+    """Return the store name of a clip's rendered segment."""
+    return f"clip_{clip['id']}.mp4"
+
+
+def _render_queue(config) -> str | None:
+    """Queue for render subtasks: configured, else wherever compiles go."""
+    queue = (config.get("COMPILE_DISTRIBUTED_QUEUE") or "").strip()
+    if queue:
+        return queue
+    return "gpu" if config.get("USE_GPU_QUEUE") else None
+
+
+class SegmentStore:
+    """Where render subtasks leave segments for the merge task.
+
+    Args:
+        config: App config
+        job_id: Processing job the segments belong to
+    """
+
+    def __init__(self, config, job_id: int):
+        self.job_id = job_id
+        shared = config.get("COMPILE_DISTRIBUTED_SHARED_DIR")
+        self.shared_dir = os.path.join(shared, str(job_id)) if shared else None
+
+    @staticmethod
+    def _check(name: str) -> str:
+        if not _SEGMENT_NAME_RE.match(name or ""):
+            raise ValueError(f"Invalid segment name: {name!r}")
+        return name
+
+    def put(self, name: str, path: str) -> int:
+        """Store a rendered segment. Returns how many the job has stored."""
+        self._check(name)
+        if self.shared_dir is None:
+            return int(worker_api.upload_segment(self.job_id, name, path)["stored"])
+
+        os.makedirs(self.shared_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.shared_dir, suffix=".part")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, os.path.join(self.shared_dir, name))
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        return sum(1 for n in os.listdir(self.shared_dir) if n.endswith(".mp4"))
+
+    def has(self, name: str) -> bool:
+        """Return True when the segment is already stored."""
+        self._check(name)
+        if self.shared_dir is None:
+            return worker_api.has_segment(self.job_id, name)
+        return os.path.isfile(os.path.join(self.shared_dir, name))
+
+    def fetch(self, name: str, dest_dir: str) -> str:
+        """Return a local path to the segment (downloaded into dest_dir)."""
+        self._check(name)
+        if self.shared_dir is None:
+            return worker_api.download_segment(self.job_id, name, dest_dir)
+        path = os.path.join(self.shared_dir, name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        return path
+
+    def clear(self) -> None:
+        """Remove every segment of the job (best effort)."""
+        try:
+            if self.shared_dir is None:
+                worker_api.delete_segments(self.job_id)
+            else:
+                shutil.rmtree(self.shared_dir, ignore_errors=True)
+        except Exception as e:
+            logger.warning(
+                "segment_store_clear_failed", job_id=self.job_id, error=str(e)
+            )
+
+
+def dispatch_distributed(
+    task,
+    job_id: int,
+    project_id: int,
+    project_data: dict,
+    tier_limits: dict,
+    clips: list[dict],
+    chunks: list[list[dict]],
+    options: dict,
+    log,
+):
+    """Replace the coordinator task with a render chord plus merge task.
+
+    Never returns: Task.replace raises celery.exceptions.Ignore, which the
+    caller must let through.
+    """
+    config = _get_app().config
+    queue = _render_queue(config)
+    # Per-run objects don't travel; subtasks rebuild what they need
+    shared_project = {k: v for k, v in project_data.items() if not k.startswith("_")}
+
+    header = []
+    for index, chunk in enumerate(chunks):
+        sig = render_chunk_task.s(
+            task.request.id,
+            job_id,
+            shared_project,
+            tier_limits,
+            chunk,
+            index,
+            len(clips),
+        )
+        if queue:
+            sig = sig.set(queue=queue)
+        header.append(sig)
+    body = merge_compilation_task.s(
+        job_id, project_id, shared_project, tier_limits, clips, options
+    )
+
+    log(
+        "info",
+        f"Distributing {len(clips)} clips across {len(chunks)} render tasks",
+        status="distributing",
+    )
+    worker_api.update_processing_job(
+        job_id,
+        result_data={"distributed": {"chunks": len(chunks), "clips": len(clips)}},
+    )
+    return task.replace(chord(header, body))
+
+
+@celery_app.task(
+    bind=True,
+    name="tasks.compile_render_chunk",
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=3,
+)
+def render_chunk_task(
+    self,
+    coordinator_id: str,
+    job_id: int,
+    project_data: dict,
+    tier_limits: dict,
+    clips: list[dict],
+    chunk_index: int,
+    total_clips: int,
+) -> dict[str, Any]:
+    """Render one chunk of a distributed compilation and store its segments.
+
+    Args:
+        coordinator_id: Task id clients poll (the merge task inherits it)
+        job_id: Processing job ID
+        project_data: Project dict from API
+        tier_limits: Tier limits dict
+        clips: Clip dicts of this chunk, in timeline order
+        chunk_index: Position of the chunk in the timeline
+        total_clips: Number of clips in the whole compilation
+
+    Returns:
+        {"chunk": int, "clips": [{"id": int, "segment": str | None,
+        "error": str | None}, ...]}
+    """
+    app = _get_app()
+    job_log = JobLogBuffer.from_config(app.config, job_id)
+    log = job_log.log
+    store = SegmentStore(app.config, job_id)
+    outcome = {c["id"]: {"id": c["id"], "segment": None, "error": None} for c in clips}
+
+    def _publish(stored: int) -> None:
+        # Clips are 10-70% of the whole compile, as on a single worker
+        percent = 10 + 60 * min(1.0, stored / max(1, total_clips))
+        self.update_state(
+            task_id=coordinator_id,
+            state="PROGRESS",
+            meta={
+                "progress": round(percent, 1),
+                "status": f"Rendered {stored}/{total_clips} clips",
+                "stage": "clips",
+            },
+        )
+        worker_api.update_processing_job(job_id, progress=int(percent))
+
+    try:
+        todo = []
+        for clip in clips:
+            if store.has(segment_name(clip)):
+                outcome[clip["id"]]["segment"] = segment_name(clip)
+            else:
+                todo.append(clip)
+        if len(todo) < len(clips):
+            log(
+                "info",
+                f"Chunk {chunk_index + 1}: {len(clips) - len(todo)} segment(s) "
+                "already stored",
+            )
+
+        store_errors = []
+        with tempfile.TemporaryDirectory(prefix="compile_chunk_") as temp_dir:
+            if todo:
+                _prepare_watermark(app, project_data, tier_limits, log)
+            stream_copy = StreamCopyStats()
+            project_data["_stream_copy"] = stream_copy
+
+            def _on_done(i, completed, clip_path, error) -> None:
+                clip = todo[i]
+                if error is not None:
+                    outcome[clip["id"]]["error"] = str(error)
+                    log("error", f"Failed to process clip {clip['id']}: {error}")
+                    return
+                try:
+                    stored = store.put(segment_name(clip), clip_path)
+                except Exception as e:
+                    store_errors.append(e)
+                    log("warning", f"Failed to store clip {clip['id']}: {e}")
+                    return
+                outcome[clip["id"]]["segment"] = segment_name(clip)
+                try:
+                    _publish(stored)
+                except Exception:
+                    pass
+
+            _render_clips_v2(
+                todo,
+                temp_dir,
+                project_data,
+                tier_limits,
+                max_workers=_clip_render_concurrency(
+                    app, resolve_binary(app, "ffmpeg"), max(1, len(todo))
+                ),
+                on_done=_on_done,
+            )
+            if stream_copy.fast_path:
+                log(
+                    "info",
+                    f"Chunk {chunk_index + 1}: {stream_copy.summary(len(todo))}",
+                )
+
+        if store_errors:
+            # Rendered segments stay in the segment cache, so a retry is cheap
+            raise store_errors[0]
+
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=5 * (2**self.request.retries)) from e
+        log("error", f"Render chunk {chunk_index + 1} failed: {e}")
+        for entry in outcome.values():
+            if entry["segment"] is None and entry["error"] is None:
+                entry["error"] = str(e)
+    finally:
+        job_log.close()
+
+    return {"chunk": chunk_index, "clips": [outcome[c["id"]] for c in clips]}
+
+
+@celery_app.task(
+    bind=True,
+    name="tasks.compile_merge",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def merge_compilation_task(
+    self,
+    chunk_results: list[dict],
+    job_id: int,
+    project_id: int,
+    project_data: dict,
+    tier_limits: dict,
+    clips: list[dict],
+    options: dict,
+) -> dict[str, Any]:
+    """Collect rendered segments and finish a distributed compilation.
+
+    Runs the same timeline, concat, music, watermark and upload steps as a
+    single-worker compile (see _finish_compilation_v2).
+
+    Args:
+        chunk_results: render_chunk_task results, one per chunk
+        job_id: Processing job created by the coordinator
+        project_id: Project ID
+        project_data: Project dict from API
+        tier_limits: Tier limits dict
+        clips: Clip dicts in timeline order
+        options: Compile task options (intro/outro/transitions/music)
+
+    Returns:
+        Dict with compilation results
+    """
+    app = _get_app()
+    job_log = JobLogBuffer.from_config(app.config, job_id)
+    log = job_log.log
+    task_id = self.request.id
+    store = SegmentStore(app.config, job_id)
+
+    def _publish_progress(snapshot: dict) -> None:
+        self.update_state(task_id=task_id, state="PROGRESS", meta=snapshot)
+        worker_api.update_processing_job(
+            job_id,
+            progress=int(snapshot["progress"]),
+            result_data={"progress_detail": snapshot},
+        )
+
+    progress = CompileProgress.from_config(app.config, _publish_progress)
+    checkpoint = None
+    temp_dir_context = None
+    try:
+        segments = {}
+        for result in chunk_results or []:
+            for entry in result.get("clips", []):
+                if entry.get("segment"):
+                    segments[entry["id"]] = entry["segment"]
+                elif entry.get("error"):
+                    log("error", f"Clip {entry['id']} not rendered: {entry['error']}")
+
+        checkpoint = open_checkpoint(
+            app,
+            checkpoint_key(
+                project_data,
+                clips,
+                tier_limits,
+                {**options, "watermark_mode": _watermark_mode(app)},
+            ),
+        )
+        if checkpoint is not None:
+            temp_dir = checkpoint.work_dir
+            project_data["_checkpoint"] = checkpoint
+        else:
+            temp_dir_context = tempfile.TemporaryDirectory()
+            temp_dir = temp_dir_context.__enter__()
+
+        progress.stage("collecting", 70, 70, "Collecting rendered clips")
+        log("info", f"Collecting {len(segments)} rendered clips", status="collecting")
+        processed_clips = []
+        used_clip_ids = []
+        for clip in clips:
+            name = segments.get(clip["id"])
+            if not name:
+                continue
+            try:
+                processed_clips.append(store.fetch(name, temp_dir))
+                used_clip_ids.append(clip["id"])
+            except Exception as e:
+                log("error", f"Failed to fetch rendered clip {clip['id']}: {e}")
+
+        if not processed_clips:
+            raise ValueError("No clips could be processed")
+
+        project_data["_progress"] = progress
+        watermark = _prepare_watermark(app, project_data, tier_limits, log)
+        result = _finish_compilation_v2(
+            project_id,
+            job_id,
+            project_data,
+            tier_limits,
+            processed_clips,
+            used_clip_ids,
+            temp_dir,
+            options,
+            watermark,
+            progress,
+            log,
+            checkpoint=checkpoint,
+        )
+        store.clear()
+        return result
+
+    except Exception as e:
+        try:
+            worker_api.update_project_status(
+                project_id=project_id, status="failed", processing_log=str(e)
+            )
+        except Exception:
+            pass
+        try:
+            worker_api.update_processing_job(
+                job_id, status="failure", error_message=str(e)
+            )
+        except Exception:
+            pass
+        # The job is failed for good (a lost worker redelivers without getting
+        # here), so its segments would only be orphaned
+        store.clear()
+        raise
+    finally:
+        if checkpoint is not None:
+            checkpoint.release()
+        if temp_dir_context is not None:
+            try:
+                temp_dir_context.__exit__(None, None, None)
+            except Exception:
+                pass
+        progress.close()
+        job_log.close()
@@ -17,21 +17,70 @@ import os
 import shutil
 import subprocess
 import tempfile
+import uuid
+from collections import Counter
 from datetime import datetime
 from typing import Any
 
 import structlog
+from celery.exceptions import Ignore
 
+from app import media_probe
 from app import storage as storage_lib
 from app.ffmpeg_config import (
     audio_args,
+    config_args,
+    detect_nvenc,
     encoder_args,
+    gpu_encoder_args,
+    gpu_filters_enabled,
+    gpu_scale_filter,
+    hwaccel_input_args,
     overlay_enabled,
     parse_resolution,
     resolve_fontfile,
 )
 from app.tasks import worker_api
 from app.tasks.celery_app import celery_app
+from app.tasks.compilation_upload import (
+    FRAGMENTED_FORMATS,
+    FRAGMENTED_MP4_ARGS,
+    CompilationUpload,
+    UploadUnsupported,
+    chunk_bytes,
+    chunked_upload_enabled,
+    stream_upload_enabled,
+)
+from app.tasks.compile_checkpoint import (
+    CompileCheckpoint,
+    checkpoint_key,
+    open_checkpoint,
+)
+from app.tasks.ffmpeg_progress import CompileProgress, run_ffmpeg
+from app.tasks.job_logs import JobLogBuffer
+from app.tasks.media_fetch import (
+    DEFAULT_ATTEMPTS,
+    DEFAULT_CHUNK_BYTES,
+    InputPrefetcher,
+    fetch_media,
+)
+from app.tasks.segment_cache import (
+    file_fingerprint,
+    file_sha256,
+    get_asset_cache,
+    get_segment_cache,
+)
+from app.tasks.storage_handoff import (
+    handoff_compilation,
+    handoff_enabled,
+    shared_storage_token,
+)
+from app.tasks.stream_copy import (
+    StreamCopyStats,
+    copy_mismatch,
+    render_fast_path,
+    stream_copy_enabled,
+)
 from app.tasks.video_processing import (
     _cap_resolution_label,
     _get_app,
@@ -39,6 +88,7 @@ from app.tasks.video_processing import (
     extract_video_metadata,
     resolve_binary,
 )
+from app.tasks.worker_cache import get_worker_cache
 
 logger = structlog.get_logger(__name__)
 
@@ -223,19 +273,32 @@ def _resolve_watermark_path(app, watermark_path: str | None) -> str | None:
     return None
 
 
-def _download_media_file(media_id: int, user_id: int, cache_dir: str) -> str:
+def _download_media_file(
+    media_id: int,
+    user_id: int,
+    cache_dir: str,
+    stats: dict | None = None,
+    pin: str | None = None,
+    pin_refs: int = 1,
+) -> str:
     """Download a media file from the main server via worker API.
 
     Remote workers use this to fetch clips, intros, outros, and transitions
     when they don't have shared filesystem access.
 
-    Files are cached in cache_dir for 2 hours. Access time is updated on each use
-    to prevent deletion of recently-used files.
+    Files are cached in cache_dir, which is size-bounded and evicted least
+    recently used first (see app.tasks.worker_cache). A cached copy is reused
+    only while its ETag/size still match the server's; interrupted downloads
+    resume with HTTP Range requests (see app.tasks.media_fetch).
 
     Args:
         media_id: MediaFile ID to download
         user_id: User ID for ownership validation
         cache_dir: Directory to save downloaded file
+        stats: Optional dict filled with transfer details (see fetch_media)
+        pin: Owner to pin the cached file for until its renders finish
+            (see WorkerMediaCache.pin), or None
+        pin_refs: Pin references to take (one per clip using the file)
 
     Returns:
         str: Path to downloaded file
@@ -243,8 +306,6 @@ def _download_media_file(media_id: int, user_id: int, cache_dir: str) -> str:
     Raises:
         RuntimeError: If download fails
     """
-    import requests
-
     app = _get_app()
     api_base = app.config.get("MEDIA_BASE_URL", "").rstrip("/")
     api_key = app.config.get("WORKER_API_KEY", "")
@@ -252,94 +313,71 @@ def _download_media_file(media_id: int, user_id: int, cache_dir: str) -> str:
     if not api_base or not api_key:
         raise RuntimeError("MEDIA_BASE_URL or WORKER_API_KEY not configured")
 
-    # Clean up old cache files (older than 2 hours since last access)
-    _cleanup_cache(cache_dir, max_age_hours=2)
-
-    # Download from API first to get the file extension
     url = f"{api_base}/api/worker/media/{media_id}/download?user_id={user_id}"
     headers = {"Authorization": f"Bearer {api_key}"}
+    if stats is None:
+        stats = {}
 
     try:
-        app.logger.info(f"Downloading media {media_id} from {url}")
-        response = requests.get(url, headers=headers, stream=True, timeout=300)
-        response.raise_for_status()
-
-        # Detect file extension from Content-Type or Content-Disposition
-        file_ext = ".mp4"  # Default
-        content_type = response.headers.get("Content-Type", "")
-        if "audio/mpeg" in content_type or "audio/mp3" in content_type:
-            file_ext = ".mp3"
-        elif "video/mp4" in content_type:
-            file_ext = ".mp4"
-
-        # Check if already cached with correct extension
-        cached_path = os.path.join(cache_dir, f"media_{media_id}{file_ext}")
-        if os.path.exists(cached_path):
-            app.logger.info(f"Using cached media file {media_id}: {cached_path}")
-            # Touch the file to update access time
-            os.utime(cached_path, None)
-            return cached_path
-
-        # Save to cache
-        os.makedirs(cache_dir, exist_ok=True)
-        with open(cached_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        app.logger.info(f"Downloaded media {media_id} to {cached_path}")
+        app.logger.info(f"Fetching media {media_id} from {url}")
+        cached_path = fetch_media(
+            url,
+            headers,
+            cache_dir,
+            f"media_{media_id}",
+            chunk_size=int(
+                app.config.get("MEDIA_DOWNLOAD_CHUNK_BYTES") or DEFAULT_CHUNK_BYTES
+            ),
+            attempts=int(app.config.get("MEDIA_DOWNLOAD_ATTEMPTS") or DEFAULT_ATTEMPTS),
+            stats=stats,
+        )
+
+        # Track the entry in the size-bounded worker cache (LRU + hit rate)
+        cache = get_worker_cache(app.config)
+        if cache is not None and os.path.dirname(cached_path) == cache.root:
+            name = os.path.basename(cached_path)
+            if stats.get("cache_hit"):
+                cache.hit(name, pin=pin, refs=pin_refs)
+            else:
+                cache.miss()
+                cache.store(name, pin=pin, refs=pin_refs)
+
+        app.logger.info(f"Media {media_id} ready at {cached_path}")
         return cached_path
 
     except Exception as e:
         raise RuntimeError(f"Failed to download media {media_id}: {e}") from e
 
 
-def _cleanup_cache(cache_dir: str, max_age_hours: float = 2.0) -> None:
-    """Remove cached files older than max_age_hours since last access.
+def _fetch_input_media(
+    project_data: dict, media_id: int, user_id: int, cache_dir: str
+) -> str:
+    """Return a remote input, waiting on its prefetch if one was started."""
+    prefetch = project_data.get("_prefetch")
+    if prefetch is not None and prefetch.has(("media", media_id)):
+        return prefetch.result(("media", media_id))
+    return _download_media_file(
+        media_id, user_id, cache_dir, pin=project_data.get("_cache_pin")
+    )
 
-    Args:
-        cache_dir: Cache directory to clean
-        max_age_hours: Maximum age in hours before deletion
-    """
-    import time
 
-    if not os.path.exists(cache_dir):
+def _unpin_clip_input(project_data: dict, clip: dict) -> None:
+    """Drop the compile's pin on a clip's cached source once it has rendered."""
+    owner = project_data.get("_cache_pin")
+    media_id = (clip.get("media_file") or {}).get("id")
+    if not owner or not media_id:
         return
+    cache = get_worker_cache(_get_app().config)
+    if cache is not None:
+        cache.unpin(f"media_{media_id}", owner)
 
-    try:
-        now = time.time()
-        max_age_seconds = max_age_hours * 3600
-        removed_count = 0
-        removed_size = 0
-
-        for filename in os.listdir(cache_dir):
-            filepath = os.path.join(cache_dir, filename)
-            if not os.path.isfile(filepath):
-                continue
-
-            # Check file access time (updated by os.utime on each use)
-            try:
-                stat = os.stat(filepath)
-                age_seconds = now - stat.st_atime
-
-                if age_seconds > max_age_seconds:
-                    file_size = stat.st_size
-                    os.remove(filepath)
-                    removed_count += 1
-                    removed_size += file_size
-            except Exception:
-                pass
-
-        if removed_count > 0:
-            size_mb = removed_size / (1024 * 1024)
-            app = _get_app()
-            app.logger.info(
-                f"Cache cleanup: removed {removed_count} files ({size_mb:.1f} MB) "
-                f"older than {max_age_hours} hours from {cache_dir}"
-            )
 
-    except Exception as e:
-        app = _get_app()
-        app.logger.warning(f"Cache cleanup failed: {e}")
+def _worker_cache_dir(app) -> str:
+    """Return the directory remote media is downloaded and cached in."""
+    cache = get_worker_cache(app.config)
+    if cache is not None:
+        return cache.root
+    return os.path.join(tempfile.gettempdir(), "clippy-worker-cache")
 
 
 def _apply_tier_limits_to_clips(
@@ -394,7 +432,7 @@ def _process_clip_v2(
         )
 
         # Create cache directory
-        cache_dir = os.path.join(tempfile.gettempdir(), "clippy-worker-cache")
+        cache_dir = _worker_cache_dir(app)
 
         try:
             # Download the file
@@ -409,7 +447,7 @@ def _process_clip_v2(
             app.logger.info(
                 f"Attempting to download media_id={media_id}, user_id={user_id}"
             )
-            input_path = _download_media_file(media_id, user_id, cache_dir)
+            input_path = _fetch_input_media(project_data, media_id, user_id, cache_dir)
             app.logger.info(f"Successfully downloaded media {media_id} to {input_path}")
 
         except Exception as e:
@@ -435,6 +473,9 @@ def _process_clip_v2(
     start_time = clip_data.get("start_time")
     end_time = clip_data.get("end_time")
     max_clip_duration = project_data.get("max_clip_duration")
+    # Output length for progress reporting (None: taken from ffmpeg's banner)
+    source_duration = clip_data.get("duration") or media_file.get("duration")
+    expected_duration = source_duration
 
     # Preview mode: cap each clip to 4 seconds for quick preview generation
     if project_data.get("_preview_mode"):
@@ -443,14 +484,20 @@ def _process_clip_v2(
             # User-specified trim: cap to 4s from start_time
             duration = min(end_time - start_time, preview_clip_duration)
             cmd.extend(["-ss", str(start_time), "-t", str(duration)])
+            expected_duration = duration
         else:
             # No user trim: take first 4 seconds
             cmd.extend(["-t", str(preview_clip_duration)])
+            expected_duration = min(
+                source_duration or preview_clip_duration, preview_clip_duration
+            )
     elif start_time is not None and end_time is not None:
         duration = end_time - start_time
         cmd.extend(["-ss", str(start_time), "-t", str(duration)])
+        expected_duration = duration
     elif max_clip_duration:
         cmd.extend(["-t", str(max_clip_duration)])
+        expected_duration = min(source_duration or max_clip_duration, max_clip_duration)
 
     # Apply tier-based resolution cap (or preview override)
     project_output_res = project_data.get("output_resolution", "1080p")
@@ -561,13 +608,69 @@ def _process_clip_v2(
     creator_name = (clip_data.get("creator_name") or "").strip()
     game_name = (clip_data.get("game_name") or "").strip()
 
+    # Sources already in the target format that need no filters are remuxed
+    # (or smart-cut around the trim point) instead of re-encoded
+    if (
+        stream_copy_enabled(app.config)
+        and not project_data.get("_preview_mode")
+        and not project_data.get("_segment_watermark")
+        and not project_data.get("audio_norm_profile")
+        and not project_data.get("audio_norm_db")
+        and not (overlay_enabled() and (creator_name or game_name))
+        and (not is_portrait_output or vertical_zoom == 100)
+    ):
+        mode = _try_stream_copy(
+            app,
+            clip_data,
+            input_path,
+            output_path,
+            target_width,
+            target_height,
+            tier_limits,
+            max_clip_duration,
+        )
+        if mode:
+            stats = project_data.get("_stream_copy")
+            if stats is not None:
+                stats.record(mode)
+            return output_path
+
+    # GPU workers decode and scale landscape clips in CUDA memory; CPU-only
+    # filters (overlay text, avatar, segment watermark) follow a download
+    needs_cpu_filters = bool(project_data.get("_segment_watermark")) or bool(
+        overlay_enabled()
+        and (creator_name or game_name)
+        and not project_data.get("_preview_mode")
+    )
+    use_gpu = (
+        not is_portrait_output
+        and not project_data.get("_preview_mode")
+        and gpu_filters_enabled(app, ffmpeg_bin)
+    )
+    cpu_scale_filter = scale_filter
+    video_args = encoder_args(ffmpeg_bin)
+    if use_gpu:
+        scale_filter = gpu_scale_filter(
+            target_width, target_height, download=needs_cpu_filters
+        )
+        if not needs_cpu_filters:
+            video_args = gpu_encoder_args(ffmpeg_bin)
+
     # Resolve avatar path for overlay
     avatar_path = None
-    if creator_name:
+    prefetch = project_data.get("_prefetch")
+    if creator_name and prefetch is not None and prefetch.has(("avatar", creator_name)):
+        try:
+            avatar_path = prefetch.result(("avatar", creator_name))
+        except Exception as e:
+            app.logger.warning(f"Avatar prefetch failed for {creator_name}: {e}")
+    elif creator_name:
         avatar_path = _resolve_avatar_path(app, clip_data.get("id"), creator_name)
 
     # Build filter complex with overlay if enabled
     # Add main video input first
+    if use_gpu:
+        cmd.extend(hwaccel_input_args())
     cmd.extend(["-i", input_path])
 
     # Then add avatar as second input if present
@@ -644,6 +747,17 @@ def _process_clip_v2(
     else:
         filter_complex = f"[0:v]{scale_filter}[v]"
 
+    # Burn the tier watermark into the segment so the final concat can copy
+    segment_watermark = project_data.get("_segment_watermark")
+    if segment_watermark:
+        wm_input = 2 if has_avatar else 1
+        cmd.extend(["-i", segment_watermark["path"]])
+        filter_complex = (
+            filter_complex.removesuffix("[v]")
+            + "[pre];"
+            + _segment_watermark_filter(segment_watermark, f"[{wm_input}:v]", "[pre]")
+        )
+
     print(f"[CLIP] Built filter_complex: {filter_complex[:200]}...")
     cmd.extend(["-filter_complex", filter_complex])
 
@@ -651,7 +765,7 @@ def _process_clip_v2(
     cmd.extend(["-map", "[v]"])
 
     # Add encoder args
-    cmd.extend(encoder_args(ffmpeg_bin))
+    cmd.extend(video_args)
 
     # Preview mode: force 10fps for faster encoding
     if project_data.get("_preview_mode"):
@@ -673,12 +787,55 @@ def _process_clip_v2(
     # Output
     cmd.extend(["-y", output_path])
 
+    # Reuse a previously rendered segment when nothing that feeds ffmpeg changed
+    seg_cache = None if project_data.get("_preview_mode") else get_segment_cache(app)
+    cache_key = None
+    if seg_cache:
+        cache_inputs = {
+            input_path: file_fingerprint(input_path, media_file.get("checksum"))
+        }
+        if has_avatar:
+            cache_inputs[avatar_path] = file_fingerprint(avatar_path)
+        if segment_watermark:
+            cache_inputs[segment_watermark["path"]] = segment_watermark["fingerprint"]
+        cache_key = seg_cache.make_key(cmd, output_path, cache_inputs)
+        if seg_cache.fetch(cache_key, output_path):
+            app.logger.info(
+                f"Segment cache hit for clip {clip_data['id']} ({cache_key[:12]})"
+            )
+            return output_path
+
     # Execute
     app.logger.info(
         f"Running ffmpeg for clip {clip_data['id']}: {' '.join(cmd[:10])}..."
     )
+    progress = project_data.get("_progress")
     try:
-        subprocess.run(cmd, check=True, capture_output=True)
+        try:
+            run_ffmpeg(
+                cmd,
+                on_progress=progress.tracker(clip_data["id"]) if progress else None,
+                duration=expected_duration,
+            )
+        except subprocess.CalledProcessError:
+            if not use_gpu:
+                raise
+            # e.g. a source codec the GPU decoder doesn't support
+            app.logger.warning(
+                f"GPU filter path failed for clip {clip_data['id']}, "
+                "retrying with CPU filters"
+            )
+            run_ffmpeg(
+                _cpu_filter_cmd(
+                    cmd,
+                    scale_filter,
+                    cpu_scale_filter,
+                    video_args,
+                    encoder_args(ffmpeg_bin),
+                ),
+                on_progress=progress.tracker(clip_data["id"]) if progress else None,
+                duration=expected_duration,
+            )
     except subprocess.CalledProcessError as e:
         # Log stderr to see what ffmpeg is complaining about
         stderr_output = (
@@ -690,9 +847,434 @@ def _process_clip_v2(
         app.logger.error(f"ffmpeg stderr: {stderr_output}")
         raise
 
+    if seg_cache and cache_key:
+        try:
+            seg_cache.store(cache_key, output_path)
+        except Exception as e:
+            app.logger.warning(
+                f"Failed to cache segment for clip {clip_data['id']}: {e}"
+            )
+
     return output_path
 
 
+def _cpu_filter_cmd(
+    cmd: list[str],
+    gpu_scale: str,
+    cpu_scale: str,
+    gpu_video_args: list[str],
+    cpu_video_args: list[str],
+) -> list[str]:
+    """Rewrite a GPU-filter clip command to decode and scale on the CPU."""
+    out = list(cmd)
+    hw = hwaccel_input_args()
+    for i in range(len(out) - len(hw) + 1):
+        if out[i : i + len(hw)] == hw:
+            del out[i : i + len(hw)]
+            break
+    i = out.index("-filter_complex")
+    out[i + 1] = out[i + 1].replace(gpu_scale, cpu_scale, 1)
+    for i in range(len(out) - len(gpu_video_args) + 1):
+        if out[i : i + len(gpu_video_args)] == gpu_video_args:
+            out[i : i + len(gpu_video_args)] = cpu_video_args
+            break
+    return out
+
+
+def _try_stream_copy(
+    app,
+    clip_data: dict,
+    input_path: str,
+    output_path: str,
+    target_width: int,
+    target_height: int,
+    tier_limits: dict,
+    max_clip_duration: float | None,
+) -> str | None:
+    """Render a clip through the stream-copy fast path when it qualifies.
+
+    Returns:
+        "copy" or "smart" when the clip was rendered, None to fall back to
+        the regular encode (ineligible source, unaligned short trim, or any
+        ffprobe/ffmpeg failure)
+    """
+    ffprobe_bin = resolve_binary(app, "ffprobe")
+    data = media_probe.probe(
+        input_path,
+        ffprobe_bin,
+        config_args(app, "ffprobe"),
+        checksum=(clip_data.get("media_file") or {}).get("checksum"),
+        config=app.config,
+    )
+    reason = copy_mismatch(
+        data, target_width, target_height, tier_limits.get("max_fps")
+    )
+    if reason:
+        logger.debug(
+            "stream_copy_ineligible", clip_id=clip_data.get("id"), reason=reason
+        )
+        return None
+
+    start_time = clip_data.get("start_time")
+    end_time = clip_data.get("end_time")
+    if start_time is not None and end_time is not None:
+        start, duration = float(start_time), float(end_time) - float(start_time)
+    else:
+        start = None
+        duration = float(max_clip_duration) if max_clip_duration else None
+
+    video = media_probe.first_stream(data, "video")
+    ffmpeg_bin = resolve_binary(app, "ffmpeg")
+    try:
+        mode = render_fast_path(
+            ffmpeg_bin,
+            ffprobe_bin,
+            input_path,
+            output_path,
+            start,
+            duration,
+            media_probe.parse_frame_rate(video.get("r_frame_rate")),
+            encoder_args(ffmpeg_bin),
+            ffmpeg_args=config_args(app, "ffmpeg", "encode"),
+            ffprobe_args=config_args(app, "ffprobe"),
+        )
+    except Exception as e:
+        app.logger.warning(
+            f"Stream copy failed for clip {clip_data.get('id')}, re-encoding: {e}"
+        )
+        return None
+
+    if mode:
+        app.logger.info(f"Clip {clip_data.get('id')} rendered by {mode} path")
+    return mode
+
+
+# CPU cores a single libx264 encode keeps busy on average; used to size the
+# clip render pool when COMPILE_CLIP_CONCURRENCY is 0 (auto).
+_CPU_CORES_PER_ENCODE = 4
+
+
+def _prefetch_concurrency(app) -> int:
+    """Return how many compile inputs to fetch in parallel (0 disables)."""
+    try:
+        return max(0, int(app.config.get("COMPILE_PREFETCH_CONCURRENCY", 4)))
+    except (TypeError, ValueError):
+        return 4
+
+
+def _start_prefetch(
+    app,
+    project_data: dict,
+    clips: list[dict],
+    library_ids: dict[int, str],
+    temp_dir: str,
+    log_func=None,
+) -> InputPrefetcher | None:
+    """Start fetching every compile input that isn't available locally.
+
+    Clips, library media (intro/outro/transitions/music), creator avatars and
+    the static bumper are queued in timeline order, so the first clip is
+    usually ready by the time its encode starts. Consumers pick results up via
+    project_data["_prefetch"]; anything not prefetched is fetched lazily.
+
+    Args:
+        app: Flask app instance
+        project_data: Project dict from API
+        clips: Clip dicts in timeline order
+        library_ids: Library media ID -> label ("intro", "music", ...)
+        temp_dir: Temporary directory for processing
+        log_func: Optional logging function for job result logs
+
+    Returns:
+        The running prefetcher, or None when prefetching is disabled
+    """
+    workers = _prefetch_concurrency(app)
+    if workers <= 0:
+        return None
+
+    user_id = project_data.get("user_id")
+    cache_dir = _worker_cache_dir(app)
+    prefetch = InputPrefetcher(workers)
+
+    # Cached sources stay pinned until every clip using them has rendered
+    # (see _unpin_clip_input); library media until the compile ends
+    clip_uses = Counter((c.get("media_file") or {}).get("id") for c in clips)
+
+    def _queue_media(media: dict, label: str, refs: int = 1) -> None:
+        media_id = media.get("id")
+        if not media_id or not user_id:
+            return
+        if os.path.exists(_resolve_media_input_path(media.get("file_path", ""))):
+            return
+        prefetch.submit(
+            ("media", media_id),
+            label,
+            _download_media_file,
+            media_id,
+            user_id,
+            cache_dir,
+            stats={},
+            pin=project_data.get("_cache_pin"),
+            pin_refs=refs,
+        )
+
+    for clip in clips:
+        media = clip.get("media_file") or {}
+        _queue_media(media, f"clip {clip['id']}", clip_uses[media.get("id")])
+
+    if library_ids and user_id:
+        try:
+            response = worker_api.get_media_batch(list(library_ids), user_id)
+            for media in response.get("media_files", []):
+                _queue_media(
+                    media, f"{library_ids.get(media['id'], 'media')} {media['id']}"
+                )
+        except Exception as e:
+            if log_func:
+                log_func("warning", f"Could not prefetch library media: {e}")
+
+    if overlay_enabled():
+        for clip in clips:
+            creator_name = (clip.get("creator_name") or "").strip()
+            if creator_name:
+                prefetch.submit(
+                    ("avatar", creator_name),
+                    f"avatar {creator_name}",
+                    _resolve_avatar_path,
+                    app,
+                    clip.get("id"),
+                    creator_name,
+                )
+
+    prefetch.submit(
+        ("static",),
+        "static bumper",
+        _resolve_static_bumper_path,
+        app,
+        temp_dir,
+        log_func,
+    )
+    return prefetch
+
+
+def _prefetch_summary(prefetch: InputPrefetcher) -> list[str]:
+    """Format one transfer line per prefetched input plus a total."""
+    lines = []
+    total_bytes = 0
+    total_seconds = 0.0
+    for record in prefetch.summary():
+        label = record["label"]
+        if record["status"] == "downloaded":
+            mb = record["bytes"] / (1024 * 1024)
+            seconds = record["seconds"]
+            rate = f" ({mb / seconds:.1f} MB/s)" if seconds > 0 else ""
+            lines.append(f"Prefetch {label}: {mb:.1f} MB in {seconds:.1f}s{rate}")
+            total_bytes += record["bytes"]
+            total_seconds = max(total_seconds, seconds)
+        elif record["status"] == "failed":
+            lines.append(f"Prefetch {label}: failed ({record['error']})")
+        else:
+            lines.append(f"Prefetch {label}: {record['status']}")
+    if total_bytes:
+        lines.append(
+            f"Prefetch total: {total_bytes / (1024 * 1024):.1f} MB downloaded, "
+            f"longest transfer {total_seconds:.1f}s"
+        )
+    return lines
+
+
+def _clip_render_concurrency(app, ffmpeg_bin: str, clip_count: int) -> int:
+    """Return how many clips may be rendered at the same time.
+
+    COMPILE_CLIP_CONCURRENCY controls the pool size: 1 renders sequentially
+    (the default), 0 sizes the pool from the CPU core count, and any other
+    value is used as-is. When NVENC is in use the pool is additionally capped
+    by COMPILE_NVENC_MAX_SESSIONS, since consumer GPUs refuse encode sessions
+    beyond a small driver limit.
+
+    Args:
+        app: Flask app instance
+        ffmpeg_bin: Resolved ffmpeg binary (used for NVENC detection)
+        clip_count: Number of clips in the timeline
+
+    Returns:
+        int: Number of concurrent clip renders (at least 1)
+    """
+    try:
+        configured = int(app.config.get("COMPILE_CLIP_CONCURRENCY", 1) or 0)
+    except (TypeError, ValueError):
+        configured = 1
+
+    if configured <= 0:
+        configured = max(1, (os.cpu_count() or 1) // _CPU_CORES_PER_ENCODE)
+
+    workers = configured
+    if workers > 1 and detect_nvenc(ffmpeg_bin)[0]:
+        try:
+            nvenc_sessions = int(app.config.get("COMPILE_NVENC_MAX_SESSIONS", 3) or 1)
+        except (TypeError, ValueError):
+            nvenc_sessions = 1
+        workers = min(workers, max(1, nvenc_sessions))
+
+    return max(1, min(workers, clip_count))
+
+
+def _render_clips_v2(
+    clips: list[dict],
+    temp_dir: str,
+    project_data: dict,
+    tier_limits: dict,
+    max_workers: int = 1,
+    on_start=None,
+    on_done=None,
+    checkpoint: CompileCheckpoint | None = None,
+) -> list[str | None]:
+    """Render clips through _process_clip_v2, optionally in a bounded pool.
+
+    Each clip runs its own ffmpeg process, so a thread pool is enough to keep
+    several encoders busy. Callbacks always run on the calling thread, which
+    keeps worker API calls (job logs, progress) out of the pool threads.
+    Clips already rendered by an interrupted run of the same compilation are
+    taken from the checkpoint instead of being queued.
+
+    Args:
+        clips: Clip dicts in timeline order
+        temp_dir: Temporary directory for processing
+        project_data: Project dict from API
+        tier_limits: Tier limits dict
+        max_workers: Maximum number of clips rendered concurrently
+        on_start: Optional callback(index, completed_count) before a clip starts
+        on_done: Optional callback(index, completed_count, clip_path, error)
+            after a clip finishes; error is the exception on failure
+        checkpoint: Optional compile checkpoint; finished clips are recorded
+            in it and clips it already holds are not rendered again
+
+    Returns:
+        List of processed clip paths in timeline order (None for failed clips)
+    """
+    results: list[str | None] = [None] * len(clips)
+    completed = 0
+
+    def _finish(
+        idx: int, clip_path: str | None, error: Exception | None, resumed=False
+    ) -> None:
+        nonlocal completed
+        completed += 1
+        results[idx] = clip_path if error is None else None
+        if not resumed:
+            _unpin_clip_input(project_data, clips[idx])
+        if checkpoint is not None and clip_path and error is None and not resumed:
+            checkpoint.record(f"clip:{clips[idx]['id']}", clip_path)
+        if on_done:
+            on_done(idx, completed, clip_path, error)
+
+    todo = []
+    for idx, clip in enumerate(clips):
+        resumed = None
+        if checkpoint is not None:
+            resumed = checkpoint.get_path(f"clip:{clip['id']}")
+        if resumed:
+            _finish(idx, resumed, None, resumed=True)
+        else:
+            todo.append(idx)
+
+    if max_workers <= 1 or len(todo) <= 1:
+        for idx in todo:
+            clip = clips[idx]
+            if on_start:
+                on_start(idx, completed)
+            try:
+                clip_path = _process_clip_v2(clip, temp_dir, project_data, tier_limits)
+            except Exception as e:
+                _finish(idx, None, e)
+            else:
+                _finish(idx, clip_path, None)
+        return results
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    pending = {}
+    queue = iter(todo)
+    next_idx = next(queue, None)
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="clip-render"
+    ) as pool:
+        while next_idx is not None or pending:
+            # Top up the pool so at most max_workers ffmpeg processes run
+            while next_idx is not None and len(pending) < max_workers:
+                if on_start:
+                    on_start(next_idx, completed)
+                future = pool.submit(
+                    _process_clip_v2,
+                    clips[next_idx],
+                    temp_dir,
+                    project_data,
+                    tier_limits,
+                )
+                pending[future] = next_idx
+                next_idx = next(queue, None)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = pending.pop(future)
+                error = future.exception()
+                _finish(idx, None if error else future.result(), error)
+
+    return results
+
+
+def _library_asset_version(media_data: dict, local_path: str) -> str:
+    """Return a version stamp for a library asset from its library metadata.
+
+    Uses the upload timestamp plus checksum (or size) reported by the server so
+    a replaced intro/outro/transition invalidates its conformed renders. Falls
+    back to the local file's size/mtime when the API omits those fields.
+    """
+    uploaded = media_data.get("uploaded_at")
+    ident = media_data.get("checksum") or media_data.get("file_size")
+    if uploaded or ident:
+        return f"{uploaded or ''}-{ident or ''}"
+    return file_fingerprint(local_path)
+
+
+def _run_conform_encode(
+    app,
+    cmd: list[str],
+    output_path: str,
+    source_path: str,
+    asset: str,
+    version: str,
+    project_data: dict,
+) -> None:
+    """Run a library asset conform encode, reusing a cached render if present.
+
+    Intro/outro/transition/static renders depend only on the asset and the
+    target profile encoded in cmd, so the same bumper is encoded once per
+    resolution/fps/encoder combination rather than once per compile.
+    """
+    cache = None if project_data.get("_preview_mode") else get_asset_cache(app)
+    cache_key = namespace = None
+    if cache:
+        namespace = cache.namespace(asset, version)
+        cache_inputs = {source_path: f"asset:{namespace}"}
+        segment_watermark = project_data.get("_segment_watermark")
+        if segment_watermark:
+            cache_inputs[segment_watermark["path"]] = segment_watermark["fingerprint"]
+        cache_key = cache.make_key(cmd, output_path, cache_inputs)
+        if cache.fetch(cache_key, output_path, namespace=namespace):
+            app.logger.info(f"Asset cache hit for {asset} ({cache_key[:12]})")
+            return
+
+    progress = project_data.get("_progress")
+    run_ffmpeg(cmd, on_progress=progress.tracker(output_path) if progress else None)
+
+    if cache and cache_key:
+        try:
+            cache.store(cache_key, output_path, namespace=namespace)
+        except Exception as e:
+            app.logger.warning(f"Failed to cache conformed {asset}: {e}")
+
+
 def _process_media_file_v2(
     media_data: dict, output_path: str, project_data: dict, tier_limits: dict
 ) -> None:
@@ -718,7 +1300,7 @@ def _process_media_file_v2(
         )
 
         # Create cache directory
-        cache_dir = os.path.join(tempfile.gettempdir(), "clippy-worker-cache")
+        cache_dir = _worker_cache_dir(app)
 
         try:
             # Download the file
@@ -730,7 +1312,7 @@ def _process_media_file_v2(
                     f"Missing media_id or user_id for media file {media_data}"
                 )
 
-            media_path = _download_media_file(media_id, user_id, cache_dir)
+            media_path = _fetch_input_media(project_data, media_id, user_id, cache_dir)
             app.logger.info(f"Successfully downloaded media {media_id} to {media_path}")
 
         except Exception as e:
@@ -793,8 +1375,7 @@ def _process_media_file_v2(
         *_cfg_args(app, "ffmpeg", "encode"),
         "-i",
         media_path,
-        "-vf",
-        scale_filter,
+        *_conform_video_args(scale_filter, project_data),
         *encoder_args(ffmpeg_bin),
     ]
 
@@ -815,7 +1396,89 @@ def _process_media_file_v2(
         ]
     )
 
-    subprocess.run(cmd, check=True, capture_output=True)
+    _run_conform_encode(
+        app,
+        cmd,
+        output_path,
+        media_path,
+        asset=f"media_{media_data.get('id')}",
+        version=_library_asset_version(media_data, media_path),
+        project_data=project_data,
+    )
+
+
+def _resolve_static_bumper_path(app, temp_dir: str, log_func=None) -> str | None:
+    """Locate the static bumper, downloading it into temp_dir if needed.
+
+    Checks STATIC_BUMPER_PATH, then instance/assets/static.mp4, then fetches
+    /api/assets/static.mp4 from MEDIA_BASE_URL.
+
+    Args:
+        app: Flask app instance
+        temp_dir: Directory for a downloaded copy
+        log_func: Optional logging function for job result logs
+
+    Returns:
+        Path to the static bumper, or None if unavailable
+    """
+    static_bumper_path = None
+
+    # Check configured path first
+    configured_static = app.config.get("STATIC_BUMPER_PATH")
+    if configured_static and os.path.exists(configured_static):
+        static_bumper_path = configured_static
+        logger.info(f"Using configured static bumper: {static_bumper_path}")
+    else:
+        # Try instance/assets/static.mp4
+        with app.app_context():
+            from app.storage import data_root
+
+            instance_static = os.path.join(data_root(), "..", "assets", "static.mp4")
+            instance_static = os.path.normpath(instance_static)
+            logger.info(f"Checking for static bumper at: {instance_static}")
+            if os.path.exists(instance_static):
+                static_bumper_path = instance_static
+                logger.info(f"Found static bumper: {static_bumper_path}")
+            else:
+                logger.warning(f"Static bumper not found locally at: {instance_static}")
+                # Try downloading from main server via worker API
+                try:
+                    api_base = app.config.get("MEDIA_BASE_URL", "").rstrip("/")
+                    if api_base:
+                        static_url = f"{api_base}/api/assets/static.mp4"
+                        logger.info(
+                            f"Attempting to download static bumper from: {static_url}"
+                        )
+
+                        downloaded_static = os.path.join(
+                            temp_dir, "static_download.mp4"
+                        )
+                        resp = worker_api.get_session().get(
+                            static_url, timeout=30, stream=True
+                        )
+                        if resp.status_code == 200:
+                            with open(downloaded_static, "wb") as f:
+                                for chunk in resp.iter_content(
+                                    chunk_size=DEFAULT_CHUNK_BYTES
+                                ):
+                                    f.write(chunk)
+                            static_bumper_path = downloaded_static
+                            logger.info(
+                                f"Successfully downloaded static bumper to: {static_bumper_path}"
+                            )
+                        else:
+                            logger.warning(
+                                f"Failed to download static bumper: HTTP {resp.status_code}"
+                            )
+                    elif log_func:
+                        log_func(
+                            "warn",
+                            "MEDIA_BASE_URL not configured, cannot download static bumper",
+                        )
+                except Exception as e:
+                    logger.error(f"Error downloading static bumper: {e}")
+
+    return static_bumper_path
 
 
 def _build_timeline_with_transitions_v2(
@@ -918,63 +1581,18 @@ def _build_timeline_with_transitions_v2(
 
     log("info", f"Processed {len(transition_paths)} transitions")
 
-    # Get static bumper path
+    # Get static bumper path (resolved ahead of time when prefetching)
     app = _get_app()
     ffmpeg_bin = resolve_binary(app, "ffmpeg")
-    static_bumper_path = None
-
-    # Check configured path first
-    configured_static = app.config.get("STATIC_BUMPER_PATH")
-    if configured_static and os.path.exists(configured_static):
-        static_bumper_path = configured_static
-        logger.info(f"Using configured static bumper: {static_bumper_path}")
+    prefetch = project_data.get("_prefetch")
+    if prefetch is not None and prefetch.has(("static",)):
+        try:
+            static_bumper_path = prefetch.result(("static",))
+        except Exception as e:
+            logger.error(f"Error downloading static bumper: {e}")
+            static_bumper_path = None
     else:
-        # Try instance/assets/static.mp4
-        with app.app_context():
-            from app.storage import data_root
-
-            instance_static = os.path.join(data_root(), "..", "assets", "static.mp4")
-            instance_static = os.path.normpath(instance_static)
-            logger.info(f"Checking for static bumper at: {instance_static}")
-            if os.path.exists(instance_static):
-                static_bumper_path = instance_static
-                logger.info(f"Found static bumper: {static_bumper_path}")
-            else:
-                logger.warning(f"Static bumper not found locally at: {instance_static}")
-                # Try downloading from main server via worker API
-                try:
-                    api_base = app.config.get("MEDIA_BASE_URL", "").rstrip("/")
-                    if api_base:
-                        static_url = f"{api_base}/api/assets/static.mp4"
-                        logger.info(
-                            f"Attempting to download static bumper from: {static_url}"
-                        )
-
-                        downloaded_static = os.path.join(
-                            temp_dir, "static_download.mp4"
-                        )
-                        import requests
-
-                        resp = requests.get(static_url, timeout=30, stream=True)
-                        if resp.status_code == 200:
-                            with open(downloaded_static, "wb") as f:
-                                for chunk in resp.iter_content(chunk_size=8192):
-                                    f.write(chunk)
-                            static_bumper_path = downloaded_static
-                            logger.info(
-                                f"Successfully downloaded static bumper to: {static_bumper_path}"
-                            )
-                        else:
-                            logger.warning(
-                                f"Failed to download static bumper: HTTP {resp.status_code}"
-                            )
-                    else:
-                        log(
-                            "warn",
-                            "MEDIA_BASE_URL not configured, cannot download static bumper",
-                        )
-                except Exception as e:
-                    logger.error(f"Error downloading static bumper: {e}")
+        static_bumper_path = _resolve_static_bumper_path(app, temp_dir, log)
 
     # Process static bumper if present
     processed_static_path = None
@@ -1049,8 +1667,7 @@ def _build_timeline_with_transitions_v2(
             *_cfg_args(app, "ffmpeg", "encode"),
             "-i",
             static_bumper_path,
-            "-vf",
-            scale_filter,
+            *_conform_video_args(scale_filter, project_data),
             *encoder_args(ffmpeg_bin),
         ]
 
@@ -1071,7 +1688,15 @@ def _build_timeline_with_transitions_v2(
                 processed_static_path,
             ]
         )
-        subprocess.run(static_cmd, check=True, capture_output=True)
+        _run_conform_encode(
+            app,
+            static_cmd,
+            processed_static_path,
+            static_bumper_path,
+            asset="static",
+            version=file_sha256(static_bumper_path),
+            project_data=project_data,
+        )
 
     # Build timeline with transitions between segments
     import random as _random
@@ -1152,6 +1777,350 @@ def _build_timeline_with_transitions_v2(
     return segments
 
 
+def _timeline_duration(clips: list[str]) -> float:
+    """Return the summed duration of timeline segments.
+
+    Static bumpers and transitions repeat on the timeline; each file is
+    probed once.
+    """
+    durations: dict[str, float] = {}
+    for clip_path in clips:
+        if clip_path not in durations:
+            meta = extract_video_metadata(clip_path) or {}
+            durations[clip_path] = float(meta.get("duration") or 0)
+    return sum(durations[p] for p in clips)
+
+
+def _write_concat_list(clips: list[str], temp_dir: str) -> str:
+    """Write a concat demuxer list for the given segment paths."""
+    concat_file = os.path.join(temp_dir, "concat.txt")
+    with open(concat_file, "w") as f:
+        for clip_path in clips:
+            # Escape single quotes in path
+            escaped = clip_path.replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+    return concat_file
+
+
+def _fetch_music_path(app, background_music_id: int, user_id: int | None) -> str | None:
+    """Resolve the background music file locally, downloading it if needed."""
+    music_path = None
+    try:
+        if user_id:
+            response = worker_api.get_media_batch([background_music_id], user_id)
+            media_files = response.get("media_files", [])
+            if media_files:
+                music_data = media_files[0]
+                music_path = music_data.get("file_path")
+
+                # Download music file if not accessible locally (remote worker)
+                if music_path and not os.path.exists(music_path):
+                    app.logger.info(
+                        f"Music file not found locally: {music_path}. Attempting download..."
+                    )
+                    cache_dir = _worker_cache_dir(app)
+                    try:
+                        music_path = _download_media_file(
+                            background_music_id, user_id, cache_dir
+                        )
+                        app.logger.info(
+                            f"Successfully downloaded music file to {music_path}"
+                        )
+                    except Exception as e:
+                        app.logger.error(
+                            f"Failed to download music file: {e}", exc_info=True
+                        )
+                        music_path = None
+    except Exception:
+        pass
+
+    if not music_path or not os.path.exists(music_path):
+        return None
+    return music_path
+
+
+def _static_bumper_duration(app) -> float:
+    """Return the duration of the static bumper used between timeline items."""
+    static_duration = 0.0
+    static_bumper_path = None
+    try:
+        configured_static = app.config.get("STATIC_BUMPER_PATH")
+        if configured_static and os.path.exists(configured_static):
+            static_bumper_path = configured_static
+        else:
+            # Try instance/assets/static.mp4
+            try:
+                from app.storage import data_root
+
+                instance_static = os.path.join(
+                    data_root(), "..", "assets", "static.mp4"
+                )
+                instance_static = os.path.normpath(instance_static)
+                if os.path.exists(instance_static):
+                    static_bumper_path = instance_static
+            except Exception:
+                pass
+
+        if static_bumper_path and os.path.exists(static_bumper_path):
+            static_meta = extract_video_metadata(static_bumper_path)
+            static_duration = float(static_meta.get("duration", 0))
+            app.logger.info(f"Static bumper duration: {static_duration}s")
+    except Exception as e:
+        app.logger.warning(f"Failed to get static duration: {e}")
+    return static_duration
+
+
+def _library_media_duration(
+    app, media_id: int, user_id: int | None, label: str
+) -> float:
+    """Return an intro/outro duration from the library, probing the file if unset."""
+    if not user_id:
+        app.logger.warning(f"user_id is None, cannot fetch {label} duration")
+        return 0.0
+
+    response = worker_api.get_media_batch([media_id], user_id)
+    media_files = response.get("media_files", [])
+    if not media_files:
+        app.logger.warning(f"No media files returned for {label}_id={media_id}")
+        return 0.0
+
+    media_data = media_files[0]
+    duration = media_data.get("duration", 0)
+
+    # If duration is missing from database, extract it from the file
+    if not duration:
+        app.logger.warning(
+            f"{label.capitalize()} duration is 0 or None, extracting from file"
+        )
+        media_path = media_data.get("file_path")
+        if media_path:
+            # Check if file exists locally, otherwise download it
+            media_path = _resolve_media_input_path(media_path)
+            if not os.path.exists(media_path):
+                cache_dir = _worker_cache_dir(app)
+                media_path = _download_media_file(media_id, user_id, cache_dir)
+
+            meta = extract_video_metadata(media_path)
+            duration = meta.get("duration", 0)
+            app.logger.info(f"Extracted {label} duration from file: {duration}s")
+
+    return float(duration or 0)
+
+
+def _music_window(
+    app,
+    total_duration: float,
+    music_start_mode: str | None,
+    music_end_mode: str | None,
+    intro_id: int | None,
+    outro_id: int | None,
+    user_id: int | None,
+) -> tuple[float, float]:
+    """Compute when background music starts and stops on the final timeline.
+
+    Returns:
+        Tuple of (start_seconds, end_seconds)
+    """
+    static_duration = _static_bumper_duration(app)
+
+    music_start_time = 0.0
+    music_end_time = total_duration
+
+    app.logger.info(
+        f"Music start calculation: mode={music_start_mode}, intro_id={intro_id}, user_id={user_id}"
+    )
+    if music_start_mode == "after_intro" and intro_id:
+        try:
+            intro_duration = _library_media_duration(app, intro_id, user_id, "intro")
+            if intro_duration:
+                # Account for intro + static bumper after intro
+                music_start_time = intro_duration + static_duration
+                app.logger.info(
+                    f"Music start: after intro (intro={intro_duration}s + static={static_duration}s = {music_start_time}s)"
+                )
+        except Exception as e:
+            app.logger.error(f"Failed to get intro duration: {e}", exc_info=True)
+
+    if music_end_mode == "before_outro" and outro_id:
+        try:
+            outro_duration = _library_media_duration(app, outro_id, user_id, "outro")
+            if outro_duration:
+                # Account for outro + static bumper before outro (after last clip)
+                music_end_time = total_duration - outro_duration - static_duration
+                app.logger.info(
+                    f"Music end: before outro (outro={outro_duration}s + static={static_duration}s, end={music_end_time}s)"
+                )
+        except Exception as e:
+            app.logger.warning(f"Failed to get outro duration: {e}")
+
+    return music_start_time, music_end_time
+
+
+def _has_audio_stream(app, path: str) -> bool:
+    """Return True when the file has at least one audio stream."""
+    data = media_probe.probe(
+        path,
+        resolve_binary(app, "ffprobe"),
+        config_args(app, "ffprobe"),
+        config=app.config,
+    )
+    if data is None:
+        return True  # Assume audio exists if detection fails
+    return media_probe.has_audio(data)
+
+
+def _music_filter(
+    music_input: str,
+    video_audio: str,
+    has_audio_stream: bool,
+    music_start_time: float,
+    music_end_time: float,
+    music_file_duration: float,
+    volume: float,
+    threshold: float,
+    ratio: float,
+    attack: float,
+    release: float,
+) -> tuple[str, str]:
+    """Build the music mixing filtergraph.
+
+    When the video has audio, the music is ducked under it with
+    sidechaincompress; otherwise the music becomes the only audio track.
+
+    Args:
+        music_input: Input pad of the music stream (e.g. "[1:a]")
+        video_audio: Input pad of the programme audio (e.g. "[0:a]")
+        has_audio_stream: Whether the video carries its own audio
+        music_start_time: Timeline position where music starts (seconds)
+        music_end_time: Timeline position where music stops (seconds)
+        music_file_duration: Duration of the music file (seconds)
+        volume: Music volume (0.0-1.0)
+        threshold: sidechaincompress threshold
+        ratio: sidechaincompress ratio
+        attack: sidechaincompress attack (ms)
+        release: sidechaincompress release (ms)
+
+    Returns:
+        Tuple of (filter_complex, audio output pad)
+    """
+    # Loop the music if it is shorter than the span it has to cover
+    needed_music_duration = music_end_time - music_start_time
+    needs_loop = music_file_duration > 0 and music_file_duration < needed_music_duration
+
+    # Fade out over the last 2 seconds; trim so music stops before the outro
+    fadeout_start = max(0, music_end_time - 2)
+    delay_ms = int(music_start_time * 1000)
+
+    # Order: loop -> delay -> trim -> volume/fade
+    music_chain = (
+        f"{music_input}"
+        f"{'aloop=loop=-1:size=2e+09,' if needs_loop else ''}"
+        f"adelay={delay_ms}|{delay_ms},"
+        f"atrim=end={music_end_time},"
+        f"volume={volume},afade=t=out:st={fadeout_start}:d=2[music]"
+    )
+
+    if not has_audio_stream:
+        return music_chain, "[music]"
+
+    # Duck the music whenever programme audio is above the threshold
+    filter_complex = (
+        f"{music_chain};"
+        f"{video_audio}asplit=2[va1][va2];"
+        f"[music][va2]sidechaincompress=threshold={threshold}:ratio={ratio}:attack={attack}:release={release}[compressed];"
+        f"[va1][compressed]amix=inputs=2:duration=first:dropout_transition=2[aout]"
+    )
+    return filter_complex, "[aout]"
+
+
+def _watermark_filter(
+    watermark_input: str,
+    video_input: str,
+    opacity: float = 0.3,
+    position: str = "bottom-right",
+    size: int = 40,
+    margin: int = 10,
+    output_label: str = "",
+) -> str:
+    """Build the filtergraph that scales, fades and overlays a watermark.
+
+    Args:
+        watermark_input: Input pad of the watermark image (e.g. "[1:v]")
+        video_input: Input pad of the video (e.g. "[0:v]")
+        opacity: Watermark opacity (0.0-1.0)
+        position: bottom-right, bottom-left, top-right or top-left
+        size: Watermark size in pixels (square)
+        margin: Margin from edges in pixels
+        output_label: Optional output pad label (e.g. "[vout]")
+
+    Returns:
+        Filtergraph string
+    """
+    # Calculate position based on position parameter
+    if position == "bottom-left":
+        x_pos = str(margin)
+        y_pos = f"H-h-{margin}"
+    elif position == "top-right":
+        x_pos = f"W-w-{margin}"
+        y_pos = str(margin)
+    elif position == "top-left":
+        x_pos = str(margin)
+        y_pos = str(margin)
+    else:
+        # Default to bottom-right
+        x_pos = f"W-w-{margin}"
+        y_pos = f"H-h-{margin}"
+
+    return (
+        f"{watermark_input}scale={size}:{size},format=yuva420p,colorchannelmixer=aa={opacity}[wm];"
+        f"{video_input}[wm]overlay={x_pos}:{y_pos}{output_label}"
+    )
+
+
+def _watermark_mode(app) -> str:
+    """Return where the tier watermark is drawn: "final" or "segment"."""
+    mode = str(app.config.get("COMPILE_WATERMARK_MODE") or "final").strip().lower()
+    return mode if mode in ("final", "segment") else "final"
+
+
+def _segment_watermark_filter(watermark: dict, watermark_input: str, video: str) -> str:
+    """Overlay a per-segment watermark on pad video, producing [v]."""
+    return _watermark_filter(
+        watermark_input,
+        video,
+        opacity=watermark.get("opacity", 0.3),
+        position=watermark.get("position", "bottom-right"),
+        size=watermark.get("size", 150),
+        margin=watermark.get("margin", 10),
+        output_label="[v]",
+    )
+
+
+def _conform_video_args(scale_filter: str, project_data: dict) -> list[str]:
+    """Return the video filter args for a library asset conform encode.
+
+    A plain ``-vf`` chain normally. When the watermark is burned into segments
+    the watermark image becomes input 1 and is overlaid after scaling, so the
+    asset lines up with watermarked clips on a stream-copied timeline.
+    """
+    watermark = project_data.get("_segment_watermark")
+    if not watermark:
+        return ["-vf", scale_filter]
+    filter_complex = f"[0:v]{scale_filter}[base];" + _segment_watermark_filter(
+        watermark, "[1:v]", "[base]"
+    )
+    return [
+        "-i",
+        watermark["path"],
+        "-filter_complex",
+        filter_complex,
+        "-map",
+        "[v]",
+        "-map",
+        "0:a?",
+    ]
+
+
 def _compile_final_video_v2(
     clips: list[str],
     temp_dir: str,
@@ -1197,13 +2166,7 @@ def _compile_final_video_v2(
         temp_dir, f"compilation_{project_data['id']}.{output_format}"
     )
 
-    # Create concat file
-    concat_file = os.path.join(temp_dir, "concat.txt")
-    with open(concat_file, "w") as f:
-        for clip_path in clips:
-            # Escape single quotes in path
-            escaped = clip_path.replace("'", r"'\''")
-            f.write(f"file '{escaped}'\n")
+    concat_file = _write_concat_list(clips, temp_dir)
 
     from app.ffmpeg_config import config_args as _cfg_args
 
@@ -1259,7 +2222,22 @@ def _compile_final_video_v2(
             concat_output,
         ]
 
-    subprocess.run(cmd, check=True, capture_output=True)
+    # The concat only survives as its own stage when music is mixed in after it
+    progress = project_data.get("_progress")
+    checkpoint = project_data.get("_checkpoint") if will_add_music else None
+    concat_inputs = [os.path.basename(c) for c in clips]
+    if checkpoint is not None and checkpoint.get_path("concat", concat_inputs):
+        app.logger.info("Resuming from checkpointed concat")
+        if progress:
+            progress.complete("concat")
+    else:
+        run_ffmpeg(
+            cmd,
+            on_progress=progress.tracker("concat") if progress else None,
+            duration=_timeline_duration(clips) if progress else None,
+        )
+        if checkpoint is not None:
+            checkpoint.record("concat", concat_output, concat_inputs)
 
     # If no background music, return the concat output
     if not background_music_id:
@@ -1273,289 +2251,55 @@ def _compile_final_video_v2(
         f"music_end_mode={music_end_mode}, intro_id={intro_id}, outro_id={outro_id}"
     )
 
-    # Fetch music file
-    music_path = None
-    try:
-        if user_id:
-            response = worker_api.get_media_batch([background_music_id], user_id)
-            media_files = response.get("media_files", [])
-            if media_files:
-                music_data = media_files[0]
-                music_path = music_data.get("file_path")
-
-                # Download music file if not accessible locally (remote worker)
-                if music_path and not os.path.exists(music_path):
-                    app.logger.info(
-                        f"Music file not found locally: {music_path}. Attempting download..."
-                    )
-                    cache_dir = os.path.join(
-                        tempfile.gettempdir(), "clippy-worker-cache"
-                    )
-                    try:
-                        music_path = _download_media_file(
-                            background_music_id, user_id, cache_dir
-                        )
-                        app.logger.info(
-                            f"Successfully downloaded music file to {music_path}"
-                        )
-                    except Exception as e:
-                        app.logger.error(
-                            f"Failed to download music file: {e}", exc_info=True
-                        )
-                        music_path = None
-    except Exception:
-        pass
-
     # If music file not found, return without music
-    if not music_path or not os.path.exists(music_path):
+    music_path = _fetch_music_path(app, background_music_id, user_id)
+    if not music_path:
         shutil.move(concat_output, output_path)
         return output_path
 
     # Calculate music start/end times based on intro/outro
-    # First, get total video duration
     video_meta = extract_video_metadata(concat_output)
     total_duration = video_meta.get("duration", 0)
-
-    # Get static bumper duration if it exists (used in timeline)
-    static_duration = 0.0
-    static_bumper_path = None
-    try:
-        configured_static = app.config.get("STATIC_BUMPER_PATH")
-        if configured_static and os.path.exists(configured_static):
-            static_bumper_path = configured_static
-        else:
-            # Try instance/assets/static.mp4
-            try:
-                from app.storage import data_root
-
-                instance_static = os.path.join(
-                    data_root(), "..", "assets", "static.mp4"
-                )
-                instance_static = os.path.normpath(instance_static)
-                if os.path.exists(instance_static):
-                    static_bumper_path = instance_static
-            except Exception:
-                pass
-
-        if static_bumper_path and os.path.exists(static_bumper_path):
-            static_meta = extract_video_metadata(static_bumper_path)
-            static_duration = float(static_meta.get("duration", 0))
-            app.logger.info(f"Static bumper duration: {static_duration}s")
-    except Exception as e:
-        app.logger.warning(f"Failed to get static duration: {e}")
-
-    music_start_time = 0.0
-    music_end_time = total_duration
-
-    # Calculate start time
-    app.logger.info(
-        f"Music start calculation: mode={music_start_mode}, intro_id={intro_id}, user_id={user_id}"
+    music_start_time, music_end_time = _music_window(
+        app,
+        total_duration,
+        music_start_mode,
+        music_end_mode,
+        intro_id,
+        outro_id,
+        user_id,
     )
-    if music_start_mode == "after_intro" and intro_id:
-        try:
-            if user_id:
-                response = worker_api.get_media_batch([intro_id], user_id)
-                app.logger.info(f"Intro media batch response: {response}")
-                media_files = response.get("media_files", [])
-                if media_files:
-                    intro_data = media_files[0]
-                    intro_duration = intro_data.get("duration", 0)
-                    app.logger.info(
-                        f"Intro data: {intro_data}, duration={intro_duration}"
-                    )
-
-                    # If duration is missing from database, extract it from the file
-                    if not intro_duration:
-                        app.logger.warning(
-                            "Intro duration is 0 or None, extracting from file"
-                        )
-                        intro_path = intro_data.get("file_path")
-                        if intro_path:
-                            # Check if file exists locally, otherwise download it
-                            intro_path = _resolve_media_input_path(intro_path)
-                            if not os.path.exists(intro_path):
-                                cache_dir = os.path.join(
-                                    tempfile.gettempdir(), "clippy-worker-cache"
-                                )
-                                intro_path = _download_media_file(
-                                    intro_id, user_id, cache_dir
-                                )
-
-                            # Extract metadata
-                            intro_meta = extract_video_metadata(intro_path)
-                            intro_duration = intro_meta.get("duration", 0)
-                            app.logger.info(
-                                f"Extracted intro duration from file: {intro_duration}s"
-                            )
-
-                    if intro_duration:
-                        # Account for intro + static bumper after intro
-                        music_start_time = float(intro_duration) + static_duration
-                        app.logger.info(
-                            f"Music start: after intro (intro={intro_duration}s + static={static_duration}s = {music_start_time}s)"
-                        )
-                    else:
-                        app.logger.warning(
-                            "Intro duration is still 0 or None after extraction attempt"
-                        )
-                else:
-                    app.logger.warning(
-                        f"No media files returned for intro_id={intro_id}"
-                    )
-            else:
-                app.logger.warning("user_id is None, cannot fetch intro duration")
-        except Exception as e:
-            app.logger.error(f"Failed to get intro duration: {e}", exc_info=True)
-
-    # Calculate end time
-    if music_end_mode == "before_outro" and outro_id:
-        try:
-            if user_id:
-                response = worker_api.get_media_batch([outro_id], user_id)
-                media_files = response.get("media_files", [])
-                if media_files:
-                    outro_data = media_files[0]
-                    outro_duration = outro_data.get("duration", 0)
-
-                    # If duration is missing from database, extract it from the file
-                    if not outro_duration:
-                        app.logger.warning(
-                            "Outro duration is 0 or None, extracting from file"
-                        )
-                        outro_path = outro_data.get("file_path")
-                        if outro_path:
-                            # Check if file exists locally, otherwise download it
-                            outro_path = _resolve_media_input_path(outro_path)
-                            if not os.path.exists(outro_path):
-                                cache_dir = os.path.join(
-                                    tempfile.gettempdir(), "clippy-worker-cache"
-                                )
-                                outro_path = _download_media_file(
-                                    outro_id, user_id, cache_dir
-                                )
-
-                            # Extract metadata
-                            outro_meta = extract_video_metadata(outro_path)
-                            outro_duration = outro_meta.get("duration", 0)
-                            app.logger.info(
-                                f"Extracted outro duration from file: {outro_duration}s"
-                            )
-
-                    if outro_duration:
-                        # Account for outro + static bumper before outro (after last clip)
-                        music_end_time = (
-                            total_duration - float(outro_duration) - static_duration
-                        )
-                        app.logger.info(
-                            f"Music end: before outro (outro={outro_duration}s + static={static_duration}s, end={music_end_time}s)"
-                        )
-        except Exception as e:
-            app.logger.warning(f"Failed to get outro duration: {e}")
 
     # Mix background music with audio ducking for clips that have audio
     volume = music_volume if music_volume is not None else 0.3
     volume = max(0.0, min(1.0, float(volume)))  # Clamp to 0-1
 
-    # Detect if video has audible content using silencedetect
-    # This helps us duck the music when the video has actual audio
-    try:
-        probe_cmd = [
-            resolve_binary(app, "ffprobe"),
-            "-v",
-            "error",
-            "-show_entries",
-            "stream=codec_type",
-            "-of",
-            "json",
-            concat_output,
-        ]
-        import json
-
-        probe_output = subprocess.check_output(probe_cmd, text=True)
-        probe_data = json.loads(probe_output)
-        has_audio_stream = any(
-            s.get("codec_type") == "audio" for s in probe_data.get("streams", [])
-        )
-    except Exception:
-        has_audio_stream = True  # Assume audio exists if detection fails
+    has_audio_stream = _has_audio_stream(app, concat_output)
 
     # Get music file duration to determine if we need to loop it
     music_meta = extract_video_metadata(music_path)
     music_file_duration = music_meta.get("duration", 0)
 
-    # Build ffmpeg command to mix audio
-    # If video has audio streams, use sidechaincompress to duck music when video audio is present
-    # Otherwise, just mix normally
-    music_duration = music_end_time - music_start_time
-
-    # Determine if we need to loop the music to cover the video duration
-    # We need music to last from start_time to end_time
-    needed_music_duration = music_duration
-    needs_loop = music_file_duration > 0 and music_file_duration < needed_music_duration
-
-    # Log music processing details
     app.logger.info(
         f"Background music: file_duration={music_file_duration}s, "
-        f"needed_duration={needed_music_duration}s, needs_loop={needs_loop}, "
         f"volume={volume}, start={music_start_time}s, end={music_end_time}s, "
         f"total_video={total_duration}s"
     )
 
-    # Calculate fadeout start time (2 seconds before music should end)
-    # Trim music to music_end_time so it stops before outro (if "before outro" is set)
-    fadeout_start = max(0, music_end_time - 2)
-
     # Use ducking parameters from project or defaults
-    threshold = duck_threshold if duck_threshold is not None else 0.02
-    ratio = duck_ratio if duck_ratio is not None else 20.0
-    attack = duck_attack if duck_attack is not None else 1.0
-    release = duck_release if duck_release is not None else 250.0
-
-    if has_audio_stream:
-        # Use sidechaincompress for automatic ducking when video audio is present
-        # This reduces music volume when video audio is detected above threshold
-        if needs_loop:
-            # Loop music to ensure it covers the full video duration
-            # Order: loop -> delay -> trim -> volume/fade
-            filter_complex = (
-                f"[1:a]aloop=loop=-1:size=2e+09,"
-                f"adelay={int(music_start_time * 1000)}|{int(music_start_time * 1000)},"
-                f"atrim=end={music_end_time},"
-                f"volume={volume},afade=t=out:st={fadeout_start}:d=2[music];"
-                f"[0:a]asplit=2[va1][va2];"
-                f"[music][va2]sidechaincompress=threshold={threshold}:ratio={ratio}:attack={attack}:release={release}[compressed];"
-                f"[va1][compressed]amix=inputs=2:duration=first:dropout_transition=2[aout]"
-            )
-        else:
-            # Music is long enough, delay and trim to music_end_time
-            filter_complex = (
-                f"[1:a]adelay={int(music_start_time * 1000)}|{int(music_start_time * 1000)},"
-                f"atrim=end={music_end_time},"
-                f"volume={volume},afade=t=out:st={fadeout_start}:d=2[music];"
-                f"[0:a]asplit=2[va1][va2];"
-                f"[music][va2]sidechaincompress=threshold={threshold}:ratio={ratio}:attack={attack}:release={release}[compressed];"
-                f"[va1][compressed]amix=inputs=2:duration=first:dropout_transition=2[aout]"
-            )
-        audio_map = "[aout]"
-    else:
-        # No audio in video, use music as the only audio source
-        # Loop music if needed to cover the video duration
-        if needs_loop:
-            # Order: loop -> delay -> trim -> volume/fade
-            filter_complex = (
-                f"[1:a]aloop=loop=-1:size=2e+09,"
-                f"adelay={int(music_start_time * 1000)}|{int(music_start_time * 1000)},"
-                f"atrim=end={music_end_time},"
-                f"volume={volume},afade=t=out:st={fadeout_start}:d=2[music]"
-            )
-        else:
-            # Music is long enough, delay and trim to music_end_time
-            filter_complex = (
-                f"[1:a]adelay={int(music_start_time * 1000)}|{int(music_start_time * 1000)},"
-                f"atrim=end={music_end_time},"
-                f"volume={volume},afade=t=out:st={fadeout_start}:d=2[music]"
-            )
-        audio_map = "[music]"
+    filter_complex, audio_map = _music_filter(
+        "[1:a]",
+        "[0:a]",
+        has_audio_stream,
+        music_start_time,
+        music_end_time,
+        music_file_duration,
+        volume,
+        duck_threshold if duck_threshold is not None else 0.02,
+        duck_ratio if duck_ratio is not None else 20.0,
+        duck_attack if duck_attack is not None else 1.0,
+        duck_release if duck_release is not None else 250.0,
+    )
 
     # Log the filter for debugging
     app.logger.info(f"Music filter_complex: {filter_complex}")
@@ -1583,12 +2327,269 @@ def _compile_final_video_v2(
         "-shortest",  # End when video ends
         "-y",
         output_path,
-    ]
+    ]
+
+    app.logger.info(f"Running music mix command: {' '.join(cmd)}")
+    result = run_ffmpeg(
+        cmd,
+        on_progress=progress.tracker("music") if progress else None,
+        duration=total_duration or None,
+        text=True,
+    )
+    if result.stderr:
+        app.logger.debug(f"FFmpeg music mix stderr: {result.stderr[-500:]}")
+
+    return output_path
+
+
+# Final-stage render engines: "multipass" concats, mixes music and watermarks
+# in separate ffmpeg runs; "single_pass" does all three in one filtergraph.
+_RENDER_ENGINES = ("multipass", "single_pass")
+
+
+def _resolve_render_engine(app, project_data: dict, tier_limits: dict) -> str:
+    """Pick the final-stage render engine for a compilation.
+
+    A project setting wins over the tier setting, which wins over the
+    COMPILE_RENDER_ENGINE default. Unknown values fall through.
+
+    Returns:
+        "multipass" or "single_pass"
+    """
+    for candidate in (
+        project_data.get("render_engine"),
+        tier_limits.get("render_engine"),
+        app.config.get("COMPILE_RENDER_ENGINE"),
+    ):
+        engine = str(candidate or "").strip().lower().replace("-", "_")
+        if engine in _RENDER_ENGINES:
+            return engine
+    return "multipass"
+
+
+def _build_single_pass_cmd(
+    ffmpeg_bin: str,
+    global_args: list[str],
+    concat_file: str,
+    output_path: str,
+    music: dict | None = None,
+    watermark: dict | None = None,
+    video_encoder_args: list[str] | None = None,
+    fragmented: bool = False,
+) -> list[str]:
+    """Build one ffmpeg command that concats, mixes music and watermarks.
+
+    Segments are already conformed to one profile, so the concat demuxer feeds
+    them straight into a single filtergraph. Video is only re-encoded when a
+    watermark has to be burned in; otherwise it is stream-copied.
+
+    Args:
+        ffmpeg_bin: ffmpeg binary
+        global_args: Leading ffmpeg args (config_args for "encode")
+        concat_file: Concat demuxer list of timeline segments
+        output_path: Final output path
+        music: Optional dict with "path" and the _music_filter arguments
+            (has_audio_stream, start, end, file_duration, volume, threshold,
+            ratio, attack, release)
+        watermark: Optional dict with "path", "opacity", "position", "size",
+            "margin"
+        video_encoder_args: Encoder args used when a watermark is applied
+        fragmented: Mux fragmented MP4 so the output can be read while written
+
+    Returns:
+        ffmpeg argv
+    """
+    cmd = [
+        ffmpeg_bin,
+        *global_args,
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-fflags",
+        "+genpts",
+        "-i",
+        concat_file,
+    ]
+    graphs: list[str] = []
+    next_input = 1
+    video_map, audio_map = "0:v", "0:a?"
+
+    if music:
+        cmd.extend(["-i", music["path"]])
+        music_graph, audio_map = _music_filter(
+            f"[{next_input}:a]",
+            "[0:a]",
+            music["has_audio_stream"],
+            music["start"],
+            music["end"],
+            music["file_duration"],
+            music["volume"],
+            music["threshold"],
+            music["ratio"],
+            music["attack"],
+            music["release"],
+        )
+        graphs.append(music_graph)
+        next_input += 1
+
+    if watermark:
+        cmd.extend(["-i", watermark["path"]])
+        graphs.append(
+            _watermark_filter(
+                f"[{next_input}:v]",
+                "[0:v]",
+                opacity=watermark.get("opacity", 0.3),
+                position=watermark.get("position", "bottom-right"),
+                size=watermark.get("size", 150),
+                margin=watermark.get("margin", 10),
+                output_label="[vout]",
+            )
+        )
+        video_map = "[vout]"
+
+    if graphs:
+        cmd.extend(["-filter_complex", ";".join(graphs)])
+    cmd.extend(["-map", video_map, "-map", audio_map])
+
+    if watermark:
+        cmd.extend(video_encoder_args or [])
+    else:
+        cmd.extend(["-c:v", "copy"])
+
+    if music:
+        cmd.extend(["-c:a", "aac", "-b:a", "192k", "-ar", "48000", "-shortest"])
+    else:
+        cmd.extend(["-c:a", "copy"])
+
+    if fragmented:
+        cmd.extend(FRAGMENTED_MP4_ARGS)
+    cmd.extend(["-avoid_negative_ts", "make_zero", "-y", output_path])
+    return cmd
+
+
+def _compile_single_pass_v2(
+    clips: list[str],
+    temp_dir: str,
+    project_data: dict,
+    background_music_id: int | None = None,
+    music_volume: float | None = None,
+    music_start_mode: str | None = None,
+    music_end_mode: str | None = None,
+    intro_id: int | None = None,
+    outro_id: int | None = None,
+    user_id: int | None = None,
+    duck_threshold: float | None = None,
+    duck_ratio: float | None = None,
+    duck_attack: float | None = None,
+    duck_release: float | None = None,
+    watermark: dict | None = None,
+) -> str:
+    """Concat, mix music and watermark the timeline in a single ffmpeg run.
+
+    Produces the same output as _compile_final_video_v2 followed by
+    _apply_watermark_overlay without writing the intermediate concat and
+    music-mix files. Timeline duration is the sum of segment durations, since
+    there is no concat output to probe.
+
+    Args:
+        clips: Timeline segment paths (already conformed)
+        temp_dir: Temporary directory
+        project_data: Project dict from API
+        background_music_id..duck_release: As for _compile_final_video_v2
+        watermark: Optional dict with "path", "opacity", "position", "size",
+            "margin"
+
+    Returns:
+        Path to compiled output file
+    """
+    app = _get_app()
+    ffmpeg_bin = resolve_binary(app, "ffmpeg")
+
+    output_format = project_data.get("output_format", "mp4")
+    output_path = os.path.join(
+        temp_dir, f"compilation_{project_data['id']}.{output_format}"
+    )
+    concat_file = _write_concat_list(clips, temp_dir)
+
+    from app.ffmpeg_config import config_args as _cfg_args
+
+    progress = project_data.get("_progress")
+    # Set by _finish_compilation_v2 when the output can be uploaded while
+    # it is being written
+    upload = project_data.get("_upload_stream")
+    if output_format not in FRAGMENTED_FORMATS:
+        upload = None
+    music = None
+    music_path = (
+        _fetch_music_path(app, background_music_id, user_id)
+        if background_music_id
+        else None
+    )
+    total_duration = _timeline_duration(clips) if music_path or progress else None
+    if music_path:
+        music_start_time, music_end_time = _music_window(
+            app,
+            total_duration,
+            music_start_mode,
+            music_end_mode,
+            intro_id,
+            outro_id,
+            user_id,
+        )
+        volume = music_volume if music_volume is not None else 0.3
+        music_meta = extract_video_metadata(music_path) or {}
+        music = {
+            "path": music_path,
+            # The concat demuxer takes its stream layout from the first segment
+            "has_audio_stream": _has_audio_stream(app, clips[0]),
+            "start": music_start_time,
+            "end": music_end_time,
+            "file_duration": music_meta.get("duration", 0),
+            "volume": max(0.0, min(1.0, float(volume))),
+            "threshold": duck_threshold if duck_threshold is not None else 0.02,
+            "ratio": duck_ratio if duck_ratio is not None else 20.0,
+            "attack": duck_attack if duck_attack is not None else 1.0,
+            "release": duck_release if duck_release is not None else 250.0,
+        }
+        app.logger.info(
+            f"Single-pass music: start={music_start_time}s, end={music_end_time}s, "
+            f"total_video={total_duration}s"
+        )
+
+    cmd = _build_single_pass_cmd(
+        ffmpeg_bin,
+        _cfg_args(app, "ffmpeg", "encode"),
+        concat_file,
+        output_path,
+        music=music,
+        watermark=watermark,
+        video_encoder_args=encoder_args(ffmpeg_bin) if watermark else None,
+        fragmented=upload is not None,
+    )
 
-    app.logger.info(f"Running music mix command: {' '.join(cmd)}")
-    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    app.logger.info(f"Running single-pass compile: {' '.join(cmd)}")
+    if upload is not None:
+        # A leftover output from an earlier attempt would be read before
+        # ffmpeg truncates it
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        upload.start_streaming(output_path)
+    try:
+        result = run_ffmpeg(
+            cmd,
+            on_progress=progress.tracker("final") if progress else None,
+            duration=total_duration or None,
+            text=True,
+        )
+    except BaseException:
+        if upload is not None:
+            upload.cancel_streaming()
+        raise
+    if upload is not None:
+        upload.writer_finished()
     if result.stderr:
-        app.logger.debug(f"FFmpeg music mix stderr: {result.stderr[-500:]}")
+        app.logger.debug(f"FFmpeg single-pass stderr: {result.stderr[-500:]}")
 
     return output_path
 
@@ -1601,6 +2602,7 @@ def _apply_watermark_overlay(
     position: str = "bottom-right",
     size: int = 40,
     margin: int = 10,
+    on_progress=None,
 ) -> str:
     """Apply watermark overlay to video.
 
@@ -1612,6 +2614,7 @@ def _apply_watermark_overlay(
         position: Watermark position (bottom-right, bottom-left, top-right, top-left)
         size: Watermark size in pixels (square)
         margin: Margin from edges in pixels
+        on_progress: Optional run_ffmpeg progress callback
 
     Returns:
         Output file path
@@ -1619,33 +2622,13 @@ def _apply_watermark_overlay(
     app = _get_app()
     ffmpeg_bin = resolve_binary(app, "ffmpeg")
 
-    # Calculate position based on position parameter
-    if position == "bottom-right":
-        x_pos = f"W-w-{margin}"
-        y_pos = f"H-h-{margin}"
-    elif position == "bottom-left":
-        x_pos = str(margin)
-        y_pos = f"H-h-{margin}"
-    elif position == "top-right":
-        x_pos = f"W-w-{margin}"
-        y_pos = str(margin)
-    elif position == "top-left":
-        x_pos = str(margin)
-        y_pos = str(margin)
-    else:
-        # Default to bottom-right
-        x_pos = f"W-w-{margin}"
-        y_pos = f"H-h-{margin}"
-
     # Build filter: scale watermark, set opacity, overlay
     # Use simpler approach: overlay filter with alpha blending
-    filter_complex = (
-        f"[1:v]scale={size}:{size},format=yuva420p,colorchannelmixer=aa={opacity}[wm];"
-        f"[0:v][wm]overlay={x_pos}:{y_pos}"
+    filter_complex = _watermark_filter(
+        "[1:v]", "[0:v]", opacity=opacity, position=position, size=size, margin=margin
     )
 
     from app.ffmpeg_config import config_args as _cfg_args
-    from app.ffmpeg_config import encoder_args
 
     cmd = [
         ffmpeg_bin,
@@ -1664,7 +2647,7 @@ def _apply_watermark_overlay(
     ]
 
     app.logger.info(f"Applying watermark overlay: {' '.join(cmd[:20])}...")
-    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    result = run_ffmpeg(cmd, on_progress=on_progress, text=True)
     if result.stderr:
         app.logger.debug(f"FFmpeg watermark stderr: {result.stderr[-500:]}")
 
@@ -1802,7 +2785,477 @@ def _save_final_video_v2(temp_path: str, project_data: dict, user_id: int) -> st
         return final_path
 
 
-@celery_app.task(bind=True, name="tasks.compile_video_v2")
+def _prepare_watermark(app, project_data: dict, tier_limits: dict, log) -> dict | None:
+    """Resolve the tier watermark for a compilation.
+
+    In "segment" mode the watermark is stored as project_data["_segment_watermark"]
+    for the clip/asset encodes to burn in, and None is returned; otherwise the
+    returned settings are applied by the final stage.
+
+    Args:
+        app: Flask app instance
+        project_data: Project dict from API
+        tier_limits: Tier limits dict
+        log: Job log function
+
+    Returns:
+        Watermark settings for the final stage, or None
+    """
+    watermark = None
+    if tier_limits.get("apply_watermark", False):
+        watermark_path_cfg = tier_limits.get("watermark_path")
+        if watermark_path_cfg:
+            try:
+                watermark_path = _resolve_watermark_path(app, watermark_path_cfg)
+            except Exception as wm_err:
+                log("warning", f"Failed to resolve watermark: {wm_err}")
+                watermark_path = None
+            if watermark_path:
+                watermark = {
+                    "path": watermark_path,
+                    "opacity": tier_limits.get("watermark_opacity", 0.3),
+                    "position": tier_limits.get("watermark_position", "bottom-right"),
+                    "size": tier_limits.get("watermark_size", 150),
+                    "margin": 10,
+                }
+            else:
+                log("warning", "Watermark configured but file not found, skipping")
+
+    if watermark and _watermark_mode(app) == "segment":
+        watermark["fingerprint"] = f"sha256:{file_sha256(watermark['path'])}"
+        project_data["_segment_watermark"] = watermark
+        watermark = None
+        log("info", "Watermark mode: burned into each segment")
+    return watermark
+
+
+def _finish_compilation_v2(
+    project_id: int,
+    job_id: int,
+    project_data: dict,
+    tier_limits: dict,
+    processed_clips: list[str],
+    used_clip_ids: list[int],
+    temp_dir: str,
+    options: dict,
+    watermark: dict | None,
+    progress: CompileProgress,
+    log,
+    checkpoint: CompileCheckpoint | None = None,
+    prefetch: InputPrefetcher | None = None,
+) -> dict[str, Any]:
+    """Build the timeline from rendered clips, then render, upload and record it.
+
+    Shared by compile_video_task_v2 and the distributed merge task, so both
+    take the same path from "clips rendered" to a completed job.
+
+    Args:
+        project_id: Project ID
+        job_id: Processing job ID
+        project_data: Project dict from API
+        tier_limits: Tier limits dict
+        processed_clips: Rendered clip paths in timeline order
+        used_clip_ids: Clip IDs matching processed_clips
+        temp_dir: Working directory for intermediate files
+        options: Task options (intro_id, outro_id, transition_ids,
+            randomize_transitions, background_music_id, music_volume,
+            music_start_mode, music_end_mode)
+        watermark: Final-stage watermark settings (see _prepare_watermark)
+        progress: Compile progress tracker
+        log: Job log function
+        checkpoint: Optional compile checkpoint for resumable stages
+        prefetch: Optional input prefetcher (summarized in the job log)
+
+    Returns:
+        Task result dict
+    """
+    intro_id = options.get("intro_id")
+    outro_id = options.get("outro_id")
+    transition_ids = options.get("transition_ids") or []
+    randomize_transitions = bool(options.get("randomize_transitions"))
+    background_music_id = options.get("background_music_id")
+    music_volume = options.get("music_volume")
+    music_start_mode = options.get("music_start_mode")
+    music_end_mode = options.get("music_end_mode")
+
+    # Number of asset encodes isn't known up front
+    progress.stage("timeline", 70, 80, "Adding intro/outro", units=None)
+    log(
+        "info",
+        f"Building timeline: intro_id={intro_id}, outro_id={outro_id}, transitions={len(transition_ids or [])}",
+    )
+
+    # Build timeline with transitions (reused as-is when the same clips
+    # were rendered before, which also keeps randomized transitions)
+    timeline_inputs = [os.path.basename(p) for p in processed_clips]
+    final_clips = (
+        checkpoint.get("timeline", timeline_inputs) if checkpoint is not None else None
+    )
+    if final_clips:
+        log("info", "Resuming from checkpointed timeline")
+    else:
+        final_clips = _build_timeline_with_transitions_v2(
+            project_data=project_data,
+            processed_clips=processed_clips,
+            temp_dir=temp_dir,
+            intro_id=intro_id,
+            outro_id=outro_id,
+            transition_ids=transition_ids or [],
+            randomize=randomize_transitions,
+            tier_limits=tier_limits,
+            log_func=log,
+        )
+        if checkpoint is not None:
+            checkpoint.record("timeline", final_clips, timeline_inputs)
+
+    if prefetch is not None:
+        for line in _prefetch_summary(prefetch):
+            log("info", line)
+
+    render_engine = _resolve_render_engine(_get_app(), project_data, tier_limits)
+    final_end = 85 if watermark and render_engine != "single_pass" else 90
+    # Multi-pass runs concat, then the music mix
+    final_units = 2 if background_music_id and render_engine != "single_pass" else 1
+    progress.stage("final", 80, final_end, "Compiling final video", units=final_units)
+    log("info", "Compiling final video", status="compiling")
+
+    # Log concat items
+    labels_path = os.path.join(temp_dir, "concat_labels.json")
+    try:
+        if os.path.exists(labels_path):
+            with open(labels_path) as f:
+                labels = json.load(f) or []
+                for idx, label in enumerate(labels):
+                    log(
+                        "info",
+                        f"Concatenating: {label} ({idx+1} of {len(labels)})",
+                        status="concatenating",
+                    )
+    except Exception:
+        pass
+
+    compile_kwargs = {
+        "background_music_id": background_music_id,
+        "music_volume": music_volume,
+        "music_start_mode": music_start_mode,
+        "music_end_mode": music_end_mode,
+        "intro_id": intro_id,
+        "outro_id": outro_id,
+        "user_id": project_data["user_id"],
+        "duck_threshold": project_data.get("duck_threshold"),
+        "duck_ratio": project_data.get("duck_ratio"),
+        "duck_attack": project_data.get("duck_attack"),
+        "duck_release": project_data.get("duck_release"),
+    }
+
+    # On storage shared with the web app the output is handed over in place;
+    # otherwise it is uploaded in resumable chunks, which the single-pass
+    # engine streams while ffmpeg is still writing the file
+    upload = None
+    handoff_token = None
+    app = _get_app()
+    if not project_data.get("_preview_mode"):
+        if handoff_enabled(app.config):
+            handoff_token = shared_storage_token(app)
+        if handoff_token is None and chunked_upload_enabled(app.config):
+            upload = CompilationUpload(project_id, chunk_size=chunk_bytes(app.config))
+            if stream_upload_enabled(app.config):
+                project_data["_upload_stream"] = upload
+
+    # Compile final video
+    final_inputs = {
+        "engine": render_engine,
+        "timeline": [os.path.basename(p) for p in final_clips],
+    }
+    output_path = (
+        checkpoint.get_path("final", final_inputs) if checkpoint is not None else None
+    )
+    if output_path:
+        log("info", "Resuming from checkpointed final video")
+        # Watermark stage: final_watermarked.mp4, or the single-pass
+        # output itself when the watermark was drawn in that run
+        watermarked = checkpoint.get_path("watermark", os.path.basename(output_path))
+        if watermarked:
+            output_path = watermarked
+            watermark = None
+    elif render_engine == "single_pass":
+        log("info", "Render engine: single-pass filtergraph")
+        try:
+            output_path = _compile_single_pass_v2(
+                final_clips,
+                temp_dir,
+                project_data,
+                watermark=watermark,
+                **compile_kwargs,
+            )
+            if checkpoint is not None:
+                checkpoint.record("final", output_path, final_inputs)
+            if watermark:
+                log("success", "Watermark applied successfully")
+                if checkpoint is not None:
+                    checkpoint.record(
+                        "watermark",
+                        output_path,
+                        os.path.basename(output_path),
+                    )
+            watermark = None
+        except Exception as sp_err:
+            log(
+                "warning",
+                f"Single-pass compile failed, falling back to multi-pass: {sp_err}",
+            )
+            progress.stage(
+                "final",
+                80,
+                85 if watermark else 90,
+                "Compiling final video",
+                units=2 if background_music_id else 1,
+            )
+
+    if output_path is None:
+        output_path = _compile_final_video_v2(
+            final_clips, temp_dir, project_data, **compile_kwargs
+        )
+        if checkpoint is not None:
+            checkpoint.record("final", output_path, final_inputs)
+
+    # Apply watermark if required by tier
+    if watermark:
+        progress.stage("watermark", 85, 90, "Applying watermark")
+        log("info", "Applying watermark overlay", status="watermark")
+
+        try:
+            watermark_output = os.path.join(temp_dir, "final_watermarked.mp4")
+            _apply_watermark_overlay(
+                input_path=output_path,
+                output_path=watermark_output,
+                watermark_path=watermark["path"],
+                opacity=watermark["opacity"],
+                position=watermark["position"],
+                size=watermark["size"],
+                margin=watermark["margin"],
+                on_progress=progress.tracker(),
+            )
+            if checkpoint is not None:
+                checkpoint.record(
+                    "watermark", watermark_output, os.path.basename(output_path)
+                )
+            output_path = watermark_output
+            log("success", "Watermark applied successfully")
+        except Exception as wm_err:
+            log("warning", f"Failed to apply watermark: {wm_err}")
+            # Continue with non-watermarked video
+
+    progress.stage("uploading", 90, 90, "Uploading compilation")
+    progress.close()
+    log("info", "Uploading compilation", status="uploading")
+
+    # Extract metadata before upload
+    meta = extract_video_metadata(output_path)
+    file_size = os.path.getsize(output_path)
+
+    # Generate thumbnail
+    thumb_path = None
+    try:
+        app = _get_app()
+        thumb_dir = tempfile.mkdtemp(prefix="thumb_")
+        stem = os.path.splitext(os.path.basename(output_path))[0]
+        thumb_path = os.path.join(thumb_dir, f"{stem}.jpg")
+
+        ffmpeg_bin = resolve_binary(app, "ffmpeg")
+        ts = str(app.config.get("THUMBNAIL_TIMESTAMP_SECONDS", 1))
+        w = int(app.config.get("THUMBNAIL_WIDTH", 480))
+
+        from app.ffmpeg_config import config_args as _cfg_args
+
+        subprocess.run(
+            [
+                ffmpeg_bin,
+                *_cfg_args(app, "ffmpeg", "thumbnail"),
+                "-y",
+                "-ss",
+                ts,
+                "-i",
+                output_path,
+                "-frames:v",
+                "1",
+                "-vf",
+                f"scale={w}:-1",
+                thumb_path,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except Exception as e:
+        log("warning", f"Failed to generate thumbnail: {e}")
+        thumb_path = None
+
+    # Upload compilation to server
+    try:
+        # Generate filename with timestamp
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        output_format = project_data.get("output_format", "mp4")
+        project_name = project_data.get("name", f"project_{project_data['id']}")
+        safe_name = "".join(
+            c for c in project_name if c.isalnum() or c in (" ", "_", "-")
+        )
+        safe_name = safe_name.replace(" ", "_")
+        filename = f"{safe_name}_{timestamp}.{output_format}"
+
+        upload_metadata = {
+            "filename": filename,
+            "file_size": file_size,
+        }
+        if meta:
+            upload_metadata.update(
+                {
+                    "duration": meta.get("duration"),
+                    "width": meta.get("width"),
+                    "height": meta.get("height"),
+                    "framerate": meta.get("framerate"),
+                }
+            )
+
+        # Skip upload in preview mode - preview task will handle it
+        if project_data.get("_preview_mode"):
+            log("info", "Preview mode: skipping compilation upload")
+            final_output_path = output_path
+        else:
+            upload_result = None
+            if handoff_token is not None:
+                try:
+                    upload_result = handoff_compilation(
+                        _get_app(),
+                        project_id,
+                        output_path,
+                        handoff_token,
+                        thumbnail_path=thumb_path,
+                        metadata=upload_metadata,
+                    )
+                    log(
+                        "info",
+                        "Handed compilation over on shared storage "
+                        f"({upload_result.get('handoff_mode')})",
+                    )
+                except Exception as handoff_err:
+                    log(
+                        "warning",
+                        f"Shared-storage handoff failed, uploading instead: {handoff_err}",
+                    )
+                    if chunked_upload_enabled(_get_app().config):
+                        upload = CompilationUpload(
+                            project_id, chunk_size=chunk_bytes(_get_app().config)
+                        )
+            if upload_result is None and upload is not None:
+                try:
+                    upload_result = upload.finish(
+                        output_path, thumbnail_path=thumb_path, metadata=upload_metadata
+                    )
+                    if upload.streamed_bytes:
+                        log(
+                            "info",
+                            f"Streamed {upload.streamed_bytes / 1048576:.1f} MB "
+                            "to the server while encoding",
+                        )
+                except UploadUnsupported:
+                    log(
+                        "info", "Server has no chunked upload; uploading in one request"
+                    )
+            if upload_result is None:
+                upload_result = worker_api.upload_compilation(
+                    project_id=project_id,
+                    video_path=output_path,
+                    thumbnail_path=thumb_path,
+                    metadata=upload_metadata,
+                )
+
+            log(
+                "success",
+                f"Uploaded compilation: {upload_result.get('media_id')}",
+                status="uploaded",
+            )
+            final_output_path = upload_result.get("file_path", output_path)
+
+    except Exception as e:
+        log("error", f"Failed to upload compilation: {e}")
+        # Fall back to local path if upload fails
+        final_output_path = output_path
+        # Don't save locally in preview mode - preview task needs temp file
+        if not project_data.get("_preview_mode"):
+            final_output_path = _save_final_video_v2(
+                output_path, project_data, project_data["user_id"]
+            )
+
+    # Update project status (skip in preview mode)
+    if not project_data.get("_preview_mode"):
+        worker_api.update_project_status(
+            project_id=project_id,
+            status="completed",
+            output_filename=os.path.basename(final_output_path),
+            output_file_size=file_size,
+        )
+
+    # Record render usage
+    try:
+        if meta and meta.get("duration"):
+            seconds = int(float(meta["duration"]))
+            if seconds > 0:
+                worker_api.record_render_usage(
+                    user_id=project_data["user_id"],
+                    project_id=project_id,
+                    seconds=seconds,
+                )
+    except Exception:
+        pass
+
+    # Update job status
+    # In preview mode, return raw temp path for preview task to use
+    if project_data.get("_preview_mode"):
+        result_output_file = final_output_path
+    else:
+        result_output_file = (
+            storage_lib.instance_canonicalize(final_output_path) or final_output_path
+        )
+
+    result_data = {
+        "output_file": result_output_file,
+        "clips_processed": len(processed_clips),
+        "used_clip_ids": used_clip_ids,
+    }
+
+    worker_api.update_processing_job(
+        job_id,
+        status="success",
+        progress=100,
+        result_data=result_data,
+    )
+
+    # Delivered: the checkpoint has nothing left to resume
+    if checkpoint is not None:
+        checkpoint.discard()
+        checkpoint = None
+
+    _get_app().logger.info(f"Worker API client metrics: {worker_api.get_metrics()}")
+    log("success", "Compilation completed", status="completed")
+
+    return {
+        "status": "completed",
+        "output_file": result_output_file,
+        "clips_processed": len(processed_clips),
+        "project_id": project_id,
+        "used_clip_ids": used_clip_ids,
+    }
+
+
+# acks_late + reject_on_worker_lost: a compile interrupted by a worker crash or
+# redeploy is redelivered and resumes from its checkpoint
+@celery_app.task(
+    bind=True,
+    name="tasks.compile_video_v2",
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 def compile_video_task_v2(
     self,
     project_id: int,
@@ -1838,6 +3291,8 @@ def compile_video_task_v2(
     Returns:
         Dict with compilation results
     """
+    job_log = None
+    progress = None
     try:
         # Log received parameters for debugging
         logger.info(
@@ -1876,25 +3331,23 @@ def compile_video_task_v2(
         )
         job_id = job_response["job_id"]
 
-        # Helper to log to job result_data
-        def log(level: str, message: str, status: str | None = None):
-            try:
-                # Fetch current job to get existing logs
-                job_data = worker_api.get_processing_job(job_id)
-                result_data = job_data.get("result_data") or {}
-                logs = result_data.get("logs") or []
-                logs.append(
-                    {
-                        "ts": datetime.utcnow().isoformat(),
-                        "level": level,
-                        "message": message,
-                        "status": status,
-                    }
-                )
-                result_data["logs"] = logs
-                worker_api.update_processing_job(job_id, result_data=result_data)
-            except Exception:
-                pass  # Don't fail compilation if logging fails
+        # Job log lines are buffered and shipped in batches
+        job_log = JobLogBuffer.from_config(_get_app().config, job_id)
+        log = job_log.log
+
+        # ffmpeg progress is folded into overall progress and published on a
+        # timer; update_state runs off the task thread, so pass the id along
+        task_id = self.request.id
+
+        def _publish_progress(snapshot: dict) -> None:
+            self.update_state(task_id=task_id, state="PROGRESS", meta=snapshot)
+            worker_api.update_processing_job(
+                job_id,
+                progress=int(snapshot["progress"]),
+                result_data={"progress_detail": snapshot},
+            )
+
+        progress = CompileProgress.from_config(_get_app().config, _publish_progress)
 
         # Filter clips if explicit timeline provided
         if clip_ids:
@@ -1917,324 +3370,212 @@ def compile_video_task_v2(
         if not clips:
             raise ValueError("No clips found for compilation")
 
-        self.update_state(
-            state="PROGRESS", meta={"progress": 10, "status": "Preparing clips"}
-        )
+        options = {
+            "intro_id": intro_id,
+            "outro_id": outro_id,
+            "transition_ids": transition_ids or [],
+            "randomize_transitions": randomize_transitions,
+            "background_music_id": background_music_id,
+            "music_volume": music_volume,
+            "music_start_mode": music_start_mode,
+            "music_end_mode": music_end_mode,
+        }
+
+        # Long timelines fan out across workers: this task is replaced by a
+        # chord of render subtasks and a merge task that keeps its task id
+        if not project_data.get("_preview_mode"):
+            from app.tasks.compile_distributed import (
+                dispatch_distributed,
+                plan_chunks,
+            )
+
+            chunks = plan_chunks(_get_app().config, clips)
+            if chunks:
+                return dispatch_distributed(
+                    self,
+                    job_id,
+                    project_id,
+                    project_data,
+                    tier_limits,
+                    clips,
+                    chunks,
+                    options,
+                    log,
+                )
+
+        progress.stage("preparing", 10, 10, "Preparing clips")
         log("info", "Preparing clips", status="preparing")
-        worker_api.update_processing_job(job_id, progress=10)
 
         # Process clips in temporary directory
         # Preview mode: use mkdtemp (manual cleanup) so preview task can access file
-        # Normal mode: use TemporaryDirectory (auto-cleanup)
+        # Normal mode: use a durable checkpoint directory keyed by the timeline
+        # hash, so a retried task resumes; TemporaryDirectory if unavailable
+        checkpoint = None
         if project_data.get("_preview_mode"):
             temp_dir = tempfile.mkdtemp(prefix="preview_compile_")
             log("info", f"Preview mode: using persistent temp dir {temp_dir}")
         else:
-            temp_dir_context = tempfile.TemporaryDirectory()
-            temp_dir = temp_dir_context.__enter__()
+            checkpoint = open_checkpoint(
+                _get_app(),
+                checkpoint_key(
+                    project_data,
+                    clips,
+                    tier_limits,
+                    {**options, "watermark_mode": _watermark_mode(_get_app())},
+                ),
+            )
+            if checkpoint is not None:
+                temp_dir = checkpoint.work_dir
+                project_data["_checkpoint"] = checkpoint
+                if checkpoint.stages:
+                    log(
+                        "info",
+                        f"Resuming compilation: {len(checkpoint.stages)} stage(s) "
+                        "already completed",
+                    )
+            else:
+                temp_dir_context = tempfile.TemporaryDirectory()
+                temp_dir = temp_dir_context.__enter__()
 
+        prefetch = None
+        cache_pin = None
         try:
+            # Resolve the watermark up front: in "segment" mode it is burned into
+            # every segment encode; otherwise the single-pass engine applies it
+            # while concatenating or the multi-pass engine overlays it afterwards
+            watermark = _prepare_watermark(_get_app(), project_data, tier_limits, log)
+
+            # Fetch remote inputs in the background so downloads overlap encodes;
+            # inputs of stages a previous run already finished aren't needed
+            library_ids: dict[int, str] = {}
+            for tid in transition_ids or []:
+                library_ids[tid] = "transition"
+            for media_id, label in (
+                (intro_id, "intro"),
+                (outro_id, "outro"),
+                (background_music_id, "music"),
+            ):
+                if media_id:
+                    library_ids[media_id] = label
+            fetch_clips = clips
+            if checkpoint is not None:
+                fetch_clips = [
+                    c for c in clips if not checkpoint.get_path(f"clip:{c['id']}")
+                ]
+                if "final" in checkpoint.stages:
+                    library_ids = {}
+            project_data["_cache_pin"] = cache_pin = f"compile-{uuid.uuid4().hex}"
+            prefetch = _start_prefetch(
+                _get_app(), project_data, fetch_clips, library_ids, temp_dir, log
+            )
+            if prefetch is not None:
+                project_data["_prefetch"] = prefetch
+            project_data["_progress"] = progress
+            stream_copy = StreamCopyStats()
+            project_data["_stream_copy"] = stream_copy
+
             processed_clips = []
             used_clip_ids = []
 
-            for i, clip in enumerate(clips):
-                progress = 10 + (i / len(clips)) * 60  # 10-70%
-                self.update_state(
-                    state="PROGRESS",
-                    meta={
-                        "progress": progress,
-                        "status": f"Processing clip {i+1}/{len(clips)}",
-                    },
+            render_workers = _clip_render_concurrency(
+                _get_app(), resolve_binary(_get_app(), "ffmpeg"), len(clips)
+            )
+            if render_workers > 1:
+                log(
+                    "info",
+                    f"Rendering {len(clips)} clips with {render_workers} parallel encoders",
                 )
+            seg_cache = get_segment_cache(_get_app())
+            cache_before = (seg_cache.hits, seg_cache.misses) if seg_cache else None
+
+            def _on_clip_start(i: int, completed: int) -> None:
+                progress.set_status(f"Processing clip {i+1}/{len(clips)}")
                 log("info", f"Processing clip {i+1}/{len(clips)}")
-                worker_api.update_processing_job(job_id, progress=int(progress))
 
-                try:
-                    clip_path = _process_clip_v2(
-                        clip, temp_dir, project_data, tier_limits
-                    )
-                    if clip_path:
-                        processed_clips.append(clip_path)
-                        used_clip_ids.append(clip["id"])
-                except Exception as e:
+            def _on_clip_done(
+                i: int, completed: int, clip_path: str | None, error: Exception | None
+            ) -> None:
+                if error is not None:
+                    clip_id = clips[i]["id"]
                     _get_app().logger.error(
-                        f"Failed to process clip {clip['id']}: {str(e)}", exc_info=True
+                        f"Failed to process clip {clip_id}: {str(error)}",
+                        exc_info=error,
                     )
-                    log("error", f"Failed to process clip {clip['id']}: {str(e)}")
-                    continue
-
-            if not processed_clips:
-                raise ValueError("No clips could be processed")
-
-            self.update_state(
-                state="PROGRESS", meta={"progress": 70, "status": "Adding intro/outro"}
-            )
-            log(
-                "info",
-                f"Building timeline: intro_id={intro_id}, outro_id={outro_id}, transitions={len(transition_ids or [])}",
-            )
-            worker_api.update_processing_job(job_id, progress=70)
-
-            # Build timeline with transitions
-            final_clips = _build_timeline_with_transitions_v2(
-                project_data=project_data,
-                processed_clips=processed_clips,
-                temp_dir=temp_dir,
-                intro_id=intro_id,
-                outro_id=outro_id,
-                transition_ids=transition_ids or [],
-                randomize=randomize_transitions,
-                tier_limits=tier_limits,
-                log_func=log,
-            )
+                    log("error", f"Failed to process clip {clip_id}: {str(error)}")
+                progress.complete(clips[i]["id"])
 
-            self.update_state(
-                state="PROGRESS",
-                meta={"progress": 80, "status": "Compiling final video"},
+            # 10-70%, averaged over the clips' ffmpeg progress
+            progress.stage(
+                "clips", 10, 70, f"Processing clip 1/{len(clips)}", units=len(clips)
             )
-            log("info", "Compiling final video", status="compiling")
-            worker_api.update_processing_job(job_id, progress=80)
-
-            # Log concat items
-            labels_path = os.path.join(temp_dir, "concat_labels.json")
-            try:
-                if os.path.exists(labels_path):
-                    with open(labels_path) as f:
-                        labels = json.load(f) or []
-                        for idx, label in enumerate(labels):
-                            log(
-                                "info",
-                                f"Concatenating: {label} ({idx+1} of {len(labels)})",
-                                status="concatenating",
-                            )
-            except Exception:
-                pass
 
-            # Compile final video
-            output_path = _compile_final_video_v2(
-                final_clips,
+            rendered = _render_clips_v2(
+                clips,
                 temp_dir,
                 project_data,
-                background_music_id=background_music_id,
-                music_volume=music_volume,
-                music_start_mode=music_start_mode,
-                music_end_mode=music_end_mode,
-                intro_id=intro_id,
-                outro_id=outro_id,
-                user_id=project_data["user_id"],
-                duck_threshold=project_data.get("duck_threshold"),
-                duck_ratio=project_data.get("duck_ratio"),
-                duck_attack=project_data.get("duck_attack"),
-                duck_release=project_data.get("duck_release"),
-            )
-
-            # Apply watermark if required by tier
-            if tier_limits.get("apply_watermark", False):
-                watermark_path_cfg = tier_limits.get("watermark_path")
-                if watermark_path_cfg:
-                    self.update_state(
-                        state="PROGRESS",
-                        meta={"progress": 85, "status": "Applying watermark"},
-                    )
-                    log("info", "Applying watermark overlay", status="watermark")
-                    worker_api.update_processing_job(job_id, progress=85)
-
-                    try:
-                        app = _get_app()
-                        watermark_path = _resolve_watermark_path(
-                            app, watermark_path_cfg
-                        )
-                        if watermark_path:
-                            watermark_output = os.path.join(
-                                temp_dir, "final_watermarked.mp4"
-                            )
-                            _apply_watermark_overlay(
-                                input_path=output_path,
-                                output_path=watermark_output,
-                                watermark_path=watermark_path,
-                                opacity=tier_limits.get("watermark_opacity", 0.3),
-                                position=tier_limits.get(
-                                    "watermark_position", "bottom-right"
-                                ),
-                                size=tier_limits.get("watermark_size", 150),
-                                margin=10,
-                            )
-                            output_path = watermark_output
-                            log("success", "Watermark applied successfully")
-                        else:
-                            log(
-                                "warning",
-                                "Watermark configured but file not found, skipping",
-                            )
-                    except Exception as wm_err:
-                        log("warning", f"Failed to apply watermark: {wm_err}")
-                        # Continue with non-watermarked video
-
-            self.update_state(
-                state="PROGRESS",
-                meta={"progress": 90, "status": "Uploading compilation"},
+                tier_limits,
+                max_workers=render_workers,
+                on_start=_on_clip_start,
+                on_done=_on_clip_done,
+                checkpoint=checkpoint,
             )
-            log("info", "Uploading compilation", status="uploading")
-            worker_api.update_processing_job(job_id, progress=90)
-
-            # Extract metadata before upload
-            meta = extract_video_metadata(output_path)
-            file_size = os.path.getsize(output_path)
-
-            # Generate thumbnail
-            thumb_path = None
-            try:
-                app = _get_app()
-                thumb_dir = tempfile.mkdtemp(prefix="thumb_")
-                stem = os.path.splitext(os.path.basename(output_path))[0]
-                thumb_path = os.path.join(thumb_dir, f"{stem}.jpg")
-
-                ffmpeg_bin = resolve_binary(app, "ffmpeg")
-                ts = str(app.config.get("THUMBNAIL_TIMESTAMP_SECONDS", 1))
-                w = int(app.config.get("THUMBNAIL_WIDTH", 480))
-
-                from app.ffmpeg_config import config_args as _cfg_args
-
-                subprocess.run(
-                    [
-                        ffmpeg_bin,
-                        *_cfg_args(app, "ffmpeg", "thumbnail"),
-                        "-y",
-                        "-ss",
-                        ts,
-                        "-i",
-                        output_path,
-                        "-frames:v",
-                        "1",
-                        "-vf",
-                        f"scale={w}:-1",
-                        thumb_path,
-                    ],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                )
-            except Exception as e:
-                log("warning", f"Failed to generate thumbnail: {e}")
-                thumb_path = None
-
-            # Upload compilation to server
-            try:
-                # Generate filename with timestamp
-                timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                output_format = project_data.get("output_format", "mp4")
-                project_name = project_data.get("name", f"project_{project_data['id']}")
-                safe_name = "".join(
-                    c for c in project_name if c.isalnum() or c in (" ", "_", "-")
-                )
-                safe_name = safe_name.replace(" ", "_")
-                filename = f"{safe_name}_{timestamp}.{output_format}"
-
-                upload_metadata = {
-                    "filename": filename,
-                    "file_size": file_size,
-                }
-                if meta:
-                    upload_metadata.update(
-                        {
-                            "duration": meta.get("duration"),
-                            "width": meta.get("width"),
-                            "height": meta.get("height"),
-                            "framerate": meta.get("framerate"),
-                        }
-                    )
 
-                # Skip upload in preview mode - preview task will handle it
-                if project_data.get("_preview_mode"):
-                    log("info", "Preview mode: skipping compilation upload")
-                    final_output_path = output_path
-                else:
-                    upload_result = worker_api.upload_compilation(
-                        project_id=project_id,
-                        video_path=output_path,
-                        thumbnail_path=thumb_path,
-                        metadata=upload_metadata,
-                    )
+            # Keep timeline order regardless of completion order
+            for clip, clip_path in zip(clips, rendered, strict=True):
+                if clip_path:
+                    processed_clips.append(clip_path)
+                    used_clip_ids.append(clip["id"])
 
+            if seg_cache and cache_before:
+                cache_hits = seg_cache.hits - cache_before[0]
+                cache_misses = seg_cache.misses - cache_before[1]
+                if cache_hits or cache_misses:
                     log(
-                        "success",
-                        f"Uploaded compilation: {upload_result.get('media_id')}",
-                        status="uploaded",
-                    )
-                    final_output_path = upload_result.get("file_path", output_path)
-
-            except Exception as e:
-                log("error", f"Failed to upload compilation: {e}")
-                # Fall back to local path if upload fails
-                final_output_path = output_path
-                # Don't save locally in preview mode - preview task needs temp file
-                if not project_data.get("_preview_mode"):
-                    final_output_path = _save_final_video_v2(
-                        output_path, project_data, project_data["user_id"]
+                        "info",
+                        f"Segment cache: {cache_hits} reused, {cache_misses} rendered",
                     )
 
-            # Update project status (skip in preview mode)
-            if not project_data.get("_preview_mode"):
-                worker_api.update_project_status(
-                    project_id=project_id,
-                    status="completed",
-                    output_filename=os.path.basename(final_output_path),
-                    output_file_size=file_size,
-                )
-
-            # Record render usage
-            try:
-                if meta and meta.get("duration"):
-                    seconds = int(float(meta["duration"]))
-                    if seconds > 0:
-                        worker_api.record_render_usage(
-                            user_id=project_data["user_id"],
-                            project_id=project_id,
-                            seconds=seconds,
-                        )
-            except Exception:
-                pass
-
-            # Update job status
-            # In preview mode, return raw temp path for preview task to use
-            if project_data.get("_preview_mode"):
-                result_output_file = final_output_path
-            else:
-                result_output_file = (
-                    storage_lib.instance_canonicalize(final_output_path)
-                    or final_output_path
-                )
+            if stream_copy.fast_path:
+                log("info", stream_copy.summary(len(clips)))
 
-            result_data = {
-                "output_file": result_output_file,
-                "clips_processed": len(processed_clips),
-                "used_clip_ids": used_clip_ids,
-            }
+            if not processed_clips:
+                raise ValueError("No clips could be processed")
 
-            worker_api.update_processing_job(
+            return _finish_compilation_v2(
+                project_id,
                 job_id,
-                status="success",
-                progress=100,
-                result_data=result_data,
+                project_data,
+                tier_limits,
+                processed_clips,
+                used_clip_ids,
+                temp_dir,
+                options,
+                watermark,
+                progress,
+                log,
+                checkpoint=checkpoint,
+                prefetch=prefetch,
             )
-
-            log("success", "Compilation completed", status="completed")
-
-            return {
-                "status": "completed",
-                "output_file": result_output_file,
-                "clips_processed": len(processed_clips),
-                "project_id": project_id,
-                "used_clip_ids": used_clip_ids,
-            }
         finally:
-            # Cleanup temp directory (but not in preview mode - preview task needs it)
-            if not project_data.get("_preview_mode"):
+            if prefetch is not None:
+                prefetch.shutdown()
+            if cache_pin:
+                media_cache = get_worker_cache(_get_app().config)
+                if media_cache is not None:
+                    media_cache.release(cache_pin)
+            # Cleanup temp directory (but not in preview mode - preview task needs
+            # it); an undelivered checkpoint is kept for the retried task
+            if checkpoint is not None:
+                checkpoint.release()
+            elif not project_data.get("_preview_mode"):
                 try:
                     temp_dir_context.__exit__(None, None, None)
                 except Exception:
                     pass
 
+    except Ignore:
+        # Replaced by a distributed render chord (Task.replace)
+        raise
     except Exception as e:
         # Update project and job on error
         try:
@@ -2253,3 +3594,8 @@ def compile_video_task_v2(
                 pass
 
         raise
+    finally:
+        if progress is not None:
+            progress.close()
+        if job_log is not None:
+            job_log.close()
@@ -16,7 +16,7 @@ Features:
 
 import os
 import subprocess
-from datetime import datetime
+import tempfile
 from typing import Any
 
 from app.tasks.celery_app import celery_app
@@ -73,29 +73,15 @@ def _upload_clip_to_server(
 
     # Get video dimensions if available
     try:
-        import json
-
-        probe_cmd = [
-            "ffprobe",
-            "-v",
-            "quiet",
-            "-print_format",
-            "json",
-            "-show_streams",
-            output_path,
-        ]
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-        probe_data = json.loads(result.stdout)
-        for stream in probe_data.get("streams", []):
-            if stream.get("codec_type") == "video":
-                metadata["width"] = stream.get("width")
-                metadata["height"] = stream.get("height")
-                if "r_frame_rate" in stream:
-                    num, den = stream["r_frame_rate"].split("/")
-                    metadata["framerate"] = (
-                        float(num) / float(den) if float(den) > 0 else None
-                    )
-                break
+        from app import media_probe
+
+        video_meta = media_probe.video_metadata(
+            media_probe.probe(output_path, os.environ.get("FFPROBE_BINARY", "ffprobe"))
+        )
+        if video_meta:
+            metadata["width"] = video_meta["width"]
+            metadata["height"] = video_meta["height"]
+            metadata["framerate"] = video_meta["framerate"] or None
     except Exception as e:
         print(f"Could not probe video metadata: {e}")
 
@@ -213,60 +199,168 @@ def _extract_video_metadata_standalone(video_path: str) -> dict[str, Any]:
     Returns:
         Dict with duration, width, height, framerate
     """
-    ffprobe_bin = os.environ.get("FFPROBE_BINARY", "ffprobe")
+    from app import media_probe
 
-    cmd = [
-        ffprobe_bin,
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration:stream=width,height,r_frame_rate,codec_name",
-        "-of",
-        "json",
-        video_path,
-    ]
+    data = media_probe.probe(
+        video_path, os.environ.get("FFPROBE_BINARY", "ffprobe"), timeout=30
+    )
+    if data is None:
+        return {}
 
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    metadata: dict[str, Any] = {}
+    duration = media_probe.duration_of(data)
+    if duration is not None:
+        metadata["duration"] = duration
 
-    if result.returncode != 0:
-        return {}
+    video_stream = media_probe.first_stream(data, "video")
+    if video_stream:
+        metadata["width"] = video_stream.get("width")
+        metadata["height"] = video_stream.get("height")
+        framerate = media_probe.parse_frame_rate(video_stream.get("r_frame_rate"))
+        if framerate:
+            metadata["framerate"] = framerate
 
-    import json
+    return metadata
 
-    try:
-        data = json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return {}
 
-    # Extract metadata
-    metadata = {}
-
-    # Duration from format
-    fmt = data.get("format", {})
-    if "duration" in fmt:
-        try:
-            metadata["duration"] = float(fmt["duration"])
-        except (ValueError, TypeError):
+def _fetch_and_upload(
+    clip_id: int,
+    source_url: str,
+    clip_meta: dict[str, Any],
+    max_bytes: int | None,
+    log,
+    progress=None,
+) -> dict[str, Any]:
+    """
+    Download one clip (or take it from the worker cache), thumbnail and upload it.
+
+    Shared by download_clip_task_v2 and download_clips_batch_task_v2.
+
+    Args:
+        clip_id: ID of the clip
+        source_url: URL to download from
+        clip_meta: Clip metadata from the worker API
+        max_bytes: yt-dlp filesize limit (remaining quota), None for no limit
+        log: log(level, message, status=None) for the job log
+        progress: Optional progress(percent, status) callback
+
+    Returns:
+        The upload response (media_id, file_path, ...) plus the local file_size
+    """
+    import hashlib
+
+    from app.tasks.worker_cache import get_worker_cache
+
+    if progress is None:
+
+        def progress(pct: int, status: str) -> None:
             pass
 
-    # Video stream info
-    streams = data.get("streams", [])
-    video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
+    # Check local cache before downloading
+    cache = get_worker_cache(os.environ)
+    cache_dir = (
+        cache.root
+        if cache is not None
+        else os.path.join(tempfile.gettempdir(), "clippy-worker-cache")
+    )
+    os.makedirs(cache_dir, exist_ok=True)
 
-    if video_stream:
-        metadata["width"] = video_stream.get("width")
-        metadata["height"] = video_stream.get("height")
+    # Generate cache key from source URL
+    url_hash = hashlib.sha256(source_url.encode()).hexdigest()[:16]
+    cache_stem = f"clip_{url_hash}"
 
-        # Parse framerate (e.g., "30/1" -> 30.0)
-        r_frame_rate = video_stream.get("r_frame_rate", "")
-        if "/" in r_frame_rate:
-            try:
-                num, den = r_frame_rate.split("/")
-                metadata["framerate"] = float(num) / float(den)
-            except (ValueError, ZeroDivisionError):
-                pass
+    # Indexed lookup instead of globbing the cache directory
+    cached_path = cache.get_stem(cache_stem) if cache is not None else None
+    output_path = None
 
-    return metadata
+    if cached_path:
+        # Use cached file
+        print(
+            f"[CACHE HIT] Using cached clip for URL {source_url[:50]}... -> {cached_path}"
+        )
+        log("info", f"Using cached clip: {cached_path}", status="cache_hit")
+        output_path = cached_path
+    else:
+        # Download to cache directory
+        print(
+            f"[CACHE MISS] Downloading from Twitch: {source_url[:50]}... to {cache_dir}"
+        )
+        progress(30, "Downloading video")
+        log("info", "Downloading video from Twitch", status="downloading")
+
+        # Download to cache
+        output_path = _download_with_ytdlp_standalone(
+            source_url,
+            cache_stem,  # Use hash-based filename for cache
+            clip_meta.get("title", f"clip_{clip_id}"),
+            max_bytes=max_bytes,
+            download_dir=cache_dir,
+        )
+        if cache is not None and os.path.dirname(output_path) == cache.root:
+            # Index the entry; evicts least recently used media over budget
+            cache.store(os.path.basename(output_path))
+        print(f"[CACHE SAVE] Downloaded to cache: {output_path}")
+        log("info", f"Downloaded to cache: {output_path}", status="cached")
+
+    # Extract metadata
+    progress(70, "Extracting metadata")
+    _extract_video_metadata_standalone(output_path)
+
+    # Generate thumbnail
+    progress(80, "Generating thumbnail")
+    log("info", "Generating thumbnail")
+
+    thumb_path = None
+    try:
+        output_dir = os.path.dirname(output_path)
+        stem = os.path.splitext(os.path.basename(output_path))[0]
+        thumb_path = os.path.join(output_dir, f"{stem}_thumb.jpg")
+
+        if not os.path.exists(thumb_path):
+            ffmpeg_bin = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+            ts = os.environ.get("THUMBNAIL_TIMESTAMP_SECONDS", "3")
+            w = int(os.environ.get("THUMBNAIL_WIDTH", "480"))
+
+            subprocess.run(
+                [
+                    ffmpeg_bin,
+                    "-y",
+                    "-ss",
+                    str(ts),
+                    "-i",
+                    output_path,
+                    "-frames:v",
+                    "1",
+                    "-vf",
+                    f"scale={w}:-1",
+                    "-q:v",
+                    "5",
+                    thumb_path,
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            if cache is not None and output_dir == cache.root:
+                cache.store(os.path.basename(thumb_path))
+    except Exception as thumb_err:
+        print(f"Thumbnail generation failed: {thumb_err}")
+        thumb_path = None
+
+    # Create MediaFile record and upload to server
+    progress(90, "Uploading to server")
+    log("info", "Uploading clip to server via HTTP")
+
+    # Upload via HTTP API (replaces rsync workflow)
+    upload_response = _upload_clip_to_server(
+        output_path=output_path,
+        thumb_path=thumb_path,
+        clip_id=clip_id,
+        project_id=clip_meta["project_id"],
+        clip_meta=clip_meta,
+    )
+    log("success", f"Upload completed, MediaFile ID: {upload_response.get('media_id')}")
+    return {**upload_response, "file_size": os.path.getsize(output_path)}
 
 
 @celery_app.task(bind=True)
@@ -285,29 +379,15 @@ def download_clip_task_v2(self, clip_id: int, source_url: str) -> dict[str, Any]
         Dict: Task result with downloaded file information
     """
     from app.tasks import worker_api
+    from app.tasks.job_logs import JobLogBuffer
 
     job_id = None
+    job_log = None
 
     def log(level: str, message: str, status: str | None = None):
-        """Helper to add log entries to job result_data."""
-        if not job_id:
-            return
-        try:
-            worker_api.update_processing_job(
-                job_id,
-                result_data={
-                    "logs": [
-                        {
-                            "ts": datetime.utcnow().isoformat(),
-                            "level": level,
-                            "message": message,
-                            "status": status,
-                        }
-                    ]
-                },
-            )
-        except Exception:
-            pass
+        """Helper to buffer log entries for the job log channel."""
+        if job_log is not None:
+            job_log.log(level, message, status)
 
     try:
         # Fetch clip metadata
@@ -329,6 +409,7 @@ def download_clip_task_v2(self, clip_id: int, source_url: str) -> dict[str, Any]
             user_id=user_id,
         )
         job_id = job_response["job_id"]
+        job_log = JobLogBuffer.from_config(os.environ, job_id)
         log("info", f"Starting download: clip {clip_id}", status="downloading")
 
         # Check for reusable media BEFORE downloading
@@ -404,140 +485,21 @@ def download_clip_task_v2(self, clip_id: int, source_url: str) -> dict[str, Any]
                 "Storage quota exceeded: no remaining bytes for download"
             )
 
-        # Check local cache before downloading
-        import hashlib
-        import time
-
-        cache_dir = "/tmp/clippy-worker-cache"
-        os.makedirs(cache_dir, exist_ok=True)
-
-        # Clean up old cache files (>2 hours)
-        try:
-            max_age = 2 * 3600  # 2 hours in seconds
-            now = time.time()
-            for cached_file in os.listdir(cache_dir):
-                cached_path = os.path.join(cache_dir, cached_file)
-                if os.path.isfile(cached_path):
-                    age = now - os.stat(cached_path).st_atime
-                    if age > max_age:
-                        try:
-                            os.remove(cached_path)
-                        except Exception:
-                            pass
-        except Exception:
-            pass
-
-        # Generate cache key from source URL
-        url_hash = hashlib.sha256(source_url.encode()).hexdigest()[:16]
-        cache_pattern = os.path.join(cache_dir, f"clip_{url_hash}.*")
-
-        # Check if cached file exists
-        import glob
-
-        cached_files = glob.glob(cache_pattern)
-        output_path = None
-
-        if cached_files:
-            # Use cached file
-            cached_path = cached_files[0]
-            print(
-                f"[CACHE HIT] Using cached clip for URL {source_url[:50]}... -> {cached_path}"
-            )
-            log("info", f"Using cached clip: {cached_path}", status="cache_hit")
-            # Touch file to refresh TTL
-            os.utime(cached_path, None)
-            output_path = cached_path
-        else:
-            # Download to cache directory
-            print(
-                f"[CACHE MISS] Downloading from Twitch: {source_url[:50]}... to {cache_dir}"
-            )
+        def progress(pct: int, status: str) -> None:
             self.update_state(
-                state="PROGRESS", meta={"progress": 30, "status": "Downloading video"}
-            )
-            worker_api.update_processing_job(job_id, progress=30)
-            log("info", "Downloading video from Twitch", status="downloading")
-
-            # Download to cache
-            output_path = _download_with_ytdlp_standalone(
-                source_url,
-                f"clip_{url_hash}",  # Use hash-based filename for cache
-                clip_meta.get("title", f"clip_{clip_id}"),
-                max_bytes=int(rem_bytes) if rem_bytes is not None else None,
-                download_dir=cache_dir,
+                state="PROGRESS", meta={"progress": pct, "status": status}
             )
-            print(f"[CACHE SAVE] Downloaded to cache: {output_path}")
-            log("info", f"Downloaded to cache: {output_path}", status="cached")
-
-        # Extract metadata
-        self.update_state(
-            state="PROGRESS", meta={"progress": 70, "status": "Extracting metadata"}
-        )
-        worker_api.update_processing_job(job_id, progress=70)
-
-        metadata = _extract_video_metadata_standalone(output_path)
-        duration = metadata.get("duration") if metadata else None
-
-        # Generate thumbnail
-        self.update_state(
-            state="PROGRESS", meta={"progress": 80, "status": "Generating thumbnail"}
+            worker_api.update_processing_job(job_id, progress=pct)
+
+        upload_response = _fetch_and_upload(
+            clip_id,
+            source_url,
+            clip_meta,
+            max_bytes=int(rem_bytes) if rem_bytes is not None else None,
+            log=log,
+            progress=progress,
         )
-        worker_api.update_processing_job(job_id, progress=80)
-        log("info", "Generating thumbnail")
-
-        thumb_path = None
-        try:
-            output_dir = os.path.dirname(output_path)
-            stem = os.path.splitext(os.path.basename(output_path))[0]
-            thumb_path = os.path.join(output_dir, f"{stem}_thumb.jpg")
-
-            if not os.path.exists(thumb_path):
-                ffmpeg_bin = os.environ.get("FFMPEG_BINARY", "ffmpeg")
-                ts = os.environ.get("THUMBNAIL_TIMESTAMP_SECONDS", "3")
-                w = int(os.environ.get("THUMBNAIL_WIDTH", "480"))
-
-                subprocess.run(
-                    [
-                        ffmpeg_bin,
-                        "-y",
-                        "-ss",
-                        str(ts),
-                        "-i",
-                        output_path,
-                        "-frames:v",
-                        "1",
-                        "-vf",
-                        f"scale={w}:-1",
-                        "-q:v",
-                        "5",
-                        thumb_path,
-                    ],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    check=True,
-                )
-        except Exception as thumb_err:
-            print(f"Thumbnail generation failed: {thumb_err}")
-            thumb_path = None
-
-        # Create MediaFile record and upload to server
-        self.update_state(
-            state="PROGRESS", meta={"progress": 90, "status": "Uploading to server"}
-        )
-        worker_api.update_processing_job(job_id, progress=90)
-        log("info", "Uploading clip to server via HTTP")
-
-        # Upload via HTTP API (replaces rsync workflow)
-        upload_response = _upload_clip_to_server(
-            output_path=output_path,
-            thumb_path=thumb_path,
-            clip_id=clip_id,
-            project_id=project_id,
-            clip_meta=clip_meta,
-        )
-
         media_id = upload_response.get("media_id")
-        log("success", f"Upload completed, MediaFile ID: {media_id}")
 
         # Complete job
         result_data = {
@@ -575,3 +537,228 @@ def download_clip_task_v2(self, clip_id: int, source_url: str) -> dict[str, Any]
                 pass
 
         raise
+    finally:
+        if job_log is not None:
+            job_log.close()
+
+
+def _batch_concurrency(count: int) -> int:
+    """Parallel yt-dlp downloads for a batch (DOWNLOAD_BATCH_CONCURRENCY)."""
+    try:
+        limit = int(os.environ.get("DOWNLOAD_BATCH_CONCURRENCY", "4"))
+    except ValueError:
+        limit = 4
+    return max(1, min(limit, count))
+
+
+@celery_app.task(bind=True)
+def download_clips_batch_task_v2(self, clips: list[list]) -> dict[str, Any]:
+    """
+    Download many clips in one task invocation (API-based, no DB access).
+
+    Clip metadata, reusable media and quota for the whole batch come from one
+    download-context call, reused clips are recorded with one status-batch
+    call, and the remaining clips are downloaded by a bounded pool of yt-dlp
+    processes that share the user's remaining quota. One ProcessingJob covers
+    the batch; a failing clip is recorded and does not stop the others.
+
+    Args:
+        clips: [clip_id, source_url] pairs
+
+    Returns:
+        Dict: {"status", "clips": {"<clip_id>": {"status", ...}}, counts}
+    """
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    from app.tasks import worker_api
+    from app.tasks.job_logs import JobLogBuffer
+
+    items = [(int(clip_id), str(url)) for clip_id, url in clips]
+    results: dict[int, dict[str, Any]] = {
+        clip_id: {"status": "pending"} for clip_id, _ in items
+    }
+    lock = threading.Lock()
+    job_id = None
+    job_log = None
+    last_job_update = 0.0
+
+    def log(level: str, message: str, status: str | None = None):
+        """Helper to buffer log entries for the job log channel."""
+        if job_log is not None:
+            job_log.log(level, message, status)
+
+    def publish(status: str, force: bool = False) -> None:
+        """Report per-clip states to the result backend and the job."""
+        nonlocal last_job_update
+        with lock:
+            states = {str(cid): r["status"] for cid, r in results.items()}
+        finished = sum(
+            1 for s in states.values() if s in ("completed", "reused", "failed")
+        )
+        pct = int(finished * 100 / max(1, len(states)))
+        self.update_state(
+            state="PROGRESS",
+            meta={"progress": pct, "status": status, "clips": states},
+        )
+        now = time.monotonic()
+        if job_id and (force or now - last_job_update >= 2.0):
+            last_job_update = now
+            worker_api.update_processing_job(job_id, progress=pct)
+
+    try:
+        publish("Fetching metadata")
+        context = worker_api.get_download_context([cid for cid, _ in items])
+        metas = {int(c["id"]): c for c in context.get("clips", [])}
+        for clip_id in context.get("missing", []):
+            results[int(clip_id)] = {"status": "failed", "error": "Clip not found"}
+        if not metas:
+            raise RuntimeError("None of the clips in the batch exist")
+
+        first = next(iter(metas.values()))
+        job_response = worker_api.create_processing_job(
+            celery_task_id=self.request.id,
+            job_type="download_clips",
+            project_id=first["project_id"],
+            user_id=first["user_id"],
+        )
+        job_id = job_response["job_id"]
+        job_log = JobLogBuffer.from_config(os.environ, job_id)
+        log("info", f"Starting batch download: {len(items)} clips", "downloading")
+
+        # Reuse existing media first; one status update for all of them
+        reused, pending = [], []
+        for clip_id, url in items:
+            meta = metas.get(clip_id)
+            if meta is None:
+                continue
+            reuse = meta.get("reuse") or {}
+            if reuse.get("found"):
+                reused.append((clip_id, url, reuse))
+            else:
+                pending.append((clip_id, url, meta))
+
+        if reused:
+            worker_api.update_clip_statuses(
+                [
+                    {
+                        "clip_id": clip_id,
+                        "is_downloaded": True,
+                        "media_file_id": reuse["media_file_id"],
+                        **(
+                            {"duration": reuse["duration"]}
+                            if reuse.get("duration") is not None
+                            else {}
+                        ),
+                    }
+                    for clip_id, _, reuse in reused
+                ]
+            )
+            # Enrich metadata even when reusing (so each clip gets proper
+            # creator/game info); one bulk Twitch lookup for all of them
+            try:
+                worker_api.enrich_clips_metadata([clip_id for clip_id, _, _ in reused])
+            except Exception as enrich_err:
+                log("warning", f"Failed to enrich reused clips: {enrich_err}")
+            for clip_id, _, reuse in reused:
+                with lock:
+                    results[clip_id] = {
+                        "status": "reused",
+                        "media_file_id": reuse["media_file_id"],
+                        "reused_from_clip_id": reuse.get("reused_from_clip_id"),
+                    }
+            log("info", f"Reused existing media for {len(reused)} clips", "reused")
+            publish("Reused existing media", force=True)
+
+        # Remaining quota shared by all downloads of this batch
+        remaining: dict[int, int | None] = {}
+        for user_id, quota in (context.get("quota") or {}).items():
+            rem = quota.get("remaining_bytes")
+            remaining[int(user_id)] = int(rem) if rem is not None else None
+
+        def download_one(clip_id: int, url: str, meta: dict) -> dict[str, Any]:
+            user_id = int(meta["user_id"])
+            with lock:
+                budget = remaining.get(user_id)
+                if budget is not None and budget <= 0:
+                    raise RuntimeError(
+                        "Storage quota exceeded: no remaining bytes for download"
+                    )
+                results[clip_id] = {"status": "downloading"}
+            upload = _fetch_and_upload(clip_id, url, meta, max_bytes=budget, log=log)
+            size = int(upload.get("file_size") or 0)
+            with lock:
+                if remaining.get(user_id) is not None:
+                    remaining[user_id] -= size
+            return upload
+
+        if pending:
+            publish(f"Downloading {len(pending)} clips", force=True)
+            with ThreadPoolExecutor(
+                max_workers=_batch_concurrency(len(pending)),
+                thread_name_prefix="clip-download",
+            ) as pool:
+                futures = {
+                    pool.submit(download_one, clip_id, url, meta): clip_id
+                    for clip_id, url, meta in pending
+                }
+                for future in as_completed(futures):
+                    clip_id = futures[future]
+                    try:
+                        upload = future.result()
+                        outcome = {
+                            "status": "completed",
+                            "media_file_id": upload.get("media_id"),
+                            "downloaded_file": upload.get("file_path"),
+                        }
+                    except Exception as e:
+                        outcome = {"status": "failed", "error": str(e)}
+                        log("error", f"Clip {clip_id} failed: {e}")
+                    with lock:
+                        results[clip_id] = outcome
+                    publish("Downloading clips")
+
+        counts = {
+            key: sum(1 for r in results.values() if r["status"] == status)
+            for key, status in (
+                ("downloaded", "completed"),
+                ("reused", "reused"),
+                ("failed", "failed"),
+            )
+        }
+        clip_results = {str(cid): r for cid, r in results.items()}
+        all_failed = counts["failed"] == len(results)
+        worker_api.update_processing_job(
+            job_id,
+            status="failure" if all_failed else "success",
+            progress=100,
+            result_data={"clips": clip_results, **counts},
+            error_message="All clips failed" if all_failed else None,
+        )
+        log(
+            "error" if all_failed else "success",
+            "Batch finished: {downloaded} downloaded, {reused} reused, "
+            "{failed} failed".format(**counts),
+            status="failed" if all_failed else "completed",
+        )
+
+        return {"status": "completed", "clips": clip_results, **counts}
+
+    except Exception as e:
+        # Update job as failed
+        if job_id:
+            try:
+                worker_api.update_processing_job(
+                    job_id,
+                    status="failure",
+                    error_message=str(e),
+                )
+                log("error", str(e), status="failed")
+            except Exception:
+                pass
+
+        raise
+    finally:
+        if job_log is not None:
+            job_log.close()
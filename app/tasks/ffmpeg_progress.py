@@ -0,0 +1,325 @@
+"""
+Real-time ffmpeg progress for the compile pipeline.
+
+run_ffmpeg() runs an ffmpeg command with ``-progress pipe:1`` and turns the
+key=value blocks ffmpeg writes every ~0.5s into callbacks carrying the
+fraction done (from the known output duration), encode fps, speed and an ETA.
+When the caller doesn't know the output duration, the first ``Duration:`` in
+ffmpeg's stderr banner is used instead.
+
+CompileProgress maps those callbacks onto the task's overall progress: each
+stage of a compile owns a slice of 0-100, stages with several encodes (clips
+rendered in parallel, timeline assets) average their units, and a background
+timer publishes the latest snapshot at most every COMPILE_PROGRESS_INTERVAL
+seconds. ffmpeg reader threads only record numbers, so a long concat or a
+pool of clip encodes costs a handful of status updates, not one HTTP call per
+progress block.
+"""
+
+import re
+import subprocess
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_DURATION_RE = re.compile(rb"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def _parse_clock(value: str) -> float | None:
+    """Parse ffmpeg's HH:MM:SS.micro timestamps."""
+    try:
+        hours, minutes, seconds = value.split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _parse_float(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return float(value.strip().rstrip("x"))
+    except ValueError:
+        return None
+
+
+def parse_progress_block(block: dict[str, str], duration: float | None) -> dict:
+    """Turn one ``-progress`` key=value block into a progress info dict.
+
+    Args:
+        block: Keys ffmpeg wrote since the previous ``progress=`` line
+        duration: Expected output duration in seconds, if known
+
+    Returns:
+        Dict with "out_time", "fps", "speed", "frame", "fraction" (None when
+        duration is unknown), "eta" (seconds, None when unknown) and "done"
+    """
+    out_time = None
+    us = block.get("out_time_us") or block.get("out_time_ms")
+    if us and us.lstrip("-").isdigit():
+        out_time = max(0.0, int(us) / 1_000_000)
+    elif block.get("out_time"):
+        out_time = _parse_clock(block["out_time"])
+
+    speed = _parse_float(block.get("speed"))
+    done = block.get("progress") == "end"
+    fraction = None
+    eta = None
+    if duration and duration > 0:
+        if done:
+            fraction = 1.0
+        elif out_time is not None:
+            fraction = min(1.0, out_time / duration)
+        if out_time is not None and speed and speed > 0:
+            eta = max(0.0, (duration - out_time) / speed)
+    frame = block.get("frame")
+    return {
+        "out_time": out_time,
+        "fps": _parse_float(block.get("fps")),
+        "speed": speed,
+        "frame": int(frame) if frame and frame.isdigit() else None,
+        "fraction": fraction,
+        "eta": 0.0 if done else eta,
+        "done": done,
+    }
+
+
+def run_ffmpeg(
+    cmd: list[str],
+    on_progress=None,
+    duration: float | None = None,
+    check: bool = True,
+    text: bool = False,
+) -> subprocess.CompletedProcess:
+    """Run an ffmpeg command, reporting progress while it encodes.
+
+    Without on_progress this is ``subprocess.run(cmd, capture_output=True)``.
+
+    Args:
+        cmd: ffmpeg argv (binary first); progress options are inserted after it
+        on_progress: Optional callback(info) for each progress block, see
+            parse_progress_block(); exceptions it raises are logged and ignored
+        duration: Expected output duration in seconds (used for fraction/ETA)
+        check: Raise CalledProcessError on a non-zero exit, like subprocess.run
+        text: Return stderr as str instead of bytes
+
+    Returns:
+        CompletedProcess with captured stderr (stdout carries the progress
+        feed and is returned empty)
+    """
+    if on_progress is None:
+        return subprocess.run(cmd, check=check, capture_output=True, text=text)
+
+    argv = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr_chunks: list[bytes] = []
+    probed = {"duration": duration}
+
+    def _drain_stderr() -> None:
+        for line in proc.stderr:
+            stderr_chunks.append(line)
+            if probed["duration"] is None:
+                match = _DURATION_RE.search(line)
+                if match:
+                    h, m, s = match.groups()
+                    probed["duration"] = int(h) * 3600 + int(m) * 60 + float(s)
+
+    reader = threading.Thread(target=_drain_stderr, name="ffmpeg-stderr", daemon=True)
+    reader.start()
+    try:
+        block: dict[str, str] = {}
+        for raw in proc.stdout:
+            key, sep, value = raw.decode("utf-8", errors="replace").partition("=")
+            if not sep:
+                continue
+            key, value = key.strip(), value.strip()
+            block[key] = value
+            if key != "progress":
+                continue
+            try:
+                on_progress(parse_progress_block(block, probed["duration"]))
+            except Exception as e:
+                logger.warning("ffmpeg_progress_callback_failed", error=str(e))
+            block = {}
+        returncode = proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        reader.join(timeout=5)
+
+    stderr = b"".join(stderr_chunks)
+    stdout = b""
+    if text:
+        stderr = stderr.decode("utf-8", errors="replace")
+        stdout = ""
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, argv, stdout, stderr)
+    return subprocess.CompletedProcess(argv, returncode, stdout, stderr)
+
+
+class CompileProgress:
+    """Throttled overall-progress channel for one compile.
+
+    Args:
+        publish: Callable(snapshot) that ships a snapshot dict with
+            "progress", "status", "stage", "fps", "speed" and "eta_seconds";
+            called on the stage-changing thread or the timer thread, never
+            more than once per interval for fractional updates
+        interval: Minimum seconds between fractional publishes (0 disables
+            the timer; only stage changes are then published)
+    """
+
+    def __init__(self, publish, interval: float = 2.0):
+        self.publish = publish
+        self.interval = float(interval)
+        self._lock = threading.Lock()
+        # Serializes publishes so snapshots arrive in order
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+        self._stage = ""
+        self._status = ""
+        self._start = 0.0
+        self._end = 0.0
+        self._units: int | None = 1
+        self._unit_state: dict = {}
+        self._stage_started = time.monotonic()
+        self._floor = 0.0
+        self._dirty = False
+        self._last_published: dict | None = None
+
+    @classmethod
+    def from_config(cls, config, publish) -> "CompileProgress":
+        """Create a channel throttled by COMPILE_PROGRESS_INTERVAL."""
+        return cls(
+            publish, interval=float(config.get("COMPILE_PROGRESS_INTERVAL", 2.0))
+        )
+
+    # ----- stages -----
+    def stage(
+        self, name: str, start: float, end: float, status: str, units: int | None = 1
+    ) -> None:
+        """Enter a stage owning [start, end] of overall progress; publishes now.
+
+        Args:
+            name: Short stage id shown next to the status ("clips", "final")
+            start: Overall progress at the start of the stage
+            end: Overall progress once the stage is done
+            status: Human-readable status line
+            units: Number of encodes averaged for the stage's fraction, or
+                None when it isn't known up front (grows as units report)
+        """
+        with self._lock:
+            self._stage = name
+            self._status = status
+            self._start = float(start)
+            self._end = float(end)
+            self._units = units
+            self._unit_state = {}
+            self._stage_started = time.monotonic()
+            self._floor = max(self._floor, self._start)
+        self.flush(force=True)
+
+    def set_status(self, status: str) -> None:
+        """Change the status line; shipped with the next publish."""
+        with self._lock:
+            self._status = status
+            self._dirty = True
+        self._ensure_timer()
+
+    def update(self, info: dict, unit="default") -> None:
+        """Record a progress block for one unit of the current stage."""
+        with self._lock:
+            state = self._unit_state.setdefault(unit, {"fraction": 0.0})
+            if info.get("fraction") is not None:
+                state["fraction"] = max(state["fraction"], float(info["fraction"]))
+            for key in ("fps", "speed", "eta"):
+                state[key] = info.get(key)
+            state["running"] = not info.get("done")
+            self._dirty = True
+        self._ensure_timer()
+
+    def complete(self, unit="default") -> None:
+        """Mark one unit of the current stage as finished."""
+        self.update({"fraction": 1.0, "done": True}, unit=unit)
+
+    def tracker(self, unit="default"):
+        """Return an on_progress callback for run_ffmpeg bound to unit."""
+        return lambda info: self.update(info, unit=unit)
+
+    # ----- snapshots -----
+    def snapshot(self) -> dict:
+        """Return the current overall progress and encode statistics."""
+        with self._lock:
+            units = max(self._units or 0, len(self._unit_state), 1)
+            states = list(self._unit_state.values())
+            fraction = min(1.0, sum(s["fraction"] for s in states) / units)
+            progress = self._start + (self._end - self._start) * fraction
+            # Units that appear late must not move the bar backwards
+            progress = max(self._floor, progress)
+            self._floor = progress
+            running = [s for s in states if s.get("running")]
+            fps = sum(s.get("fps") or 0.0 for s in running) or None
+            speed = sum(s.get("speed") or 0.0 for s in running) or None
+            eta = None
+            if units == 1 and running and running[0].get("eta") is not None:
+                eta = running[0]["eta"]
+            elif 0.02 < fraction < 1.0:
+                elapsed = time.monotonic() - self._stage_started
+                eta = elapsed * (1.0 - fraction) / fraction
+            return {
+                "progress": round(progress, 1),
+                "status": self._status,
+                "stage": self._stage,
+                "fps": round(fps, 1) if fps else None,
+                "speed": round(speed, 2) if speed else None,
+                "eta_seconds": int(eta) if eta is not None else None,
+            }
+
+    def flush(self, force: bool = False) -> None:
+        """Publish the current snapshot if anything changed (or force)."""
+        with self._publish_lock:
+            with self._lock:
+                if not (force or self._dirty):
+                    return
+                self._dirty = False
+            snap = self.snapshot()
+            if not force and snap == self._last_published:
+                return
+            self._last_published = snap
+            try:
+                self.publish(snap)
+            except Exception as e:
+                # Progress reporting must never fail the compile
+                logger.warning("compile_progress_publish_failed", error=str(e))
+
+    def close(self) -> None:
+        """Stop the timer and wait for an in-flight publish to finish.
+
+        The timer publishes nothing afterwards; the caller reports the final
+        state itself.
+        """
+        self._stop.set()
+        timer = self._timer
+        if timer is not None and timer is not threading.current_thread():
+            timer.join(timeout=10)
+
+    # ----- internals -----
+    def _ensure_timer(self) -> None:
+        if self.interval <= 0 or self._stop.is_set():
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(
+                target=self._run_timer, name="compile-progress", daemon=True
+            )
+        self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
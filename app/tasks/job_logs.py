@@ -0,0 +1,135 @@
+"""
+Buffered, batched job log shipping for worker tasks.
+
+Tasks used to log by fetching the job, appending one line to
+result_data["logs"] and PUTting the whole list back, which costs a round
+trip plus a full JSON rewrite per line. JobLogBuffer collects entries
+locally and ships them in batches to the append-only job log endpoint,
+either when the batch fills up or on a timer, so a long compile turns
+hundreds of log lines into a handful of small requests.
+
+Servers that predate the append endpoint are handled by falling back to the
+old result_data merge, once per batch rather than once per line.
+"""
+
+import threading
+from datetime import datetime
+
+import requests
+import structlog
+
+from app.tasks import worker_api
+
+logger = structlog.get_logger(__name__)
+
+
+class JobLogBuffer:
+    """Collects log entries for one processing job and flushes them in batches.
+
+    Args:
+        job_id: Processing job ID
+        batch_size: Flush as soon as this many entries are buffered
+        flush_interval: Seconds between background flushes (0 disables the
+            timer; entries then ship only on size or close())
+    """
+
+    def __init__(self, job_id: int, batch_size: int = 20, flush_interval: float = 2.0):
+        self.job_id = job_id
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self._entries: list[dict] = []
+        self._lock = threading.Lock()
+        # Serializes flushes so batches arrive in the order they were logged
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+        self._append_supported = True
+
+    @classmethod
+    def from_config(cls, config, job_id: int) -> "JobLogBuffer":
+        """Create a buffer sized by JOB_LOG_BATCH_SIZE / JOB_LOG_FLUSH_SECONDS.
+
+        Args:
+            config: Mapping with those keys (app.config, or os.environ for
+                tasks that run without a Flask app)
+            job_id: Processing job ID
+        """
+        return cls(
+            job_id,
+            batch_size=int(config.get("JOB_LOG_BATCH_SIZE", 20)),
+            flush_interval=float(config.get("JOB_LOG_FLUSH_SECONDS", 2.0)),
+        )
+
+    def log(self, level: str, message: str, status: str | None = None) -> None:
+        """Buffer one log entry; never raises."""
+        entry = {
+            "ts": datetime.utcnow().isoformat(),
+            "level": level,
+            "message": message,
+            "status": status,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= self.batch_size
+        if full:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def flush(self) -> None:
+        """Ship all buffered entries now."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._entries = self._entries, []
+            if batch:
+                self._ship(batch)
+
+    def close(self) -> None:
+        """Stop the background timer and flush what is left."""
+        self._stop.set()
+        self.flush()
+
+    # ----- internals -----
+    def _ensure_timer(self) -> None:
+        if self.flush_interval <= 0 or self._stop.is_set():
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(
+                target=self._run_timer, name=f"job-log-{self.job_id}", daemon=True
+            )
+        self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _ship(self, batch: list[dict]) -> None:
+        if self._append_supported:
+            try:
+                worker_api.append_job_logs(self.job_id, batch)
+                return
+            except requests.HTTPError as e:
+                status_code = e.response.status_code if e.response is not None else 0
+                if status_code not in (404, 405):
+                    logger.warning(
+                        "job_log_append_failed", job_id=self.job_id, error=str(e)
+                    )
+                    return
+                # Server without the append endpoint: use result_data from now on
+                self._append_supported = False
+            except Exception as e:
+                # Don't fail the task if logging fails
+                logger.warning(
+                    "job_log_append_failed", job_id=self.job_id, error=str(e)
+                )
+                return
+
+        try:
+            job_data = worker_api.get_processing_job(self.job_id)
+            logs = (job_data.get("result_data") or {}).get("logs") or []
+            logs.extend(batch)
+            worker_api.update_processing_job(self.job_id, result_data={"logs": logs})
+        except Exception as e:
+            logger.warning("job_log_legacy_failed", job_id=self.job_id, error=str(e))
@@ -0,0 +1,323 @@
+"""
+Resumable, cache-aware media downloads for remote workers.
+
+Workers without shared storage pull clips, intros, outros and music from
+/api/worker/media/<id>/download. fetch_media() asks the server for the
+file's identity with a HEAD request first, so a cached copy whose ETag (or,
+failing that, size) still matches is used without transferring a byte.
+
+Downloads stream in large chunks into ``<name>.part`` next to the cache
+entry and are renamed into place only once complete, so readers never see a
+partial file. When the connection drops, the next attempt sends
+``Range: bytes=<have>-`` with ``If-Range: <etag>`` and appends to the part
+file; a server that ignores the range (or a changed file) answers 200 and the
+part is rewritten from zero. Part files survive task failures, so a retried
+compile resumes too.
+
+The ETag a cache entry was downloaded with is kept in ``<entry>.etag``.
+"""
+
+import contextlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import structlog
+
+from app.tasks import worker_api
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+DEFAULT_ATTEMPTS = 5
+
+_CONTENT_TYPE_EXTS = (
+    ("audio/mpeg", ".mp3"),
+    ("audio/mp3", ".mp3"),
+    ("video/mp4", ".mp4"),
+)
+
+
+def _ext_for(content_type: str) -> str:
+    for needle, ext in _CONTENT_TYPE_EXTS:
+        if needle in content_type:
+            return ext
+    return ".mp4"
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_text(path: str, value: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(value)
+    os.replace(tmp, path)
+
+
+@contextlib.contextmanager
+def _locked(path: str):
+    """Hold an exclusive cross-process lock while one entry is downloaded."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - non-POSIX platforms
+        yield
+        return
+
+    with open(path, "a+") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _is_current(path: str, etag: str | None, size: int | None) -> bool:
+    """Return True when the cached file at path matches the server's copy."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if size is not None and st.st_size != size:
+        return False
+    if etag:
+        cached_etag = _read_text(f"{path}.etag")
+        # Entries cached before ETags were recorded are trusted on size alone
+        return cached_etag is None or cached_etag == etag
+    return True
+
+
+def _touch(path: str) -> None:
+    for p in (path, f"{path}.etag"):
+        with contextlib.suppress(OSError):
+            os.utime(p, None)
+
+
+def fetch_media(
+    url: str,
+    headers: dict[str, str],
+    cache_dir: str,
+    stem: str,
+    chunk_size: int = DEFAULT_CHUNK_BYTES,
+    attempts: int = DEFAULT_ATTEMPTS,
+    stats: dict | None = None,
+) -> str:
+    """Return a local cached copy of url, downloading or resuming as needed.
+
+    Args:
+        url: Media download URL
+        headers: Request headers (authorization)
+        cache_dir: Cache directory
+        stem: Cache file name without extension (e.g. "media_42"); the
+            extension is derived from the server's Content-Type
+        chunk_size: Read/write buffer size in bytes
+        attempts: Connection attempts before giving up; each one resumes
+            from the bytes already on disk
+        stats: Optional dict filled with "cache_hit", "bytes" (transferred)
+            and "resumed_from"
+
+    Returns:
+        Path of the cached file
+
+    Raises:
+        requests.RequestException: If the server rejects the request or every
+            attempt fails
+        OSError: If the completed download does not match Content-Length
+    """
+    session = worker_api.get_session()
+    head = session.head(url, headers=headers, timeout=30, allow_redirects=True)
+    head.raise_for_status()
+
+    etag = head.headers.get("ETag")
+    length = head.headers.get("Content-Length")
+    size = int(length) if length and length.isdigit() else None
+    ranges = head.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cached_path = os.path.join(
+        cache_dir, f"{stem}{_ext_for(head.headers.get('Content-Type', ''))}"
+    )
+    if stats is None:
+        stats = {}
+    stats.update(cache_hit=True, bytes=0, resumed_from=0)
+    if _is_current(cached_path, etag, size):
+        _touch(cached_path)
+        logger.info("media_fetch_cache_hit", path=cached_path)
+        return cached_path
+
+    part_path = f"{cached_path}.part"
+    with _locked(f"{cached_path}.lock"):
+        # Another worker may have finished it while we waited for the lock
+        if _is_current(cached_path, etag, size):
+            _touch(cached_path)
+            return cached_path
+
+        # A part written for a different version of the file can't be resumed
+        if _read_text(f"{part_path}.etag") != etag:
+            with contextlib.suppress(OSError):
+                os.remove(part_path)
+        if etag:
+            _write_text(f"{part_path}.etag", etag)
+
+        started = time.perf_counter()
+        resumed_from = 0
+        attempt = 0
+        while True:
+            attempt += 1
+            have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if size and have == size:
+                break
+            req_headers = dict(headers)
+            if have and ranges:
+                req_headers["Range"] = f"bytes={have}-"
+                if etag:
+                    req_headers["If-Range"] = etag
+            try:
+                with session.get(
+                    url, headers=req_headers, stream=True, timeout=300
+                ) as response:
+                    if response.status_code == 416 and have:
+                        # Part already holds the whole file
+                        break
+                    response.raise_for_status()
+                    if response.status_code == 206:
+                        resumed_from = resumed_from or have
+                        mode = "ab"
+                    else:
+                        mode = "wb"
+                    with open(part_path, mode, buffering=chunk_size) as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                break
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                if attempt >= attempts:
+                    raise
+                logger.warning(
+                    "media_fetch_interrupted",
+                    url=url,
+                    attempt=attempt,
+                    bytes_on_disk=(
+                        os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                    ),
+                    error=str(e),
+                )
+                time.sleep(min(30.0, 0.5 * (2 ** (attempt - 1))))
+
+        final_size = os.path.getsize(part_path)
+        if size is not None and final_size != size:
+            raise OSError(f"Incomplete download of {url}: {final_size} of {size} bytes")
+        stats.update(
+            cache_hit=False, bytes=final_size - resumed_from, resumed_from=resumed_from
+        )
+        os.replace(part_path, cached_path)
+        if etag:
+            _write_text(f"{cached_path}.etag", etag)
+        with contextlib.suppress(OSError):
+            os.remove(f"{part_path}.etag")
+
+    logger.info(
+        "media_fetch_downloaded",
+        path=cached_path,
+        bytes=final_size,
+        resumed_from=resumed_from,
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return cached_path
+
+
+class InputPrefetcher:
+    """Fetches compile inputs on a thread pool ahead of the renders using them.
+
+    Each input is registered under a key; consumers call result(key), which
+    blocks only until that one input is ready, so the first clip can encode
+    while later ones are still downloading.
+
+    Args:
+        max_workers: Maximum number of concurrent fetches
+    """
+
+    def __init__(self, max_workers: int):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)), thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._futures: dict = {}
+        self._records: dict = {}
+
+    def submit(self, key, label: str, fn, *args, **kwargs) -> None:
+        """Schedule fn(*args, **kwargs) to produce the local path for key.
+
+        A "stats" dict passed in kwargs is read after the call for transfer
+        details (see fetch_media). Keys already submitted are ignored.
+        """
+        with self._lock:
+            if key in self._futures:
+                return
+            record = {
+                "label": label,
+                "status": "queued",
+                "path": None,
+                "bytes": 0,
+                "seconds": 0.0,
+                "error": None,
+            }
+            self._records[key] = record
+            self._futures[key] = self._pool.submit(self._run, record, fn, args, kwargs)
+
+    @staticmethod
+    def _run(record: dict, fn, args, kwargs) -> str | None:
+        record["status"] = "fetching"
+        started = time.perf_counter()
+        try:
+            path = fn(*args, **kwargs)
+        except Exception as e:
+            record.update(
+                status="failed",
+                error=str(e),
+                seconds=time.perf_counter() - started,
+            )
+            raise
+        stats = kwargs.get("stats")
+        if stats is None:
+            status, transferred = "ready", 0
+        elif stats.get("cache_hit"):
+            status, transferred = "cached", 0
+        else:
+            status, transferred = "downloaded", int(stats.get("bytes") or 0)
+        record.update(
+            status=status if path else "missing",
+            path=path,
+            bytes=transferred,
+            seconds=time.perf_counter() - started,
+        )
+        return path
+
+    def has(self, key) -> bool:
+        with self._lock:
+            return key in self._futures
+
+    def result(self, key, timeout: float | None = None):
+        """Wait for key's fetch and return its path; re-raises its error."""
+        with self._lock:
+            future = self._futures[key]
+        return future.result(timeout=timeout)
+
+    def summary(self) -> list[dict]:
+        """Return one record per input, in submission order."""
+        with self._lock:
+            return [dict(r) for r in self._records.values()]
+
+    def shutdown(self) -> None:
+        """Cancel queued fetches and wait for running ones to finish."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
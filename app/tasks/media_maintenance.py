@@ -169,27 +169,19 @@ def process_uploaded_media_task(
             media.mime_type.startswith("video") or media.mime_type.startswith("audio")
         ):
             try:
+                from app import media_probe
                 from app.ffmpeg_config import config_args as _cfg_args
                 from app.main.routes import _resolve_binary
 
-                probe_cmd = [
-                    _resolve_binary(app, "ffprobe"),
-                    *_cfg_args(app, "ffprobe"),
-                    "-v",
-                    "error",
-                    "-show_entries",
-                    "format=duration:stream=width,height,r_frame_rate,codec_type",
-                    "-of",
-                    "json",
+                data = media_probe.probe(
                     str(file_path),
-                ]
-
-                import json
-
-                out = subprocess.check_output(
-                    probe_cmd, text=True, encoding="utf-8", timeout=15
+                    _resolve_binary(app, "ffprobe"),
+                    _cfg_args(app, "ffprobe"),
+                    timeout=15,
+                    config=app.config,
                 )
-                data = json.loads(out)
+                if data is None:
+                    raise RuntimeError(f"ffprobe failed for {file_path}")
 
                 # Extract duration from format
                 duration = data.get("format", {}).get("duration")
@@ -0,0 +1,429 @@
+"""
+Persistent, content-addressed cache of rendered compilation segments.
+
+Workers re-render every clip on each compile, even when the clip, its trim
+and every render setting are unchanged since the last run. This module keys a
+rendered segment by a hash of the input media fingerprints plus the exact
+ffmpeg argument list used to produce it, so any change to resolution, zoom,
+alignment, overlay text, avatar, audio or encoder settings yields a new key.
+
+The cache lives in a plain directory shared by all worker processes on a host:
+
+    <root>/<key[:2]>/<key>.mp4   rendered segments
+    <root>/.index.sqlite         size and last access per entry + counters
+    <root>/.lock                 flock() target for writes and eviction
+
+Library assets (intro, outro, transitions, the static bumper) use a second
+cache instance where entries live under a per-asset namespace directory,
+``<root>/<asset>@<version>/<key>.mp4``. When the library reports a newer
+version of an asset, older namespaces for it are dropped on the next store.
+
+Entries are copied in and out (never hardlinked) so an ffmpeg run that later
+overwrites its output path can't corrupt a cached segment. Eviction is LRU by
+the indexed last access, which is refreshed on every hit, and bounded by
+SEGMENT_CACHE_MAX_BYTES. As in worker_cache, stores and eviction are indexed
+queries; the directory is only walked by a periodic sweep that adopts files
+the index doesn't know (caches created before the index) and forgets entries
+whose files are gone.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Bump when the key derivation changes so old entries are never matched
+_KEY_VERSION = 1
+
+_INDEX_NAME = ".index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+_CACHE_SINGLETONS: dict[str, "SegmentCache"] = {}
+_SINGLETON_LOCK = threading.Lock()
+
+
+def file_fingerprint(path: str, checksum: str | None = None) -> str:
+    """Return a stable identity string for an input file.
+
+    Prefers the server-side SHA256 checksum when known; otherwise falls back to
+    (absolute path, size, mtime) which is stable on shared storage.
+    """
+    if checksum:
+        return f"sha256:{checksum}"
+    try:
+        st = os.stat(path)
+        return f"file:{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        return f"missing:{path}"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA256 hex digest of a file's contents.
+
+    Used for small library assets (e.g. the static bumper) whose local path and
+    mtime change on every download, so stat-based fingerprints never match.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SegmentCache:
+    """Size-bounded LRU cache of rendered segments shared across processes.
+
+    Args:
+        root: Cache directory
+        max_bytes: Total size budget for cached segments
+        sweep_minutes: Minimum interval between directory sweeps
+    """
+
+    def __init__(self, root: str, max_bytes: int, sweep_minutes: float = 30.0):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.sweep_seconds = float(sweep_minutes) * 60
+        self._lock_path = os.path.join(root, ".lock")
+        self._index_path = os.path.join(root, _INDEX_NAME)
+        self._counter_lock = threading.Lock()
+        # Per-process counters (persistent totals live in the index)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    # ----- keys -----
+    def make_key(
+        self,
+        cmd: list[str],
+        output_path: str,
+        inputs: dict[str, str],
+    ) -> str:
+        """Derive a cache key from an ffmpeg command.
+
+        Args:
+            cmd: Full ffmpeg argv (binary first)
+            output_path: Output path inside cmd; excluded from the key
+            inputs: Mapping of input path in cmd -> fingerprint string
+
+        Returns:
+            Hex SHA256 key
+        """
+        normalized: list[str] = []
+        for i, arg in enumerate(cmd):
+            if i == 0:
+                normalized.append(file_fingerprint(shutil.which(arg) or arg))
+            elif arg == output_path:
+                continue
+            elif arg in inputs:
+                normalized.append(inputs[arg])
+            else:
+                normalized.append(arg)
+        payload = json.dumps({"v": _KEY_VERSION, "cmd": normalized})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def namespace(asset: str, version: str) -> str:
+        """Return a filesystem-safe namespace for one version of an asset."""
+
+        def _safe(val: str) -> str:
+            return re.sub(r"[^A-Za-z0-9._-]+", "_", str(val)) or "_"
+
+        return f"{_safe(asset)}@{_safe(version)}"
+
+    def _entry_name(self, key: str, namespace: str | None = None) -> str:
+        """Return the entry's path relative to root (its index name)."""
+        return f"{namespace or key[:2]}/{key}.mp4"
+
+    def _entry_path(self, key: str, namespace: str | None = None) -> str:
+        return os.path.join(self.root, namespace or key[:2], f"{key}.mp4")
+
+    # ----- locking / stats -----
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold an exclusive cross-process lock on the cache directory."""
+        try:
+            import fcntl
+        except ImportError:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+
+        with open(self._lock_path, "a+") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open an autocommit connection to the index; closed on exit."""
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _bump_locked(conn: sqlite3.Connection, **deltas: float) -> None:
+        for name, delta in deltas.items():
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def _bump(self, **deltas: int) -> None:
+        try:
+            with self._connect() as conn:
+                self._bump_locked(conn, **deltas)
+        except sqlite3.Error as e:
+            logger.warning("segment_cache_stats_failed", error=str(e))
+
+    # ----- public API -----
+    def fetch(self, key: str, dest_path: str, namespace: str | None = None) -> bool:
+        """Copy a cached segment to dest_path. Returns True on a hit."""
+        entry = self._entry_path(key, namespace)
+        try:
+            shutil.copyfile(entry, dest_path)
+        except FileNotFoundError:
+            with self._counter_lock:
+                self.misses += 1
+            self._bump(misses=1)
+            return False
+        except OSError as e:
+            logger.warning("segment_cache_fetch_failed", key=key, error=str(e))
+            with self._counter_lock:
+                self.misses += 1
+            self._bump(misses=1)
+            return False
+
+        # Refresh LRU position; entry may have been evicted meanwhile (harmless)
+        with contextlib.suppress(OSError):
+            os.utime(entry, None)
+        with self._counter_lock:
+            self.hits += 1
+        try:
+            size = os.path.getsize(dest_path)
+            with self._connect() as conn:
+                # Files cached before the index existed are adopted on first use
+                conn.execute(
+                    "INSERT INTO entries (name, size, last_access) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET last_access = excluded.last_access",
+                    (self._entry_name(key, namespace), size, time.time()),
+                )
+                self._bump_locked(conn, hits=1)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("segment_cache_index_failed", key=key, error=str(e))
+        return True
+
+    def store(self, key: str, src_path: str, namespace: str | None = None) -> None:
+        """Insert a rendered segment and evict least-recently-used entries.
+
+        When namespace is an ``asset@version`` namespace, entries for other
+        versions of the same asset are removed as stale.
+        """
+        entry = self._entry_path(key, namespace)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".part")
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp)
+            os.replace(tmp, entry)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+        name = self._entry_name(key, namespace)
+        try:
+            size = os.path.getsize(entry)
+            with self._locked(), self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (name, size, last_access) "
+                    "VALUES (?, ?, ?)",
+                    (name, size, time.time()),
+                )
+                evicted = self._prune_stale_locked(conn, namespace) if namespace else 0
+                evicted += self._evict_locked(conn)
+                self._bump_locked(conn, stores=1, evictions=evicted)
+            self._maybe_sweep()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("segment_cache_store_failed", key=key, error=str(e))
+
+    def _prune_stale_locked(self, conn: sqlite3.Connection, namespace: str) -> int:
+        """Drop other versions of the asset owning namespace. Caller holds lock."""
+        asset, sep, _ = namespace.partition("@")
+        if not sep:
+            return 0
+        removed = 0
+        for sub in os.listdir(self.root):
+            if sub == namespace or not sub.startswith(f"{asset}@"):
+                continue
+            sub_path = os.path.join(self.root, sub)
+            if not os.path.isdir(sub_path):
+                continue
+            removed += sum(1 for n in os.listdir(sub_path) if n.endswith(".mp4"))
+            shutil.rmtree(sub_path, ignore_errors=True)
+            conn.execute(
+                "DELETE FROM entries WHERE substr(name, 1, ?) = ?",
+                (len(sub) + 1, f"{sub}/"),
+            )
+        if removed:
+            logger.info("segment_cache_pruned_stale", asset=asset, count=removed)
+        return removed
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> int:
+        """Remove least recently used entries until the cache fits max_bytes.
+
+        Caller holds the lock.
+        """
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        rows = conn.execute(
+            "SELECT name, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for name, size in rows:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("segment_cache_evicted", count=evicted, remaining_bytes=total)
+        return evicted
+
+    def _maybe_sweep(self) -> None:
+        """Reconcile the index with the directory, at most once per interval.
+
+        Adopts segment files the index doesn't track (using their mtime as
+        last access) and forgets entries whose files were removed.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM counters WHERE name = 'last_sweep'"
+            ).fetchone()
+            if row and now - row[0] < self.sweep_seconds:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO counters (name, value) VALUES ('last_sweep', ?)",
+                (now,),
+            )
+
+        with self._locked(), self._connect() as conn:
+            known = {name for (name,) in conn.execute("SELECT name FROM entries")}
+            found = set()
+            for sub in os.listdir(self.root):
+                sub_path = os.path.join(self.root, sub)
+                if sub.startswith(".") or not os.path.isdir(sub_path):
+                    continue
+                for fname in os.listdir(sub_path):
+                    if not fname.endswith(".mp4"):
+                        continue
+                    name = f"{sub}/{fname}"
+                    found.add(name)
+                    if name in known:
+                        continue
+                    try:
+                        st = os.stat(os.path.join(sub_path, fname))
+                    except OSError:
+                        continue
+                    conn.execute(
+                        "INSERT OR IGNORE INTO entries (name, size, last_access) "
+                        "VALUES (?, ?, ?)",
+                        (name, st.st_size, st.st_mtime),
+                    )
+            for name in known - found:
+                conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            evicted = self._evict_locked(conn)
+            if evicted:
+                self._bump_locked(conn, evictions=evicted)
+
+    def stats(self) -> dict:
+        """Return persistent counters plus current size and entry count."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "root": self.root,
+            "max_bytes": self.max_bytes,
+            "size_bytes": int(size),
+            "entries": int(entries),
+            "hits": hits,
+            "misses": misses,
+            "stores": int(counters.get("stores", 0)),
+            "evictions": int(counters.get("evictions", 0)),
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+def _get_cache(app, prefix: str, default_dir: str) -> SegmentCache | None:
+    """Return the process-wide cache configured by <prefix>_* settings."""
+    if not app.config.get(f"{prefix}_ENABLED", True):
+        return None
+    max_bytes = int(app.config.get(f"{prefix}_MAX_BYTES") or 0)
+    if max_bytes <= 0:
+        return None
+
+    root = app.config.get(f"{prefix}_DIR") or os.path.join(
+        tempfile.gettempdir(), default_dir
+    )
+    with _SINGLETON_LOCK:
+        cache = _CACHE_SINGLETONS.get(prefix)
+        if cache is None or cache.root != root or cache.max_bytes != max_bytes:
+            try:
+                cache = SegmentCache(root, max_bytes)
+            except OSError as e:
+                logger.warning("segment_cache_unavailable", root=root, error=str(e))
+                return None
+            _CACHE_SINGLETONS[prefix] = cache
+        return cache
+
+
+def get_segment_cache(app) -> SegmentCache | None:
+    """Return the process-wide clip segment cache, or None when disabled."""
+    return _get_cache(app, "SEGMENT_CACHE", "clippy-segment-cache")
+
+
+def get_asset_cache(app) -> SegmentCache | None:
+    """Return the process-wide conformed library asset cache, or None."""
+    return _get_cache(app, "ASSET_CACHE", "clippy-asset-cache")
@@ -0,0 +1,137 @@
+"""
+Zero-copy handoff of finished compilations on shared storage.
+
+A worker on the same host or storage mount as the web app used to upload the
+finished video over HTTP, only for the server to write the same bytes back
+to the same disk. The server writes a random token to ``<data root>/.storage-
+token`` (storage.storage_token()) and reports it from
+``/api/worker/storage/handshake``. A worker whose own data root holds the same
+token shares the storage: it hard-links the output into ``<data root>/.handoff/``
+(copying only when the temp directory is on another filesystem) and sends just
+the file name and metadata; the server renames it into the compilations
+directory.
+
+Any mismatch (no token, different token, file not visible to the server)
+returns None or raises, and the caller falls back to uploading.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import requests
+import structlog
+
+from app import storage as storage_lib
+from app.tasks import worker_api
+
+logger = structlog.get_logger(__name__)
+
+# How long a handshake result is trusted before asking the server again
+_HANDSHAKE_TTL = 300.0
+
+_lock = threading.Lock()
+_handshakes: dict[tuple[str, str], tuple[float, str | None]] = {}
+
+
+def handoff_enabled(config) -> bool:
+    """Return True when COMPILE_LOCAL_HANDOFF allows the shared-storage handoff."""
+    value = config.get("COMPILE_LOCAL_HANDOFF", True)
+    if isinstance(value, str):
+        return value.lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+def shared_storage_token(app) -> str | None:
+    """Return the storage token when this worker shares the app's data root.
+
+    The result is cached per server URL and data root for _HANDSHAKE_TTL
+    seconds, so the handshake costs one API call per worker process.
+    """
+    with app.app_context():
+        root = storage_lib.data_root()
+        key = (os.environ.get("FLASK_APP_URL", ""), root)
+        now = time.monotonic()
+        with _lock:
+            cached = _handshakes.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        token = None
+        local = storage_lib.storage_token()
+        if local:
+            try:
+                remote = worker_api.get_storage_handshake().get("token")
+                token = local if remote == local else None
+            except (requests.RequestException, RuntimeError, ValueError) as e:
+                logger.info("storage_handshake_failed", error=str(e))
+        with _lock:
+            _handshakes[key] = (now + _HANDSHAKE_TTL, token)
+        return token
+
+
+def forget_handshake() -> None:
+    """Drop cached handshake results (e.g. after a rejected handoff)."""
+    with _lock:
+        _handshakes.clear()
+
+
+def _place(src: str, dest: str) -> str:
+    """Hard-link src to dest, copying when they are on different filesystems.
+
+    Returns:
+        "link" or "copy"
+    """
+    try:
+        os.link(src, dest)
+        return "link"
+    except OSError:
+        tmp = f"{dest}.part"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        return "copy"
+
+
+def handoff_compilation(
+    app,
+    project_id: int,
+    video_path: str,
+    token: str,
+    thumbnail_path: str | None = None,
+    metadata: dict | None = None,
+) -> dict:
+    """Place video_path in the shared handoff directory and record it.
+
+    Returns:
+        The server's result (as for worker_api.upload_compilation) with
+        "handoff_mode" set to "link" or "copy"
+
+    Raises:
+        requests.HTTPError: The server rejected the handoff (the placed file
+            is removed again)
+    """
+    with app.app_context():
+        handoff_dir = storage_lib.handoff_dir()
+    os.makedirs(handoff_dir, exist_ok=True)
+    ext = os.path.splitext(video_path)[1] or ".mp4"
+    name = f"{uuid.uuid4().hex}{ext}"
+    dest = os.path.join(handoff_dir, name)
+    mode = _place(video_path, dest)
+    try:
+        result = worker_api.handoff_compilation(
+            project_id,
+            name,
+            token,
+            thumbnail_path=thumbnail_path,
+            metadata={**(metadata or {}), "file_size": os.path.getsize(video_path)},
+        )
+    except Exception:
+        try:
+            os.remove(dest)
+        except OSError:
+            pass
+        forget_handshake()
+        raise
+    return {**result, "handoff_mode": mode}
@@ -0,0 +1,409 @@
+"""
+Stream-copy and smart-cut fast path for clips that already match the target.
+
+_process_clip_v2 re-encodes every clip, even a Twitch download that is already
+1080p H.264 High / AAC 48 kHz and needs no scaling, overlay or watermark. For
+such clips re-encoding only costs time and a generation of quality. This module
+decides whether a clip qualifies and renders it without a full encode:
+
+- copy: no trim, or a trim starting on (or within a frame of) a keyframe, is
+  remuxed with ``-c copy``
+- smart cut: a trim starting mid-GOP re-encodes only from the trim point to
+  the next keyframe and stream-copies the rest, then concatenates the two
+
+Clips rendered this way are later concatenated with ``-c copy`` next to
+encoded segments (intro, static bumper, clips that fell back), and the concat
+keeps the first segment's avcC for the whole output. Parameter sets may still
+differ between segments: copied video gets its SPS/PPS repeated in-band
+(h264_mp4toannexb, as MP4 sources carry avcC rather than Annex B extradata)
+and encoder_args() does the same for every encode. What copy_mismatch()
+rejects is what concat can't reconcile: codec, profile, pixel format, size,
+sample aspect ratio, variable frame rate and the audio format. Copied video
+is written with the track timescale the encoder would use, so time bases
+agree too.
+
+The caller falls back to the regular encode whenever a probe or one of these
+ffmpeg runs fails, so a false positive here only costs the attempt.
+"""
+
+import os
+import subprocess
+import threading
+from fractions import Fraction
+
+import structlog
+
+from app import media_probe
+from app.ffmpeg_config import DEFAULTS, INBAND_HEADER_ARGS
+from app.tasks.ffmpeg_progress import run_ffmpeg
+
+logger = structlog.get_logger(__name__)
+
+# What encoder_args()/the clip audio args produce; copied clips must match it
+# so the timeline concat never mixes stream formats
+_VIDEO_CODEC = "h264"
+_VIDEO_PROFILE = "High"
+_PIX_FMT = "yuv420p"
+_AUDIO_CODEC = "aac"
+_AUDIO_RATE = 48000
+_AUDIO_CHANNELS = 2
+
+# Seek past a keyframe by this much so input seeking lands on it, not the one
+# before it, despite pts rounding
+_SEEK_EPSILON = 0.001
+
+# Repeats the SPS/PPS from an MP4 source's avcC before each keyframe
+_INBAND_COPY_ARGS = ["-bsf:v", "h264_mp4toannexb"]
+
+
+def stream_copy_enabled(config) -> bool:
+    """Return True when COMPILE_STREAM_COPY allows the fast path."""
+    value = config.get("COMPILE_STREAM_COPY", False)
+    if isinstance(value, str):
+        return value.lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+def copy_mismatch(
+    data: dict | None, width: int, height: int, max_fps: float | None = None
+) -> str | None:
+    """Return why a probed source can't be copied to the target, or None.
+
+    Args:
+        data: media_probe.probe() result for the source
+        width: Target width
+        height: Target height
+        max_fps: Tier frame rate cap, if any
+
+    Returns:
+        Short reason string (for logs), or None when the streams match
+    """
+    video = media_probe.first_stream(data, "video")
+    if video is None:
+        return "no video stream"
+    if video.get("codec_name") != _VIDEO_CODEC:
+        return f"video codec {video.get('codec_name')}"
+    if video.get("profile") != _VIDEO_PROFILE:
+        return f"profile {video.get('profile')}"
+    if video.get("pix_fmt") != _PIX_FMT:
+        return f"pixel format {video.get('pix_fmt')}"
+    if (video.get("width"), video.get("height")) != (width, height):
+        return f"resolution {video.get('width')}x{video.get('height')}"
+    if video.get("sample_aspect_ratio") not in (None, "1:1", "0:1"):
+        return f"sample aspect ratio {video.get('sample_aspect_ratio')}"
+
+    fps = media_probe.parse_frame_rate(video.get("r_frame_rate", "0/1"))
+    avg_fps = media_probe.parse_frame_rate(video.get("avg_frame_rate", "0/1"))
+    if fps <= 0 or (avg_fps and abs(avg_fps - fps) > 0.01 * fps):
+        return "variable frame rate"
+    if max_fps and fps > float(max_fps) + 0.01:
+        return f"frame rate {fps:g} above tier cap"
+
+    audio = media_probe.first_stream(data, "audio")
+    if audio is None:
+        return "no audio stream"
+    if audio.get("codec_name") != _AUDIO_CODEC:
+        return f"audio codec {audio.get('codec_name')}"
+    try:
+        sample_rate = int(audio.get("sample_rate") or 0)
+    except (TypeError, ValueError):
+        sample_rate = 0
+    if sample_rate != _AUDIO_RATE:
+        return f"audio sample rate {audio.get('sample_rate')}"
+    if audio.get("channels") not in (None, _AUDIO_CHANNELS):
+        return f"audio channels {audio.get('channels')}"
+    return None
+
+
+def encoder_timescale(frame_rate) -> int:
+    """MP4 video timescale ffmpeg gives an encode at frame_rate.
+
+    The encoder time base is 1/frame rate; the mov muxer doubles its
+    denominator until it reaches 10000 (60 fps: 15360, 30000/1001: 30000).
+    """
+    try:
+        rate = Fraction(str(frame_rate)).limit_denominator(1001)
+    except (ValueError, ZeroDivisionError):
+        rate = Fraction(0)
+    timescale = rate.numerator if rate > 0 else 90000
+    while timescale < 10000:
+        timescale *= 2
+    return timescale
+
+
+def keyframe_times(
+    path: str,
+    ffprobe_bin: str,
+    start: float,
+    end: float,
+    extra_args: list[str] | None = None,
+) -> list[float]:
+    """Return the video keyframe timestamps between start and end (sorted).
+
+    Only the requested interval is demuxed and non-key frames are skipped
+    without decoding, so this stays cheap on long sources.
+    """
+    cmd = [
+        ffprobe_bin,
+        *(extra_args or []),
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-skip_frame",
+        "nokey",
+        "-read_intervals",
+        f"{max(0.0, start - 1):.3f}%{end + 1:.3f}",
+        "-show_entries",
+        "frame=pts_time",
+        "-of",
+        "csv=p=0",
+        path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe exited with {result.returncode}")
+    times = []
+    for line in result.stdout.splitlines():
+        try:
+            times.append(float(line.strip().strip(",")))
+        except ValueError:
+            continue
+    return sorted(times)
+
+
+def plan_cut(
+    keyframes: list[float], start: float, end: float, tolerance: float
+) -> tuple[str, float | None]:
+    """Choose how to cut [start, end) given the source keyframes.
+
+    Args:
+        keyframes: Sorted keyframe timestamps around the trim
+        start: Trim start in seconds
+        end: Trim end in seconds
+        tolerance: How far (seconds) a keyframe may precede start and still
+            count as aligned; about one frame
+
+    Returns:
+        ("copy", keyframe) when start is keyframe-aligned, ("smart", keyframe)
+        to re-encode [start, keyframe) and copy the rest, or ("encode", None)
+        when no keyframe falls inside the trim
+    """
+    for kf in keyframes:
+        if start - tolerance <= kf <= start + 1e-6:
+            return "copy", kf
+        if start < kf < end:
+            return "smart", kf
+    return "encode", None
+
+
+class StreamCopyStats:
+    """Thread-safe tally of how each clip of a compile was rendered."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.copied = 0
+        self.smart_cut = 0
+
+    def record(self, mode: str) -> None:
+        with self._lock:
+            if mode == "copy":
+                self.copied += 1
+            elif mode == "smart":
+                self.smart_cut += 1
+
+    @property
+    def fast_path(self) -> int:
+        return self.copied + self.smart_cut
+
+    def summary(self, total: int) -> str:
+        """One-line description for the job log."""
+        return (
+            f"Stream copy: {self.fast_path}/{total} clips skipped the full "
+            f"re-encode ({self.copied} copied, {self.smart_cut} smart-cut)"
+        )
+
+
+def _copy_cmd(
+    ffmpeg_bin: str,
+    ffmpeg_args: list[str],
+    input_path: str,
+    output_path: str,
+    seek: float | None,
+    duration: float | None,
+    timescale: int,
+) -> list[str]:
+    cmd = [ffmpeg_bin, *ffmpeg_args]
+    if seek is not None:
+        cmd.extend(["-ss", f"{seek:.3f}"])
+    cmd.extend(["-i", input_path])
+    if duration is not None:
+        cmd.extend(["-t", f"{duration:.3f}"])
+    cmd.extend(
+        [
+            "-map",
+            "0:v:0",
+            "-map",
+            "0:a:0",
+            "-c",
+            "copy",
+            *_INBAND_COPY_ARGS,
+            "-video_track_timescale",
+            str(timescale),
+            "-avoid_negative_ts",
+            "make_zero",
+            "-movflags",
+            "+faststart",
+            "-y",
+            output_path,
+        ]
+    )
+    return cmd
+
+
+def render_fast_path(
+    ffmpeg_bin: str,
+    ffprobe_bin: str,
+    input_path: str,
+    output_path: str,
+    start: float | None,
+    duration: float | None,
+    fps: float,
+    video_args: list[str],
+    ffmpeg_args: list[str] | None = None,
+    ffprobe_args: list[str] | None = None,
+) -> str | None:
+    """Render a copy-eligible clip by stream copy or smart cut.
+
+    Args:
+        ffmpeg_bin: ffmpeg executable
+        ffprobe_bin: ffprobe executable
+        input_path: Source clip
+        output_path: Where to write the rendered clip
+        start: Trim start (None: from the beginning)
+        duration: Output duration (None: to the end)
+        fps: Source frame rate (keyframe alignment tolerance, track timescale)
+        video_args: Encoder args for the re-encoded head of a smart cut
+        ffmpeg_args: Extra ffmpeg args (FFMPEG_GLOBAL_ARGS etc.)
+        ffprobe_args: Extra ffprobe args
+
+    Returns:
+        "copy" or "smart", or None when the trim needs a full encode
+
+    Raises:
+        subprocess.CalledProcessError/RuntimeError: ffprobe or ffmpeg failed
+    """
+    ffmpeg_args = list(ffmpeg_args or [])
+    timescale = encoder_timescale(fps)
+    if not start:
+        run_ffmpeg(
+            _copy_cmd(
+                ffmpeg_bin,
+                ffmpeg_args,
+                input_path,
+                output_path,
+                None,
+                duration,
+                timescale,
+            )
+        )
+        return "copy"
+
+    end = start + duration if duration is not None else float("inf")
+    window_end = end if duration is not None else start + 30
+    keyframes = keyframe_times(
+        input_path, ffprobe_bin, start, window_end, extra_args=ffprobe_args
+    )
+    mode, keyframe = plan_cut(keyframes, start, end, tolerance=1.0 / fps)
+    if mode == "encode":
+        return None
+
+    if mode == "copy":
+        remaining = end - keyframe if duration is not None else None
+        run_ffmpeg(
+            _copy_cmd(
+                ffmpeg_bin,
+                ffmpeg_args,
+                input_path,
+                output_path,
+                keyframe + _SEEK_EPSILON,
+                remaining,
+                timescale,
+            )
+        )
+        return "copy"
+
+    base, _ = os.path.splitext(output_path)
+    head_path = f"{base}_head.mp4"
+    tail_path = f"{base}_tail.mp4"
+    list_path = f"{base}_parts.txt"
+    # encoder_args() already repeats SPS/PPS in-band; custom args may not
+    head_bsf = [] if "-bsf:v" in video_args else INBAND_HEADER_ARGS
+    try:
+        # Accurate (decoding) seek for the partial GOP up to the keyframe
+        run_ffmpeg(
+            [
+                ffmpeg_bin,
+                *ffmpeg_args,
+                "-ss",
+                f"{start:.3f}",
+                "-i",
+                input_path,
+                "-t",
+                f"{keyframe - start:.3f}",
+                "-map",
+                "0:v:0",
+                "-map",
+                "0:a:0",
+                *video_args,
+                *head_bsf,
+                "-c:a",
+                _AUDIO_CODEC,
+                "-b:a",
+                str(DEFAULTS["audio_bitrate"]),
+                "-ar",
+                str(_AUDIO_RATE),
+                "-y",
+                head_path,
+            ]
+        )
+        remaining = end - keyframe if duration is not None else None
+        run_ffmpeg(
+            _copy_cmd(
+                ffmpeg_bin,
+                ffmpeg_args,
+                input_path,
+                tail_path,
+                keyframe + _SEEK_EPSILON,
+                remaining,
+                timescale,
+            )
+        )
+        with open(list_path, "w") as f:
+            for part in (head_path, tail_path):
+                f.write(f"file '{os.path.abspath(part)}'\n")
+        run_ffmpeg(
+            [
+                ffmpeg_bin,
+                *ffmpeg_args,
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                "-y",
+                output_path,
+            ]
+        )
+    finally:
+        for path in (head_path, tail_path, list_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return "smart"
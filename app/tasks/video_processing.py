@@ -4,12 +4,16 @@ Video processing tasks for Clippy platform.
 This module contains Celery tasks for video compilation, clip downloading,
 and media processing using ffmpeg and yt-dlp.
 """
-import json
 import os
 import subprocess
+import threading
 from typing import Any
 
+from celery.signals import worker_ready
+from celery.worker.control import control_command, inspect_command
+
 from app import storage as storage_lib
+from app.binary_registry import get_registry
 from app.models import (
     Clip,
     Project,
@@ -378,7 +382,7 @@ def download_with_yt_dlp(
 
 def extract_video_metadata(file_path: str) -> dict[str, Any]:
     """
-    Extract video metadata using ffprobe.
+    Extract video metadata using ffprobe (memoized, see app.media_probe).
 
     Args:
         file_path: Path to video file
@@ -387,56 +391,17 @@ def extract_video_metadata(file_path: str) -> dict[str, Any]:
         Dict: Video metadata
     """
     app = _get_app()
-    ffprobe_bin = resolve_binary(app, "ffprobe")
+    from app import media_probe
     from app.ffmpeg_config import config_args as _cfg_args
 
-    cmd = [
-        ffprobe_bin,
-        *_cfg_args(app, "ffprobe"),
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_format",
-        "-show_streams",
+    data = media_probe.probe(
         file_path,
-    ]
-
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-
-            # Find video stream
-            video_stream = None
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    video_stream = stream
-                    break
-
-            if video_stream:
-                # Parse framerate safely (e.g., "30000/1001")
-                fr_raw = video_stream.get("r_frame_rate", "0/1")
-                try:
-                    num, den = fr_raw.split("/")
-                    fr_val = float(num) / float(den) if float(den or 0) else 0.0
-                except Exception:
-                    try:
-                        fr_val = float(fr_raw)
-                    except Exception:
-                        fr_val = 0.0
-
-                return {
-                    "duration": float(data.get("format", {}).get("duration", 0)),
-                    "width": int(video_stream.get("width", 0)),
-                    "height": int(video_stream.get("height", 0)),
-                    "framerate": fr_val,
-                }
-
-    except Exception:
-        pass
-
-    return {}
+        resolve_binary(app, "ffprobe"),
+        _cfg_args(app, "ffprobe"),
+        timeout=None,
+        config=app.config,
+    )
+    return media_probe.video_metadata(data)
 
 
 def resolve_binary(app, name: str) -> str:
@@ -448,104 +413,45 @@ def resolve_binary(app, name: str) -> str:
       3) Project-local ./bin/<name> if present
          - For ffmpeg: if local ffmpeg lacks NVENC but system ffmpeg has NVENC, prefer system
       4) Fallback to executable name (resolved via PATH)
+
+    Encoder listings behind the NVENC choice are cached per process by the
+    binary registry and refreshed when either binary changes on disk.
     """
-    cfg_key = None
-    lname = name.lower()
-    if lname == "ffmpeg":
-        cfg_key = "FFMPEG_BINARY"
-    elif lname in ("yt-dlp", "ytdlp"):
-        cfg_key = "YT_DLP_BINARY"
-    elif lname == "ffprobe":
-        cfg_key = "FFPROBE_BINARY"
-
-    if cfg_key:
-        path = app.config.get(cfg_key)
-        if path:
-            return path
-
-    proj_root = os.path.dirname(app.root_path)
-    local_bin = os.path.join(proj_root, "bin", name)
-
-    # For ffmpeg specifically, allow preferring system binary (useful in GPU containers)
-    if lname == "ffmpeg":
-        prefer_system = str(
-            os.getenv(
-                "PREFER_SYSTEM_FFMPEG", app.config.get("PREFER_SYSTEM_FFMPEG", "")
-            )
-        ).lower() in {"1", "true", "yes", "on"}
-        if prefer_system:
-            if os.getenv("FFMPEG_DEBUG"):
-                try:
-                    print("[ffmpeg] prefer system ffmpeg via PREFER_SYSTEM_FFMPEG=1")
-                except Exception:
-                    pass
-            return "ffmpeg"
+    return get_registry().resolve(app, name)
+
+
+# Remote-control commands so admins can see and refresh each worker's binaries
+# (celery inspect ... binary_capabilities / celery control refresh_binaries)
+@inspect_command()
+def binary_capabilities(state):
+    """Resolved ffmpeg/ffprobe/yt-dlp paths, versions and capabilities.
+
+    Answers from the registry warmed at startup; never runs a binary, so the
+    worker's control loop isn't blocked.
+    """
+    return get_registry().cached_snapshot()
+
+
+@control_command()
+def refresh_binaries(state):
+    """Drop cached binary resolution and capability listings."""
+    get_registry().invalidate()
+    _warm_binaries_in_background()
+    return {"ok": True, "generation": get_registry().generation}
+
+
+def _warm_binaries_in_background() -> None:
+    threading.Thread(
+        target=lambda: get_registry().warm(_get_app()),
+        name="binary-registry-warm",
+        daemon=True,
+    ).start()
 
-        # If local exists, but we're in a GPU context, pick the one that supports NVENC
-        def _has_nvenc(bin_path: str) -> bool:
-            try:
-                import subprocess
-
-                res = subprocess.run(
-                    [bin_path, "-hide_banner", "-encoders"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    timeout=5,
-                )
-                return "h264_nvenc" in (res.stdout or "")
-            except Exception:
-                return False
-
-        gpu_context = (
-            str(os.getenv("USE_GPU_QUEUE", app.config.get("USE_GPU_QUEUE", ""))).lower()
-            in {
-                "1",
-                "true",
-                "yes",
-                "on",
-            }
-            or os.getenv("NVIDIA_VISIBLE_DEVICES")
-            or os.getenv("CUDA_VISIBLE_DEVICES")
-        )
-
-        if os.path.exists(local_bin):
-            if gpu_context:
-                # Prefer the binary that actually has NVENC
-                local_has = _has_nvenc(local_bin)
-                sys_has = _has_nvenc("ffmpeg")
-                if os.getenv("FFMPEG_DEBUG"):
-                    try:
-                        print(
-                            f"[ffmpeg] gpu_context=1 local_bin='{local_bin}' local_nvenc={local_has} system_nvenc={sys_has}"
-                        )
-                    except Exception:
-                        pass
-                if sys_has and not local_has:
-                    if os.getenv("FFMPEG_DEBUG"):
-                        try:
-                            print("[ffmpeg] selecting system ffmpeg (has NVENC)")
-                        except Exception:
-                            pass
-                    return "ffmpeg"
-            if os.getenv("FFMPEG_DEBUG"):
-                try:
-                    print(f"[ffmpeg] selecting local ffmpeg: {local_bin}")
-                except Exception:
-                    pass
-            return local_bin
-        # No local bin; system
-        if os.getenv("FFMPEG_DEBUG"):
-            try:
-                print("[ffmpeg] no local ffmpeg; using system 'ffmpeg'")
-            except Exception:
-                pass
-        return "ffmpeg"
 
-    # Non-ffmpeg tools: prefer project-local if present, else PATH
-    if os.path.exists(local_bin):
-        return local_bin
-    return name
+@worker_ready.connect
+def _warm_binary_registry(sender=None, **kwargs):
+    """List binaries once at worker startup for binary_capabilities."""
+    _warm_binaries_in_background()
 
 
 def ffmpeg_render_preview(input_path, output_path):
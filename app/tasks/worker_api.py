@@ -4,12 +4,172 @@ Worker API client - helpers for workers to communicate with Flask app via API.
 Workers use these functions instead of direct database access to maintain
 the DMZ boundary. All functions require WORKER_API_KEY and FLASK_APP_URL
 to be set in the environment.
+
+Requests go through one pooled requests.Session per process, so calls reuse
+keep-alive connections instead of opening a new TCP (and TLS) connection each
+time. Idempotent calls (GET/PUT/HEAD/DELETE) are retried with exponential
+backoff on connection errors and 502/503/504; POSTs are only retried when the
+connection could not be established. Large JSON bodies are gzipped and gzip
+responses are accepted. Call counts, latency and connection reuse are kept in
+per-process counters, see get_metrics().
 """
 
+import gzip
+import json
 import os
+import threading
+import time
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+_RETRY_STATUSES = (502, 503, 504)
+
+_session: requests.Session | None = None
+_session_pid: int | None = None
+_session_lock = threading.Lock()
+# Cleared when the server rejects a gzipped body (older app versions)
+_gzip_requests_supported = True
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "requests": 0,
+    "errors": 0,
+    "retries": 0,
+    "total_latency_ms": 0.0,
+    "max_latency_ms": 0.0,
+}
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _build_session() -> requests.Session:
+    retries = max(0, _env_number("WORKER_API_RETRIES", 3))
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=max(0.0, _env_number("WORKER_API_BACKOFF", 0.5, float)),
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=_IDEMPOTENT_METHODS,
+        raise_on_status=False,
+    )
+    pool_size = max(1, _env_number("WORKER_API_POOL_SIZE", 10))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return this process's pooled HTTP session for talking to the app.
+
+    The session is rebuilt after a fork (Celery prefork children) so pooled
+    sockets are never shared between processes.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+            with _metrics_lock:
+                for name in _metrics:
+                    _metrics[name] = 0
+        return _session
+
+
+def _record_call(started: float, response=None, error: bool = False) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    retries = 0
+    if response is not None:
+        try:
+            retries = len(response.raw.retries.history)
+        except (AttributeError, TypeError):
+            retries = 0
+    with _metrics_lock:
+        _metrics["requests"] += 1
+        _metrics["retries"] += retries
+        _metrics["total_latency_ms"] += elapsed_ms
+        _metrics["max_latency_ms"] = max(_metrics["max_latency_ms"], elapsed_ms)
+        status_code = getattr(response, "status_code", 0)
+        if error or (isinstance(status_code, int) and status_code >= 400):
+            _metrics["errors"] += 1
+
+
+def _connections_opened(session: requests.Session) -> int:
+    """Count connections opened by the session's live urllib3 pools."""
+    opened = 0
+    for adapter in set(session.adapters.values()):
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in list(pools.keys()):
+            try:
+                opened += pools[key].num_connections
+            except (KeyError, AttributeError):
+                continue
+    return opened
+
+
+def get_metrics() -> dict[str, Any]:
+    """Return this process's worker API client metrics.
+
+    Returns:
+        {
+            "requests": int,
+            "errors": int,
+            "retries": int,
+            "connections_opened": int,
+            "connection_reuse_rate": float,  # share of requests on a reused socket
+            "avg_latency_ms": float,
+            "max_latency_ms": float
+        }
+    """
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    opened = _connections_opened(_session) if _session is not None else 0
+    total = snapshot["requests"]
+    attempts = total + snapshot["retries"]
+    reused = max(0, attempts - opened)
+    return {
+        "requests": total,
+        "errors": snapshot["errors"],
+        "retries": snapshot["retries"],
+        "connections_opened": opened,
+        "connection_reuse_rate": round(reused / attempts, 4) if attempts else 0.0,
+        "avg_latency_ms": round(snapshot["total_latency_ms"] / total, 2)
+        if total
+        else 0.0,
+        "max_latency_ms": round(snapshot["max_latency_ms"], 2),
+    }
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request on the pooled session and record metrics."""
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.RequestException:
+        _record_call(started, error=True)
+        raise
+    _record_call(started, response)
+    return response
 
 
 def _get_api_config() -> tuple[str, str]:
@@ -54,14 +214,42 @@ def _make_request(
         requests.HTTPError: If request fails
         RuntimeError: If configuration is missing
     """
+    global _gzip_requests_supported
     base_url, api_key = _get_api_config()
 
     url = f"{base_url}/api{endpoint}"
     headers = {"Authorization": f"Bearer {api_key}"}
 
-    response = requests.request(
-        method, url, headers=headers, json=json_data, timeout=30
-    )
+    body = None
+    gzip_min = _env_number("WORKER_API_GZIP_MIN_BYTES", 1024)
+    if json_data is not None and _gzip_requests_supported and gzip_min > 0:
+        body = json.dumps(json_data).encode("utf-8")
+        if len(body) < gzip_min:
+            body = None
+
+    if body is None:
+        response = _request(method, url, headers=headers, json=json_data, timeout=30)
+    else:
+        response = _request(
+            method,
+            url,
+            headers={
+                **headers,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+            data=gzip.compress(body, compresslevel=5),
+            timeout=30,
+        )
+        if response.status_code in (400, 415):
+            # Possibly a server that predates gzip request bodies: resend plain,
+            # and stop compressing if that is accepted
+            response = _request(
+                method, url, headers=headers, json=json_data, timeout=30
+            )
+            if response.status_code < 400:
+                _gzip_requests_supported = False
+
     response.raise_for_status()
     return response.json()
 
@@ -115,6 +303,36 @@ def update_clip_status(
     return _make_request("POST", f"/worker/clips/{clip_id}/status", data)
 
 
+def update_clip_statuses(updates: list[dict[str, Any]]) -> dict[str, Any]:
+    """Update the download status of many clips in one call.
+
+    Args:
+        updates: Dicts with "clip_id" and the update_clip_status() fields
+
+    Returns:
+        {"status": "updated", "updated": [int, ...], "missing": [int, ...]}
+    """
+    return _make_request("POST", "/worker/clips/status-batch", {"updates": updates})
+
+
+def get_download_context(clip_ids: list[int]) -> dict[str, Any]:
+    """Get metadata, reusable media and quota for many clips in one call.
+
+    Args:
+        clip_ids: Clip IDs (at most 200)
+
+    Returns:
+        {
+            "clips": [{...get_clip_metadata() fields..., "reuse": {...}}],
+            "missing": [int, ...],
+            "quota": {"<user_id>": {...get_user_quota() fields...}}
+        }
+    """
+    return _make_request(
+        "POST", "/worker/clips/download-context", {"clip_ids": list(clip_ids)}
+    )
+
+
 def enrich_clip_metadata(clip_id: int, source_url: str) -> dict[str, Any]:
     """Enrich clip with Twitch metadata (creator, game, date).
 
@@ -130,6 +348,20 @@ def enrich_clip_metadata(clip_id: int, source_url: str) -> dict[str, Any]:
     )
 
 
+def enrich_clips_metadata(clip_ids: list[int]) -> dict[str, Any]:
+    """Enrich many clips with Twitch metadata using bulk Helix lookups.
+
+    Args:
+        clip_ids: Clip IDs (at most 200)
+
+    Returns:
+        {"status": "enriched", "enriched": [int, ...], "skipped": [int, ...]}
+    """
+    return _make_request(
+        "POST", "/worker/clips/enrich-batch", {"clip_ids": list(clip_ids)}
+    )
+
+
 def get_media_metadata(media_id: int) -> dict[str, Any]:
     """Fetch media file metadata.
 
@@ -226,6 +458,77 @@ def update_processing_job(
     return _make_request("PUT", f"/worker/jobs/{job_id}", data)
 
 
+def append_job_logs(job_id: int, entries: list[dict]) -> dict[str, Any]:
+    """Append log entries to a processing job without touching result_data.
+
+    Args:
+        job_id: Job ID
+        entries: List of {"ts", "level", "message", "status"} dicts
+
+    Returns:
+        {"status": "appended", "job_id": int, "count": int}
+    """
+    return _make_request("POST", f"/worker/jobs/{job_id}/logs", {"entries": entries})
+
+
+def upload_segment(job_id: int, name: str, path: str) -> dict[str, Any]:
+    """Upload a rendered segment of a distributed compilation.
+
+    Args:
+        job_id: Processing job the segment belongs to
+        name: Segment file name (e.g. "clip_12.mp4")
+        path: Local path of the rendered segment
+
+    Returns:
+        {"status": "stored", "name": str, "stored": int}
+    """
+    base_url, api_key = _get_api_config()
+    url = f"{base_url}/api/worker/jobs/{job_id}/segments/{name}"
+    headers = {"Authorization": f"Bearer {api_key}"}
+
+    with open(path, "rb") as f:
+        response = _request(
+            "PUT", url, headers=headers, files={"segment": f}, timeout=300
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+def has_segment(job_id: int, name: str) -> bool:
+    """Return True when the server already holds a job's segment."""
+    base_url, api_key = _get_api_config()
+    url = f"{base_url}/api/worker/jobs/{job_id}/segments/{name}"
+    response = _request(
+        "HEAD", url, headers={"Authorization": f"Bearer {api_key}"}, timeout=30
+    )
+    if response.status_code == 404:
+        return False
+    response.raise_for_status()
+    return True
+
+
+def download_segment(job_id: int, name: str, dest_dir: str) -> str:
+    """Download a job's segment into dest_dir (resumable, see media_fetch).
+
+    Returns:
+        Local path of the segment
+    """
+    from app.tasks.media_fetch import fetch_media
+
+    base_url, api_key = _get_api_config()
+    return fetch_media(
+        f"{base_url}/api/worker/jobs/{job_id}/segments/{name}",
+        {"Authorization": f"Bearer {api_key}"},
+        dest_dir,
+        os.path.splitext(name)[0],
+    )
+
+
+def delete_segments(job_id: int) -> dict[str, Any]:
+    """Remove every uploaded segment of a distributed compilation."""
+    return _make_request("DELETE", f"/worker/jobs/{job_id}/segments")
+
+
 def get_project_metadata(project_id: int) -> dict[str, Any]:
     """Fetch project metadata for compilation.
 
@@ -318,6 +621,26 @@ def find_reusable_media(
     return _make_request("POST", "/worker/media/find-reusable", data)
 
 
+def find_reusable_media_batch(
+    user_id: int, source_urls: list[str]
+) -> list[dict[str, Any]]:
+    """Find reusable media for many source URLs of one user in one call.
+
+    Args:
+        user_id: User ID
+        source_urls: Source URLs (at most 200)
+
+    Returns:
+        One find_reusable_media() result per URL, in order
+    """
+    result = _make_request(
+        "POST",
+        "/worker/media/find-reusable/batch",
+        {"user_id": user_id, "source_urls": list(source_urls)},
+    )
+    return result.get("results", [])
+
+
 def create_media_file(
     filename: str,
     original_filename: str,
@@ -538,8 +861,6 @@ def upload_compilation(
             "thumbnail_path": str
         }
     """
-    import json
-
     base_url, api_key = _get_api_config()
     url = f"{base_url}/api/worker/projects/{project_id}/compilation/upload"
     headers = {"Authorization": f"Bearer {api_key}"}
@@ -551,8 +872,8 @@ def upload_compilation(
     data = {"metadata": json.dumps(metadata or {})}
 
     try:
-        response = requests.post(
-            url, headers=headers, files=files, data=data, timeout=300
+        response = _request(
+            "POST", url, headers=headers, files=files, data=data, timeout=300
         )
         response.raise_for_status()
         return response.json()
@@ -561,6 +882,148 @@ def upload_compilation(
             f.close()
 
 
+def _upload_url(project_id: int, upload_id: str) -> tuple[str, dict[str, str]]:
+    base_url, api_key = _get_api_config()
+    return (
+        f"{base_url}/api/worker/projects/{project_id}/compilation/chunks/{upload_id}",
+        {"Authorization": f"Bearer {api_key}"},
+    )
+
+
+def put_compilation_chunk(
+    project_id: int, upload_id: str, offset: int, data: bytes
+) -> dict[str, Any]:
+    """Append one chunk to a chunked compilation upload.
+
+    Args:
+        project_id: Project ID
+        upload_id: Client-chosen upload id
+        offset: Byte offset of data in the file (must match what is stored)
+        data: Chunk bytes
+
+    Returns:
+        {"status": "stored", "upload_id": str, "offset": int}, or on an
+        offset mismatch {"error": str, "offset": int} with the stored offset
+    """
+    url, headers = _upload_url(project_id, upload_id)
+    response = _request(
+        "PUT",
+        url,
+        headers={**headers, "Content-Type": "application/octet-stream"},
+        params={"offset": offset},
+        data=data,
+        timeout=120,
+    )
+    if response.status_code == 409:
+        return response.json()
+    response.raise_for_status()
+    return response.json()
+
+
+def get_compilation_upload_offset(project_id: int, upload_id: str) -> int:
+    """Return how many bytes of a chunked upload the server has stored."""
+    url, headers = _upload_url(project_id, upload_id)
+    response = _request("GET", url, headers=headers, timeout=30)
+    response.raise_for_status()
+    return int(response.json().get("offset") or 0)
+
+
+def abort_compilation_upload(project_id: int, upload_id: str) -> None:
+    """Discard a chunked upload's partial file on the server."""
+    url, headers = _upload_url(project_id, upload_id)
+    _request("DELETE", url, headers=headers, timeout=30).raise_for_status()
+
+
+def commit_compilation_upload(
+    project_id: int,
+    upload_id: str,
+    sha256: str,
+    thumbnail_path: str | None = None,
+    metadata: dict | None = None,
+) -> dict[str, Any]:
+    """Finish a chunked upload; the server verifies sha256 before storing it.
+
+    Args:
+        project_id: Project ID
+        upload_id: Upload id used for the chunks
+        sha256: Hex SHA-256 of the complete local file
+        thumbnail_path: Optional path to thumbnail
+        metadata: Metadata as for upload_compilation (file_size is checked)
+
+    Returns:
+        Same as upload_compilation
+
+    Raises:
+        requests.HTTPError: 409 when the assembled file does not match
+    """
+    url, headers = _upload_url(project_id, upload_id)
+    data = {"metadata": json.dumps({**(metadata or {}), "sha256": sha256})}
+    files = {"thumbnail": open(thumbnail_path, "rb")} if thumbnail_path else None
+    try:
+        response = _request(
+            "POST",
+            f"{url}/commit",
+            headers=headers,
+            files=files,
+            data=data,
+            timeout=300,
+        )
+        response.raise_for_status()
+        return response.json()
+    finally:
+        if files:
+            files["thumbnail"].close()
+
+
+def get_storage_handshake() -> dict[str, Any]:
+    """Fetch the server's shared-storage handshake token.
+
+    Returns:
+        {"token": str, "token_file": str, "handoff_dir": str}
+    """
+    return _make_request("GET", "/worker/storage/handshake")
+
+
+def handoff_compilation(
+    project_id: int,
+    name: str,
+    token: str,
+    thumbnail_path: str | None = None,
+    metadata: dict | None = None,
+) -> dict[str, Any]:
+    """Record a compilation placed in the shared handoff directory.
+
+    Args:
+        project_id: Project ID
+        name: File name inside the handoff directory
+        token: Storage token the worker found in its data root
+        thumbnail_path: Optional path to thumbnail
+        metadata: Metadata as for upload_compilation
+
+    Returns:
+        Same as upload_compilation, plus "handoff": True
+
+    Raises:
+        requests.HTTPError: 409 when the server does not see the same storage
+    """
+    base_url, api_key = _get_api_config()
+    url = f"{base_url}/api/worker/projects/{project_id}/compilation/handoff"
+    headers = {"Authorization": f"Bearer {api_key}"}
+    data = {
+        "metadata": json.dumps({**(metadata or {}), "handoff": name, "token": token})
+    }
+    files = {"thumbnail": open(thumbnail_path, "rb")} if thumbnail_path else None
+    try:
+        response = _request(
+            "POST", url, headers=headers, files=files, data=data, timeout=60
+        )
+        response.raise_for_status()
+        return response.json()
+    finally:
+        if files:
+            files["thumbnail"].close()
+
+
 def upload_preview(
     project_id: int, video_path: str, metadata: dict | None = None
 ) -> dict[str, Any]:
@@ -579,8 +1042,6 @@ def upload_preview(
             "preview_path": str
         }
     """
-    import json
-
     base_url, api_key = _get_api_config()
     url = f"{base_url}/api/worker/projects/{project_id}/preview/upload"
     headers = {"Authorization": f"Bearer {api_key}"}
@@ -589,8 +1050,8 @@ def upload_preview(
     data = {"metadata": json.dumps(metadata or {})}
 
     try:
-        response = requests.post(
-            url, headers=headers, files=files, data=data, timeout=120
+        response = _request(
+            "POST", url, headers=headers, files=files, data=data, timeout=120
         )
         response.raise_for_status()
         return response.json()
@@ -0,0 +1,426 @@
+"""
+Size-bounded LRU cache for media downloaded by remote workers.
+
+Compile and download tasks keep source media in one directory per host
+(``clippy-worker-cache``). Instead of listing and stat()ing that directory on
+every call and evicting on a fixed atime age, entries are tracked in a small
+SQLite index next to the files:
+
+    <root>/<name>              cached media (clips, intros, music, thumbnails)
+    <root>/.index.sqlite       name, size and last access per entry + counters
+    <root>/.lock               flock() target for stores and eviction
+
+Lookups are single indexed queries. Storing an entry evicts the least recently
+used entries until the cache fits WORKER_CACHE_MAX_BYTES. Entries a compile
+has prefetched but not rendered yet are pinned (ref-counted per owner, with a
+WORKER_CACHE_PIN_HOURS lease in case the worker dies) and never evicted, so
+later downloads can't remove an input that is about to be used. Files the index
+doesn't know about (partial downloads, files from older workers) are swept at
+most once per WORKER_CACHE_SWEEP_MINUTES once older than
+WORKER_CACHE_ORPHAN_HOURS.
+
+Index or lock failures never fail a task: the cache then degrades to a plain
+directory.
+"""
+
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_INDEX_NAME = ".index.sqlite"
+_LOCK_NAME = ".lock"
+# Files stored next to an entry that go away with it
+_COMPANION_SUFFIXES = (".etag",)
+# Side files of an entry or its in-flight download (see media_fetch)
+_SIDE_SUFFIXES = (".part.etag", ".etag", ".part", ".lock", ".tmp")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pins (
+    name TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    refs INTEGER NOT NULL,
+    pinned_until REAL NOT NULL,
+    PRIMARY KEY (name, owner)
+);
+"""
+
+_CACHE_SINGLETONS: dict[str, "WorkerMediaCache"] = {}
+_SINGLETON_LOCK = threading.Lock()
+
+
+class WorkerMediaCache:
+    """Byte-budget LRU cache of worker media files shared across processes.
+
+    Args:
+        root: Cache directory
+        max_bytes: Total size budget for indexed entries
+        orphan_hours: Age after which unindexed files are removed
+        sweep_minutes: Minimum interval between orphan sweeps
+        pin_hours: Lease after which a pin no longer protects its entry
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int,
+        orphan_hours: float = 24.0,
+        sweep_minutes: float = 30.0,
+        pin_hours: float = 6.0,
+    ):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.orphan_seconds = float(orphan_hours) * 3600
+        self.sweep_seconds = float(sweep_minutes) * 60
+        self.pin_seconds = float(pin_hours) * 3600
+        self._index_path = os.path.join(root, _INDEX_NAME)
+        self._lock_path = os.path.join(root, _LOCK_NAME)
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config) -> "WorkerMediaCache":
+        """Create a cache from WORKER_CACHE_* settings.
+
+        Args:
+            config: Mapping with those keys (app.config, or os.environ for
+                tasks that run without a Flask app)
+        """
+        return cls(
+            config.get("WORKER_CACHE_DIR")
+            or os.path.join(tempfile.gettempdir(), "clippy-worker-cache"),
+            int(config.get("WORKER_CACHE_MAX_BYTES") or 20 * 1024**3),
+            orphan_hours=float(config.get("WORKER_CACHE_ORPHAN_HOURS") or 24.0),
+            sweep_minutes=float(config.get("WORKER_CACHE_SWEEP_MINUTES") or 30.0),
+            pin_hours=float(config.get("WORKER_CACHE_PIN_HOURS") or 6.0),
+        )
+
+    # ----- plumbing -----
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open an autocommit connection to the index; closed on exit."""
+        conn = sqlite3.connect(self._index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold an exclusive cross-process lock on the cache directory."""
+        try:
+            import fcntl
+        except ImportError:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+
+        with open(self._lock_path, "a+") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, **deltas: float) -> None:
+        for name, delta in deltas.items():
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, delta),
+            )
+
+    def path(self, name: str) -> str:
+        """Return the absolute path an entry named name lives at."""
+        return os.path.join(self.root, name)
+
+    # ----- public API -----
+    def get(self, name: str) -> str | None:
+        """Return the path of a cached entry (counting a hit), or None (a miss)."""
+        path = self.path(name)
+        if os.path.isfile(path):
+            self.hit(name)
+            return path
+        self.miss()
+        return None
+
+    def get_stem(self, stem: str) -> str | None:
+        """Like get(), for an entry whose extension isn't known (``<stem>.*``)."""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT name FROM entries WHERE substr(name, 1, ?) = ?",
+                    (len(stem) + 1, f"{stem}."),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("worker_cache_index_failed", error=str(e))
+            rows = []
+        for (name,) in rows:
+            if not name.endswith(_COMPANION_SUFFIXES) and os.path.isfile(
+                self.path(name)
+            ):
+                self.hit(name)
+                return self.path(name)
+        self.miss()
+        return None
+
+    def hit(self, name: str, pin: str | None = None, refs: int = 1) -> None:
+        """Record a hit on name and move it to the most recently used end.
+
+        Args:
+            name: Entry name
+            pin: Owner to pin the entry for (see pin()), or None
+            refs: Pin references taken for that owner
+        """
+        path = self.path(name)
+        with contextlib.suppress(OSError):
+            os.utime(path, None)
+        try:
+            size = os.path.getsize(path)
+            with self._connect() as conn:
+                # Files cached before the index existed are adopted on first use
+                conn.execute(
+                    "INSERT INTO entries (name, size, last_access) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET last_access = excluded.last_access",
+                    (name, size, time.time()),
+                )
+                if pin:
+                    self._pin(conn, name, pin, refs)
+                self._bump(conn, hits=1)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("worker_cache_index_failed", name=name, error=str(e))
+
+    def miss(self) -> None:
+        """Record a lookup that had to go to the network."""
+        try:
+            with self._connect() as conn:
+                self._bump(conn, misses=1)
+        except sqlite3.Error as e:
+            logger.warning("worker_cache_index_failed", error=str(e))
+
+    def store(self, name: str, pin: str | None = None, refs: int = 1) -> str:
+        """Index a file already written to path(name) and enforce the budget.
+
+        The new entry itself is never evicted, even if it alone exceeds the
+        budget, since the caller is about to use it; neither are pinned ones.
+
+        Args:
+            name: Entry name
+            pin: Owner to pin the entry for (see pin()), or None
+            refs: Pin references taken for that owner
+
+        Returns:
+            Path of the entry
+        """
+        path = self.path(name)
+        try:
+            size = os.path.getsize(path)
+            with self._locked(), self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (name, size, last_access) "
+                    "VALUES (?, ?, ?)",
+                    (name, size, time.time()),
+                )
+                if pin:
+                    self._pin(conn, name, pin, refs)
+                self._bump(conn, stores=1)
+                self._evict_locked(conn, keep=name)
+            self._maybe_sweep()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("worker_cache_store_failed", name=name, error=str(e))
+        return path
+
+    def _pin(self, conn: sqlite3.Connection, name: str, owner: str, refs: int) -> None:
+        conn.execute(
+            "INSERT INTO pins (name, owner, refs, pinned_until) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name, owner) DO UPDATE SET refs = refs + excluded.refs, "
+            "pinned_until = excluded.pinned_until",
+            (name, owner, max(1, int(refs)), time.time() + self.pin_seconds),
+        )
+
+    def pin(self, name: str, owner: str, refs: int = 1) -> None:
+        """Protect an entry from eviction until owner unpins or releases it.
+
+        Pins are counted per owner (e.g. one compile), so an input used by
+        several clips stays pinned until the last of them has rendered.
+        """
+        try:
+            with self._connect() as conn:
+                self._pin(conn, name, owner, refs)
+        except sqlite3.Error as e:
+            logger.warning("worker_cache_index_failed", name=name, error=str(e))
+
+    def unpin(self, stem: str, owner: str) -> None:
+        """Drop one of owner's references on the entry named stem or ``<stem>.*``."""
+        try:
+            with self._connect() as conn:
+                match = "(name = ? OR substr(name, 1, ?) = ?) AND owner = ?"
+                args = (stem, len(stem) + 1, f"{stem}.", owner)
+                conn.execute(f"UPDATE pins SET refs = refs - 1 WHERE {match}", args)
+                conn.execute(f"DELETE FROM pins WHERE refs <= 0 AND {match}", args)
+        except sqlite3.Error as e:
+            logger.warning("worker_cache_index_failed", name=stem, error=str(e))
+
+    def release(self, owner: str) -> None:
+        """Drop every pin held by owner (e.g. when its compile ends)."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM pins WHERE owner = ?", (owner,))
+        except sqlite3.Error as e:
+            logger.warning("worker_cache_index_failed", error=str(e))
+
+    def _remove_files(self, name: str) -> None:
+        for suffix in ("", *_COMPANION_SUFFIXES):
+            with contextlib.suppress(OSError):
+                os.remove(self.path(name + suffix))
+
+    def _evict_locked(self, conn: sqlite3.Connection, keep: str | None = None) -> int:
+        """Drop least recently used entries until the budget fits. Caller holds lock."""
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        freed = 0
+        now = time.time()
+        # Pins of workers that died without releasing them expire
+        conn.execute("DELETE FROM pins WHERE pinned_until <= ?", (now,))
+        pinned = {name for (name,) in conn.execute("SELECT DISTINCT name FROM pins")}
+        rows = conn.execute(
+            "SELECT name, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for name, size in rows:
+            if total - freed <= self.max_bytes:
+                break
+            if name == keep or name in pinned:
+                continue
+            self._remove_files(name)
+            conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            freed += size
+            evicted += 1
+        if evicted:
+            self._bump(conn, evictions=evicted, evicted_bytes=freed)
+            logger.info(
+                "worker_cache_evicted",
+                count=evicted,
+                freed_bytes=freed,
+                remaining_bytes=total - freed,
+            )
+        return evicted
+
+    def _maybe_sweep(self) -> None:
+        """Remove old files the index doesn't track, at most once per interval."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM counters WHERE name = 'last_sweep'"
+            ).fetchone()
+            if row and now - row[0] < self.sweep_seconds:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO counters (name, value) VALUES ('last_sweep', ?)",
+                (now,),
+            )
+            known = {name for (name,) in conn.execute("SELECT name FROM entries")}
+
+        removed = 0
+        with self._locked(), self._connect() as conn:
+            for name in os.listdir(self.root):
+                if name.startswith(".") or name in known:
+                    continue
+                owner = name
+                for suffix in _SIDE_SUFFIXES:
+                    if name.endswith(suffix):
+                        owner = name[: -len(suffix)]
+                        break
+                if owner in known:
+                    continue
+                # Lock files of a download that is still in progress
+                if name.endswith(".lock") and os.path.exists(
+                    self.path(f"{owner}.part")
+                ):
+                    continue
+                path = self.path(name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if not os.path.isfile(path) or now - st.st_mtime < self.orphan_seconds:
+                    continue
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+                    removed += 1
+            # Forget entries whose files were deleted behind our back
+            for name in known:
+                if not os.path.exists(self.path(name)):
+                    conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+        if removed:
+            logger.info("worker_cache_swept", count=removed)
+
+    def stats(self) -> dict:
+        """Return persistent counters plus current size and entry count."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            (pinned,) = conn.execute(
+                "SELECT COUNT(DISTINCT name) FROM pins WHERE pinned_until > ?",
+                (time.time(),),
+            ).fetchone()
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "root": self.root,
+            "max_bytes": self.max_bytes,
+            "size_bytes": int(size),
+            "entries": int(entries),
+            "hits": hits,
+            "misses": misses,
+            "stores": int(counters.get("stores", 0)),
+            "evictions": int(counters.get("evictions", 0)),
+            "evicted_bytes": int(counters.get("evicted_bytes", 0)),
+            "pinned": int(pinned),
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
+
+
+def get_worker_cache(config) -> WorkerMediaCache | None:
+    """Return the process-wide worker media cache, or None if unusable.
+
+    Args:
+        config: app.config, or os.environ for tasks without a Flask app
+    """
+    try:
+        root = config.get("WORKER_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "clippy-worker-cache"
+        )
+        max_bytes = int(config.get("WORKER_CACHE_MAX_BYTES") or 20 * 1024**3)
+        with _SINGLETON_LOCK:
+            cache = _CACHE_SINGLETONS.get(root)
+            if cache is None or cache.max_bytes != max_bytes:
+                cache = WorkerMediaCache.from_config(config)
+                _CACHE_SINGLETONS[root] = cache
+            return cache
+    except Exception as e:
+        logger.warning("worker_cache_unavailable", error=str(e))
+        return None
@@ -4,12 +4,16 @@ Worker heartbeat and version reporting system.
 This module ensures workers are running compatible code versions
 and provides visibility into the worker fleet.
 """
+import os
 import platform
 import socket
 from datetime import datetime, timezone
 
 from celery import current_app as current_celery_app
 
+from app import media_probe
+from app.tasks import worker_api
+from app.tasks.worker_cache import get_worker_cache
 from app.version import __version__
 
 
@@ -20,6 +24,20 @@ def get_worker_info():
     except Exception:
         worker_name = socket.gethostname()
 
+    media_cache = None
+    try:
+        cache = get_worker_cache(os.environ)
+        if cache is not None:
+            media_cache = cache.stats()
+    except Exception:
+        pass
+
+    probe_cache = None
+    try:
+        probe_cache = media_probe.get_probe_cache(os.environ).stats()
+    except Exception:
+        pass
+
     return {
         "worker_name": worker_name,
         "version": __version__,
@@ -27,6 +45,9 @@ def get_worker_info():
         "python_version": platform.python_version(),
         "hostname": socket.gethostname(),
         "timestamp": datetime.now(timezone.utc).isoformat(),
+        "api_client": worker_api.get_metrics(),
+        "media_cache": media_cache,
+        "probe_cache": probe_cache,
     }
 
 
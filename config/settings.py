@@ -141,6 +141,13 @@ class Config:
     TWITCH_REDIRECT_URI = os.environ.get("TWITCH_REDIRECT_URI")
     YOUTUBE_CLIENT_ID = os.environ.get("YOUTUBE_CLIENT_ID")
     YOUTUBE_CLIENT_SECRET = os.environ.get("YOUTUBE_CLIENT_SECRET")
+    # Keep-alive connections and retries (429/5xx) for Twitch/Discord API calls,
+    # read from the environment by app.integrations.http_client
+    INTEGRATION_HTTP_POOL_SIZE = int(os.environ.get("INTEGRATION_HTTP_POOL_SIZE", 10))
+    INTEGRATION_HTTP_RETRIES = int(os.environ.get("INTEGRATION_HTTP_RETRIES", 3))
+    # In-process entries per lookup cache (Twitch user IDs, avatars, game names);
+    # the shared tier is the app cache (Redis)
+    INTEGRATION_CACHE_SIZE = int(os.environ.get("INTEGRATION_CACHE_SIZE", 2048))
 
     # Worker API Configuration
     # Shared secret for workers to authenticate with the Flask app
@@ -191,6 +198,143 @@ class Config:
         "yes",
     }
 
+    # Compilation performance
+    # Number of clips rendered concurrently per compile: 1 = sequential,
+    # 0 = auto (sized from CPU core count), N = fixed pool size
+    COMPILE_CLIP_CONCURRENCY = int(os.environ.get("COMPILE_CLIP_CONCURRENCY", 1))
+    # Upper bound on simultaneous NVENC sessions when rendering clips in parallel
+    # (consumer GeForce drivers cap concurrent encode sessions)
+    COMPILE_NVENC_MAX_SESSIONS = int(os.environ.get("COMPILE_NVENC_MAX_SESSIONS", 3))
+    # Default final-stage render engine ("multipass" or "single_pass"); tiers and
+    # projects can override it via their render_engine column
+    COMPILE_RENDER_ENGINE = os.environ.get("COMPILE_RENDER_ENGINE", "multipass")
+    # Where the tier watermark is drawn: "final" overlays the finished video,
+    # "segment" burns it into each clip/asset encode so concat stays a copy
+    COMPILE_WATERMARK_MODE = os.environ.get("COMPILE_WATERMARK_MODE", "final")
+    # Worker job logs are buffered and shipped in batches of this many entries,
+    # or every JOB_LOG_FLUSH_SECONDS, whichever comes first
+    JOB_LOG_BATCH_SIZE = int(os.environ.get("JOB_LOG_BATCH_SIZE", 20))
+    JOB_LOG_FLUSH_SECONDS = float(os.environ.get("JOB_LOG_FLUSH_SECONDS", 2.0))
+    # Worker -> app HTTP client: pooled keep-alive connections per process,
+    # retried with exponential backoff on idempotent calls only
+    WORKER_API_POOL_SIZE = int(os.environ.get("WORKER_API_POOL_SIZE", 10))
+    WORKER_API_RETRIES = int(os.environ.get("WORKER_API_RETRIES", 3))
+    WORKER_API_BACKOFF = float(os.environ.get("WORKER_API_BACKOFF", 0.5))
+    # JSON request bodies at least this large are gzipped (0 disables)
+    WORKER_API_GZIP_MIN_BYTES = int(os.environ.get("WORKER_API_GZIP_MIN_BYTES", 1024))
+    # Remote media downloads: read/write buffer size and connection attempts
+    # (each attempt resumes from the bytes already downloaded)
+    MEDIA_DOWNLOAD_CHUNK_BYTES = int(
+        os.environ.get("MEDIA_DOWNLOAD_CHUNK_BYTES", 1024 * 1024)
+    )
+    MEDIA_DOWNLOAD_ATTEMPTS = int(os.environ.get("MEDIA_DOWNLOAD_ATTEMPTS", 5))
+    # Clip downloads: clips per batch download task (0/1 = one task per clip)
+    # and parallel yt-dlp downloads inside each batch task
+    DOWNLOAD_BATCH_SIZE = int(os.environ.get("DOWNLOAD_BATCH_SIZE", 25))
+    DOWNLOAD_BATCH_CONCURRENCY = int(os.environ.get("DOWNLOAD_BATCH_CONCURRENCY", 4))
+    # Compile inputs (clips, intro/outro, transitions, music, avatars, static
+    # bumper) fetched in parallel before rendering; 0 fetches lazily per clip
+    COMPILE_PREFETCH_CONCURRENCY = int(
+        os.environ.get("COMPILE_PREFETCH_CONCURRENCY", 4)
+    )
+    # ffmpeg runs report -progress; overall progress, fps and ETA are published
+    # to the task state and job at most once per this many seconds
+    COMPILE_PROGRESS_INTERVAL = float(os.environ.get("COMPILE_PROGRESS_INTERVAL", 2.0))
+    # NVENC workers decode and scale clips on the GPU when ffmpeg supports CUDA
+    # filters ("auto"); "false" keeps the CPU filter chain
+    COMPILE_GPU_FILTERS = os.environ.get("COMPILE_GPU_FILTERS", "auto")
+    # Clips already in the target format with no filters to apply are remuxed
+    # (or smart-cut at the trim point) instead of fully re-encoded (opt-in)
+    COMPILE_STREAM_COPY = os.environ.get("COMPILE_STREAM_COPY", "false").lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    # Workers that see the web app's data root (same host or shared mount,
+    # detected by a token file) hand compilations over without uploading
+    COMPILE_LOCAL_HANDOFF = os.environ.get("COMPILE_LOCAL_HANDOFF", "true").lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    # The finished compilation is uploaded in resumable chunks. Streaming the
+    # upload during the single-pass encode delivers a fragmented MP4 (no
+    # faststart moov index), so it is opt-in
+    COMPILE_CHUNKED_UPLOAD = os.environ.get(
+        "COMPILE_CHUNKED_UPLOAD", "true"
+    ).lower() in {"1", "true", "yes", "on"}
+    COMPILE_STREAM_UPLOAD = os.environ.get(
+        "COMPILE_STREAM_UPLOAD", "false"
+    ).lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    COMPILE_UPLOAD_CHUNK_MB = float(os.environ.get("COMPILE_UPLOAD_CHUNK_MB", 8))
+    # Distributed compile: timelines with at least COMPILE_DISTRIBUTED_MIN_CLIPS
+    # clips (0 disables) are rendered as chunks on several workers, then merged
+    COMPILE_DISTRIBUTED_MIN_CLIPS = int(
+        os.environ.get("COMPILE_DISTRIBUTED_MIN_CLIPS", 0)
+    )
+    COMPILE_DISTRIBUTED_CHUNK_SIZE = int(
+        os.environ.get("COMPILE_DISTRIBUTED_CHUNK_SIZE", 4)
+    )
+    # Queue for render subtasks (default: gpu with USE_GPU_QUEUE, else celery)
+    COMPILE_DISTRIBUTED_QUEUE = os.environ.get("COMPILE_DISTRIBUTED_QUEUE", "")
+    # Directory shared by all workers for segments; unset uploads them to the app
+    COMPILE_DISTRIBUTED_SHARED_DIR = os.environ.get("COMPILE_DISTRIBUTED_SHARED_DIR")
+    # Durable per-compilation scratch directories with a manifest of finished
+    # stages; a retried compile resumes instead of starting from clip 1
+    COMPILE_CHECKPOINT_ENABLED = os.environ.get(
+        "COMPILE_CHECKPOINT_ENABLED", "true"
+    ).lower() in {"1", "true", "yes", "on"}
+    COMPILE_CHECKPOINT_DIR = os.environ.get("COMPILE_CHECKPOINT_DIR")  # <tmp>/...
+    COMPILE_CHECKPOINT_TTL_HOURS = float(
+        os.environ.get("COMPILE_CHECKPOINT_TTL_HOURS", 48)
+    )
+    # Persistent cache of rendered clip segments, reused across compilations
+    SEGMENT_CACHE_ENABLED = os.environ.get("SEGMENT_CACHE_ENABLED", "true").lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    SEGMENT_CACHE_DIR = os.environ.get("SEGMENT_CACHE_DIR")  # default: <tmp>/...
+    SEGMENT_CACHE_MAX_BYTES = int(
+        os.environ.get("SEGMENT_CACHE_MAX_BYTES", 10 * 1024 * 1024 * 1024)
+    )  # Default 10GB
+    # Conformed intro/outro/transition/static renders, one per target profile
+    ASSET_CACHE_ENABLED = os.environ.get("ASSET_CACHE_ENABLED", "true").lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR")  # default: <tmp>/...
+    ASSET_CACHE_MAX_BYTES = int(
+        os.environ.get("ASSET_CACHE_MAX_BYTES", 5 * 1024 * 1024 * 1024)
+    )  # Default 5GB
+    # Source media downloaded by remote workers (clips, intros, music), kept in
+    # a SQLite-indexed directory and evicted least-recently-used over budget
+    WORKER_CACHE_DIR = os.environ.get("WORKER_CACHE_DIR")  # default: <tmp>/...
+    WORKER_CACHE_MAX_BYTES = int(
+        os.environ.get("WORKER_CACHE_MAX_BYTES", 20 * 1024 * 1024 * 1024)
+    )  # Default 20GB
+    # Unindexed files (abandoned partial downloads) older than this are removed
+    WORKER_CACHE_ORPHAN_HOURS = float(os.environ.get("WORKER_CACHE_ORPHAN_HOURS", 24))
+    WORKER_CACHE_SWEEP_MINUTES = float(os.environ.get("WORKER_CACHE_SWEEP_MINUTES", 30))
+    # Longest a compile's prefetched inputs stay protected from eviction if the
+    # worker dies before releasing them
+    WORKER_CACHE_PIN_HOURS = float(os.environ.get("WORKER_CACHE_PIN_HOURS", 6))
+    # Memoized ffprobe results: in-process LRU entries (0 disables) plus an
+    # optional Redis tier shared by the web app and workers (empty disables)
+    PROBE_CACHE_SIZE = int(os.environ.get("PROBE_CACHE_SIZE", 1024))
+    PROBE_CACHE_REDIS_URL = os.environ.get("PROBE_CACHE_REDIS_URL", "")
+    PROBE_CACHE_TTL = int(os.environ.get("PROBE_CACHE_TTL", 7 * 24 * 3600))
+
     # Worker media over HTTP
     # Base URL used by workers (or any process without a request context) to build
     # absolute raw media URLs. Example: https://clippy.example.com
@@ -0,0 +1,82 @@
+"""add source_key to clips
+
+Revision ID: e3a9c5b1f0d7
+Revises: d81f3b6a0c52
+Create Date: 2026-10-16 23:40:12.118406
+
+"""
+import re
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e3a9c5b1f0d7"
+down_revision = "d81f3b6a0c52"
+branch_labels = None
+depends_on = None
+
+# Rows read and updated per backfill round trip
+_BACKFILL_BATCH = 1000
+
+# Frozen copy of app.clip_urls.source_clip_key at this revision, so the
+# backfill doesn't change with later application code
+_TWITCH_SLUG_RE = re.compile(
+    r"(?:clips?\.twitch\.tv/|twitch\.tv/(?:[^?#]+/)?clip/)([^/?&#]+)", re.IGNORECASE
+)
+
+
+def _source_clip_key(url):
+    s = (url or "").strip()
+    if not s:
+        return ""
+    base = s.split("?")[0].split("#")[0]
+    base = base[:-1] if base.endswith("/") else base
+    match = _TWITCH_SLUG_RE.search(base)
+    return match.group(1).lower() if match else base
+
+
+def upgrade():
+    with op.batch_alter_table("clips", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("source_key", sa.String(length=500), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_clips_source_key"), ["source_key"], unique=False
+        )
+
+    # Backfill existing clips in id order, one batch at a time
+    clips = sa.table(
+        "clips",
+        sa.column("id", sa.Integer),
+        sa.column("source_url", sa.String),
+        sa.column("source_key", sa.String),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(clips.c.id, clips.c.source_url)
+            .where(clips.c.id > last_id, clips.c.source_url.isnot(None))
+            .order_by(clips.c.id)
+            .limit(_BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            break
+        updates = [
+            {"clip_id": row.id, "key": _source_clip_key(row.source_url) or None}
+            for row in rows
+        ]
+        bind.execute(
+            clips.update()
+            .where(clips.c.id == sa.bindparam("clip_id"))
+            .values(source_key=sa.bindparam("key")),
+            updates,
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table("clips", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_clips_source_key"))
+        batch_op.drop_column("source_key")
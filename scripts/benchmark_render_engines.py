@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Benchmark the multi-pass and single-pass compilation render engines.
+
+Generates a synthetic timeline (conformed segments, a music bed and a
+watermark PNG) and runs the final compile stage of each engine on it:
+
+- multipass:   concat demuxer -> music mix (video copy) -> watermark re-encode
+- single_pass: one ffmpeg run with concat, sidechaincompress and overlay
+
+For each engine it reports wall time, bytes written to intermediate/final
+files, and block I/O reported by the kernel for the ffmpeg children.
+
+Usage:
+    python scripts/benchmark_render_engines.py [--segments 12] [--seconds 8]
+        [--resolution 1920x1080] [--fps 30] [--runs 3] [--no-music]
+        [--no-watermark] [--keep]
+
+Notes:
+- Uses the ffmpeg from FFMPEG_BINARY or PATH, and the same encoder arguments
+  the worker would (NVENC when detected, libx264 otherwise).
+- Block I/O counts come from getrusage(RUSAGE_CHILDREN); files on tmpfs or
+  still in the page cache may report zero, so bytes written is the steadier
+  comparison.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Make app importable
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.ffmpeg_config import encoder_args  # noqa: E402
+from app.tasks.compile_video_v2 import (  # noqa: E402
+    _build_single_pass_cmd,
+    _music_filter,
+    _watermark_filter,
+    _write_concat_list,
+)
+
+MUSIC_START = 0.0
+
+
+def _run(cmd: list[str]) -> None:
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def _make_fixtures(ffmpeg_bin: str, work: str, args) -> tuple[list[str], str, str]:
+    """Render synthetic segments, a music bed and a watermark image."""
+    segments = []
+    for i in range(args.segments):
+        path = os.path.join(work, f"segment_{i:03d}.mp4")
+        _run(
+            [
+                ffmpeg_bin,
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-f",
+                "lavfi",
+                "-i",
+                f"testsrc2=size={args.resolution}:rate={args.fps}:duration={args.seconds}",
+                "-f",
+                "lavfi",
+                "-i",
+                f"sine=frequency={220 + 20 * i}:sample_rate=48000:duration={args.seconds}",
+                *encoder_args(ffmpeg_bin),
+                "-c:a",
+                "aac",
+                "-b:a",
+                "192k",
+                "-ar",
+                "48000",
+                path,
+            ]
+        )
+        segments.append(path)
+
+    music = os.path.join(work, "music.m4a")
+    _run(
+        [
+            ffmpeg_bin,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=110:sample_rate=48000:duration={args.seconds * 3}",
+            "-c:a",
+            "aac",
+            music,
+        ]
+    )
+
+    watermark = os.path.join(work, "watermark.png")
+    _run(
+        [
+            ffmpeg_bin,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=size=256x256:color=white",
+            "-frames:v",
+            "1",
+            watermark,
+        ]
+    )
+    return segments, music, watermark
+
+
+def _music_opts(music: str, total: float) -> dict:
+    return {
+        "path": music,
+        "has_audio_stream": True,
+        "start": MUSIC_START,
+        "end": total,
+        "file_duration": total / 4,  # Forces the aloop branch like short beds do
+        "volume": 0.3,
+        "threshold": 0.02,
+        "ratio": 20.0,
+        "attack": 1.0,
+        "release": 250.0,
+    }
+
+
+def _watermark_opts(watermark: str) -> dict:
+    return {
+        "path": watermark,
+        "opacity": 0.3,
+        "position": "bottom-right",
+        "size": 150,
+        "margin": 10,
+    }
+
+
+def _multipass(ffmpeg_bin, out_dir, concat_file, music, watermark) -> list[str]:
+    """Run the multi-pass stage; returns every file it wrote."""
+    written = []
+    concat_out = os.path.join(out_dir, "concat_no_music.mp4")
+    _run(
+        [
+            ffmpeg_bin,
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-fflags",
+            "+genpts",
+            "-i",
+            concat_file,
+            "-c:v",
+            "copy",
+            *(["-c:a", "aac", "-b:a", "192k", "-ar", "48000"] if music else []),
+            *([] if music else ["-c:a", "copy"]),
+            "-avoid_negative_ts",
+            "make_zero",
+            "-y",
+            concat_out,
+        ]
+    )
+    written.append(concat_out)
+    current = concat_out
+
+    if music:
+        mixed = os.path.join(out_dir, "music_mixed.mp4")
+        graph, audio_map = _music_filter(
+            "[1:a]",
+            "[0:a]",
+            music["has_audio_stream"],
+            music["start"],
+            music["end"],
+            music["file_duration"],
+            music["volume"],
+            music["threshold"],
+            music["ratio"],
+            music["attack"],
+            music["release"],
+        )
+        _run(
+            [
+                ffmpeg_bin,
+                "-i",
+                current,
+                "-i",
+                music["path"],
+                "-filter_complex",
+                graph,
+                "-map",
+                "0:v",
+                "-map",
+                audio_map,
+                "-c:v",
+                "copy",
+                "-c:a",
+                "aac",
+                "-b:a",
+                "192k",
+                "-shortest",
+                "-y",
+                mixed,
+            ]
+        )
+        written.append(mixed)
+        current = mixed
+
+    if watermark:
+        final = os.path.join(out_dir, "final_watermarked.mp4")
+        _run(
+            [
+                ffmpeg_bin,
+                "-i",
+                current,
+                "-i",
+                watermark["path"],
+                "-filter_complex",
+                _watermark_filter(
+                    "[1:v]",
+                    "[0:v]",
+                    opacity=watermark["opacity"],
+                    position=watermark["position"],
+                    size=watermark["size"],
+                    margin=watermark["margin"],
+                ),
+                "-map",
+                "0:a?",
+                *encoder_args(ffmpeg_bin),
+                "-y",
+                final,
+            ]
+        )
+        written.append(final)
+    return written
+
+
+def _single_pass(ffmpeg_bin, out_dir, concat_file, music, watermark) -> list[str]:
+    """Run the single-pass stage; returns every file it wrote."""
+    final = os.path.join(out_dir, "compilation.mp4")
+    _run(
+        _build_single_pass_cmd(
+            ffmpeg_bin,
+            [],
+            concat_file,
+            final,
+            music=music,
+            watermark=watermark,
+            video_encoder_args=encoder_args(ffmpeg_bin) if watermark else None,
+        )
+    )
+    return [final]
+
+
+def _measure(fn, *fn_args) -> dict:
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    written = fn(*fn_args)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "wall": wall,
+        "bytes_written": sum(os.path.getsize(p) for p in written),
+        "passes": len(written),
+        "blocks_in": after.ru_inblock - before.ru_inblock,
+        "blocks_out": after.ru_oublock - before.ru_oublock,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--segments", type=int, default=12)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-music", action="store_true")
+    parser.add_argument("--no-watermark", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="Keep the work dir")
+    args = parser.parse_args()
+
+    ffmpeg_bin = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg") or "ffmpeg"
+    work = tempfile.mkdtemp(prefix="clippy-engine-bench-")
+    try:
+        print(f"Preparing {args.segments} x {args.seconds}s segments in {work}")
+        segments, music_path, wm_path = _make_fixtures(ffmpeg_bin, work, args)
+        concat_file = _write_concat_list(segments, work)
+        total = args.segments * args.seconds
+        music = None if args.no_music else _music_opts(music_path, total)
+        watermark = None if args.no_watermark else _watermark_opts(wm_path)
+
+        results: dict[str, list[dict]] = {"multipass": [], "single_pass": []}
+        for run in range(args.runs):
+            for name, fn in (("multipass", _multipass), ("single_pass", _single_pass)):
+                out_dir = os.path.join(work, f"{name}_{run}")
+                os.makedirs(out_dir)
+                results[name].append(
+                    _measure(fn, ffmpeg_bin, out_dir, concat_file, music, watermark)
+                )
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+        print(
+            f"\n{'engine':<12} {'passes':>6} {'wall (s)':>10} {'written (MB)':>13}"
+            f" {'blk in':>9} {'blk out':>9}"
+        )
+        for name, runs in results.items():
+            wall = sorted(r["wall"] for r in runs)[len(runs) // 2]
+            written = runs[0]["bytes_written"] / (1024 * 1024)
+            blk_in = sum(r["blocks_in"] for r in runs) // len(runs)
+            blk_out = sum(r["blocks_out"] for r in runs) // len(runs)
+            print(
+                f"{name:<12} {runs[0]['passes']:>6} {wall:>10.2f} {written:>13.1f}"
+                f" {blk_in:>9} {blk_out:>9}"
+            )
+        print(f"\nMedian wall time over {args.runs} run(s); blocks are 512-byte units.")
+        return 0
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode(errors="replace")[-800:]
+        print(f"ffmpeg failed: {' '.join(e.cmd[:6])} ...\n{stderr}", file=sys.stderr)
+        return 1
+    finally:
+        if args.keep:
+            print(f"Work dir kept at {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
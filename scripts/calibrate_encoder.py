@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Calibrate encoder presets for this worker and save a per-host profile.
+
+Encodes a standard reference clip (testsrc2 with grain, lossless) with every
+NVENC preset/lookahead and libx264 preset/thread combination, measures
+encode fps, bitrate and SSIM against the reference, and saves the fastest
+combination per encoder that meets the targets. Compile tasks on this host
+pick the profile up through ffmpeg_config.encoder_args().
+
+Usage:
+    python scripts/calibrate_encoder.py [--min-ssim 0.97] [--max-bitrate 12M]
+        [--resolution 1920x1080] [--fps 60] [--seconds 10] [--output PATH]
+        [--dry-run]
+
+Notes:
+- Uses the ffmpeg from FFMPEG_BINARY or PATH; NVENC candidates are only
+  tried when detect_nvenc() succeeds.
+- The profile is written to ENCODER_PROFILE_PATH (default
+  instance/encoder_profiles/<hostname>.json). Delete it to return to the
+  built-in defaults. FFMPEG_NVENC_PRESET still overrides the NVENC preset.
+- Run it on an idle worker; a full matrix takes a few minutes.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+# Make app importable
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.encoder_profile import (  # noqa: E402
+    DEFAULT_MIN_SSIM,
+    calibrate,
+    parse_bitrate,
+    profile_path,
+    save_profile,
+)
+from app.ffmpeg_config import DEFAULTS, detect_nvenc  # noqa: E402
+
+
+def _print_result(result: dict) -> None:
+    settings = " ".join(f"{k}={v}" for k, v in result["settings"].items())
+    if not result["ok"]:
+        print(f"{result['encoder']:<6} {settings:<28} failed: {result.get('error')}")
+        return
+    print(
+        f"{result['encoder']:<6} {settings:<28} {result['fps']:>8.1f}"
+        f" {result['bitrate'] / 1e6:>10.2f} {result['ssim']:>8.4f}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--min-ssim", type=float, default=DEFAULT_MIN_SSIM)
+    parser.add_argument(
+        "--max-bitrate",
+        default=str(DEFAULTS["bitrate"]),
+        help="Maximum average bitrate, e.g. 12M (0 for no limit)",
+    )
+    parser.add_argument("--resolution", default="1920x1080")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--output", default=None, help="Profile path to write")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print results without saving"
+    )
+    args = parser.parse_args()
+
+    ffmpeg_bin = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg") or "ffmpeg"
+    nvenc, reason = detect_nvenc(ffmpeg_bin)
+    print(f"ffmpeg: {ffmpeg_bin} (NVENC: {'yes' if nvenc else reason})")
+    print(f"\n{'enc':<6} {'settings':<28} {'fps':>8} {'Mbit/s':>10} {'ssim':>8}")
+
+    try:
+        profile = calibrate(
+            ffmpeg_bin,
+            nvenc,
+            min_ssim=args.min_ssim,
+            max_bitrate=parse_bitrate(args.max_bitrate) or None,
+            resolution=args.resolution,
+            fps=args.fps,
+            seconds=args.seconds,
+            report=_print_result,
+        )
+    except subprocess.CalledProcessError as e:
+        stderr = (e.stderr or b"").decode(errors="replace")[-800:]
+        print(f"ffmpeg failed: {' '.join(e.cmd[:6])} ...\n{stderr}", file=sys.stderr)
+        return 1
+
+    print()
+    for encoder in ("nvenc", "x264"):
+        chosen = profile["encoders"].get(encoder)
+        if chosen:
+            print(f"{encoder}: {chosen['settings']} at {chosen['fps']} fps")
+        elif encoder == "x264" or nvenc:
+            print(f"{encoder}: no combination met the targets; keeping defaults")
+
+    if args.dry_run:
+        return 0
+    path = save_profile(profile, args.output or profile_path())
+    print(f"\nProfile written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Tests for the per-process binary/capability registry.
+"""
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.binary_registry import BinaryRegistry, _parse_listing
+
+ENCODERS = """Encoders:
+ V..... = Video
+ A..... = Audio
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+
+def _fake_bin(path, mtime=None):
+    path.write_text("")
+    if mtime:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def _app(tmp_path, **config):
+    return SimpleNamespace(root_path=str(tmp_path / "app"), config=config)
+
+
+def test_parse_listing_skips_legend():
+    assert _parse_listing(ENCODERS) == {"libx264", "h264_nvenc", "aac"}
+
+
+def test_capabilities_listed_once_and_refreshed_on_mtime_change(tmp_path):
+    registry = BinaryRegistry()
+    ffmpeg = _fake_bin(tmp_path / "ffmpeg", mtime=1_000_000)
+    run = MagicMock(return_value=MagicMock(stdout=ENCODERS))
+
+    with patch("subprocess.run", run):
+        assert registry.has_encoder(ffmpeg, "h264_nvenc")
+        assert registry.has_encoder(ffmpeg, "libx264")
+        assert run.call_count == 1
+
+        key = registry.cache_key(ffmpeg)
+        os.utime(ffmpeg, (2_000_000, 2_000_000))  # binary replaced in place
+        assert registry.cache_key(ffmpeg) != key
+        assert registry.has_encoder(ffmpeg, "aac")
+        assert run.call_count == 2
+
+        registry.invalidate()
+        assert registry.has_encoder(ffmpeg, "aac")
+        assert run.call_count == 3
+
+
+def test_gpu_context_resolution_is_cached(tmp_path, monkeypatch):
+    registry = BinaryRegistry()
+    os.makedirs(tmp_path / "bin")
+    local = _fake_bin(tmp_path / "bin" / "ffmpeg")
+    monkeypatch.setenv("USE_GPU_QUEUE", "1")
+    monkeypatch.delenv("PREFER_SYSTEM_FFMPEG", raising=False)
+    run = MagicMock(return_value=MagicMock(stdout=ENCODERS))
+
+    with patch("subprocess.run", run):
+        assert registry.resolve(_app(tmp_path), "ffmpeg") == local
+        calls = run.call_count
+        for _ in range(5):
+            assert registry.resolve(_app(tmp_path), "ffmpeg") == local
+        assert run.call_count == calls
+
+    # Config overrides and non-ffmpeg tools never list capabilities
+    assert registry.resolve(_app(tmp_path, FFPROBE_BINARY="/x/ffprobe"), "ffprobe") == (
+        "/x/ffprobe"
+    )
+    assert registry.resolve(_app(tmp_path), "yt-dlp") == "yt-dlp"
+
+
+def test_snapshot_reports_probed_capabilities(tmp_path):
+    registry = BinaryRegistry()
+    ffmpeg = _fake_bin(tmp_path / "ffmpeg")
+    with patch("subprocess.run", return_value=MagicMock(stdout=ENCODERS)):
+        registry.has_encoder(ffmpeg, "h264_nvenc")
+
+    entry = registry.snapshot()["binaries"][ffmpeg]
+    assert entry["encoders"] == ["aac", "h264_nvenc", "libx264"]
+    assert entry["real_path"] == os.path.realpath(ffmpeg)
+    assert "hwaccels" not in entry
+
+
+def test_cached_snapshot_serves_warm_result_without_running_binaries(tmp_path):
+    registry = BinaryRegistry()
+    ffmpeg = _fake_bin(tmp_path / "ffmpeg")
+    app = _app(tmp_path, FFMPEG_BINARY=ffmpeg)
+    with patch("subprocess.run", return_value=MagicMock(stdout=ENCODERS)):
+        registry.warm(app)
+
+    with patch("subprocess.run", side_effect=AssertionError("ran a binary")):
+        snap = registry.cached_snapshot()
+        assert snap["binaries"]["ffmpeg"]["encoders"] == [
+            "aac",
+            "h264_nvenc",
+            "libx264",
+        ]
+        # A refresh drops the warm snapshot until the next warm()
+        registry.invalidate()
+        assert registry.cached_snapshot()["binaries"] == {}
@@ -0,0 +1,145 @@
+"""
+Tests for the chunked, resumable compilation upload.
+"""
+import hashlib
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from app.tasks import worker_api
+from app.tasks.compilation_upload import (
+    CompilationUpload,
+    UploadUnsupported,
+    stream_upload_enabled,
+)
+
+
+class FakeServer:
+    """In-memory stand-in for the chunk endpoints."""
+
+    def __init__(self, fail_after_store: int = 0):
+        self.parts: dict[str, bytearray] = {}
+        self.puts: list[tuple[int, int]] = []
+        self.fail_after_store = fail_after_store
+        self.committed = None
+
+    def put(self, project_id, upload_id, offset, data):
+        stored = self.parts.setdefault(upload_id, bytearray())
+        if offset != len(stored):
+            return {"error": "Offset does not match stored size", "offset": len(stored)}
+        stored.extend(data)
+        self.puts.append((offset, len(data)))
+        if self.fail_after_store:
+            # The chunk is stored but the response never arrives
+            self.fail_after_store -= 1
+            raise requests.ConnectionError("connection reset")
+        return {"status": "stored", "offset": len(stored)}
+
+    def offset(self, project_id, upload_id):
+        return len(self.parts.get(upload_id, b""))
+
+    def abort(self, project_id, upload_id):
+        self.parts.pop(upload_id, None)
+
+    def commit(self, project_id, upload_id, sha256, thumbnail_path=None, metadata=None):
+        data = bytes(self.parts.get(upload_id, b""))
+        if hashlib.sha256(data).hexdigest() != sha256:
+            self.parts.pop(upload_id, None)
+            response = MagicMock(status_code=409)
+            raise requests.HTTPError("409 Conflict", response=response)
+        self.committed = (data, metadata)
+        return {"status": "uploaded", "media_id": 1, "file_path": "/srv/final.mp4"}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeServer()
+    monkeypatch.setattr(worker_api, "put_compilation_chunk", fake.put)
+    monkeypatch.setattr(worker_api, "get_compilation_upload_offset", fake.offset)
+    monkeypatch.setattr(worker_api, "abort_compilation_upload", fake.abort)
+    monkeypatch.setattr(worker_api, "commit_compilation_upload", fake.commit)
+    return fake
+
+
+def test_chunked_upload_resumes_from_server_offset(server, tmp_path):
+    path = tmp_path / "out.mp4"
+    body = bytes(range(256)) * 40
+    path.write_bytes(body)
+    server.fail_after_store = 1
+
+    upload = CompilationUpload(7, chunk_size=1000, retry_backoff=0)
+    result = upload.finish(str(path), metadata={"filename": "out.mp4"})
+
+    assert result["media_id"] == 1
+    assert server.committed[0] == body
+    assert server.committed[1]["file_size"] == len(body)
+    # The chunk whose response was lost is not sent twice
+    assert [offset for offset, _ in server.puts] == list(range(0, len(body), 1000))
+
+
+def test_streams_while_the_file_is_written(server, tmp_path):
+    path = tmp_path / "out.mp4"
+    upload = CompilationUpload(7, chunk_size=100, poll_interval=0.001)
+    upload.start_streaming(str(path))
+
+    with open(path, "wb") as f:
+        for i in range(10):
+            f.write(bytes([i]) * 150)
+            f.flush()
+            deadline = time.time() + 2
+            while upload.offset < (i + 1) * 150 // 100 * 100 and time.time() < deadline:
+                time.sleep(0.001)
+    upload.writer_finished()
+    upload.finish(str(path))
+
+    assert server.committed[0] == path.read_bytes()
+    assert upload.streamed_bytes >= 1300
+    # Only whole chunks are sent until the writer is done
+    assert all(size == 100 for _, size in server.puts[:-1])
+
+
+def test_checksum_mismatch_reuploads_finished_file(server, tmp_path):
+    path = tmp_path / "out.mp4"
+    path.write_bytes(b"a" * 500)
+    upload = CompilationUpload(7, chunk_size=200)
+    upload._pump(str(path), live=False)
+    # The muxer rewrote the start of the file after it was sent
+    path.write_bytes(b"b" * 500)
+
+    upload.finish(str(path))
+    assert server.committed[0] == b"b" * 500
+
+
+def test_unsupported_server_is_reported(monkeypatch, tmp_path):
+    path = tmp_path / "out.mp4"
+    path.write_bytes(b"x" * 10)
+
+    def _missing(*args, **kwargs):
+        raise requests.HTTPError("404", response=MagicMock(status_code=404))
+
+    monkeypatch.setattr(worker_api, "put_compilation_chunk", _missing)
+    with pytest.raises(UploadUnsupported):
+        CompilationUpload(7).finish(str(path))
+
+
+def test_cancel_streaming_discards_partial_upload(server, tmp_path):
+    path = tmp_path / "out.mp4"
+    path.write_bytes(b"z" * 300)
+    upload = CompilationUpload(7, chunk_size=100, poll_interval=0.001)
+    first_id = upload.upload_id
+    upload.start_streaming(str(path))
+    deadline = time.time() + 2
+    while upload.offset < 300 and time.time() < deadline:
+        time.sleep(0.001)
+
+    upload.cancel_streaming()
+    assert first_id not in server.parts
+    assert upload.upload_id != first_id and upload.offset == 0
+
+
+def test_stream_upload_is_opt_in():
+    # Streaming delivers a fragmented MP4, so it stays off unless requested
+    assert stream_upload_enabled({}) is False
+    assert stream_upload_enabled({"COMPILE_STREAM_UPLOAD": "true"}) is True
@@ -0,0 +1,92 @@
+"""
+Tests for durable, resumable compile checkpoints.
+"""
+import os
+import time
+from types import SimpleNamespace
+
+from app.tasks.compile_checkpoint import (
+    CompileCheckpoint,
+    checkpoint_key,
+    collect_stale,
+    open_checkpoint,
+)
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def test_key_ignores_private_project_keys():
+    project = {"id": 1, "output_resolution": "1920x1080"}
+    clips = [{"id": 5, "start_time": 1.0}]
+    params = {"intro_id": None}
+    key = checkpoint_key(project, clips, {}, params)
+
+    with_runtime = {**project, "_progress": object()}
+    assert checkpoint_key(with_runtime, clips, {}, params) == key
+    retrimmed = [{"id": 5, "start_time": 2.0}]
+    assert checkpoint_key(project, retrimmed, {}, params) != key
+    assert checkpoint_key(project, clips, {}, {"intro_id": 9}) != key
+
+
+def test_record_and_resume_across_instances(tmp_path):
+    root = str(tmp_path / "ckpt")
+    first = CompileCheckpoint(root, "abc")
+    clip = _write(os.path.join(first.work_dir, "clip_1_processed.mp4"), 50)
+    first.record("clip:1", clip)
+    first.record("timeline", [clip], ["clip_1_processed.mp4"])
+
+    # A new task (after a worker restart) sees the same completed stages
+    second = CompileCheckpoint(root, "abc")
+    assert second.get_path("clip:1") == clip
+    assert second.get("timeline", ["clip_1_processed.mp4"]) == [clip]
+    # Different inputs: the stage has to be redone
+    assert second.get("timeline", ["clip_2_processed.mp4"]) is None
+
+    # Truncated or missing outputs don't count as complete
+    _write(clip, 10)
+    assert second.get_path("clip:1") is None
+
+
+def test_outputs_outside_checkpoint_are_not_recorded(tmp_path):
+    ckpt = CompileCheckpoint(str(tmp_path / "ckpt"), "abc")
+    outside = _write(str(tmp_path / "static.mp4"), 10)
+    ckpt.record("timeline", [outside])
+    assert ckpt.stages == []
+
+
+def test_lock_excludes_concurrent_task_and_gc(tmp_path):
+    app = SimpleNamespace(config={"COMPILE_CHECKPOINT_DIR": str(tmp_path)})
+    held = open_checkpoint(app, "abc")
+    assert held is not None
+    assert open_checkpoint(app, "abc") is None
+
+    # Locked checkpoints survive garbage collection even when stale
+    old = time.time() - 7200
+    os.utime(held.work_dir, (old, old))
+    assert collect_stale(str(tmp_path), 3600) == 0
+
+    held.release()
+    assert collect_stale(str(tmp_path), 3600) == 1
+    assert not os.path.exists(held.work_dir)
+
+
+def test_discard_removes_directory(tmp_path):
+    app = SimpleNamespace(config={"COMPILE_CHECKPOINT_DIR": str(tmp_path)})
+    ckpt = open_checkpoint(app, "abc")
+    ckpt.discard()
+    assert not os.path.exists(ckpt.work_dir)
+    assert open_checkpoint(app, "abc") is not None
+
+
+def test_disabled_returns_none(tmp_path):
+    app = SimpleNamespace(
+        config={
+            "COMPILE_CHECKPOINT_ENABLED": False,
+            "COMPILE_CHECKPOINT_DIR": str(tmp_path),
+        }
+    )
+    assert open_checkpoint(app, "abc") is None
@@ -0,0 +1,204 @@
+"""
+Tests for distributed (chord-based) compilation.
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.tasks import compile_distributed as cd
+
+
+def test_plan_chunks_thresholds():
+    clips = [{"id": i} for i in range(10)]
+
+    assert cd.plan_chunks({"COMPILE_DISTRIBUTED_MIN_CLIPS": 0}, clips) == []
+    assert cd.plan_chunks({"COMPILE_DISTRIBUTED_MIN_CLIPS": 20}, clips) == []
+    # A single chunk gains nothing from fanning out
+    config = {"COMPILE_DISTRIBUTED_MIN_CLIPS": 5, "COMPILE_DISTRIBUTED_CHUNK_SIZE": 10}
+    assert cd.plan_chunks(config, clips) == []
+
+    config["COMPILE_DISTRIBUTED_CHUNK_SIZE"] = 4
+    chunks = cd.plan_chunks(config, clips)
+    assert [[c["id"] for c in chunk] for chunk in chunks] == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8, 9],
+    ]
+
+
+def test_shared_segment_store_roundtrip(tmp_path):
+    store = cd.SegmentStore({"COMPILE_DISTRIBUTED_SHARED_DIR": str(tmp_path)}, 42)
+    src = tmp_path / "render.mp4"
+    src.write_bytes(b"x" * 10)
+
+    assert store.has("clip_1.mp4") is False
+    assert store.put("clip_1.mp4", str(src)) == 1
+    assert store.put("clip_2.mp4", str(src)) == 2
+    assert store.has("clip_1.mp4") is True
+    assert os.path.getsize(store.fetch("clip_1.mp4", str(tmp_path))) == 10
+
+    for bad in ("../escape.mp4", "..", ".", "clip_1.mp4.part", "other.mp4"):
+        with pytest.raises(ValueError):
+            store.put(bad, str(src))
+
+    store.clear()
+    assert not os.path.exists(os.path.join(str(tmp_path), "42"))
+
+
+def test_render_chunk_stores_segments_and_isolates_failures(app, tmp_path):
+    app.config["COMPILE_DISTRIBUTED_SHARED_DIR"] = str(tmp_path / "shared")
+    clips = [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    # Clip 1 survived an earlier, interrupted attempt
+    store = cd.SegmentStore(app.config, 9)
+    done = tmp_path / "done.mp4"
+    done.write_bytes(b"d")
+    store.put("clip_1.mp4", str(done))
+
+    def fake_render(todo, temp_dir, project_data, tier_limits, **kwargs):
+        for i, clip in enumerate(todo):
+            if clip["id"] == 3:
+                kwargs["on_done"](i, i + 1, None, RuntimeError("bad input"))
+                continue
+            path = os.path.join(temp_dir, f"clip_{clip['id']}_processed.mp4")
+            with open(path, "wb") as f:
+                f.write(b"r")
+            kwargs["on_done"](i, i + 1, path, None)
+
+    with patch.object(cd, "_get_app", return_value=app), patch.object(
+        cd, "_render_clips_v2", side_effect=fake_render
+    ) as render, patch.object(
+        cd, "_clip_render_concurrency", return_value=1
+    ), patch.object(
+        cd, "resolve_binary", return_value="ffmpeg"
+    ), patch.object(
+        cd.worker_api, "update_processing_job"
+    ), patch.object(
+        cd.worker_api, "append_job_logs"
+    ), patch.object(
+        cd.render_chunk_task, "update_state"
+    ):
+        result = cd.render_chunk_task.run("coord", 9, {"id": 1}, {}, clips, 0, 3)
+
+    assert [c["id"] for c in render.call_args[0][0]] == [2, 3]
+    assert result == {
+        "chunk": 0,
+        "clips": [
+            {"id": 1, "segment": "clip_1.mp4", "error": None},
+            {"id": 2, "segment": "clip_2.mp4", "error": None},
+            {"id": 3, "segment": None, "error": "bad input"},
+        ],
+    }
+    assert store.has("clip_2.mp4")
+
+
+def test_merge_collects_segments_in_timeline_order(app, tmp_path):
+    app.config["COMPILE_DISTRIBUTED_SHARED_DIR"] = str(tmp_path / "shared")
+    app.config["COMPILE_CHECKPOINT_DIR"] = str(tmp_path / "ckpt")
+    store = cd.SegmentStore(app.config, 5)
+    src = tmp_path / "seg.mp4"
+    src.write_bytes(b"s")
+    for cid in (1, 2, 4):
+        store.put(f"clip_{cid}.mp4", str(src))
+
+    clips = [{"id": i} for i in (1, 2, 3, 4)]
+    chunk_results = [
+        {
+            "chunk": 1,
+            "clips": [
+                {"id": 3, "segment": None, "error": "boom"},
+                {"id": 4, "segment": "clip_4.mp4", "error": None},
+            ],
+        },
+        {
+            "chunk": 0,
+            "clips": [
+                {"id": 1, "segment": "clip_1.mp4", "error": None},
+                {"id": 2, "segment": "clip_2.mp4", "error": None},
+            ],
+        },
+    ]
+
+    with patch.object(cd, "_get_app", return_value=app), patch.object(
+        cd, "_finish_compilation_v2", return_value={"status": "completed"}
+    ) as finish, patch.object(cd.worker_api, "update_processing_job"), patch.object(
+        cd.worker_api, "append_job_logs"
+    ), patch.object(
+        cd.merge_compilation_task, "update_state"
+    ):
+        result = cd.merge_compilation_task.run(
+            chunk_results, 5, 77, {"id": 77, "user_id": 1}, {}, clips, {}
+        )
+
+    assert result == {"status": "completed"}
+    processed, used = finish.call_args[0][4], finish.call_args[0][5]
+    assert used == [1, 2, 4]
+    assert [os.path.basename(p) for p in processed] == [
+        "clip_1.mp4",
+        "clip_2.mp4",
+        "clip_4.mp4",
+    ]
+    # Segments are dropped once the compilation is delivered
+    assert not store.has("clip_1.mp4")
+
+
+def test_failed_merge_clears_segments(app, tmp_path):
+    app.config["COMPILE_DISTRIBUTED_SHARED_DIR"] = str(tmp_path / "shared")
+    app.config["COMPILE_CHECKPOINT_DIR"] = str(tmp_path / "ckpt")
+    store = cd.SegmentStore(app.config, 6)
+    src = tmp_path / "seg.mp4"
+    src.write_bytes(b"s")
+    store.put("clip_1.mp4", str(src))
+    chunk_results = [{"clips": [{"id": 1, "segment": "clip_1.mp4", "error": None}]}]
+
+    with patch.object(cd, "_get_app", return_value=app), patch.object(
+        cd, "_finish_compilation_v2", side_effect=RuntimeError("concat failed")
+    ), patch.object(cd.worker_api, "update_processing_job"), patch.object(
+        cd.worker_api, "update_project_status"
+    ), patch.object(
+        cd.worker_api, "append_job_logs"
+    ), patch.object(
+        cd.merge_compilation_task, "update_state"
+    ):
+        with pytest.raises(RuntimeError):
+            cd.merge_compilation_task.run(
+                chunk_results, 6, 77, {"id": 77, "user_id": 1}, {}, [{"id": 1}], {}
+            )
+
+    assert not store.has("clip_1.mp4")
+
+
+def test_dispatch_replaces_task_with_render_chord(app):
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    app.config["COMPILE_DISTRIBUTED_QUEUE"] = "cpu"
+    task = SimpleNamespace(
+        request=SimpleNamespace(id="coord-id"),
+        replace=MagicMock(return_value="replaced"),
+    )
+    clips = [{"id": i} for i in range(3)]
+
+    with patch.object(cd, "_get_app", return_value=app), patch.object(
+        cd.worker_api, "update_processing_job"
+    ):
+        result = cd.dispatch_distributed(
+            task,
+            8,
+            77,
+            {"id": 77, "_progress": object()},
+            {},
+            clips,
+            [clips[:2], clips[2:]],
+            {"intro_id": None},
+            lambda *a, **k: None,
+        )
+
+    assert result == "replaced"
+    sig = task.replace.call_args[0][0]
+    assert [t.options.get("queue") for t in sig.tasks] == ["cpu", "cpu"]
+    assert sig.tasks[0].args[0] == "coord-id"
+    assert sig.body.task == "tasks.compile_merge"
+    # Per-run objects are not sent to other workers
+    assert sig.body.args[2] == {"id": 77}
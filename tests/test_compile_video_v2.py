@@ -4,6 +4,7 @@ Tests for Phase 4 worker API endpoints (compile_video_task migration).
 These tests validate the batch endpoints that efficiently provide compilation
 data to workers without requiring N+1 database queries.
 """
+import os
 
 
 def test_get_compilation_context(client, test_user, test_project, test_clip):
@@ -42,6 +43,8 @@ def test_get_compilation_context(client, test_user, test_project, test_clip):
     assert "max_res_label" in tier
     assert "max_fps" in tier
     assert "max_clips" in tier
+    assert "render_engine" in tier
+    assert data["project"]["render_engine"] is None
 
 
 def test_get_compilation_context_not_found(client):
@@ -113,3 +116,415 @@ def test_get_media_batch_missing_user_id(client):
 
     assert response.status_code == 400
     assert "error" in response.json
+
+
+def test_render_clips_parallel_keeps_timeline_order():
+    """Parallel clip rendering returns paths in timeline order and isolates failures."""
+    import time
+    from unittest.mock import patch
+
+    from app.tasks import compile_video_v2 as cv2
+
+    clips = [{"id": i} for i in range(1, 7)]
+
+    def fake_process(clip, temp_dir, project_data, tier_limits):
+        # Earlier clips finish last so completion order differs from timeline order
+        time.sleep(0.01 * (7 - clip["id"]))
+        if clip["id"] == 3:
+            raise RuntimeError("ffmpeg exploded")
+        return f"/tmp/clip_{clip['id']}_processed.mp4"
+
+    started, finished = [], []
+    with patch.object(cv2, "_process_clip_v2", side_effect=fake_process):
+        results = cv2._render_clips_v2(
+            clips,
+            "/tmp",
+            {},
+            {},
+            max_workers=3,
+            on_start=lambda i, done: started.append(i),
+            on_done=lambda i, done, path, err: finished.append((i, done, err)),
+        )
+
+    assert results == [
+        "/tmp/clip_1_processed.mp4",
+        "/tmp/clip_2_processed.mp4",
+        None,
+        "/tmp/clip_4_processed.mp4",
+        "/tmp/clip_5_processed.mp4",
+        "/tmp/clip_6_processed.mp4",
+    ]
+    assert sorted(started) == list(range(6))
+    assert [done for _, done, _ in finished] == [1, 2, 3, 4, 5, 6]
+    errors = [i for i, _, err in finished if err is not None]
+    assert errors == [2]
+
+
+def test_render_clips_resumes_from_checkpoint(tmp_path):
+    """Clips recorded by an interrupted run are reused, new renders recorded."""
+    from unittest.mock import patch
+
+    from app.tasks import compile_video_v2 as cv2
+    from app.tasks.compile_checkpoint import CompileCheckpoint
+
+    ckpt = CompileCheckpoint(str(tmp_path), "abc")
+    done_path = os.path.join(ckpt.work_dir, "clip_1_processed.mp4")
+    with open(done_path, "wb") as f:
+        f.write(b"x" * 10)
+    ckpt.record("clip:1", done_path)
+
+    def fake_process(clip, temp_dir, project_data, tier_limits):
+        path = os.path.join(temp_dir, f"clip_{clip['id']}_processed.mp4")
+        with open(path, "wb") as f:
+            f.write(b"y" * 10)
+        return path
+
+    with patch.object(cv2, "_process_clip_v2", side_effect=fake_process) as proc:
+        results = cv2._render_clips_v2(
+            [{"id": 1}, {"id": 2}], ckpt.work_dir, {}, {}, checkpoint=ckpt
+        )
+
+    assert [c.args[0]["id"] for c in proc.call_args_list] == [2]
+    assert results[0] == done_path
+    assert CompileCheckpoint(str(tmp_path), "abc").get_path("clip:2") == results[1]
+
+
+def test_clip_render_concurrency_sizing():
+    """Pool size honours config, auto sizing and the NVENC session cap."""
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    from app.tasks import compile_video_v2 as cv2
+
+    app = SimpleNamespace(
+        config={"COMPILE_CLIP_CONCURRENCY": 1, "COMPILE_NVENC_MAX_SESSIONS": 2}
+    )
+    with patch.object(cv2, "detect_nvenc", return_value=(False, "")):
+        assert cv2._clip_render_concurrency(app, "ffmpeg", 40) == 1
+
+        app.config["COMPILE_CLIP_CONCURRENCY"] = 8
+        assert cv2._clip_render_concurrency(app, "ffmpeg", 40) == 8
+        # Never more workers than clips
+        assert cv2._clip_render_concurrency(app, "ffmpeg", 3) == 3
+
+        app.config["COMPILE_CLIP_CONCURRENCY"] = 0
+        with patch.object(cv2.os, "cpu_count", return_value=16):
+            assert cv2._clip_render_concurrency(app, "ffmpeg", 40) == 4
+
+    with patch.object(cv2, "detect_nvenc", return_value=(True, "ok")):
+        app.config["COMPILE_CLIP_CONCURRENCY"] = 8
+        assert cv2._clip_render_concurrency(app, "ffmpeg", 40) == 2
+
+
+def test_resolve_render_engine_precedence():
+    """Project overrides tier, tier overrides config; junk values fall through."""
+    from types import SimpleNamespace
+
+    from app.tasks import compile_video_v2 as cv2
+
+    app = SimpleNamespace(config={"COMPILE_RENDER_ENGINE": "single_pass"})
+    assert cv2._resolve_render_engine(app, {}, {}) == "single_pass"
+    assert (
+        cv2._resolve_render_engine(app, {}, {"render_engine": "multipass"})
+        == "multipass"
+    )
+    assert (
+        cv2._resolve_render_engine(
+            app, {"render_engine": "single-pass"}, {"render_engine": "multipass"}
+        )
+        == "single_pass"
+    )
+    assert (
+        cv2._resolve_render_engine(
+            SimpleNamespace(config={}), {"render_engine": "bogus"}, {}
+        )
+        == "multipass"
+    )
+
+
+def test_build_single_pass_cmd():
+    """Single-pass command mixes music and burns the watermark in one run."""
+    from app.tasks import compile_video_v2 as cv2
+
+    music = {
+        "path": "/m/music.mp3",
+        "has_audio_stream": True,
+        "start": 5.0,
+        "end": 60.0,
+        "file_duration": 20.0,
+        "volume": 0.3,
+        "threshold": 0.02,
+        "ratio": 20.0,
+        "attack": 1.0,
+        "release": 250.0,
+    }
+    watermark = {
+        "path": "/m/wm.png",
+        "opacity": 0.5,
+        "position": "top-left",
+        "size": 120,
+        "margin": 10,
+    }
+    cmd = cv2._build_single_pass_cmd(
+        "ffmpeg",
+        [],
+        "/t/concat.txt",
+        "/t/out.mp4",
+        music=music,
+        watermark=watermark,
+        video_encoder_args=["-c:v", "libx264"],
+    )
+
+    inputs = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-i"]
+    assert inputs == ["/t/concat.txt", "/m/music.mp3", "/m/wm.png"]
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "[1:a]aloop=loop=-1" in graph
+    assert "adelay=5000|5000" in graph
+    assert "sidechaincompress" in graph
+    assert "[2:v]scale=120:120" in graph
+    assert "overlay=10:10[vout]" in graph
+    maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"]
+    assert maps == ["[vout]", "[aout]"]
+    assert cmd[cmd.index("-c:v") + 1] == "libx264"
+    assert cmd[-1] == "/t/out.mp4"
+
+    # Without a watermark the video stream is copied and the music keeps input 1
+    cmd = cv2._build_single_pass_cmd(
+        "ffmpeg", [], "/t/concat.txt", "/t/out.mp4", music=music
+    )
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"] == [
+        "0:v",
+        "[aout]",
+    ]
+
+
+def test_segment_watermark_in_clip_and_asset_encodes(tmp_path):
+    """Per-segment watermark mode overlays the logo inside each segment encode."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock, patch
+
+    from app.tasks import compile_video_v2 as cv2
+
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(b"x")
+    watermark = {
+        "path": "/wm/logo.png",
+        "opacity": 0.4,
+        "position": "top-right",
+        "size": 96,
+        "margin": 10,
+        "fingerprint": "sha256:abc",
+    }
+    project_data = {
+        "id": 1,
+        "user_id": 1,
+        "output_resolution": "1080p",
+        "_segment_watermark": watermark,
+    }
+    app = SimpleNamespace(config={}, logger=MagicMock())
+    run = MagicMock()
+    with patch.object(cv2, "_get_app", return_value=app), patch.object(
+        cv2, "resolve_binary", return_value="ffmpeg"
+    ), patch.object(
+        cv2, "encoder_args", return_value=["-c:v", "libx264"]
+    ), patch.object(
+        cv2, "overlay_enabled", return_value=False
+    ), patch.object(
+        cv2, "get_segment_cache", return_value=None
+    ), patch.object(
+        cv2.subprocess, "run", run
+    ):
+        cv2._process_clip_v2(
+            {"id": 7, "media_file": {"id": 3, "file_path": str(src)}},
+            str(tmp_path),
+            project_data,
+            {},
+        )
+
+    cmd = run.call_args[0][0]
+    inputs = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-i"]
+    assert inputs == [str(src), "/wm/logo.png"]
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]scale=")
+    assert "[pre];[1:v]scale=96:96" in graph
+    assert "colorchannelmixer=aa=0.4" in graph
+    assert graph.endswith("[pre][wm]overlay=W-w-10:10[v]")
+    assert cmd[cmd.index("-map") + 1] == "[v]"
+
+    # Library assets get the same overlay after their scale chain
+    args = cv2._conform_video_args("scale=1920:1080", project_data)
+    assert args[:2] == ["-i", "/wm/logo.png"]
+    assert args[3] == (
+        "[0:v]scale=1920:1080[base];[1:v]scale=96:96,format=yuva420p,"
+        "colorchannelmixer=aa=0.4[wm];[base][wm]overlay=W-w-10:10[v]"
+    )
+    assert cv2._conform_video_args("scale=1920:1080", {}) == [
+        "-vf",
+        "scale=1920:1080",
+    ]
+
+
+def test_start_prefetch_queues_missing_inputs(tmp_path):
+    """Only inputs missing locally are downloaded; everything lands in the summary."""
+    from unittest.mock import MagicMock, patch
+
+    from app.tasks import compile_video_v2 as cv2
+
+    local = tmp_path / "local.mp4"
+    local.write_bytes(b"x")
+    clips = [
+        {"id": 1, "media_file": {"id": 11, "file_path": str(local)}},
+        {"id": 2, "media_file": {"id": 12, "file_path": "/missing/a.mp4"}},
+        {"id": 3, "media_file": {"id": 13, "file_path": "/missing/b.mp4"}},
+    ]
+    app = MagicMock()
+    app.config = {"COMPILE_PREFETCH_CONCURRENCY": 2}
+
+    pins = {}
+
+    def fake_download(media_id, user_id, cache_dir, stats=None, pin=None, pin_refs=1):
+        pins[media_id] = (pin, pin_refs)
+        stats.update(cache_hit=media_id == 13, bytes=2 * 1024 * 1024)
+        return f"/cache/media_{media_id}.mp4"
+
+    batch = {"media_files": [{"id": 21, "file_path": "/missing/music.mp3"}]}
+    with patch.object(
+        cv2, "_download_media_file", side_effect=fake_download
+    ), patch.object(
+        cv2.worker_api, "get_media_batch", return_value=batch
+    ), patch.object(
+        cv2, "overlay_enabled", return_value=False
+    ), patch.object(
+        cv2, "_resolve_static_bumper_path", return_value="/assets/static.mp4"
+    ):
+        prefetch = cv2._start_prefetch(
+            app,
+            {"user_id": 5, "_cache_pin": "compile-x"},
+            clips + [{"id": 4, "media_file": clips[1]["media_file"]}],
+            {21: "music"},
+            str(tmp_path),
+        )
+        try:
+            assert not prefetch.has(("media", 11))
+            assert prefetch.result(("media", 12)) == "/cache/media_12.mp4"
+            assert (
+                cv2._fetch_input_media({"_prefetch": prefetch}, 21, 5, "/unused")
+                == "/cache/media_21.mp4"
+            )
+            assert prefetch.result(("static",)) == "/assets/static.mp4"
+            prefetch.result(("media", 13))
+        finally:
+            prefetch.shutdown()
+
+    # Cached sources are pinned once per clip that uses them
+    assert pins == {
+        12: ("compile-x", 2),
+        13: ("compile-x", 1),
+        21: ("compile-x", 1),
+    }
+
+    lines = cv2._prefetch_summary(prefetch)
+    assert lines[0].startswith("Prefetch clip 2: 2.0 MB in ")
+    assert lines[1] == "Prefetch clip 3: cached"
+    assert lines[2].startswith("Prefetch music 21: 2.0 MB")
+    assert lines[3] == "Prefetch static bumper: ready"
+    assert lines[4].startswith("Prefetch total: 4.0 MB downloaded")
+
+    app.config = {"COMPILE_PREFETCH_CONCURRENCY": 0}
+    assert cv2._start_prefetch(app, {"user_id": 5}, clips, {}, str(tmp_path)) is None
+
+
+def test_gpu_filter_path_and_cpu_fallback(tmp_path):
+    """GPU workers decode/scale in CUDA memory and retry on CPU filters on failure."""
+    import subprocess
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock, patch
+
+    from app.tasks import compile_video_v2 as cv2
+
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(b"x")
+    app = SimpleNamespace(config={"COMPILE_STREAM_COPY": False}, logger=MagicMock())
+    run = MagicMock(
+        side_effect=[subprocess.CalledProcessError(1, "ffmpeg"), MagicMock()]
+    )
+    with patch.object(cv2, "_get_app", return_value=app), patch.object(
+        cv2, "resolve_binary", return_value="ffmpeg"
+    ), patch.object(cv2, "gpu_filters_enabled", return_value=True), patch.object(
+        cv2, "encoder_args", return_value=["-c:v", "h264_nvenc", "-pix_fmt", "yuv420p"]
+    ), patch.object(
+        cv2, "gpu_encoder_args", return_value=["-c:v", "h264_nvenc"]
+    ), patch.object(
+        cv2, "overlay_enabled", return_value=False
+    ), patch.object(
+        cv2, "get_segment_cache", return_value=None
+    ), patch.object(
+        cv2.subprocess, "run", run
+    ):
+        cv2._process_clip_v2(
+            {"id": 7, "media_file": {"id": 3, "file_path": str(src)}},
+            str(tmp_path),
+            {"id": 1, "user_id": 1, "output_resolution": "1080p"},
+            {},
+        )
+
+    gpu_cmd, cpu_cmd = (c[0][0] for c in run.call_args_list)
+    assert gpu_cmd[gpu_cmd.index("-hwaccel") + 1] == "cuda"
+    assert gpu_cmd[gpu_cmd.index("-filter_complex") + 1] == (
+        "[0:v]scale_cuda=1920:1080:format=yuv420p[v]"
+    )
+    assert "-pix_fmt" not in gpu_cmd
+
+    assert "-hwaccel" not in cpu_cmd
+    assert cpu_cmd[cpu_cmd.index("-filter_complex") + 1] == (
+        "[0:v]scale=1920:1080:flags=lanczos[v]"
+    )
+    assert cpu_cmd[cpu_cmd.index("-pix_fmt") + 1] == "yuv420p"
+
+
+def test_detect_gpu_filters_requires_cuda_hwaccel_and_scale_cuda(tmp_path):
+    """The capability probe is mocked so this runs on GPU-less machines."""
+    from unittest.mock import MagicMock, patch
+
+    from app import binary_registry, ffmpeg_config
+
+    ffmpeg_bin = tmp_path / "ffmpeg"
+    ffmpeg_bin.write_text("")
+
+    def fake_run(cmd, **kwargs):
+        if cmd[-1] == "-hwaccels":
+            return MagicMock(stdout="Hardware acceleration methods:\nvaapi\n")
+        return MagicMock(stdout="", returncode=0)
+
+    with patch.object(
+        binary_registry, "_REGISTRY", binary_registry.BinaryRegistry()
+    ), patch.object(ffmpeg_config, "_GPU_FILTER_CACHE", {}), patch.object(
+        ffmpeg_config, "_detect_nvenc", return_value=True
+    ), patch(
+        "subprocess.run", side_effect=fake_run
+    ):
+        assert ffmpeg_config.detect_gpu_filters(str(ffmpeg_bin)) == (
+            False,
+            "cuda hwaccel not listed by ffmpeg",
+        )
+
+    def fake_run_ok(cmd, **kwargs):
+        if cmd[-1] == "-hwaccels":
+            return MagicMock(stdout="Hardware acceleration methods:\ncuda\n")
+        if cmd[-1] == "-filters":
+            return MagicMock(stdout=" ... scale_cuda  V->V  GPU resizer\n")
+        return MagicMock(stdout="", returncode=0)
+
+    app = MagicMock(config={"COMPILE_GPU_FILTERS": "auto"})
+    with patch.object(
+        binary_registry, "_REGISTRY", binary_registry.BinaryRegistry()
+    ), patch.object(ffmpeg_config, "_GPU_FILTER_CACHE", {}), patch.object(
+        ffmpeg_config, "_detect_nvenc", return_value=True
+    ), patch(
+        "subprocess.run", side_effect=fake_run_ok
+    ):
+        assert ffmpeg_config.detect_gpu_filters(str(ffmpeg_bin)) == (True, "ok")
+        assert ffmpeg_config.gpu_filters_enabled(app, str(ffmpeg_bin))
+        app.config["COMPILE_GPU_FILTERS"] = "false"
+        assert not ffmpeg_config.gpu_filters_enabled(app, str(ffmpeg_bin))
@@ -1,11 +1,15 @@
 """
 Tests for Phase 3: Worker API endpoints for download_clip_task_v2.
-Tests the /api/worker/media endpoints: find-reusable and media creation.
+Tests the /api/worker/media endpoints (find-reusable, media creation), the
+batch download endpoints and download_clips_batch_task_v2.
 """
 
+from unittest.mock import patch
+
 import pytest
 
 from app.models import Clip, MediaFile, db
+from app.tasks import download_clip_v2
 
 
 class TestWorkerDownloadEndpoints:
@@ -64,6 +68,89 @@ class TestWorkerDownloadEndpoints:
         result = response.get_json()
         assert result["found"] is False
 
+    def test_find_reusable_media_batch(
+        self,
+        app,
+        client,
+        worker_headers,
+        test_user,
+        test_clip,
+        test_media_file,
+        tmp_path,
+    ):
+        """POST /api/worker/media/find-reusable/batch matches by clip key."""
+        video = tmp_path / "reused.mp4"
+        video.write_bytes(b"v")
+        media = db.session.get(MediaFile, test_media_file)
+        media.file_path = str(video)
+        clip = db.session.get(Clip, test_clip)
+        clip.source_url = "https://clips.twitch.tv/ReusedSlug"
+        clip.media_file_id = test_media_file
+        db.session.commit()
+
+        response = client.post(
+            "/api/worker/media/find-reusable/batch",
+            headers=worker_headers,
+            json={
+                "user_id": test_user,
+                "source_urls": [
+                    "https://www.twitch.tv/someone/clip/reusedslug?filter=clips",
+                    "https://example.com/never-downloaded",
+                ],
+            },
+        )
+        assert response.status_code == 200
+        found, missing = response.get_json()["results"]
+        assert found["found"] is True
+        assert found["media_file_id"] == test_media_file
+        assert found["reused_from_clip_id"] == test_clip
+        assert missing == {"found": False}
+
+        # Media whose file is gone is not reused
+        video.unlink()
+        response = client.post(
+            "/api/worker/media/find-reusable/batch",
+            headers=worker_headers,
+            json={"user_id": test_user, "source_urls": ["clips.twitch.tv/reusedslug"]},
+        )
+        assert response.get_json()["results"] == [{"found": False}]
+
+    def test_enrich_clips_batch(self, client, worker_headers, test_clip):
+        """POST /api/worker/clips/enrich-batch uses one bulk Twitch lookup."""
+        from app.integrations.twitch import Clip as TwitchClip
+
+        clip = db.session.get(Clip, test_clip)
+        clip.source_url = "https://www.twitch.tv/someone/clip/BulkSlug"
+        db.session.commit()
+
+        twitch_clip = TwitchClip(
+            id="BulkSlug",
+            url="https://clips.twitch.tv/BulkSlug",
+            title="Bulk",
+            created_at="2025-01-02T03:04:05Z",
+            duration=20.0,
+            view_count=3,
+            thumbnail_url="",
+            creator_name="someone",
+            creator_id="42",
+            game_name="Chess",
+        )
+        with patch(
+            "app.integrations.twitch.get_clips_by_ids",
+            return_value={"BulkSlug": twitch_clip},
+        ) as lookup, patch("app.api.worker._download_creator_avatar"):
+            response = client.post(
+                "/api/worker/clips/enrich-batch",
+                headers=worker_headers,
+                json={"clip_ids": [test_clip]},
+            )
+
+        assert response.status_code == 200
+        assert response.get_json()["enriched"] == [test_clip]
+        assert list(lookup.call_args[0][0]) == ["BulkSlug"]
+        clip = db.session.get(Clip, test_clip)
+        assert (clip.creator_name, clip.game_name) == ("someone", "Chess")
+
     def test_create_media_file(self, client, worker_headers, test_user, test_project):
         """POST /api/worker/media creates new media file."""
         data = {
@@ -86,6 +173,134 @@ class TestWorkerDownloadEndpoints:
         assert result["status"] == "created"
         assert "media_id" in result
 
+    def test_download_context(
+        self, client, worker_headers, test_user, test_project, test_clip
+    ):
+        """POST /api/worker/clips/download-context covers many clips at once."""
+        response = client.post(
+            "/api/worker/clips/download-context",
+            headers=worker_headers,
+            json={"clip_ids": [test_clip, 999999]},
+        )
+        assert response.status_code == 200
+        result = response.get_json()
+        assert [c["id"] for c in result["clips"]] == [test_clip]
+        clip = result["clips"][0]
+        assert clip["project_id"] == test_project
+        assert clip["user_id"] == test_user
+        assert clip["reuse"] == {"found": False}
+        assert result["missing"] == [999999]
+        assert "remaining_bytes" in result["quota"][str(test_user)]
+
+        response = client.post(
+            "/api/worker/clips/download-context",
+            headers=worker_headers,
+            json={"clip_ids": "1,2"},
+        )
+        assert response.status_code == 400
+
+    def test_clip_status_batch(
+        self, client, worker_headers, test_clip, test_media_file
+    ):
+        """POST /api/worker/clips/status-batch updates several clips in one call."""
+        response = client.post(
+            "/api/worker/clips/status-batch",
+            headers=worker_headers,
+            json={
+                "updates": [
+                    {
+                        "clip_id": test_clip,
+                        "is_downloaded": True,
+                        "media_file_id": test_media_file,
+                        "duration": 12.5,
+                    },
+                    {"clip_id": 999999, "is_downloaded": True},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result["updated"] == [test_clip]
+        assert result["missing"] == [999999]
+
+        clip = db.session.get(Clip, test_clip)
+        assert clip.is_downloaded is True
+        assert clip.media_file_id == test_media_file
+        assert clip.duration == 12.5
+
+
+def test_batch_download_isolates_failing_clips(monkeypatch):
+    """One failing clip is recorded without failing the rest of the batch."""
+    from app.tasks import worker_api
+
+    def meta(clip_id, reuse=None):
+        return {
+            "id": clip_id,
+            "title": f"Clip {clip_id}",
+            "project_id": 5,
+            "user_id": 7,
+            "reuse": reuse or {"found": False},
+        }
+
+    context = {
+        "clips": [
+            meta(1, {"found": True, "media_file_id": 40, "duration": 9.0}),
+            meta(2),
+            meta(3),
+        ],
+        "missing": [4],
+        "quota": {"7": {"remaining_bytes": 1000}},
+    }
+    budgets = []
+
+    def fake_fetch(clip_id, url, clip_meta, max_bytes, log, progress=None):
+        budgets.append(max_bytes)
+        if clip_id == 3:
+            raise RuntimeError("yt-dlp failed")
+        return {"media_id": 50 + clip_id, "file_path": "/srv/x.mp4", "file_size": 300}
+
+    monkeypatch.setenv("DOWNLOAD_BATCH_CONCURRENCY", "1")
+    with patch.object(
+        worker_api, "get_download_context", return_value=context
+    ) as get_context, patch.object(
+        worker_api, "create_processing_job", return_value={"job_id": 11}
+    ), patch.object(
+        worker_api, "update_clip_statuses"
+    ) as statuses, patch.object(
+        worker_api, "enrich_clips_metadata"
+    ) as enrich, patch.object(
+        worker_api, "update_processing_job"
+    ) as update_job, patch.object(
+        worker_api, "append_job_logs"
+    ), patch.object(
+        download_clip_v2, "_fetch_and_upload", side_effect=fake_fetch
+    ), patch.object(
+        download_clip_v2.download_clips_batch_task_v2, "update_state"
+    ):
+        result = download_clip_v2.download_clips_batch_task_v2.run(
+            [[1, "https://clips.twitch.tv/a"], [2, "u2"], [3, "u3"], [4, "u4"]]
+        )
+
+    get_context.assert_called_once_with([1, 2, 3, 4])
+    statuses.assert_called_once_with(
+        [{"clip_id": 1, "is_downloaded": True, "media_file_id": 40, "duration": 9.0}]
+    )
+    enrich.assert_called_once_with([1])
+    assert result["clips"]["1"]["status"] == "reused"
+    assert result["clips"]["2"] == {
+        "status": "completed",
+        "media_file_id": 52,
+        "downloaded_file": "/srv/x.mp4",
+    }
+    assert result["clips"]["3"]["status"] == "failed"
+    assert result["clips"]["4"] == {"status": "failed", "error": "Clip not found"}
+    assert (result["downloaded"], result["reused"], result["failed"]) == (1, 1, 2)
+    # Both downloads draw on the same remaining quota
+    assert budgets == [1000, 700]
+    final = update_job.call_args_list[-1]
+    assert final.kwargs["status"] == "success"
+    assert final.kwargs["result_data"]["failed"] == 2
+
 
 @pytest.fixture
 def worker_api_key(app):
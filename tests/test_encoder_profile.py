@@ -0,0 +1,104 @@
+"""
+Tests for per-host encoder calibration profiles.
+"""
+from app import encoder_profile, ffmpeg_config
+from app.encoder_profile import (
+    candidate_matrix,
+    load_profile,
+    parse_bitrate,
+    save_profile,
+    select_best,
+)
+
+
+def _result(encoder, preset, fps, bitrate, ssim, ok=True):
+    return {
+        "encoder": encoder,
+        "settings": {"preset": preset},
+        "ok": ok,
+        "fps": fps,
+        "bitrate": bitrate,
+        "ssim": ssim,
+    }
+
+
+def test_parse_bitrate():
+    assert parse_bitrate("12M") == 12e6
+    assert parse_bitrate("800k") == 800e3
+    assert parse_bitrate(0) == 0
+
+
+def test_select_best_prefers_fastest_passing_result():
+    results = [
+        _result("x264", "ultrafast", 400, 30e6, 0.99),  # over the bitrate cap
+        _result("x264", "veryfast", 250, 9e6, 0.96),  # under the SSIM target
+        _result("x264", "faster", 180, 10e6, 0.975),
+        _result("x264", "fast", 120, 9e6, 0.98),
+        _result("x264", "broken", 999, 1, 1.0, ok=False),
+    ]
+    best = select_best(results, min_ssim=0.97, max_bitrate=12e6)
+    assert best["settings"] == {"preset": "faster"}
+    assert select_best(results, min_ssim=0.999, max_bitrate=12e6) is None
+
+
+def test_candidate_matrix_only_tries_nvenc_when_available():
+    assert {enc for enc, _ in candidate_matrix(False, cpu_count=8)} == {"x264"}
+    with_gpu = candidate_matrix(True, cpu_count=8)
+    assert ("nvenc", {"preset": "p1", "rc_lookahead": 8}) in with_gpu
+    assert ("x264", {"preset": "fast", "threads": 4}) in with_gpu
+
+
+def test_encoder_args_use_saved_profile(tmp_path, monkeypatch):
+    path = str(tmp_path / "host.json")
+    monkeypatch.setenv("ENCODER_PROFILE_PATH", path)
+    monkeypatch.delenv("FFMPEG_NVENC_PRESET", raising=False)
+
+    # No profile: built-in defaults
+    assert ffmpeg_config.cpu_encoder_args()[3] == "medium"
+
+    save_profile(
+        {
+            "version": 1,
+            "encoders": {
+                "nvenc": {"settings": {"preset": "p3", "rc_lookahead": 8}},
+                "x264": {"settings": {"preset": "veryfast", "threads": 6}},
+            },
+        },
+        path,
+    )
+    assert load_profile(path)["encoders"]["x264"]["settings"]["threads"] == 6
+
+    cpu = ffmpeg_config.cpu_encoder_args()
+    assert cpu[cpu.index("-preset") + 1] == "veryfast"
+    assert cpu[cpu.index("-threads") + 1] == "6"
+    nvenc = ffmpeg_config.nvenc_encoder_args()
+    assert nvenc[nvenc.index("-preset") + 1] == "p3"
+    assert nvenc[nvenc.index("-rc-lookahead") + 1] == "8"
+
+    # The environment override still wins over the calibrated preset
+    monkeypatch.setenv("FFMPEG_NVENC_PRESET", "slow")
+    nvenc = ffmpeg_config.nvenc_encoder_args()
+    assert nvenc[nvenc.index("-preset") + 1] == "slow"
+
+    # Explicit tuning (used while calibrating) bypasses the profile and the
+    # environment override
+    nvenc = ffmpeg_config.nvenc_encoder_args({"preset": "p1", "rc_lookahead": 8})
+    assert nvenc[nvenc.index("-preset") + 1] == "p1"
+    assert "-threads" not in ffmpeg_config.cpu_encoder_args({"preset": "fast"})
+    assert encoder_profile.tuned_settings("missing") == {}
+
+
+def test_measure_encodes_candidate_preset_despite_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("FFMPEG_NVENC_PRESET", "slow")
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        raise encoder_profile.subprocess.CalledProcessError(1, cmd, stderr=b"")
+
+    monkeypatch.setattr(encoder_profile.subprocess, "run", fake_run)
+    result = encoder_profile.measure(
+        "ffmpeg", "ref.mp4", "nvenc", {"preset": "p2"}, str(tmp_path), 60, 1.0
+    )
+    assert result["ok"] is False
+    assert commands[0][commands[0].index("-preset") + 1] == "p2"
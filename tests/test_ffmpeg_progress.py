@@ -0,0 +1,132 @@
+"""
+Tests for ffmpeg -progress parsing and the throttled compile progress channel.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from app.tasks.ffmpeg_progress import CompileProgress, parse_progress_block, run_ffmpeg
+
+FAKE_FFMPEG = """\
+import sys
+args = sys.argv[1:]
+assert args[:3] == ["-progress", "pipe:1", "-nostats"], args
+sys.stderr.write("Input #0, mov,mp4\\n  Duration: 00:00:10.00, start: 0.000000\\n")
+for us, progress in ((2500000, "continue"), (5000000, "continue"), (10000000, "end")):
+    sys.stdout.write(
+        f"frame={us // 40000}\\nfps=120.0\\nout_time_us={us}\\n"
+        f"out_time=00:00:0{us // 1000000}.000000\\nspeed=2.0x\\nprogress={progress}\\n"
+    )
+    sys.stdout.flush()
+sys.exit(int(args[-1]))
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\n{FAKE_FFMPEG}")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_parse_progress_block():
+    info = parse_progress_block(
+        {"out_time_us": "3000000", "fps": "60.5", "speed": "1.5x", "frame": "180"},
+        duration=12.0,
+    )
+    assert info["fraction"] == pytest.approx(0.25)
+    assert info["eta"] == pytest.approx(6.0)
+    assert info["fps"] == 60.5
+    assert info["frame"] == 180
+    assert not info["done"]
+
+    # Unknown duration, N/A fields
+    info = parse_progress_block(
+        {"out_time_us": "N/A", "out_time": "00:01:02.500000", "speed": "N/A"}, None
+    )
+    assert info["out_time"] == pytest.approx(62.5)
+    assert info["fraction"] is None and info["eta"] is None
+
+    assert parse_progress_block({"progress": "end"}, 5.0)["fraction"] == 1.0
+
+
+def test_run_ffmpeg_reports_progress_from_banner_duration(fake_ffmpeg):
+    updates = []
+    result = run_ffmpeg([fake_ffmpeg, "-i", "in.mp4", "0"], on_progress=updates.append)
+
+    assert result.returncode == 0
+    assert b"Duration" in result.stderr
+    assert [u["fraction"] for u in updates][-1] == 1.0
+    assert updates[-1]["done"]
+    assert all(u["fps"] == 120.0 for u in updates)
+
+
+def test_run_ffmpeg_raises_with_stderr(fake_ffmpeg):
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        run_ffmpeg([fake_ffmpeg, "1"], on_progress=lambda info: None, text=True)
+    assert "Duration" in exc.value.stderr
+
+
+def test_compile_progress_folds_units_into_stage():
+    published = []
+    progress = CompileProgress(published.append, interval=0)
+
+    progress.stage("clips", 10, 70, "Processing clip 1/2", units=2)
+    assert published[-1]["progress"] == 10
+    assert published[-1]["stage"] == "clips"
+
+    # Fractional updates are recorded, not shipped, until the channel flushes
+    progress.update({"fraction": 0.5, "fps": 90.0, "speed": 3.0}, unit="a")
+    progress.update({"fraction": 0.5, "fps": 30.0, "speed": 1.0}, unit="b")
+    assert len(published) == 1
+    progress.flush()
+    assert published[-1]["progress"] == 40
+    assert published[-1]["fps"] == 120.0
+    assert published[-1]["eta_seconds"] is not None
+
+    # Nothing changed: no duplicate publish
+    progress.flush()
+    assert len(published) == 2
+
+    progress.complete("a")
+    progress.complete("b")
+    progress.flush()
+    assert published[-1]["progress"] == 70
+    assert published[-1]["fps"] is None
+
+
+def test_compile_progress_never_moves_backwards():
+    published = []
+    progress = CompileProgress(published.append, interval=0)
+    progress.stage("timeline", 70, 80, "Adding intro/outro", units=None)
+
+    progress.complete("intro")
+    progress.flush()
+    assert published[-1]["progress"] == 80
+    # A second asset shows up after the first finished
+    progress.update({"fraction": 0.1}, unit="outro")
+    progress.flush()
+    assert published[-1]["progress"] == 80
+
+
+def test_compile_progress_single_unit_uses_ffmpeg_eta():
+    published = []
+    progress = CompileProgress(published.append, interval=0)
+    progress.stage("final", 80, 90, "Compiling final video")
+    progress.update({"fraction": 0.5, "eta": 42.0, "speed": 4.0})
+    progress.flush()
+    assert published[-1]["progress"] == 85
+    assert published[-1]["eta_seconds"] == 42
+    assert published[-1]["speed"] == 4.0
+
+
+def test_compile_progress_publish_errors_are_swallowed():
+    def broken(snapshot):
+        raise ConnectionError("api down")
+
+    progress = CompileProgress(broken, interval=0)
+    progress.stage("final", 80, 90, "Compiling final video")
+    progress.close()
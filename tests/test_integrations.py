@@ -3,8 +3,16 @@ Tests for external integrations (Twitch, Discord).
 
 Covers API client functionality and error handling.
 """
+import contextlib
+import os
 from unittest.mock import Mock, patch
 
+import httpx
+import pytest
+
+from app.integrations.http_client import ApiClient, RateLimiter
+from app.integrations.lookup_cache import LookupCache, lookup_cache_stats
+
 
 class TestTwitchIntegration:
     """Test Twitch API integration."""
@@ -47,6 +55,161 @@ class TestTwitchIntegration:
             assert mock_response.status_code == 401
             assert "error" in mock_response.json()
 
+    def test_get_clips_by_ids_batches_requests(self, monkeypatch):
+        """150 clips take two /clips requests and one /games request."""
+        from app.integrations import twitch
+
+        monkeypatch.setattr(twitch, "_client_headers", lambda: {})
+        twitch.game_name_cache.clear()
+        calls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            ids = [value for key, value in params if key == "id"]
+            calls.append((url.rsplit("/", 1)[1], len(ids)))
+            if url.endswith("/games"):
+                data = [{"id": gid, "name": f"Game {gid}"} for gid in ids]
+            else:
+                data = [
+                    {
+                        "id": cid.capitalize(),
+                        "url": f"https://clips.twitch.tv/{cid}",
+                        "title": cid,
+                        "duration": 10,
+                        "game_id": str(int(cid[4:]) % 3),
+                    }
+                    for cid in ids
+                ]
+            return Mock(json=Mock(return_value={"data": data}))
+
+        monkeypatch.setattr(twitch.twitch_client, "get", fake_get)
+        slugs = [f"clip{i}" for i in range(150)]
+        clips = twitch.get_clips_by_ids(slugs + ["clip0"])
+
+        assert calls == [("clips", 100), ("clips", 50), ("games", 3)]
+        assert set(clips) == set(slugs)
+        assert clips["clip4"].game_name == "Game 1"
+
+        # Game names are cached; one clip costs one request
+        calls.clear()
+        assert twitch.get_clip_by_id("clip5").game_name == "Game 2"
+        assert calls == [("clips", 1)]
+
+    def test_get_clips_for_duration_pages_through_pooled_client(self, monkeypatch):
+        """Pages are fetched through twitch_client until the target is met."""
+        from app.integrations import twitch
+
+        monkeypatch.setattr(twitch, "_client_headers", lambda: {})
+        twitch.game_name_cache.clear()
+        twitch.game_name_cache.put("7", "Game 7")
+        pages = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            after = params.get("after")
+            pages.append(after)
+            start = int(after or 0)
+            data = [
+                {"id": f"c{i}", "duration": 30, "game_id": "7"}
+                for i in range(start, start + params["first"])
+            ]
+            cursor = str(start + len(data))
+            return Mock(
+                json=Mock(return_value={"data": data, "pagination": {"cursor": cursor}})
+            )
+
+        monkeypatch.setattr(twitch.twitch_client, "get", fake_get)
+        result = twitch.get_clips_for_duration("b1", 900)
+
+        assert pages == [None, "20"]
+        assert len(result["items"]) == 30
+        assert result["total_duration"] == 900
+        assert result["items"][0]["game_name"] == "Game 7"
+
+    def test_get_clips_for_duration_async(self, monkeypatch):
+        """The async variant pages through clips like the sync one."""
+        import asyncio
+
+        from app.integrations import twitch
+
+        monkeypatch.setattr(twitch, "_client_headers", lambda: {})
+        twitch.game_name_cache.clear()
+        twitch.game_name_cache.put("7", "Game 7")
+        pages = []
+
+        def handler(request):
+            after = request.url.params.get("after")
+            pages.append(after)
+            start = int(after or 0)
+            data = [
+                {"id": f"c{i}", "duration": 30, "game_id": "7"}
+                for i in range(start, start + int(request.url.params["first"]))
+            ]
+            cursor = str(start + len(data))
+            return httpx.Response(
+                200, json={"data": data, "pagination": {"cursor": cursor}}
+            )
+
+        @contextlib.asynccontextmanager
+        async def session():
+            async with httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            ) as client:
+                yield client
+
+        monkeypatch.setattr(twitch.twitch_client, "async_session", session)
+        requests_before = twitch.twitch_client.stats["requests"]
+        result = asyncio.run(twitch.aget_clips_for_duration("b1", 900))
+
+        assert pages == [None, "20"]
+        # Async requests draw from the same client stats and rate limiter
+        assert twitch.twitch_client.stats["requests"] == requests_before + 2
+        assert len(result["items"]) == 30
+        assert result["total_duration"] == 900
+        assert result["items"][0]["game_name"] == "Game 7"
+
+    def test_get_user_id_is_cached(self, monkeypatch):
+        """Logins resolve once, case-insensitively; unknown logins are cached too."""
+        from app.integrations import twitch
+
+        monkeypatch.setattr(twitch, "_client_headers", lambda: {})
+        twitch.user_id_cache.clear()
+        calls = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            calls.append(params["login"])
+            data = [{"id": "42"}] if params["login"] == "Streamer" else []
+            return Mock(json=Mock(return_value={"data": data}))
+
+        monkeypatch.setattr(twitch.twitch_client, "get", fake_get)
+
+        assert twitch.get_user_id("Streamer") == "42"
+        assert twitch.get_user_id("streamer") == "42"
+        assert twitch.get_user_id("nobody") is None
+        assert twitch.get_user_id("nobody") is None
+        assert calls == ["Streamer", "nobody"]
+
+    def test_failed_profile_image_lookup_is_not_cached(self, monkeypatch):
+        from app.integrations import twitch
+
+        monkeypatch.setattr(twitch, "_client_headers", lambda: {})
+        twitch.profile_image_cache.clear()
+        responses = iter(
+            [
+                Mock(raise_for_status=Mock(side_effect=RuntimeError("503"))),
+                Mock(
+                    json=Mock(
+                        return_value={"data": [{"profile_image_url": "https://x/a"}]}
+                    )
+                ),
+            ]
+        )
+        monkeypatch.setattr(
+            twitch.twitch_client, "get", lambda *a, **k: next(responses)
+        )
+
+        assert twitch.get_user_profile_image_url("42") is None
+        assert twitch.get_user_profile_image_url("42") == "https://x/a"
+        assert twitch.get_user_profile_image_url("42") == "https://x/a"
+
     def test_twitch_url_validation(self, app):
         """Should validate Twitch clip URLs."""
         with app.app_context():
@@ -116,3 +279,144 @@ class TestDiscordIntegration:
             for msg in messages_with_urls:
                 # Basic URL detection
                 assert "https://" in msg or "http://" in msg
+
+
+class TestIntegrationHttpClient:
+    """Test the pooled, rate-limited integration HTTP client."""
+
+    @staticmethod
+    def _client(handler, **kwargs):
+        api = ApiClient("test", capacity=10, rate=10, backoff=0, **kwargs)
+        api._client = httpx.Client(transport=httpx.MockTransport(handler))
+        api._pid = os.getpid()
+        return api
+
+    def test_retries_rate_limited_requests(self, monkeypatch):
+        """A 429 is retried after Retry-After and blocks the limiter meanwhile."""
+        from app.integrations import http_client
+
+        sleeps = []
+        monkeypatch.setattr(http_client.time, "sleep", sleeps.append)
+        responses = iter(
+            [
+                httpx.Response(429, headers={"Retry-After": "2"}),
+                httpx.Response(503),
+                httpx.Response(200, json={"ok": True}),
+            ]
+        )
+        api = self._client(lambda request: next(responses), max_retries=3)
+
+        resp = api.get("https://api.example.com/x")
+
+        assert resp.json() == {"ok": True}
+        # Waits out Retry-After before retrying the 429
+        assert sleeps[0] == 2.0
+        assert api.stats == {"requests": 3, "retries": 2, "rate_limited": 1}
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        from app.integrations import http_client
+
+        monkeypatch.setattr(http_client.time, "sleep", lambda s: None)
+        api = self._client(lambda request: httpx.Response(502), max_retries=1)
+
+        resp = api.get("https://api.example.com/x")
+
+        assert resp.status_code == 502
+        assert api.stats["requests"] == 2
+        with pytest.raises(httpx.HTTPStatusError):
+            resp.raise_for_status()
+
+    def test_limiter_follows_rate_limit_headers(self):
+        """An exhausted budget makes the next request wait for the reset."""
+        limiter = RateLimiter(capacity=800, rate=800 / 60)
+        assert limiter.reserve() == 0
+
+        limiter.update(
+            httpx.Headers(
+                {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "1.5"}
+            )
+        )
+
+        assert 1.0 < limiter.reserve() <= 1.5
+        assert limiter.waits == 1
+
+    def test_limiter_spaces_requests_beyond_capacity(self):
+        limiter = RateLimiter(capacity=2, rate=4)
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == pytest.approx(0.25, abs=0.01)
+
+
+class TestLookupCache:
+    """Test the two-tier integration lookup cache."""
+
+    def test_negative_entries_expire_sooner(self, monkeypatch):
+        from app.integrations import lookup_cache
+
+        now = [1000.0]
+        monkeypatch.setattr(lookup_cache.time, "monotonic", lambda: now[0])
+        cache = LookupCache("test.expiry", ttl=100, negative_ttl=10)
+        cache.put_many({"a": "A", "b": None})
+
+        assert cache.get_many(["a", "b", "c"]) == ({"a": "A", "b": None}, ["c"])
+        now[0] += 20
+        assert cache.get("a") == (True, "A")
+        assert cache.get("b") == (False, None)
+        now[0] += 100
+        assert cache.get("a") == (False, None)
+
+    def test_lru_evicts_oldest(self):
+        cache = LookupCache("test.lru", ttl=100, negative_ttl=10, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get_many(["a", "b", "c"]) == ({"a": 1, "c": 3}, ["b"])
+
+    def test_shared_tier_serves_other_processes(self, monkeypatch):
+        """Values (and misses) stored by one process are read by another."""
+        from cachelib import SimpleCache
+
+        from app.integrations import lookup_cache
+
+        shared = SimpleCache()
+        monkeypatch.setattr(lookup_cache, "_shared_cache", lambda: shared)
+        writer = LookupCache("test.shared", ttl=100, negative_ttl=10)
+        writer.put_many({"a": "A", "b": None})
+        reader = LookupCache("test.shared", ttl=100, negative_ttl=10)
+
+        assert reader.get_many(["a", "b", "c"]) == ({"a": "A", "b": None}, ["c"])
+        stats = reader.stats()
+        assert (stats["shared_hits"], stats["misses"]) == (2, 1)
+
+        # Answered from memory now
+        reader.get("a")
+        assert reader.stats()["memory_hits"] == 1
+
+    def test_unreachable_shared_tier_falls_through(self, app, monkeypatch):
+        from app.integrations import lookup_cache
+
+        monkeypatch.setattr(lookup_cache, "_shared_down_until", 0.0)
+        with app.app_context():
+            from app.cache import cache as app_cache
+
+            monkeypatch.setattr(
+                app_cache, "get_many", Mock(side_effect=ConnectionError("down"))
+            )
+            cache = LookupCache("test.down", ttl=100, negative_ttl=10)
+
+            assert cache.get("a") == (False, None)
+            cache.get("b")
+            # Backed off after the first error
+            assert app_cache.get_many.call_count == 1
+
+    def test_stats_list_registered_caches(self):
+        cache = LookupCache("test.stats", ttl=100, negative_ttl=10)
+        cache.put("a", "A")
+        cache.get("a")
+        cache.get("b")
+
+        stats = {s["name"]: s for s in lookup_cache_stats()}
+        assert "twitch.game_name" in stats
+        assert stats["test.stats"]["hit_rate"] == 0.5
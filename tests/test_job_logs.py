@@ -0,0 +1,85 @@
+"""
+Tests for buffered job log shipping (app.tasks.job_logs).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import requests
+
+
+def test_flushes_on_batch_size_and_close():
+    """Entries ship in batches of batch_size, remainder on close()."""
+    from app.tasks import job_logs
+
+    with patch.object(job_logs.worker_api, "append_job_logs") as append:
+        buf = job_logs.JobLogBuffer(7, batch_size=3, flush_interval=0)
+        for i in range(5):
+            buf.log("info", f"line {i}")
+
+        assert append.call_count == 1
+        job_id, batch = append.call_args[0]
+        assert job_id == 7
+        assert [e["message"] for e in batch] == ["line 0", "line 1", "line 2"]
+
+        buf.close()
+        assert append.call_count == 2
+        assert [e["message"] for e in append.call_args[0][1]] == ["line 3", "line 4"]
+
+        # Nothing left to ship
+        buf.flush()
+        assert append.call_count == 2
+
+
+def test_timer_flushes_idle_entries():
+    """A buffered entry is shipped by the timer without further logging."""
+    import threading
+
+    from app.tasks import job_logs
+
+    shipped = threading.Event()
+    with patch.object(
+        job_logs.worker_api,
+        "append_job_logs",
+        side_effect=lambda *a: shipped.set(),
+    ):
+        buf = job_logs.JobLogBuffer(1, batch_size=100, flush_interval=0.05)
+        buf.log("info", "lonely")
+        assert shipped.wait(2.0)
+        buf.close()
+
+
+def test_falls_back_to_result_data_on_old_server():
+    """A 404 from the append endpoint switches to merging into result_data."""
+    from app.tasks import job_logs
+
+    not_found = requests.HTTPError(response=MagicMock(status_code=404))
+    with patch.object(
+        job_logs.worker_api, "append_job_logs", side_effect=not_found
+    ) as append, patch.object(
+        job_logs.worker_api,
+        "get_processing_job",
+        side_effect=lambda job_id: {"result_data": {"logs": [{"message": "old"}]}},
+    ), patch.object(
+        job_logs.worker_api, "update_processing_job"
+    ) as update:
+        buf = job_logs.JobLogBuffer(3, batch_size=1, flush_interval=0)
+        buf.log("info", "a")
+        buf.log("info", "b")
+
+    # The append endpoint is only tried once
+    assert append.call_count == 1
+    assert update.call_count == 2
+    logs = update.call_args[1]["result_data"]["logs"]
+    assert [e["message"] for e in logs] == ["old", "b"]
+
+
+def test_logging_never_raises():
+    """Transport errors are swallowed so tasks keep running."""
+    from app.tasks import job_logs
+
+    with patch.object(
+        job_logs.worker_api, "append_job_logs", side_effect=ConnectionError("down")
+    ):
+        buf = job_logs.JobLogBuffer(1, batch_size=1, flush_interval=0)
+        buf.log("info", "still fine")
+        buf.close()
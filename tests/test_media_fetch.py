@@ -0,0 +1,159 @@
+"""
+Tests for resumable, cache-aware worker media downloads.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.tasks import media_fetch
+
+PAYLOAD = b"0123456789" * 10
+URL = "http://server/api/worker/media/7/download?user_id=1"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None, fail_after=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+        self._fail_after = fail_after
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(response=self)
+
+    def iter_content(self, chunk_size=1):
+        sent = 0
+        for i in range(0, len(self._body), 10):
+            if self._fail_after is not None and sent >= self._fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection reset")
+            yield self._body[i : i + 10]
+            sent += 10
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeServer:
+    """Serves PAYLOAD, honouring Range/If-Range like send_file(conditional=True)."""
+
+    def __init__(self, etag='"v1"', fail_first_after=None):
+        self.etag = etag
+        self.fail_first_after = fail_first_after
+        self.gets = []
+
+    def head(self, url, headers=None, **kwargs):
+        return FakeResponse(
+            200,
+            headers={
+                "ETag": self.etag,
+                "Content-Length": str(len(PAYLOAD)),
+                "Content-Type": "video/mp4",
+                "Accept-Ranges": "bytes",
+            },
+        )
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.gets.append(headers)
+        fail_after = self.fail_first_after if len(self.gets) == 1 else None
+        rng = headers.get("Range")
+        if rng and headers.get("If-Range", self.etag) == self.etag:
+            start = int(rng.split("=")[1].rstrip("-"))
+            return FakeResponse(206, PAYLOAD[start:], fail_after=fail_after)
+        return FakeResponse(200, PAYLOAD, fail_after=fail_after)
+
+
+@pytest.fixture
+def fake_server():
+    server = FakeServer()
+    with patch.object(media_fetch.worker_api, "get_session", return_value=server):
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch.object(media_fetch.time, "sleep", MagicMock()):
+        yield
+
+
+def test_download_then_cache_hit(fake_server, tmp_path):
+    path = media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7")
+
+    assert path == str(tmp_path / "media_7.mp4")
+    assert open(path, "rb").read() == PAYLOAD
+    assert (tmp_path / "media_7.mp4.etag").read_text() == '"v1"'
+    assert not (tmp_path / "media_7.mp4.part").exists()
+
+    # Second call validates via HEAD only
+    assert media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7") == path
+    assert len(fake_server.gets) == 1
+
+
+def test_resumes_with_range_after_connection_drop(fake_server, tmp_path):
+    fake_server.fail_first_after = 40
+
+    path = media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7")
+
+    assert open(path, "rb").read() == PAYLOAD
+    assert len(fake_server.gets) == 2
+    assert fake_server.gets[1]["Range"] == "bytes=40-"
+    assert fake_server.gets[1]["If-Range"] == '"v1"'
+
+
+def test_changed_etag_invalidates_cache_and_part(fake_server, tmp_path):
+    media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7")
+    # Leftover part from an older version must not be resumed
+    (tmp_path / "media_7.mp4.part").write_bytes(b"stale")
+    (tmp_path / "media_7.mp4.part.etag").write_text('"v1"')
+    fake_server.etag = '"v2"'
+
+    path = media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7")
+
+    assert len(fake_server.gets) == 2
+    assert "Range" not in fake_server.gets[1]
+    assert open(path, "rb").read() == PAYLOAD
+    assert (tmp_path / "media_7.mp4.etag").read_text() == '"v2"'
+
+
+def test_gives_up_after_attempts(fake_server, tmp_path):
+    fake_server.get = MagicMock(side_effect=requests.ConnectionError("down"))
+
+    with pytest.raises(requests.ConnectionError):
+        media_fetch.fetch_media(URL, {}, str(tmp_path), "media_7", attempts=3)
+
+    assert fake_server.get.call_count == 3
+    assert not (tmp_path / "media_7.mp4").exists()
+
+
+def test_input_prefetcher_records_results_and_failures():
+    prefetcher = media_fetch.InputPrefetcher(2)
+
+    def download(path, stats=None):
+        stats.update(cache_hit=False, bytes=1024)
+        return path
+
+    def broken():
+        raise RuntimeError("boom")
+
+    prefetcher.submit("a", "clip 1", download, "/cache/a.mp4", stats={})
+    prefetcher.submit("a", "clip 1 again", download, "/cache/other.mp4", stats={})
+    prefetcher.submit("b", "avatar", lambda: "/avatars/b.png")
+    prefetcher.submit("c", "intro", broken)
+
+    assert prefetcher.result("a") == "/cache/a.mp4"
+    assert prefetcher.result("b") == "/avatars/b.png"
+    with pytest.raises(RuntimeError, match="boom"):
+        prefetcher.result("c")
+    prefetcher.shutdown()
+
+    summary = prefetcher.summary()
+    assert [r["label"] for r in summary] == ["clip 1", "avatar", "intro"]
+    assert [r["status"] for r in summary] == ["downloaded", "ready", "failed"]
+    assert summary[0]["bytes"] == 1024
+    assert summary[2]["error"] == "boom"
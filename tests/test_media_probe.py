@@ -0,0 +1,145 @@
+"""
+Tests for the memoized ffprobe metadata layer.
+"""
+
+import json
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import media_probe
+
+PROBE_JSON = {
+    "format": {"duration": "12.5"},
+    "streams": [
+        {
+            "codec_type": "video",
+            "width": 1920,
+            "height": 1080,
+            "r_frame_rate": "30000/1001",
+        },
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    with patch.object(media_probe, "_CACHE_SINGLETON", None):
+        yield
+
+
+@pytest.fixture
+def ffprobe():
+    with patch.object(media_probe.subprocess, "run") as run:
+        run.return_value = Mock(returncode=0, stdout=json.dumps(PROBE_JSON))
+        yield run
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"x" * 100)
+    return str(path)
+
+
+def test_probe_is_memoized_per_file_version(ffprobe, video):
+    assert media_probe.probe(video)["format"]["duration"] == "12.5"
+    assert media_probe.probe(video) is not None
+    assert ffprobe.call_count == 1
+
+    # A rewritten file is probed again
+    with open(video, "ab") as f:
+        f.write(b"more")
+    media_probe.probe(video)
+    assert ffprobe.call_count == 2
+
+    stats = media_probe.get_probe_cache().stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_failed_probe_is_not_cached(ffprobe, video):
+    ffprobe.return_value = Mock(returncode=1, stdout="")
+    assert media_probe.probe(video) is None
+
+    ffprobe.return_value = Mock(returncode=0, stdout=json.dumps(PROBE_JSON))
+    assert media_probe.probe(video) is not None
+    assert ffprobe.call_count == 2
+    assert media_probe.get_probe_cache().stats()["failures"] == 1
+
+
+def test_missing_file_skips_ffprobe(ffprobe, tmp_path):
+    assert media_probe.probe(str(tmp_path / "gone.mp4")) is None
+    ffprobe.assert_not_called()
+
+
+def test_checksum_key_shared_across_paths(ffprobe, tmp_path):
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / name).write_bytes(b"same")
+        media_probe.probe(str(tmp_path / name), checksum="abc123")
+    assert ffprobe.call_count == 1
+
+
+def test_lru_evicts_oldest_entry(ffprobe, tmp_path):
+    cache = media_probe.get_probe_cache({"PROBE_CACHE_SIZE": 2})
+    paths = []
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+        media_probe.probe(paths[-1], config={"PROBE_CACHE_SIZE": 2})
+
+    assert cache.stats()["entries"] == 2
+    media_probe.probe(paths[0], config={"PROBE_CACHE_SIZE": 2})
+    assert ffprobe.call_count == 4
+
+
+def test_redis_tier_shared_between_processes(ffprobe, video):
+    store = {}
+    client = Mock()
+    client.get.side_effect = store.get
+    client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+    config = {"PROBE_CACHE_REDIS_URL": "redis://cache:6379/0"}
+
+    cache = media_probe.get_probe_cache(config)
+    with patch.object(cache, "_get_redis", return_value=client):
+        media_probe.probe(video, config=config)
+        cache.clear()  # as seen by another process
+        assert media_probe.probe(video, config=config)["streams"]
+    assert ffprobe.call_count == 1
+    assert cache.stats()["redis_hits"] == 1
+
+
+def test_redis_errors_fall_back_to_ffprobe(ffprobe, video):
+    config = {"PROBE_CACHE_REDIS_URL": "redis://cache:6379/0"}
+    cache = media_probe.get_probe_cache(config)
+    client = Mock()
+    client.get.side_effect = ConnectionError("down")
+    cache._redis = client
+
+    assert media_probe.probe(video, config=config) is not None
+    # Tier is skipped during the back-off
+    assert cache._get_redis() is None
+    assert ffprobe.call_count == 1
+
+
+def test_derived_metadata():
+    assert media_probe.video_metadata(PROBE_JSON) == {
+        "duration": 12.5,
+        "width": 1920,
+        "height": 1080,
+        "framerate": pytest.approx(29.97, rel=1e-3),
+    }
+    assert media_probe.has_audio(PROBE_JSON)
+    assert not media_probe.has_audio({"streams": [{"codec_type": "video"}]})
+    assert media_probe.video_metadata({"streams": []}) == {}
+    assert media_probe.duration_of({"format": {"duration": "N/A"}}) is None
+    assert media_probe.parse_frame_rate("0/0") == 0.0
+
+
+def test_make_key_includes_ffprobe_args(video):
+    plain = media_probe.ProbeCache.make_key(video)
+    with_args = media_probe.ProbeCache.make_key(video, ["-probesize", "5M"])
+    assert plain.startswith(f"file:{os.path.realpath(video)}:100:")
+    assert plain != with_args
@@ -168,6 +168,37 @@ class TestClipModel:
             assert len(clips) >= 2
             assert clips[0].order_index < clips[1].order_index
 
+    def test_clip_source_key(self, app, test_project):
+        """source_key follows source_url: Twitch slug, else the normalized URL."""
+        with app.app_context():
+            clip = Clip(
+                title="Keyed",
+                source_url="https://www.twitch.tv/streamer/clip/FunnySlug-ab_12?filter=all",
+                project_id=test_project,
+            )
+            assert clip.source_key == "funnyslug-ab_12"
+
+            clip.source_url = "https://example.com/video/9/?t=3"
+            assert clip.source_key == "https://example.com/video/9"
+
+            clip.source_url = None
+            assert clip.source_key is None
+
+    def test_twitch_clip_slug_keeps_case(self):
+        """Helix lookups get the slug as written; source keys lower-case it."""
+        from app.clip_urls import source_clip_key, twitch_clip_slug
+
+        for url in (
+            "https://clips.twitch.tv/FunnySlug-ab_12",
+            "https://clip.twitch.tv/FunnySlug-ab_12/",
+            "https://www.twitch.tv/streamer/clip/FunnySlug-ab_12?filter=all",
+            "https://m.twitch.tv/clip/FunnySlug-ab_12#t",
+        ):
+            assert twitch_clip_slug(url) == "FunnySlug-ab_12"
+            assert source_clip_key(url) == "funnyslug-ab_12"
+        assert twitch_clip_slug("https://www.twitch.tv/videos/123") is None
+        assert twitch_clip_slug(None) is None
+
 
 class TestMediaFileModel:
     """Test MediaFile model."""
@@ -108,3 +108,49 @@ def test_delete_project_removes_project_directory(client, app, auth):
         # name is known
         root = storage_lib.project_root(user, "Compilation of 2025-11-02")
         assert not os.path.exists(root)
+
+
+def test_download_batches_queued_for_committed_clips_on_failure(
+    client, app, auth, test_project
+):
+    """Clips committed before an error still get their batch download task."""
+    from unittest.mock import MagicMock, patch
+
+    from app import clip_urls
+    from app.models import Clip, db
+    from app.tasks.celery_app import celery_app
+    from app.tasks.download_clip_v2 import download_clips_batch_task_v2
+
+    auth.login()
+    app.config["DOWNLOAD_BATCH_SIZE"] = 2
+    urls = [f"https://cdn.discordapp.com/attachments/1/2/clip{i}.mp4" for i in range(4)]
+    normalize = clip_urls.normalize_source_url
+
+    def failing_normalize(url):
+        if url == urls[-1]:
+            raise RuntimeError("boom")
+        return normalize(url)
+
+    inspector = MagicMock()
+    inspector.active_queues.return_value = {"w1": [{"name": "cpu"}]}
+    queued = []
+    with patch.object(celery_app.control, "inspect", return_value=inspector), patch(
+        "app.clip_urls.normalize_source_url", side_effect=failing_normalize
+    ), patch.object(
+        download_clips_batch_task_v2,
+        "apply_async",
+        side_effect=lambda args, queue: queued.append(args[0]) or MagicMock(id="t"),
+    ):
+        resp = client.post(
+            f"/api/projects/{test_project}/clips/download", json={"urls": urls}
+        )
+
+    assert resp.status_code == 500
+    with app.app_context():
+        clip_ids = [
+            c.id for c in db.session.query(Clip).filter_by(project_id=test_project)
+        ]
+    assert len(clip_ids) == 3
+    # The full batch went out as soon as it filled; the remainder on failure
+    assert [len(chunk) for chunk in queued] == [2, 1]
+    assert sorted(item[0] for chunk in queued for item in chunk) == sorted(clip_ids)
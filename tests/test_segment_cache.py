@@ -0,0 +1,122 @@
+"""
+Tests for the worker-side rendered segment cache.
+"""
+import os
+
+from app.tasks.segment_cache import SegmentCache, file_fingerprint
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def test_key_changes_with_render_parameters(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"), max_bytes=1024)
+    src = _write(str(tmp_path / "in.mp4"), 10)
+    inputs = {src: file_fingerprint(src)}
+
+    base = ["ffmpeg", "-i", src, "-vf", "scale=1920:1080", "-y", "/a/out.mp4"]
+    key = cache.make_key(base, "/a/out.mp4", inputs)
+
+    # Output path is not part of the key
+    other_out = base[:-1] + ["/b/out.mp4"]
+    assert cache.make_key(other_out, "/b/out.mp4", inputs) == key
+
+    # Any filter/encoder change produces a new key
+    changed = list(base)
+    changed[4] = "scale=1280:720"
+    assert cache.make_key(changed, "/a/out.mp4", inputs) != key
+
+    # A checksum-identified input differs from a stat-identified one
+    by_checksum = {src: file_fingerprint(src, "abc123")}
+    assert cache.make_key(base, "/a/out.mp4", by_checksum) != key
+
+
+def test_fetch_store_and_stats(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"), max_bytes=1024)
+    rendered = _write(str(tmp_path / "clip_1_processed.mp4"), 100)
+    dest = str(tmp_path / "restored.mp4")
+
+    assert cache.fetch("ab" * 32, dest) is False
+    cache.store("ab" * 32, rendered)
+    assert cache.fetch("ab" * 32, dest) is True
+    assert os.path.getsize(dest) == 100
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["stores"] == 1
+    assert stats["entries"] == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_lru_eviction_respects_byte_budget(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"), max_bytes=250)
+    src = _write(str(tmp_path / "seg.mp4"), 100)
+
+    cache.store("aa" * 32, src)
+    cache.store("bb" * 32, src)
+    # Make "aa" the oldest entry, then touch it via a hit so "bb" becomes LRU
+    os.utime(cache._entry_path("aa" * 32), (1, 1))
+    os.utime(cache._entry_path("bb" * 32), (2, 2))
+    cache.fetch("aa" * 32, str(tmp_path / "tmp.mp4"))
+
+    cache.store("cc" * 32, src)
+
+    assert os.path.exists(cache._entry_path("aa" * 32))
+    assert not os.path.exists(cache._entry_path("bb" * 32))
+    assert os.path.exists(cache._entry_path("cc" * 32))
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] <= 250
+
+
+def test_asset_namespace_drops_stale_versions(tmp_path):
+    cache = SegmentCache(str(tmp_path / "assets"), max_bytes=10_000)
+    src = _write(str(tmp_path / "intro.mp4"), 50)
+
+    old_ns = cache.namespace("media_7", "2025-01-01T00:00:00-abc")
+    new_ns = cache.namespace("media_7", "2025-02-01T00:00:00-def")
+    other_ns = cache.namespace("media_8", "2025-01-01T00:00:00-abc")
+    assert "/" not in old_ns and ":" not in old_ns
+
+    cache.store("aa" * 32, src, namespace=old_ns)
+    cache.store("bb" * 32, src, namespace=other_ns)
+    assert cache.fetch("aa" * 32, str(tmp_path / "out.mp4"), namespace=old_ns)
+
+    # A newer library version of media_7 replaces the old conformed renders
+    cache.store("cc" * 32, src, namespace=new_ns)
+    assert not cache.fetch("aa" * 32, str(tmp_path / "out.mp4"), namespace=old_ns)
+    assert cache.fetch("cc" * 32, str(tmp_path / "out.mp4"), namespace=new_ns)
+    assert cache.fetch("bb" * 32, str(tmp_path / "out.mp4"), namespace=other_ns)
+
+
+def test_store_uses_index_instead_of_scanning(tmp_path, monkeypatch):
+    """Only the periodic sweep walks the directory; stores query the index."""
+    root = tmp_path / "cache"
+    (root / "dd").mkdir(parents=True)
+    # A segment cached before the index existed
+    legacy = _write(str(root / "dd" / f"{'dd' * 32}.mp4"), 100)
+    os.utime(legacy, (1, 1))
+    cache = SegmentCache(str(root), max_bytes=250)
+    src = _write(str(tmp_path / "seg.mp4"), 100)
+
+    # First store sweeps and adopts the legacy entry
+    cache.store("aa" * 32, src)
+    assert cache.stats()["entries"] == 2
+
+    listed = []
+    real_listdir = os.listdir
+    monkeypatch.setattr(
+        "app.tasks.segment_cache.os.listdir",
+        lambda path: listed.append(path) or real_listdir(path),
+    )
+    cache.store("bb" * 32, src)
+    cache.store("cc" * 32, src)
+
+    assert listed == []
+    # The legacy entry was the least recently used
+    assert not os.path.exists(legacy)
+    assert cache.stats()["size_bytes"] <= 250
@@ -0,0 +1,84 @@
+"""
+Tests for the shared-storage compilation handoff on workers.
+"""
+import os
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from app import storage as storage_lib
+from app.tasks import storage_handoff, worker_api
+
+
+@pytest.fixture(autouse=True)
+def _fresh_handshakes():
+    storage_handoff.forget_handshake()
+    yield
+    storage_handoff.forget_handshake()
+
+
+def test_shared_token_requires_matching_server_token(app, monkeypatch):
+    calls = []
+
+    def _handshake():
+        calls.append(1)
+        return {"token": server_token}
+
+    monkeypatch.setattr(worker_api, "get_storage_handshake", _handshake)
+    with app.app_context():
+        local = storage_lib.storage_token(create=True)
+
+    # No match: a worker with its own storage
+    server_token = "somebody-else"
+    assert storage_handoff.shared_storage_token(app) is None
+    # The result is cached, so the server is asked once per TTL
+    server_token = local
+    assert storage_handoff.shared_storage_token(app) is None
+    assert len(calls) == 1
+
+    storage_handoff.forget_handshake()
+    assert storage_handoff.shared_storage_token(app) == local
+
+
+def test_handoff_links_output_and_sends_only_metadata(app, tmp_path, monkeypatch):
+    sent = {}
+
+    def _record(project_id, name, token, thumbnail_path=None, metadata=None):
+        with app.app_context():
+            path = os.path.join(storage_lib.handoff_dir(), name)
+        sent.update(path=path, token=token, metadata=metadata)
+        return {"status": "uploaded", "media_id": 3, "file_path": "/x.mp4"}
+
+    monkeypatch.setattr(worker_api, "handoff_compilation", _record)
+    video = tmp_path / "out.mp4"
+    video.write_bytes(b"frame" * 20)
+
+    result = storage_handoff.handoff_compilation(
+        app, 5, str(video), "tok", metadata={"filename": "final.mp4"}
+    )
+
+    assert result["media_id"] == 3
+    assert result["handoff_mode"] in {"link", "copy"}
+    assert sent["token"] == "tok"
+    assert sent["metadata"] == {"filename": "final.mp4", "file_size": 100}
+    with open(sent["path"], "rb") as f:
+        assert f.read() == video.read_bytes()
+
+
+def test_rejected_handoff_removes_placed_file(app, tmp_path, monkeypatch):
+    placed = []
+
+    def _reject(project_id, name, token, thumbnail_path=None, metadata=None):
+        with app.app_context():
+            placed.append(os.path.join(storage_lib.handoff_dir(), name))
+        raise requests.HTTPError("409", response=MagicMock(status_code=409))
+
+    monkeypatch.setattr(worker_api, "handoff_compilation", _reject)
+    video = tmp_path / "out.mp4"
+    video.write_bytes(b"x" * 10)
+
+    with pytest.raises(requests.HTTPError):
+        storage_handoff.handoff_compilation(app, 5, str(video), "tok")
+    assert placed and not os.path.exists(placed[0])
+    assert video.exists()
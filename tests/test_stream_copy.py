@@ -0,0 +1,229 @@
+"""
+Tests for the stream-copy / smart-cut clip fast path.
+"""
+import os
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app import ffmpeg_config
+from app.ffmpeg_config import INBAND_HEADER_ARGS
+from app.tasks import stream_copy
+from app.tasks.stream_copy import (
+    StreamCopyStats,
+    copy_mismatch,
+    encoder_timescale,
+    plan_cut,
+    render_fast_path,
+    stream_copy_enabled,
+)
+
+_HAS_FFMPEG = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+
+
+def _probe(**overrides):
+    video = {
+        "codec_type": "video",
+        "codec_name": "h264",
+        "profile": "High",
+        "pix_fmt": "yuv420p",
+        "width": 1920,
+        "height": 1080,
+        "r_frame_rate": "60/1",
+        "avg_frame_rate": "60/1",
+        "sample_aspect_ratio": "1:1",
+    }
+    audio = {
+        "codec_type": "audio",
+        "codec_name": "aac",
+        "sample_rate": "48000",
+        "channels": 2,
+    }
+    video.update(overrides.pop("video", {}))
+    audio.update(overrides.pop("audio", {}))
+    return {"format": {"duration": "30.0"}, "streams": [video, audio]}
+
+
+def test_copy_mismatch_accepts_matching_source():
+    assert copy_mismatch(_probe(), 1920, 1080) is None
+    assert copy_mismatch(_probe(), 1920, 1080, max_fps=60) is None
+    # Unset SAR counts as square pixels
+    unset_sar = _probe(video={"sample_aspect_ratio": "0:1"})
+    assert copy_mismatch(unset_sar, 1920, 1080) is None
+
+
+def test_copy_mismatch_reasons():
+    assert "resolution" in copy_mismatch(_probe(), 1280, 720)
+    assert "codec" in copy_mismatch(_probe(video={"codec_name": "hevc"}), 1920, 1080)
+    assert "profile" in copy_mismatch(_probe(video={"profile": "Main"}), 1920, 1080)
+    assert "pixel" in copy_mismatch(
+        _probe(video={"pix_fmt": "yuv420p10le"}), 1920, 1080
+    )
+    assert "aspect ratio" in copy_mismatch(
+        _probe(video={"sample_aspect_ratio": "4:3"}), 1920, 1080
+    )
+    assert "variable" in copy_mismatch(
+        _probe(video={"avg_frame_rate": "45/1"}), 1920, 1080
+    )
+    assert "tier cap" in copy_mismatch(_probe(), 1920, 1080, max_fps=30)
+    assert "sample rate" in copy_mismatch(
+        _probe(audio={"sample_rate": "44100"}), 1920, 1080
+    )
+    assert "channels" in copy_mismatch(_probe(audio={"channels": 6}), 1920, 1080)
+    no_audio = _probe()
+    no_audio["streams"].pop()
+    assert copy_mismatch(no_audio, 1920, 1080) == "no audio stream"
+    assert copy_mismatch(None, 1920, 1080) == "no video stream"
+
+
+def test_plan_cut():
+    keyframes = [0.0, 2.0, 4.0, 6.0]
+    # Start on (or a frame after) a keyframe: plain copy from that keyframe
+    assert plan_cut(keyframes, 2.0, 5.0, tolerance=1 / 30) == ("copy", 2.0)
+    assert plan_cut(keyframes, 2.02, 5.0, tolerance=1 / 30) == ("copy", 2.0)
+    # Mid-GOP start: re-encode up to the next keyframe inside the trim
+    assert plan_cut(keyframes, 2.5, 5.0, tolerance=1 / 30) == ("smart", 4.0)
+    # No keyframe before the trim ends: nothing to copy
+    assert plan_cut(keyframes, 2.5, 3.5, tolerance=1 / 30) == ("encode", None)
+
+
+def test_render_fast_path_smart_cut_runs_three_ffmpeg_passes(tmp_path):
+    calls = []
+    output = str(tmp_path / "clip_1_processed.mp4")
+
+    with patch.object(stream_copy, "keyframe_times", return_value=[0.0, 4.0, 8.0]):
+        with patch.object(stream_copy, "run_ffmpeg", side_effect=calls.append):
+            mode = render_fast_path(
+                "ffmpeg",
+                "ffprobe",
+                "in.mp4",
+                output,
+                start=2.5,
+                duration=5.0,
+                fps=30.0,
+                video_args=["-c:v", "libx264"],
+            )
+
+    assert mode == "smart"
+    head, tail, concat = calls
+    assert "libx264" in head and head[head.index("-t") + 1] == "1.500"
+    # Parameter sets repeated in-band on the re-encoded head
+    assert head[head.index("-bsf:v") + 1] == "dump_extra"
+    assert tail[tail.index("-bsf:v") + 1] == "h264_mp4toannexb"
+    assert tail[tail.index("-ss") + 1] == "4.001"
+    assert tail[tail.index("-t") + 1] == "3.500"
+    assert "copy" in tail and "concat" in concat and concat[-1] == output
+    # Intermediate parts are cleaned up
+    assert sorted(os.listdir(tmp_path)) == []
+
+
+def test_render_fast_path_untrimmed_copies_without_probe():
+    calls = []
+    with patch.object(stream_copy, "keyframe_times") as keyframes:
+        with patch.object(stream_copy, "run_ffmpeg", side_effect=calls.append):
+            mode = render_fast_path(
+                "ffmpeg", "ffprobe", "in.mp4", "out.mp4", None, None, 30.0, []
+            )
+    assert mode == "copy"
+    keyframes.assert_not_called()
+    assert "-ss" not in calls[0] and "-t" not in calls[0]
+    # SPS/PPS in-band and the encoder's timescale, as encoded segments have
+    assert calls[0][calls[0].index("-bsf:v") + 1] == "h264_mp4toannexb"
+    assert calls[0][calls[0].index("-video_track_timescale") + 1] == "15360"
+
+
+def test_render_fast_path_keeps_encoder_bitstream_filter():
+    calls = []
+    with patch.object(stream_copy, "keyframe_times", return_value=[0.0, 4.0]):
+        with patch.object(stream_copy, "run_ffmpeg", side_effect=calls.append):
+            render_fast_path(
+                "ffmpeg",
+                "ffprobe",
+                "in.mp4",
+                "out.mp4",
+                2.5,
+                5.0,
+                30.0,
+                ["-c:v", "libx264", *INBAND_HEADER_ARGS],
+            )
+    assert calls[0].count("-bsf:v") == 1
+
+
+def test_encoded_segments_repeat_parameter_sets():
+    for nvenc in (False, True):
+        with patch.object(ffmpeg_config, "_detect_nvenc", return_value=nvenc):
+            args = ffmpeg_config.encoder_args("ffmpeg")
+        assert args[-2:] == INBAND_HEADER_ARGS
+
+
+def test_encoder_timescale():
+    assert encoder_timescale(60.0) == 15360
+    assert encoder_timescale("30/1") == 15360
+    assert encoder_timescale(30000 / 1001) == 30000
+    assert encoder_timescale("25/1") == 12800
+
+
+def test_stats_summary():
+    stats = StreamCopyStats()
+    for mode in ("copy", "smart", "copy", None):
+        stats.record(mode)
+    assert stats.fast_path == 3
+    assert stats.summary(5).startswith("Stream copy: 3/5 clips")
+
+
+def test_stream_copy_disabled_by_default():
+    assert stream_copy_enabled({}) is False
+    assert stream_copy_enabled({"COMPILE_STREAM_COPY": "true"}) is True
+
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-v", "error", *args], check=True, capture_output=True)
+
+
+@pytest.mark.skipif(not _HAS_FFMPEG, reason="ffmpeg not installed")
+def test_smart_cut_concatenates_with_encoded_segments(tmp_path):
+    video_args = ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p"]
+    # A source from another encoder setup: different SPS/PPS than video_args
+    source_args = [
+        "-c:v", "libx264", "-preset", "ultrafast", "-profile:v", "high",
+        "-x264-params", "ref=1:bframes=0", "-pix_fmt", "yuv420p",
+    ]  # fmt: skip
+    audio = ["-c:a", "aac", "-ar", "48000", "-ac", "2"]
+    source = str(tmp_path / "source.mp4")
+    encoded = str(tmp_path / "static.mp4")
+    _ffmpeg(
+        "-f", "lavfi", "-i", "testsrc2=s=320x240:r=30",
+        "-f", "lavfi", "-i", "sine=f=440:r=48000",
+        "-t", "4", *source_args, "-force_key_frames", "expr:gte(t,n_forced)",
+        *audio, "-y", source,
+    )  # fmt: skip
+    _ffmpeg(
+        "-f", "lavfi", "-i", "testsrc=s=320x240:r=30",
+        "-f", "lavfi", "-i", "sine=f=220:r=48000",
+        "-t", "1", *video_args, *INBAND_HEADER_ARGS, *audio, "-y", encoded,
+    )  # fmt: skip
+
+    assert copy_mismatch(stream_copy.media_probe.probe(source), 320, 240) is None
+
+    clip = str(tmp_path / "clip.mp4")
+    mode = render_fast_path(
+        "ffmpeg", "ffprobe", source, clip, 0.5, 2.5, 30.0,
+        [*video_args, *INBAND_HEADER_ARGS],
+    )  # fmt: skip
+    assert mode == "smart"
+
+    # Timeline concat as the compile does it: encoded, copied, encoded
+    parts = tmp_path / "parts.txt"
+    parts.write_text("".join(f"file '{p}'\n" for p in (encoded, clip, encoded)))
+    output = str(tmp_path / "output.mp4")
+    _ffmpeg(
+        "-f", "concat", "-safe", "0", "-i", str(parts), "-c", "copy", "-y", output
+    )  # fmt: skip
+    decoded = subprocess.run(
+        ["ffmpeg", "-v", "error", "-xerror", "-i", output, "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    assert decoded.returncode == 0 and not decoded.stderr.strip()
@@ -189,6 +189,49 @@ class TestWorkerMediaEndpoints:
         response = client.get("/api/worker/media/99999", headers=worker_headers)
         assert response.status_code == 404
 
+    def test_download_media_supports_etag_and_ranges(
+        self, client, worker_headers, test_user, tmp_path
+    ):
+        """Media download advertises ETag/Accept-Ranges and serves byte ranges."""
+        video = tmp_path / "clip.mp4"
+        video.write_bytes(b"0123456789" * 100)
+        media = MediaFile(
+            filename="clip.mp4",
+            original_filename="clip.mp4",
+            file_path=str(video),
+            file_size=1000,
+            mime_type="video/mp4",
+            media_type=MediaType.CLIP,
+            user_id=test_user,
+            checksum="a" * 64,
+        )
+        db.session.add(media)
+        db.session.commit()
+        url = f"/api/worker/media/{media.id}/download?user_id={test_user}"
+
+        head = client.head(url, headers=worker_headers)
+        assert head.status_code == 200
+        assert head.headers["ETag"] == f'"{"a" * 64}"'
+        assert head.headers["Accept-Ranges"] == "bytes"
+        assert head.headers["Content-Length"] == "1000"
+
+        partial = client.get(
+            url,
+            headers={
+                **worker_headers,
+                "Range": "bytes=990-",
+                "If-Range": head.headers["ETag"],
+            },
+        )
+        assert partial.status_code == 206
+        assert partial.data == b"0123456789"
+
+        stale = client.get(
+            url, headers={**worker_headers, "Range": "bytes=990-", "If-Range": '"old"'}
+        )
+        assert stale.status_code == 200
+        assert len(stale.data) == 1000
+
     def test_create_media_file(self, client, worker_headers, test_user, test_project):
         """POST /api/worker/media creates new media file."""
         data = {
@@ -335,6 +378,154 @@ class TestWorkerJobEndpoints:
         assert job.result_data["existing_key"] == "existing_value"
         assert job.result_data["new_key"] == "new_value"
 
+    def test_append_job_logs(self, client, worker_headers, test_user, test_project):
+        """POST /api/worker/jobs/<id>/logs appends rows without touching result_data."""
+        from app.models import ProcessingJobLog
+
+        job = ProcessingJob(
+            celery_task_id="test-task-logs",
+            job_type="compile_video",
+            project_id=test_project,
+            user_id=test_user,
+            status="started",
+            result_data={"logs": [{"level": "info", "message": "legacy"}]},
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        entries = [
+            {"ts": "2026-01-01T10:00:00", "level": "info", "message": "first"},
+            {"level": "error", "message": "second", "status": "failed"},
+            {"level": "info"},  # no message: skipped
+        ]
+        response = client.post(
+            f"/api/worker/jobs/{job.id}/logs",
+            headers=worker_headers,
+            json={"entries": entries},
+        )
+        assert response.status_code == 200
+        assert response.get_json()["count"] == 2
+
+        rows = ProcessingJobLog.query.filter_by(job_id=job.id).all()
+        assert [r.message for r in rows] == ["first", "second"]
+        assert rows[0].ts == datetime(2026, 1, 1, 10, 0, 0)
+        assert rows[1].status == "failed"
+
+        db.session.refresh(job)
+        assert job.result_data == {"logs": [{"level": "info", "message": "legacy"}]}
+        assert [e["message"] for e in job.all_logs()] == ["legacy", "first", "second"]
+
+    def test_append_job_logs_validation(self, client, worker_headers):
+        """Append endpoint rejects unknown jobs and malformed bodies."""
+        response = client.post(
+            "/api/worker/jobs/99999/logs",
+            headers=worker_headers,
+            json={"entries": []},
+        )
+        assert response.status_code == 404
+
+    def test_job_segments_store_serve_and_delete(
+        self, client, worker_headers, test_user, test_project
+    ):
+        """Distributed compile segments can be uploaded, probed, ranged and removed."""
+        import io
+
+        job = ProcessingJob(
+            celery_task_id="test-task-segments",
+            job_type="compile_video",
+            project_id=test_project,
+            user_id=test_user,
+            status="started",
+        )
+        db.session.add(job)
+        db.session.commit()
+        url = f"/api/worker/jobs/{job.id}/segments/clip_7.mp4"
+
+        assert client.head(url, headers=worker_headers).status_code == 404
+
+        response = client.put(
+            url,
+            headers=worker_headers,
+            data={"segment": (io.BytesIO(b"0123456789"), "clip_7.mp4")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200
+        assert response.get_json()["stored"] == 1
+
+        head = client.head(url, headers=worker_headers)
+        assert head.status_code == 200
+        assert head.headers["Accept-Ranges"] == "bytes"
+        partial = client.get(url, headers={**worker_headers, "Range": "bytes=5-"})
+        assert partial.status_code == 206
+        assert partial.data == b"56789"
+
+        bad = f"/api/worker/jobs/{job.id}/segments/..%2Fescape.mp4"
+        assert client.get(bad, headers=worker_headers).status_code in (400, 404)
+        for name in ("..", "notes.txt"):
+            response = client.put(
+                f"/api/worker/jobs/{job.id}/segments/{name}",
+                headers=worker_headers,
+                data={"segment": (io.BytesIO(b"x"), "x.mp4")},
+                content_type="multipart/form-data",
+            )
+            assert response.status_code in (400, 404)
+
+        response = client.delete(
+            f"/api/worker/jobs/{job.id}/segments", headers=worker_headers
+        )
+        assert response.status_code == 200
+        assert client.head(url, headers=worker_headers).status_code == 404
+
+    def test_gzip_request_and_response(
+        self, client, worker_headers, test_user, test_project
+    ):
+        """Worker endpoints inflate gzip bodies and gzip large JSON replies."""
+        import gzip
+        import json
+
+        job = ProcessingJob(
+            celery_task_id="test-task-gzip",
+            job_type="compile_video",
+            project_id=test_project,
+            user_id=test_user,
+            status="started",
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        entries = [{"level": "info", "message": f"line {i}"} for i in range(100)]
+        response = client.post(
+            f"/api/worker/jobs/{job.id}/logs",
+            headers={**worker_headers, "Content-Encoding": "gzip"},
+            data=gzip.compress(json.dumps({"entries": entries}).encode()),
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        assert response.get_json()["count"] == 100
+
+        response = client.post(
+            f"/api/worker/jobs/{job.id}/logs",
+            headers={**worker_headers, "Content-Encoding": "gzip"},
+            data=b"not gzip",
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+
+        job.result_data = {"notes": "x" * 4000}
+        db.session.commit()
+        response = client.get(
+            f"/api/worker/jobs/{job.id}",
+            headers={**worker_headers, "Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        payload = json.loads(gzip.decompress(response.data))
+        assert payload["result_data"]["notes"] == "x" * 4000
+
+        response = client.get(f"/api/worker/jobs/{job.id}", headers=worker_headers)
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json()["id"] == job.id
+
     def test_update_job_not_found(self, client, worker_headers):
         """PUT /api/worker/jobs/<id> with invalid ID returns 404."""
         response = client.put(
@@ -419,6 +610,97 @@ class TestWorkerProjectEndpoints:
         project = db.session.get(Project, test_project)
         assert project.completed_at.isoformat().startswith("2025-11-11T12:00")
 
+    def test_chunked_compilation_upload(self, client, worker_headers, test_project):
+        """Chunks append at matching offsets; commit verifies and records the file."""
+        import hashlib
+        import json
+        import os
+
+        body = b"fragmented-mp4-" * 100
+        url = f"/api/worker/projects/{test_project}/compilation/chunks/upload00001"
+
+        assert client.get(url, headers=worker_headers).get_json()["offset"] == 0
+        response = client.put(
+            f"{url}?offset=0", headers=worker_headers, data=body[:700]
+        )
+        assert response.get_json()["offset"] == 700
+
+        # A stale offset is refused with the stored size, so the worker resumes
+        response = client.put(f"{url}?offset=0", headers=worker_headers, data=body)
+        assert response.status_code == 409
+        assert response.get_json()["offset"] == 700
+        client.put(f"{url}?offset=700", headers=worker_headers, data=body[700:])
+
+        metadata = {"filename": "final.mp4", "file_size": len(body), "duration": 12.5}
+        response = client.post(
+            f"{url}/commit",
+            headers=worker_headers,
+            data={"metadata": json.dumps({**metadata, "sha256": "0" * 64})},
+        )
+        assert response.status_code == 409
+        assert client.get(url, headers=worker_headers).get_json()["offset"] == 0
+
+        client.put(f"{url}?offset=0", headers=worker_headers, data=body)
+        sha = hashlib.sha256(body).hexdigest()
+        response = client.post(
+            f"{url}/commit",
+            headers=worker_headers,
+            data={"metadata": json.dumps({**metadata, "sha256": sha})},
+        )
+        assert response.status_code == 200
+        result = response.get_json()
+        with open(result["file_path"], "rb") as f:
+            assert f.read() == body
+        assert not os.path.exists(result["file_path"] + ".part")
+
+        media = db.session.get(MediaFile, result["media_id"])
+        assert media.media_type == MediaType.COMPILATION
+        assert media.duration == 12.5
+        assert db.session.get(Project, test_project).output_filename == "final.mp4"
+
+    def test_storage_handoff(self, client, worker_headers, test_project):
+        """Workers on shared storage hand compilations over by name."""
+        import json
+        import os
+
+        from app import storage as storage_lib
+
+        handshake = client.get("/api/worker/storage/handshake", headers=worker_headers)
+        assert handshake.status_code == 200
+        token = handshake.get_json()["token"]
+        assert storage_lib.storage_token() == token
+        # The token is stable across calls
+        again = client.get("/api/worker/storage/handshake", headers=worker_headers)
+        assert again.get_json()["token"] == token
+
+        os.makedirs(storage_lib.handoff_dir(), exist_ok=True)
+        name = "a1b2c3d4e5f6.mp4"
+        src = os.path.join(storage_lib.handoff_dir(), name)
+        with open(src, "wb") as f:
+            f.write(b"video" * 10)
+        url = f"/api/worker/projects/{test_project}/compilation/handoff"
+        metadata = {"handoff": name, "filename": "handed.mp4", "file_size": 50}
+
+        response = client.post(
+            url,
+            headers=worker_headers,
+            data={"metadata": json.dumps({**metadata, "token": "other"})},
+        )
+        assert response.status_code == 409
+        assert os.path.exists(src)
+
+        response = client.post(
+            url,
+            headers=worker_headers,
+            data={"metadata": json.dumps({**metadata, "token": token})},
+        )
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result["handoff"] is True
+        assert not os.path.exists(src)
+        assert os.path.getsize(result["file_path"]) == 50
+        assert db.session.get(Project, test_project).output_filename == "handed.mp4"
+
 
 class TestWorkerUserEndpoints:
     """Test /api/worker/users/* endpoints."""
@@ -471,7 +753,7 @@ class TestWorkerUserEndpoints:
 class TestWorkerAPIClient:
     """Test worker_api.py client library."""
 
-    @patch("app.tasks.worker_api.requests.request")
+    @patch("app.tasks.worker_api.requests.Session.request")
     def test_get_clip_metadata(self, mock_request):
         """worker_api.get_clip_metadata() makes correct API call."""
         from app.tasks import worker_api
@@ -504,7 +786,7 @@ class TestWorkerAPIClient:
             assert result["id"] == 123
             assert result["title"] == "Test Clip"
 
-    @patch("app.tasks.worker_api.requests.request")
+    @patch("app.tasks.worker_api.requests.Session.request")
     def test_create_media_file(self, mock_request):
         """worker_api.create_media_file() sends correct data."""
         from app.tasks import worker_api
@@ -555,3 +837,73 @@ class TestWorkerAPIClient:
         ):
             with pytest.raises(RuntimeError, match="WORKER_API_KEY not configured"):
                 worker_api.get_clip_metadata(123)
+
+    def test_session_is_pooled_per_process(self):
+        """get_session() reuses one session and rebuilds it after a fork."""
+        from app.tasks import worker_api
+
+        session = worker_api.get_session()
+        assert worker_api.get_session() is session
+
+        adapter = session.get_adapter("http://test:5000")
+        retry = adapter.max_retries
+        assert retry.total == 3
+        assert "GET" in retry.allowed_methods
+        assert "POST" not in retry.allowed_methods
+        assert 503 in retry.status_forcelist
+
+        with patch("app.tasks.worker_api.os.getpid", return_value=-1):
+            assert worker_api.get_session() is not session
+
+    @patch("app.tasks.worker_api.requests.Session.request")
+    def test_large_body_is_gzipped(self, mock_request):
+        """Large JSON bodies are sent gzipped; small ones stay plain JSON."""
+        import gzip
+        import json
+
+        from app.tasks import worker_api
+
+        mock_request.return_value = MagicMock(status_code=200)
+        mock_request.return_value.json.return_value = {"status": "appended"}
+        entries = [{"level": "info", "message": "x" * 100} for _ in range(50)]
+
+        with patch.dict(
+            "os.environ",
+            {"FLASK_APP_URL": "http://test:5000", "WORKER_API_KEY": "test-key"},
+        ):
+            worker_api.append_job_logs(1, entries)
+            kwargs = mock_request.call_args.kwargs
+            assert kwargs["headers"]["Content-Encoding"] == "gzip"
+            assert json.loads(gzip.decompress(kwargs["data"])) == {"entries": entries}
+
+            worker_api.append_job_logs(1, entries[:1])
+            kwargs = mock_request.call_args.kwargs
+            assert "Content-Encoding" not in kwargs["headers"]
+            assert kwargs["json"] == {"entries": entries[:1]}
+
+    @patch("app.tasks.worker_api.requests.Session.request")
+    def test_metrics_track_calls(self, mock_request):
+        """get_metrics() reports call counts, errors and latency."""
+        import requests
+
+        from app.tasks import worker_api
+
+        with patch("app.tasks.worker_api.os.getpid", return_value=-2):
+            worker_api.get_session()  # fresh session resets the counters
+            mock_request.side_effect = [
+                MagicMock(status_code=200),
+                requests.ConnectionError("down"),
+            ]
+            with patch.dict(
+                "os.environ",
+                {"FLASK_APP_URL": "http://test:5000", "WORKER_API_KEY": "test-key"},
+            ):
+                worker_api.get_clip_metadata(1)
+                with pytest.raises(requests.ConnectionError):
+                    worker_api.get_clip_metadata(1)
+
+            metrics = worker_api.get_metrics()
+        assert metrics["requests"] == 2
+        assert metrics["errors"] == 1
+        assert metrics["avg_latency_ms"] >= 0
+        assert 0.0 <= metrics["connection_reuse_rate"] <= 1.0
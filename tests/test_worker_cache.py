@@ -0,0 +1,133 @@
+"""
+Tests for the worker media cache (SQLite index + byte-budget LRU).
+"""
+import os
+import time
+
+from app.tasks.worker_cache import WorkerMediaCache, get_worker_cache
+
+
+def _write(cache, name, size):
+    with open(cache.path(name), "wb") as f:
+        f.write(b"x" * size)
+    return name
+
+
+def test_store_get_and_stats(tmp_path):
+    cache = WorkerMediaCache(str(tmp_path / "cache"), max_bytes=1024)
+
+    assert cache.get("media_1.mp4") is None
+    cache.store(_write(cache, "media_1.mp4", 100))
+    assert cache.get("media_1.mp4") == cache.path("media_1.mp4")
+    assert cache.get_stem("media_1") == cache.path("media_1.mp4")
+    assert cache.get_stem("media_") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["size_bytes"] == 100
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["stores"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction_respects_byte_budget(tmp_path):
+    cache = WorkerMediaCache(str(tmp_path / "cache"), max_bytes=250)
+    for i in range(3):
+        cache.store(_write(cache, f"media_{i}.mp4", 100))
+        time.sleep(0.01)
+    # Oldest entry went to make room for the third
+    assert not os.path.exists(cache.path("media_0.mp4"))
+
+    # Touching media_1 makes media_2 the least recently used
+    with open(cache.path("media_2.mp4.etag"), "w") as f:
+        f.write('"v1"')
+    cache.hit("media_1.mp4")
+    cache.store(_write(cache, "media_3.mp4", 100))
+
+    assert os.path.exists(cache.path("media_1.mp4"))
+    assert not os.path.exists(cache.path("media_2.mp4"))
+    assert not os.path.exists(cache.path("media_2.mp4.etag"))
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["size_bytes"] == 200
+
+    # An entry larger than the whole budget is kept for its caller
+    cache.store(_write(cache, "huge.mp4", 500))
+    assert os.path.exists(cache.path("huge.mp4"))
+    assert cache.stats()["entries"] == 1
+
+
+def test_pinned_entries_survive_eviction(tmp_path):
+    """A compile's prefetched input stays until its last clip has rendered."""
+    cache = WorkerMediaCache(str(tmp_path / "cache"), max_bytes=250)
+    cache.store(_write(cache, "media_1.mp4", 100), pin="compile-a", refs=2)
+    time.sleep(0.01)
+
+    # Two later stores over budget evict around the pinned entry
+    cache.store(_write(cache, "media_2.mp4", 100))
+    time.sleep(0.01)
+    cache.store(_write(cache, "media_3.mp4", 100))
+    time.sleep(0.01)
+    cache.store(_write(cache, "media_4.mp4", 100))
+    assert os.path.exists(cache.path("media_1.mp4"))
+    assert not os.path.exists(cache.path("media_2.mp4"))
+    assert cache.stats()["pinned"] == 1
+
+    # Still referenced by a second clip after the first unpin
+    cache.unpin("media_1", "compile-a")
+    cache.store(_write(cache, "media_5.mp4", 100))
+    assert os.path.exists(cache.path("media_1.mp4"))
+
+    cache.unpin("media_1", "compile-a")
+    cache.store(_write(cache, "media_6.mp4", 100))
+    assert not os.path.exists(cache.path("media_1.mp4"))
+    assert cache.stats()["pinned"] == 0
+
+
+def test_release_and_expired_pins(tmp_path, monkeypatch):
+    cache = WorkerMediaCache(str(tmp_path / "cache"), max_bytes=150, pin_hours=1)
+    cache.store(_write(cache, "media_1.mp4", 100), pin="compile-a")
+    cache.hit("media_1.mp4", pin="compile-b")
+    cache.release("compile-a")
+    cache.store(_write(cache, "media_2.mp4", 100))
+    assert os.path.exists(cache.path("media_1.mp4"))
+
+    # compile-b's worker died: its pin lapses after the lease
+    real_time = time.time
+    monkeypatch.setattr("app.tasks.worker_cache.time.time", lambda: real_time() + 7200)
+    cache.store(_write(cache, "media_3.mp4", 100))
+    assert not os.path.exists(cache.path("media_1.mp4"))
+
+
+def test_unindexed_files_adopted_or_swept(tmp_path):
+    root = tmp_path / "cache"
+    root.mkdir()
+    (root / "legacy.mp4").write_bytes(b"x" * 10)
+    stale = root / "media_9.mp4.part"
+    stale.write_bytes(b"x" * 10)
+    old = time.time() - 3 * 3600
+    os.utime(stale, (old, old))
+    fresh = root / "media_8.mp4.part"
+    fresh.write_bytes(b"x")
+
+    cache = WorkerMediaCache(str(root), max_bytes=1024, orphan_hours=1)
+    # Files from before the index existed are adopted on first hit
+    assert cache.get("legacy.mp4") == cache.path("legacy.mp4")
+    cache.store(_write(cache, "media_1.mp4", 10))
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert (root / "legacy.mp4").exists()
+    assert cache.stats()["entries"] == 2
+
+
+def test_get_worker_cache_from_config(tmp_path):
+    config = {
+        "WORKER_CACHE_DIR": str(tmp_path / "wc"),
+        "WORKER_CACHE_MAX_BYTES": "4096",
+    }
+    cache = get_worker_cache(config)
+    assert cache is get_worker_cache(config)
+    assert cache.root == str(tmp_path / "wc")
+    assert cache.max_bytes == 4096